@@ -0,0 +1,190 @@
+"""
+Set-based helpers for creating operator accounts in bulk.
+
+Used by the CSV import paths so that a large roster costs a handful of
+queries instead of several per row.
+"""
+import secrets
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, UNUSABLE_PASSWORD_SUFFIX_LENGTH
+from django.db import IntegrityError, transaction
+
+from common.csv_import import PhaseTimer
+from notifications.outbox import enqueue_messages
+from operators.models import OperatorProfile
+from .utils import generate_operator_username, is_valid_indian_mobile, normalize_mobile
+
+BULK_BATCH_SIZE = 1000
+
+
+def generate_unique_operator_usernames(mobiles, max_rounds: int = 5) -> dict:
+    """
+    Returns {mobile: username} with usernames that are unique against the
+    database and against each other. Collisions are re-rolled in rounds, each
+    round costing one IN query per BULK_BATCH_SIZE candidates.
+    """
+    User = get_user_model()
+    result = {}
+    pending = list(dict.fromkeys(mobiles))
+
+    for _ in range(max_rounds):
+        if not pending:
+            break
+        candidates = {m: generate_operator_username(m) for m in pending}
+        names = list(candidates.values())
+        taken = set()
+        for i in range(0, len(names), BULK_BATCH_SIZE):
+            taken.update(
+                User.objects.filter(username__in=names[i:i + BULK_BATCH_SIZE]).values_list('username', flat=True)
+            )
+        taken.update(result.values())
+
+        retry = []
+        for mobile, username in candidates.items():
+            if username in taken:
+                retry.append(mobile)
+            else:
+                result[mobile] = username
+                taken.add(username)
+        pending = retry
+
+    if pending:
+        raise ValueError(f"Could not generate unique usernames for {len(pending)} mobiles")
+    return result
+
+
+def unusable_password() -> str:
+    """
+    What make_password(None) returns. token_hex draws the random suffix in
+    one call, where get_random_string picks it a character at a time.
+    """
+    return UNUSABLE_PASSWORD_PREFIX + secrets.token_hex(UNUSABLE_PASSWORD_SUFFIX_LENGTH // 2)
+
+
+def bulk_create_operators(entries, status: str = "REQUESTED", batch_size: int = BULK_BATCH_SIZE) -> dict:
+    """
+    Creates operator users (with unusable passwords) and their profiles.
+
+    Args:
+        entries: iterable of (mobile_10, name) tuples. Mobiles must be unique.
+        status: initial AppUser status.
+
+    Returns:
+        dict: {mobile: AppUser} for the created users.
+
+    Note: bulk_create bypasses AppUser.save() and the post_save profile signal,
+    so full_name and OperatorProfile are populated here explicitly.
+    """
+    User = get_user_model()
+    entries = list(entries)
+    if not entries:
+        return {}
+
+    usernames = generate_unique_operator_usernames([m for m, _ in entries])
+
+    users = []
+    for mobile, name in entries:
+        name = (name or "").strip() or None
+        users.append(User(
+            username=usernames[mobile].strip().lower(),
+            password=unusable_password(),
+            user_type="OPERATOR",
+            status=status,
+            is_active=status not in ["BLACKLIST", "INACTIVE", "REJECTED"],
+            mobile_primary=mobile,
+            first_name=name,
+            full_name=name,
+        ))
+
+    created = User.objects.bulk_create(users, batch_size=batch_size)
+    OperatorProfile.objects.bulk_create(
+        [OperatorProfile(user=u) for u in created],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    return {u.mobile_primary: u for u in created}
+
+
+def existing_mobiles(mobiles) -> set:
+    """The subset of `mobiles` some user already has as mobile_primary."""
+    User = get_user_model()
+    mobiles = list(mobiles)
+    found = set()
+    for i in range(0, len(mobiles), BULK_BATCH_SIZE):
+        found.update(
+            User.objects.filter(mobile_primary__in=mobiles[i:i + BULK_BATCH_SIZE]).values_list('mobile_primary', flat=True)
+        )
+    return found
+
+
+def onboard_operators(rows) -> dict:
+    """
+    Requests operator accounts for `rows` ({"mobile", "name"} dicts), as
+    AppUserViewSet.bulk_request_operator did one row at a time: invalid
+    mobiles are errors, mobiles that already belong to a user (or appear
+    earlier in the file) are skipped, and every new operator gets a
+    REQUESTED account, a profile and a queued ONBOARDING WhatsApp.
+
+    The outbox rows are written in the same transaction as the users, so
+    the worker only sends them once the accounts have committed. If the
+    batch insert hits a constraint (a username taken concurrently), rows
+    are retried one savepoint each and only the failing rows become errors.
+
+    Returns {"created": [...], "skipped": [...], "errors": [...]} in the
+    per-row shape plus "timings" (per-phase milliseconds).
+    """
+    timer = PhaseTimer()
+    results = {"created": [], "skipped": [], "errors": []}
+
+    with timer.phase('parse'):
+        valid = []
+        for row in rows:
+            m = row.get('mobile')
+            mobile_10 = normalize_mobile(str(m))
+            if not is_valid_indian_mobile(mobile_10):
+                results["errors"].append({"mobile": m, "reason": "Invalid Indian mobile number."})
+                continue
+            valid.append((m, mobile_10, (row.get('name') or '').strip()))
+
+    with timer.phase('resolve'):
+        taken = existing_mobiles({mobile_10 for _, mobile_10, _ in valid})
+
+    entries = []
+    given = {}
+    for m, mobile_10, name in valid:
+        if mobile_10 in taken:
+            results["skipped"].append({"mobile": m, "reason": "User already exists."})
+            continue
+        taken.add(mobile_10)
+        given[mobile_10] = m
+        entries.append((mobile_10, name))
+
+    with transaction.atomic():
+        with timer.phase('users'):
+            try:
+                with transaction.atomic():
+                    created = bulk_create_operators(entries)
+            except IntegrityError:
+                # Another request took one of the usernames since they were
+                # checked; retry row by row so only the clashing rows fail
+                created = {}
+                for entry in entries:
+                    try:
+                        with transaction.atomic():
+                            created.update(bulk_create_operators([entry]))
+                    except IntegrityError as e:
+                        results["errors"].append({"mobile": given[entry[0]], "reason": str(e)})
+            entries = [(mobile_10, name) for mobile_10, name in entries if mobile_10 in created]
+        with timer.phase('messages'):
+            enqueue_messages(
+                {
+                    'kind': 'ONBOARDING', 'mobile': mobile_10, 'params': {'name': name},
+                    'dedupe_key': f"onboarding:{created[mobile_10].uid}",
+                }
+                for mobile_10, name in entries
+            )
+
+    results["created"] = [{"mobile": mobile_10, "username": created[mobile_10].username} for mobile_10, _ in entries]
+    results["timings"] = timer.timings
+    return results
@@ -0,0 +1,143 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.bulk import onboard_operators
+from accounts.utils import generate_operator_username, is_valid_indian_mobile, normalize_mobile
+from common.benchmarking import QueryCounter, rollback_fixture
+from notifications.models import OutboundMessage
+from notifications.outbox import enqueue_message
+from operators.models import OperatorProfile
+
+
+def legacy_onboard(rows):
+    """The previous per-row bulk_request_operator loop, kept for comparison."""
+    User = get_user_model()
+    results = {"created": [], "skipped": [], "errors": []}
+    with transaction.atomic():
+        for row in rows:
+            m = row.get('mobile')
+            name = row.get('name', '').strip()
+            mobile_10 = normalize_mobile(str(m))
+            if not is_valid_indian_mobile(mobile_10):
+                results["errors"].append({"mobile": m, "reason": "Invalid Indian mobile number."})
+                continue
+            if User.objects.filter(mobile_primary=mobile_10).exists():
+                results["skipped"].append({"mobile": m, "reason": "User already exists."})
+                continue
+            username = generate_operator_username(mobile_10)
+            for _ in range(5):
+                if not User.objects.filter(username=username).exists():
+                    break
+                username = generate_operator_username(mobile_10)
+            user = User.objects.create_user(
+                username=username, password=None, user_type="OPERATOR", status="REQUESTED", mobile_primary=mobile_10,
+            )
+            if name:
+                user.first_name = name
+            user.set_unusable_password()
+            user.save(update_fields=["password", "first_name", "full_name"])
+            OperatorProfile.objects.get_or_create(user=user)
+            enqueue_message("ONBOARDING", mobile_10, {"name": name}, dedupe_key=f"onboarding:{user.uid}")
+            results["created"].append({"mobile": mobile_10, "username": username})
+    return results
+
+
+def build_rows(count, existing, rng):
+    """
+    `count` roster rows: about 2% invalid mobiles, 3% repeats of an earlier
+    row and, when `existing` is given, 5% mobiles that already have an account.
+    """
+    rows = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.02:
+            mobile = f"12345{i:05d}"
+        elif kind < 0.05 and rows:
+            mobile = rng.choice(rows)["mobile"]
+        elif kind < 0.10 and existing:
+            mobile = rng.choice(existing)
+        else:
+            mobile = f"+91 9{i:09d}"
+        rows.append({"mobile": mobile, "name": f"Operator {i}" if rng.random() < 0.8 else ""})
+    return rows
+
+
+def snapshot(mobiles, results):
+    """What an onboarding run left behind; usernames are random, so only their shape is compared."""
+    User = get_user_model()
+    users = sorted(
+        (u.mobile_primary, u.first_name, u.full_name, u.status, u.user_type, u.is_active, u.has_usable_password(),
+         u.username.startswith(f"op_{u.mobile_primary[-6:]}_"))
+        for u in User.objects.filter(mobile_primary__in=mobiles, user_type="OPERATOR")
+    )
+    profiles = OperatorProfile.objects.filter(user__mobile_primary__in=mobiles).count()
+    messages = sorted(
+        OutboundMessage.objects.filter(kind="ONBOARDING", mobile__in=mobiles).values_list('mobile', 'params', 'priority')
+    )
+    report = (
+        [r["mobile"] for r in results["created"]],
+        results["skipped"],
+        results["errors"],
+    )
+    return users, profiles, [(m, sorted(p.items()), pr) for m, p, pr in messages], report
+
+
+class Command(BaseCommand):
+    help = "Benchmarks AppUserViewSet.bulk_request_operator: per-row create_user vs set-based onboarding"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operators", type=int, default=50000, help="Roster rows for the set-based run")
+        parser.add_argument(
+            "--legacy-limit", type=int, default=1000,
+            help="Run the per-row loop on the first N rows only and compare the resulting data",
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        rng = random.Random(23)
+        with rollback_fixture():
+            existing = [f"8{i:09d}" for i in range(200)]
+            User.objects.bulk_create(
+                [User(username=f"bench_onb_{m}", user_type="OPERATOR", mobile_primary=m) for m in existing]
+            )
+            rows = build_rows(options["operators"], existing, rng)
+            subset = rows[:options["legacy_limit"]]
+            mobiles = {normalize_mobile(str(r["mobile"])) for r in rows}
+
+            with rollback_fixture(), QueryCounter() as counter:
+                start = time.perf_counter()
+                legacy_results = legacy_onboard(subset)
+                legacy_s = time.perf_counter() - start
+                legacy_queries = counter.count
+                legacy = snapshot(mobiles, legacy_results)
+            with rollback_fixture(), QueryCounter() as counter:
+                start = time.perf_counter()
+                batched_results = onboard_operators(subset)
+                batched_s = time.perf_counter() - start
+                batched_queries = counter.count
+                batched = snapshot(mobiles, batched_results)
+
+            if legacy != batched:
+                for name, a, b in zip(("users", "profiles", "messages", "report"), legacy, batched):
+                    if a != b:
+                        self.stderr.write(self.style.ERROR(f"{name} differ after onboarding {len(subset)} rows"))
+                return
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(subset)} rows: identical users, profiles, messages and report; "
+                f"per-row={legacy_s:.2f}s/{legacy_queries} queries, set-based={batched_s:.3f}s/{batched_queries} queries"
+            ))
+
+            with QueryCounter() as counter:
+                start = time.perf_counter()
+                results = onboard_operators(rows)
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{len(rows)} rows: set-based {elapsed:.2f}s, {counter.count} queries "
+                f"(created={len(results['created'])} skipped={len(results['skipped'])} "
+                f"errors={len(results['errors'])}), phases {results['timings']} "
+                f"(per-row extrapolated ~{legacy_s * len(rows) / max(1, len(subset)):.0f}s)"
+            )
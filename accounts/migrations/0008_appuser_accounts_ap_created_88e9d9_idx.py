@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_alter_appuser_mobile_primary_alter_otpsession_mobile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appuser',
+            index=models.Index(fields=['created_at', 'id'], name='accounts_ap_created_88e9d9_idx'),
+        ),
+    ]
@@ -99,6 +99,12 @@ class AppUser(AbstractBaseUser, PermissionsMixin, TimeStampModel):
     USERNAME_FIELD = "username"
     REQUIRED_FIELDS = []
 
+    class Meta:
+        indexes = [
+            # Keyset pagination (common.pagination)
+            models.Index(fields=['created_at', 'id']),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.user_type})"
 
@@ -1,3 +1,92 @@
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from notifications.models import OutboundMessage
+from notifications.outbox import claim_batch, deliver
+from notifications.tests import OtpOutboxTests
+from operators.models import OperatorProfile
+from .bulk import onboard_operators
+from .models import AppUser
+
+
+class OnboardOperatorsTests(TestCase):
+    def test_duplicate_and_existing_mobiles_are_skipped(self):
+        AppUser.objects.create(username='existing', user_type='OPERATOR', mobile_primary='9000000001')
+        results = onboard_operators([
+            {'mobile': '9000000001', 'name': 'Already Here'},
+            {'mobile': '9000000002', 'name': 'Asha'},
+            {'mobile': '+91 9000000002', 'name': 'Asha Again'},
+            {'mobile': '12345', 'name': 'Bad'},
+            {'mobile': '9000000003', 'name': ''},
+        ])
+        self.assertEqual([row['mobile'] for row in results['created']], ['9000000002', '9000000003'])
+        self.assertEqual(
+            [(row['mobile'], row['reason']) for row in results['skipped']],
+            [('9000000001', 'User already exists.'), ('+91 9000000002', 'User already exists.')],
+        )
+        self.assertEqual([row['mobile'] for row in results['errors']], ['12345'])
+        user = AppUser.objects.get(mobile_primary='9000000002')
+        self.assertEqual((user.status, user.full_name, user.has_usable_password()), ('REQUESTED', 'Asha', False))
+        self.assertTrue(OperatorProfile.objects.filter(user=user).exists())
+        self.assertEqual(
+            sorted(OutboundMessage.objects.filter(kind='ONBOARDING').values_list('mobile', 'dedupe_key')),
+            sorted((u.mobile_primary, f'onboarding:{u.uid}')
+                   for u in AppUser.objects.exclude(username='existing')),
+        )
+
+    def test_username_taken_concurrently_fails_only_that_row(self):
+        AppUser.objects.create(username='taken', user_type='OPERATOR', mobile_primary='9000000009')
+
+        def usernames(mobiles):
+            return {m: 'taken' if m == '9000000002' else f'op{m}' for m in mobiles}
+
+        with mock.patch('accounts.bulk.generate_unique_operator_usernames', side_effect=usernames):
+            results = onboard_operators([
+                {'mobile': '9000000001', 'name': 'One'},
+                {'mobile': '9000000002', 'name': 'Two'},
+                {'mobile': '9000000003', 'name': 'Three'},
+            ])
+        self.assertEqual([row['mobile'] for row in results['created']], ['9000000001', '9000000003'])
+        self.assertEqual([row['mobile'] for row in results['errors']], ['9000000002'])
+        self.assertFalse(AppUser.objects.filter(mobile_primary='9000000002').exists())
+        self.assertEqual(
+            sorted(OutboundMessage.objects.values_list('mobile', flat=True)), ['9000000001', '9000000003'],
+        )
+
+    def test_outbox_rows_share_the_users_transaction(self):
+        with mock.patch('accounts.bulk.enqueue_messages', side_effect=RuntimeError('outbox down')):
+            with self.assertRaises(RuntimeError):
+                onboard_operators([{'mobile': '9000000001', 'name': 'One'}])
+        self.assertFalse(AppUser.objects.filter(mobile_primary='9000000001').exists())
+
+
+class OtpLoginTests(TestCase):
+    """The OTP reaches the operator only through the outbox worker (run_outbox)."""
+
+    start_authkey = OtpOutboxTests.start_authkey
+
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+
+    def test_otp_login_through_the_outbox(self):
+        server = self.start_authkey()
+        response = self.api.post('/api/identity/operator/otp/request/', {'mobile': '9000000001'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['provider_response']['status'], 'queued')
+        # Nothing is sent until the worker delivers the queued row
+        self.assertEqual(server.calls, [])
+
+        [message] = claim_batch(10)
+        self.assertEqual(deliver(message), 'SENT')
+        [call] = server.calls
+        self.assertEqual(call['mobile'], '9000000001')
 
-# Create your tests here.
+        response = self.api.post('/api/identity/operator/otp/verify/', {
+            'otp_session_uid': response.data['otp_session_uid'], 'otp': call['otp'],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data['tokens'])
@@ -1,6 +1,17 @@
 import requests
 from django.conf import settings
 
+from common.http import get_session
+
+
+def _authkey_get(params: dict) -> requests.Response:
+    """GET against the AuthKey request API over the shared keep-alive session."""
+    return get_session("authkey").get(
+        settings.AUTHKEY_BASE_URL,
+        params=params,
+        timeout=getattr(settings, "AUTHKEY_TIMEOUT_SECONDS", 10),
+    )
+
 def send_authkey_otp(mobile: str, otp: str) -> dict:
     """
     Sends OTP using AuthKey API.
@@ -12,9 +23,6 @@ def send_authkey_otp(mobile: str, otp: str) -> dict:
     Returns:
         dict: The JSON response from AuthKey or error details.
     """
-    
-    base_url = "https://api.authkey.io/request"
-    
     params = {
         "authkey": settings.AUTHKEY_API_KEY,
         "mobile": mobile,
@@ -29,7 +37,7 @@ def send_authkey_otp(mobile: str, otp: str) -> dict:
     }
 
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = _authkey_get(params)
         response.raise_for_status()
         return response.json()
     except requests.RequestException as e:
@@ -41,8 +49,6 @@ def send_onboarding_request_whatsapp(mobile: str, name: str) -> dict:
     """
     Sends Onboarding Request via WhatsApp using AuthKey.
     """
-    base_url = "https://api.authkey.io/request"
-    
     # Clean name default
     if not name:
         name = "Operator"
@@ -57,9 +63,11 @@ def send_onboarding_request_whatsapp(mobile: str, name: str) -> dict:
     }
 
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = _authkey_get(params)
         # response.raise_for_status() # AuthKey sometimes returns 200 with error msg, so strict raise might be overkill but good for debug
         print(f"AuthKey WhatsApp Response: {response.text}")
+        if response.status_code >= 500:
+            return {"status": "error", "message": f"AuthKey error {response.status_code}"}
         return response.json()
     except Exception as e:
         print(f"AuthKey WhatsApp Request Failed: {e}")
@@ -71,8 +79,6 @@ def send_assignment_notification_whatsapp(mobile: str, role: str) -> dict:
     Template ID (wid): 9718
     Variable {1}: Role
     """
-    base_url = "https://api.authkey.io/request"
-    
     params = {
         "authkey": settings.AUTHKEY_API_KEY,
         "mobile": mobile,
@@ -82,8 +88,10 @@ def send_assignment_notification_whatsapp(mobile: str, role: str) -> dict:
     }
 
     try:
-        response = requests.get(base_url, params=params, timeout=10)
+        response = _authkey_get(params)
         print(f"AuthKey Assignment Notification Response: {response.text}")
+        if response.status_code >= 500:
+            return {"status": "error", "message": f"AuthKey error {response.status_code}"}
         return response.json()
     except Exception as e:
         print(f"AuthKey Assignment Notification Failed: {e}")
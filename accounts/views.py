@@ -16,7 +16,9 @@ from rest_framework.decorators import action
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from notifications.outbox import enqueue_message
 from operators.models import OperatorProfile
+from .bulk import onboard_operators
 from .models import OtpSession
 from .permissions import IsInternalAdmin
 from .serializers import (
@@ -133,9 +135,12 @@ class OperatorOtpRequestView(APIView):
             expires_at=OtpSession.default_expiry(),
         )
 
-        # Call AuthKey API
-        from .utils import send_authkey_otp
-        api_resp = send_authkey_otp(mobile, otp)
+        # Queue for AuthKey delivery (run_outbox worker)
+        msg = enqueue_message(
+            "OTP", mobile, {"otp": otp, "expires_at": sess.expires_at.isoformat()},
+            dedupe_key=f"otp:{sess.uid}",
+        )
+        api_resp = {"status": "queued", "message_uid": str(msg.uid)}
 
         print(f"[DEV OTP] mobile={mobile} otp={otp} session={sess.uid} authkey_resp={api_resp}")
 
@@ -219,12 +224,7 @@ class OperatorOtpVerifyView(APIView):
 
 from rest_framework import viewsets, filters 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
-
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 1000
+from common.pagination import StandardResultsSetPagination
 
 class AppUserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
@@ -318,12 +318,8 @@ class AppUserViewSet(viewsets.ModelViewSet):
                 # Create profile
                 OperatorProfile.objects.get_or_create(user=user)
                 
-                # Send Onboarding Message
-                from .utils import send_onboarding_request_whatsapp
-                try:
-                    send_onboarding_request_whatsapp(mobile_10, name)
-                except Exception as e:
-                    print(f"Failed to send WhatsApp to {mobile_10}: {e}")
+                # Queue Onboarding Message (delivered after commit)
+                enqueue_message("ONBOARDING", mobile_10, {"name": name}, dedupe_key=f"onboarding:{user.uid}")
                 
                 return Response({
                     "detail": "Operator request created successfully.",
@@ -380,61 +376,7 @@ class AppUserViewSet(viewsets.ModelViewSet):
         if not rows:
             return Response({"detail": "No valid data found."}, status=status.HTTP_400_BAD_REQUEST)
 
-        results = {
-            "created": [],
-            "skipped": [],
-            "errors": []
-        }
-
-        from .utils import send_onboarding_request_whatsapp
-
-        with transaction.atomic():
-            for row in rows:
-                m = row.get('mobile')
-                name = row.get('name', '').strip()
-
-                mobile_10 = normalize_mobile(str(m))
-                if not is_valid_indian_mobile(mobile_10):
-                    results["errors"].append({"mobile": m, "reason": "Invalid Indian mobile number."})
-                    continue
-                
-                if User.objects.filter(mobile_primary=mobile_10).exists():
-                    results["skipped"].append({"mobile": m, "reason": "User already exists."})
-                    continue
-                
-                try:
-                    username = generate_operator_username(mobile_10)
-                    for _ in range(5):
-                        if not User.objects.filter(username=username).exists():
-                            break
-                        username = generate_operator_username(mobile_10)
-
-                    user = User.objects.create_user(
-                        username=username,
-                        password=None,
-                        user_type="OPERATOR",
-                        status="REQUESTED",
-                        mobile_primary=mobile_10,
-                    )
-                    if name:
-                        user.first_name = name
-
-                    user.set_unusable_password()
-                    # We must include 'full_name' because the model's save() method updates it based on first_name
-                    user.save(update_fields=["password", "first_name", "full_name"])
-                    
-                    OperatorProfile.objects.get_or_create(user=user)
-                    
-                    # Send WhatsApp
-                    try:
-                        send_onboarding_request_whatsapp(mobile_10, name)
-                    except:
-                        pass # Don't fail the batch
-
-                    results["created"].append({"mobile": mobile_10, "username": username})
-                except Exception as e:
-                    results["errors"].append({"mobile": m, "reason": str(e)})
-
+        results = onboard_operators(rows)
         return Response(results, status=status.HTTP_200_OK)
 
 class BlacklistTokenView(APIView):
@@ -0,0 +1,203 @@
+"""
+Set-based CSV import for operator assignments.
+
+The whole file is parsed up front, then mobiles, roles and existing
+assignments are resolved with a few IN queries and everything is written
+with bulk_create / bulk_update. Side effects that the per-row path got from
+post_save signals (in-app notification, AssignmentTask rows) are applied in
+bulk here, and WhatsApp messages go through the outbox so they are only
+delivered once the import has committed.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.bulk import bulk_create_operators
+from accounts.utils import normalize_mobile, is_valid_indian_mobile
+from common.csv_import import PhaseTimer
+from common.reference_cache import roles_by_name
+from events.emit import assignments_changed
+from notifications.models import Notification
+from notifications.outbox import enqueue_messages
+from notifications.service import create_notifications
+from operations.models import ShiftCenterTask
+from operations.stats import StatsDelta, apply_deltas
+from reports.cache import invalidate_summary_cache
+from .models import OperatorAssignment, AssignmentTask
+
+BATCH_SIZE = 1000
+
+# Statuses for which create_assignment_tasks materializes tasks
+TASK_STATUSES = ['PENDING', 'CONFIRMED', 'CHECK_IN', 'ACTIVE']
+
+
+def import_assignments(shift_center, raw_rows):
+    """
+    Creates or updates assignments for `shift_center` from parsed CSV rows.
+
+    Returns the same report as the per-row importer
+    ({"created": [...], "updated": [...], "errors": [...]}) plus a
+    "timings" dict with per-phase milliseconds.
+    """
+    User = get_user_model()
+    timer = PhaseTimer()
+    results = {"created": [], "updated": [], "errors": []}
+
+    # 1. Validate rows (no queries)
+    with timer.phase('parse'):
+        valid = []
+        for row in raw_rows:
+            data = {k: (v.strip() if v else None) for k, v in row.items()}
+
+            mobile_raw = data.get('operator_mobile')
+            role_name = data.get('role_name')
+            if not mobile_raw or not role_name:
+                results["errors"].append({"row": row, "error": "Missing mobile or role_name"})
+                continue
+
+            mobile = normalize_mobile(mobile_raw)
+            if not is_valid_indian_mobile(mobile):
+                results["errors"].append({"row": row, "error": f"Invalid mobile: {mobile_raw}"})
+                continue
+
+            valid.append((row, data, mobile))
+
+    # 2. Resolve roles, operators and existing assignments with IN queries
+    with timer.phase('resolve'):
+        roles = roles_by_name()
+
+        # Last row for a mobile wins, matching sequential update_or_create
+        entries = {}
+        order = []
+        for row, data, mobile in valid:
+            role = roles.get(data['role_name'].lower())
+            if not role:
+                results["errors"].append({"row": row, "error": f"Role '{data['role_name']}' not found"})
+                continue
+            if mobile not in entries:
+                order.append(mobile)
+            entries.setdefault(mobile, []).append((data, role))
+
+        operators = {}
+        for user in User.objects.filter(mobile_primary__in=order, user_type='OPERATOR').order_by('pk'):
+            operators.setdefault(user.mobile_primary, user)
+
+        existing = {
+            a.operator_id: a
+            for a in OperatorAssignment.objects.filter(
+                shift_center=shift_center,
+                operator__in=list(operators.values()),
+            )
+        }
+
+    onboarding = []
+
+    with transaction.atomic():
+        # 3. Create missing operators
+        with timer.phase('users'):
+            new_entries = []
+            for mobile in order:
+                if mobile not in operators:
+                    name = (entries[mobile][0][0].get('operator_name') or '').strip()
+                    new_entries.append((mobile, name))
+            operators.update(bulk_create_operators(new_entries))
+            onboarding = new_entries
+
+        # 4. Create / update assignments
+        with timer.phase('assignments'):
+            now = timezone.now()
+            to_create = []
+            to_update = []
+            # (assignment, previous status or None) for the live events feed
+            changes = []
+            stats = StatsDelta()
+            for mobile in order:
+                operator = operators[mobile]
+                data, role = entries[mobile][-1]
+                fields = {
+                    'role': role,
+                    'assignment_type': 'PRIMARY' if data.get('is_primary') == '1' else 'BUFFER',
+                    'remarks': data.get('notes'),
+                    'status': 'PENDING',
+                }
+
+                assignment = existing.get(operator.pk)
+                if assignment:
+                    stats.move(shift_center.pk, assignment.status, fields['status'])
+                    if assignment.status != fields['status']:
+                        changes.append((assignment, assignment.status))
+                    for key, value in fields.items():
+                        setattr(assignment, key, value)
+                    assignment.updated_at = now
+                    to_update.append(assignment)
+                    results["updated"].append(operator.username)
+                else:
+                    to_create.append(OperatorAssignment(shift_center=shift_center, operator=operator, **fields))
+                    stats.add(shift_center.pk, fields['status'])
+                    results["created"].append(operator.username)
+
+                # Repeated rows for the same mobile were sequential updates
+                results["updated"].extend([operator.username] * (len(entries[mobile]) - 1))
+
+            created = OperatorAssignment.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+            OperatorAssignment.objects.bulk_update(
+                to_update,
+                ['role', 'assignment_type', 'remarks', 'status', 'updated_at'],
+                batch_size=BATCH_SIZE,
+            )
+            # bulk writes skip the post_save counter and events hooks
+            apply_deltas(stats)
+            assignments_changed(changes + [(a, None) for a in created])
+
+        # 5. Materialize AssignmentTasks (create_assignment_tasks signal equivalent)
+        with timer.phase('tasks'):
+            touched = created + to_update
+            role_ids = {a.role_id for a in touched}
+            templates = {}
+            for t in ShiftCenterTask.objects.filter(shift_center=shift_center, role_id__in=role_ids):
+                templates.setdefault(t.role_id, []).append(t)
+
+            have = set(
+                AssignmentTask.objects.filter(assignment__in=to_update).values_list('assignment_id', 'shift_center_task_id')
+            )
+            tasks = [
+                AssignmentTask(assignment=a, shift_center_task=t, status='PENDING')
+                for a in touched
+                if a.status in TASK_STATUSES
+                for t in templates.get(a.role_id, [])
+                if (a.pk, t.pk) not in have
+            ]
+            AssignmentTask.objects.bulk_create(tasks, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+        # 6. In-app notifications (notify_operator signal equivalent)
+        with timer.phase('notifications'):
+            exam_name = shift_center.exam.name
+            create_notifications([
+                Notification(
+                    user=a.operator,
+                    title="New Duty Assigned",
+                    message=f"You have been assigned to {exam_name} as {a.role.name}.",
+                    notification_type='ASSIGNMENT',
+                )
+                for a in created
+            ])
+
+        # 7. WhatsApp via the outbox (invisible to the worker until commit)
+        with timer.phase('messages'):
+            enqueue_messages(
+                [
+                    {'kind': 'ONBOARDING', 'mobile': mobile, 'params': {'name': name},
+                     'dedupe_key': f"onboarding:{operators[mobile].uid}"}
+                    for mobile, name in onboarding
+                ] + [
+                    {'kind': 'ASSIGNMENT', 'mobile': a.operator.mobile_primary, 'params': {'role': a.role.name},
+                     'dedupe_key': f"assignment:{a.uid}"}
+                    for a in created
+                ]
+            )
+
+        # bulk writes skip the post_save hooks that normally do this
+        transaction.on_commit(invalidate_summary_cache)
+
+    results["timings"] = timer.timings
+    return results
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from assignments.models import OperatorAssignment
+from assignments.views import OperatorAssignmentViewSet
+from common.benchmarking import format_row, measure, rollback_fixture
+from common.pagination import KeysetPagination
+from common.synthetic import seed_exam
+
+PATH = "/api/assignments/"
+
+
+def list_page(view, user, params):
+    # next/previous links are absolute, so the request needs an allowed host
+    host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost").lstrip(".")
+
+    def run():
+        request = APIRequestFactory().get(PATH, params, HTTP_HOST=host)
+        force_authenticate(request, user=user)
+        response = view(request)
+        assert response.status_code == 200, response.data
+        return response
+    return run
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the assignment list at shallow and deep pages: page numbers (OFFSET + COUNT) vs keyset cursor"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=2000)
+        parser.add_argument("--operators-per-center", type=int, default=10)
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--iterations", type=int, default=20)
+
+    def handle(self, *args, **options):
+        user = get_user_model()(username="bench_pagination", user_type="INTERNAL_ADMIN", is_superuser=True)
+        view = OperatorAssignmentViewSet.as_view({"get": "list"})
+        page_size = options["page_size"]
+        keyset = KeysetPagination()
+
+        with rollback_fixture():
+            seeded = seed_exam(
+                centers=options["centers"], operators_per_center=options["operators_per_center"],
+                incidents_per_center=0,
+            )
+            total = OperatorAssignment.objects.count()
+            self.stdout.write(f"Seeded {seeded['assignments']} assignments ({total} in the table)")
+
+            last_page = max(1, -(-total // page_size))
+            ordered = OperatorAssignment.objects.order_by(*OperatorAssignmentViewSet.keyset_ordering)
+            for label, page in [("first", 1), ("middle", last_page // 2 or 1), ("last", last_page)]:
+                numbered = measure(
+                    list_page(view, user, {"page": page, "page_size": page_size}), iterations=options["iterations"]
+                )
+                cursor = ""
+                if page > 1:
+                    # The cursor a client walking from page 1 would hold at this page
+                    row = ordered.values_list("assigned_at", "id")[(page - 1) * page_size - 1]
+                    cursor = keyset.encode_cursor(row)
+                cursored = measure(
+                    list_page(view, user, {"cursor": cursor, "page_size": page_size}), iterations=options["iterations"]
+                )
+                self.stdout.write(format_row(f"page {page} ({label}) numbered", numbered))
+                self.stdout.write(format_row(f"page {page} ({label}) keyset", cursored))
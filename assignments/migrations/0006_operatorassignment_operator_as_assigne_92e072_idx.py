@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0005_assignmenttaskevidence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operatorassignment',
+            index=models.Index(fields=['assigned_at', 'id'], name='operator_as_assigne_92e072_idx'),
+        ),
+    ]
@@ -52,6 +52,8 @@ class OperatorAssignment(TimeStampedUUIDModel):
             models.Index(fields=['operator', 'status']),
             models.Index(fields=['shift_center']),
             models.Index(fields=['status', 'assigned_at']),
+            # Keyset pagination (common.pagination)
+            models.Index(fields=['assigned_at', 'id']),
         ]
         ordering = ['-assigned_at']
     
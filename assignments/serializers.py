@@ -1,8 +1,26 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import OuterRef, Subquery
 from .models import OperatorAssignment, AssignmentTask, AssignmentTaskEvidence
-from operations.models import ShiftCenter
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter
 from masters.models import RoleMaster
+from attendance.models import AttendanceLog
+
+
+def annotate_attendance_times(queryset):
+    """
+    Adds `check_in_at` (first CHECK_IN) and `check_out_at` (last CHECK_OUT) as
+    correlated subqueries, replacing two attendance_logs queries per row.
+    """
+    logs = AttendanceLog.objects.filter(assignment=OuterRef('pk'))
+    return queryset.annotate(
+        check_in_at=Subquery(
+            logs.filter(activity_type='CHECK_IN').order_by('timestamp').values('timestamp')[:1]
+        ),
+        check_out_at=Subquery(
+            logs.filter(activity_type='CHECK_OUT').order_by('-timestamp').values('timestamp')[:1]
+        ),
+    )
 
 class AssignmentTaskEvidenceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,14 +51,97 @@ class OperatorAssignmentSerializer(serializers.ModelSerializer):
         read_only_fields = ('uid', 'created_at', 'updated_at', 'assigned_at')
         depth = 3
 
+    # Querysets from annotate_attendance_times() already carry the values
     def get_check_in_at(self, obj):
+        if hasattr(obj, 'check_in_at'):
+            return obj.check_in_at
         log = obj.attendance_logs.filter(activity_type='CHECK_IN').order_by('timestamp').first()
         return log.timestamp if log else None
 
     def get_check_out_at(self, obj):
+        if hasattr(obj, 'check_out_at'):
+            return obj.check_out_at
         log = obj.attendance_logs.filter(activity_type='CHECK_OUT').order_by('-timestamp').first()
         return log.timestamp if log else None
 
+
+class AssignmentOperatorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = ('uid', 'username', 'full_name', 'mobile_primary')
+
+
+class AssignmentRoleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RoleMaster
+        fields = ('uid', 'code', 'name')
+
+
+class AssignmentExamSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Exam
+        fields = ('uid', 'exam_code', 'name')
+
+
+class AssignmentExamCenterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExamCenter
+        fields = ('uid', 'client_center_code', 'client_center_name')
+
+
+class AssignmentShiftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Shift
+        fields = ('uid', 'shift_code', 'work_date', 'start_time', 'end_time')
+
+
+class AssignmentShiftCenterSerializer(serializers.ModelSerializer):
+    """The slice of the shift center the web duty cards read (OperatorList.vue)."""
+    exam = AssignmentExamSerializer(read_only=True)
+    exam_center = AssignmentExamCenterSerializer(read_only=True)
+    shift = AssignmentShiftSerializer(read_only=True)
+
+    class Meta:
+        model = ShiftCenter
+        fields = ('uid', 'exam', 'exam_center', 'shift')
+
+
+class OperatorAssignmentListSerializer(serializers.ModelSerializer):
+    """
+    Explicit, shallow representation for list/export. Expects the queryset
+    from OperatorAssignmentViewSet.get_queryset (select_related, prefetched
+    tasks and annotate_attendance_times), so a page costs a fixed number of
+    queries regardless of its size.
+    """
+    operator = AssignmentOperatorSerializer(read_only=True)
+    role = AssignmentRoleSerializer(read_only=True)
+    tasks = AssignmentTaskSerializer(many=True, read_only=True)
+
+    shift_center = AssignmentShiftCenterSerializer(read_only=True)
+    operator_name = serializers.SerializerMethodField()
+    role_name = serializers.ReadOnlyField(source='role.name')
+    exam_name = serializers.ReadOnlyField(source='shift_center.exam.name')
+    shift_name = serializers.ReadOnlyField(source='shift_center.shift.shift_code')
+    work_date = serializers.ReadOnlyField(source='shift_center.shift.work_date')
+    center_code = serializers.ReadOnlyField(source='shift_center.exam_center.client_center_code')
+    center_name = serializers.ReadOnlyField(source='shift_center.exam_center.client_center_name')
+
+    check_in_at = serializers.DateTimeField(read_only=True)
+    check_out_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = OperatorAssignment
+        fields = (
+            'uid', 'status', 'assignment_type', 'operator', 'operator_name', 'role', 'role_name',
+            'shift_center', 'exam_name', 'shift_name', 'work_date', 'center_code', 'center_name',
+            'check_in_at', 'check_out_at', 'assigned_at', 'confirmed_at', 'cancelled_at', 'completed_at',
+            'payout_amount', 'is_paid', 'remarks', 'tasks', 'created_at', 'updated_at',
+        )
+        read_only_fields = fields
+
+    def get_operator_name(self, obj):
+        return obj.operator.full_name or obj.operator.username
+
 class OperatorAssignmentCreateSerializer(serializers.ModelSerializer):
     shift_center = serializers.SlugRelatedField(
         slug_field='uid', 
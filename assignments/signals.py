@@ -1,27 +1,34 @@
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from .models import OperatorAssignment, AssignmentTask
-from operations.models import ShiftCenterTask
-import threading
-from accounts.utils import send_assignment_notification_whatsapp
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter, ShiftCenterTask
+from operations.stats import StatsDelta, apply_deltas, rebuild_stats
+from operations.task_provisioning import materialize_assignment_tasks
+from notifications.outbox import enqueue_message
 from notifications.models import Notification
 
+# Statuses in which an assignment carries its AssignmentTasks
+TASK_STATUSES = ('PENDING', 'CONFIRMED', 'CHECK_IN', 'ACTIVE')
+
+# Deleting one of these cascades to the shift center and its stats row
+CENTER_ORIGINS = (ShiftCenter, Shift, Exam, ExamCenter)
+
+
 @receiver(post_save, sender=OperatorAssignment)
 def notify_operator(sender, instance, created, **kwargs):
     """
     Notify the operator via WhatsApp and In-App notification when assigned to a duty.
     """
     if created:
-        # 1. WhatsApp (Background Thread)
+        # 1. WhatsApp (queued, delivered by the outbox worker)
         if instance.operator.mobile_primary:
-            thread = threading.Thread(
-                target=send_assignment_notification_whatsapp,
-                kwargs={
-                    'mobile': instance.operator.mobile_primary,
-                    'role': instance.role.name
-                }
+            enqueue_message(
+                'ASSIGNMENT',
+                instance.operator.mobile_primary,
+                {'role': instance.role.name},
+                dedupe_key=f"assignment:{instance.uid}",
             )
-            thread.start()
         
         # 2. In-App Notification
         Notification.objects.create(
@@ -32,13 +39,20 @@ def notify_operator(sender, instance, created, **kwargs):
         )
 
 @receiver(post_save, sender=OperatorAssignment)
-def create_assignment_tasks(sender, instance, created, **kwargs):
+def create_assignment_tasks(sender, instance, created, update_fields=None, **kwargs):
     """
     Auto-create AssignmentTasks when an assignment is confirmed or checked-in.
     """
     # Trigger if status is relevant (PENDING, CONFIRMED, CHECK_IN, ACTIVE)
     # PENDING is included so operators see tasks immediately upon assignment
-    if instance.status in ['PENDING', 'CONFIRMED', 'CHECK_IN', 'ACTIVE']:
+    if instance.status in TASK_STATUSES:
+        # A status-only save between these statuses (e.g. check-in) finds the
+        # tasks already there; templates added later go through
+        # sync_new_task_to_assignments. _stats_state still holds the pre-save
+        # status here because update_shift_center_stats runs after this hook.
+        old_status = getattr(instance, '_stats_state', (None, None))[1]
+        if update_fields and not {'role', 'shift_center'} & set(update_fields) and old_status in TASK_STATUSES:
+            return
         # Find templates for this Role in this ShiftCenter
         templates = ShiftCenterTask.objects.filter(
             shift_center=instance.shift_center,
@@ -61,21 +75,52 @@ def sync_new_task_to_assignments(sender, instance, created, **kwargs):
     that match the shift_center and role.
     """
     if created:
-        active_assignments = OperatorAssignment.objects.filter(
-            shift_center=instance.shift_center,
-            role=instance.role,
-            status__in=['PENDING', 'CONFIRMED', 'CHECK_IN']
-        )
-        
-        tasks_to_create = []
-        for assignment in active_assignments:
-            tasks_to_create.append(
-                AssignmentTask(
-                    assignment=assignment,
-                    shift_center_task=instance,
-                    status='PENDING'
-                )
-            )
-        
-        if tasks_to_create:
-            AssignmentTask.objects.bulk_create(tasks_to_create)
+        materialize_assignment_tasks(ShiftCenterTask.objects.filter(pk=instance.pk))
+
+
+def _remember_stats_state(instance):
+    # Read from __dict__ so deferred fields don't trigger a query
+    instance._stats_state = (instance.__dict__.get('shift_center_id'), instance.__dict__.get('status'))
+
+
+@receiver(post_init, sender=OperatorAssignment)
+def track_assignment_status(sender, instance, **kwargs):
+    _remember_stats_state(instance)
+
+
+@receiver(post_save, sender=OperatorAssignment)
+def update_shift_center_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Applies the status transition to ShiftCenterStats. Runs in the caller's
+    transaction, so wrap status changes in transaction.atomic() to commit the
+    counter together with the assignment.
+    """
+    if raw:
+        return
+    old_center, old_status = getattr(instance, '_stats_state', (None, None))
+    delta = StatsDelta()
+    if created:
+        delta.add(instance.shift_center_id, instance.status)
+    elif old_center is None or old_status is None:
+        # Loaded without status (e.g. .only()); recount instead of guessing
+        rebuild_stats(ShiftCenter.objects.filter(pk=instance.shift_center_id))
+    elif old_center != instance.shift_center_id:
+        delta.remove(old_center, old_status)
+        delta.add(instance.shift_center_id, instance.status)
+    else:
+        delta.move(instance.shift_center_id, old_status, instance.status)
+    apply_deltas(delta)
+    _remember_stats_state(instance)
+
+
+@receiver(post_delete, sender=OperatorAssignment)
+def remove_from_shift_center_stats(sender, instance, origin=None, **kwargs):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if issubclass(origin_model, CENTER_ORIGINS):
+        # The shift center's stats row is deleted in the same cascade
+        return
+    old_center, old_status = getattr(instance, '_stats_state', (None, None))
+    delta = StatsDelta()
+    delta.remove(old_center or instance.shift_center_id, old_status or instance.status)
+    # During a cascading ShiftCenter delete the center is about to go too
+    apply_deltas(delta, rebuild_missing=False)
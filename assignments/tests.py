@@ -1,3 +1,109 @@
+import base64
+import datetime
+import json
+from urllib.parse import parse_qsl, urlparse
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import AppUser
+from attendance.models import AttendanceLog
+from masters.models import Client, RoleMaster
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter, ShiftCenterTask
+from .models import OperatorAssignment
+
+
+class AssignmentListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(client_code='C1', name='Client One')
+        cls.role = RoleMaster.objects.create(code='INV', name='Invigilator')
+        cls.exam = Exam.objects.create(exam_code='E1', name='Exam One', client=client)
+        cls.shift = Shift.objects.create(
+            exam=cls.exam, shift_code='S1', work_date=datetime.date(2030, 1, 1),
+            start_time=datetime.time(9, 0), end_time=datetime.time(12, 0),
+        )
+        cls.exam_center = ExamCenter.objects.create(
+            exam=cls.exam, client_center_code='EC1', client_center_name='Center One',
+            latitude='28.600000', longitude='77.200000',
+        )
+        shift_center = ShiftCenter.objects.create(exam=cls.exam, shift=cls.shift, exam_center=cls.exam_center)
+        ShiftCenterTask.objects.create(shift_center=shift_center, role=cls.role, task_name='Frisking')
+        ShiftCenterTask.objects.create(shift_center=shift_center, role=cls.role, task_name='Seating')
+        cls.admin = AppUser.objects.create(
+            username='admin', user_type='INTERNAL_ADMIN', is_staff=True, is_superuser=True,
+        )
+        for i in range(30):
+            operator = AppUser.objects.create(
+                username=f'op{i}', user_type='OPERATOR', mobile_primary=f'90000000{i:02d}',
+            )
+            assignment = OperatorAssignment.objects.create(
+                shift_center=shift_center, operator=operator, role=cls.role,
+            )
+            AttendanceLog.objects.create(
+                assignment=assignment, activity_type='CHECK_IN',
+                latitude='28.6', longitude='77.2', distance_from_center=0,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def list_queries(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/assignments/', params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        _, small = self.list_queries(page_size=2)
+        response, large = self.list_queries(page_size=25)
+        self.assertEqual(len(response.data['results']), 25)
+        self.assertEqual(small, large)
+
+    def test_keyset_query_count_does_not_grow_with_page_size(self):
+        _, small = self.list_queries(cursor='', page_size=2)
+        _, large = self.list_queries(cursor='', page_size=25)
+        self.assertEqual(small, large)
+
+    def test_duty_card_fields(self):
+        response, _ = self.list_queries(page_size=1)
+        duty = response.data['results'][0]
+        shift_center = duty['shift_center']
+        self.assertEqual(shift_center['exam']['exam_code'], 'E1')
+        self.assertEqual(shift_center['exam_center']['client_center_name'], 'Center One')
+        self.assertEqual(shift_center['shift']['work_date'], '2030-01-01')
+        self.assertEqual(shift_center['shift']['start_time'], '09:00:00')
+        self.assertEqual(shift_center['shift']['end_time'], '12:00:00')
+        self.assertEqual(duty['role']['name'], 'Invigilator')
+        self.assertEqual(len(duty['tasks']), 2)
+        self.assertIsNotNone(duty['check_in_at'])
+
+    def test_malformed_cursor_is_not_found(self):
+        for position in (
+            ['2024-01-01T00:00:00+00:00', 'abc'],
+            [{'a': 1}, 1],
+            ['notadate', 1],
+            [None, 1],
+            [1],
+        ):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get('/api/assignments/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, position)
+        response = self.client.get('/api/assignments/', {'cursor': 'not base64!'})
+        self.assertEqual(response.status_code, 404)
 
-# Create your tests here.
+    def test_cursor_walks_every_row(self):
+        seen = []
+        params = {'cursor': '', 'page_size': 7}
+        while True:
+            response = self.client.get('/api/assignments/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['uid'] for row in response.data['results']]
+            if not response.data['next']:
+                break
+            params = dict(parse_qsl(urlparse(response.data['next']).query))
+        self.assertEqual(len(seen), 30)
+        self.assertEqual(len(set(seen)), 30)
@@ -1,32 +1,23 @@
 from rest_framework import viewsets, permissions, status, filters
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
+from common.pagination import StandardResultsSetPagination
 
 from common.mixins import ExportMixin
-from .serializers import OperatorAssignmentSerializer, AssignmentTaskSerializer, OperatorAssignmentCreateSerializer
+from .serializers import (
+    OperatorAssignmentSerializer, OperatorAssignmentListSerializer, AssignmentTaskSerializer,
+    OperatorAssignmentCreateSerializer, annotate_attendance_times,
+)
 from .models import OperatorAssignment, AssignmentTask
 from operations.models import ShiftCenter
-from masters.models import RoleMaster
 from django.utils import timezone
+from django.db import transaction
+from django.db.models import Prefetch
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.contrib.auth import get_user_model
-from django.db import transaction
 from django.http import HttpResponse
-from accounts.utils import (
-    normalize_mobile, 
-    is_valid_indian_mobile, 
-    generate_operator_username,
-    send_onboarding_request_whatsapp,
-    send_assignment_notification_whatsapp
-)
+from common.csv_import import parse_rows
+from .bulk_import import import_assignments
 import csv
-import io
-
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 1000
 
 class OperatorAssignmentViewSet(ExportMixin, viewsets.ModelViewSet):
     queryset = OperatorAssignment.objects.all()
@@ -41,20 +32,69 @@ class OperatorAssignmentViewSet(ExportMixin, viewsets.ModelViewSet):
     filterset_fields = ['status', 'assignment_type', 'role']
     ordering_fields = ['assigned_at', 'status']
     ordering = ['-assigned_at']
+    keyset_ordering = ('-assigned_at', '-id')
+
+    # Actions rendered with OperatorAssignmentListSerializer
+    LIST_ACTIONS = ('list', 'export')
 
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return OperatorAssignmentCreateSerializer
+        if self.action in self.LIST_ACTIONS:
+            return OperatorAssignmentListSerializer
         return OperatorAssignmentSerializer
 
+    @staticmethod
+    def _tasks_prefetch():
+        return Prefetch(
+            'tasks',
+            queryset=AssignmentTask.objects.select_related('shift_center_task').prefetch_related('evidence'),
+        )
+
+    def with_list_plan(self, queryset):
+        """Everything OperatorAssignmentListSerializer reads, in a fixed number of queries."""
+        return annotate_attendance_times(
+            queryset.select_related(
+                'operator', 'role',
+                'shift_center__exam', 'shift_center__shift', 'shift_center__exam_center',
+            ).prefetch_related(self._tasks_prefetch())
+        )
+
+    def with_detail_plan(self, queryset):
+        """Everything the depth=3 OperatorAssignmentSerializer walks (used by the mobile app)."""
+        return annotate_attendance_times(
+            queryset.select_related(
+                'role',
+                'operator__client', 'operator__exam',
+                'shift_center__exam__client', 'shift_center__exam__created_by', 'shift_center__exam__updated_by',
+                'shift_center__shift__exam', 'shift_center__shift__created_by', 'shift_center__shift__updated_by',
+                'shift_center__exam_center__exam', 'shift_center__exam_center__master_center',
+            ).prefetch_related(
+                'operator__groups', 'operator__user_permissions',
+                'shift_center__exam__created_by__groups', 'shift_center__exam__created_by__user_permissions',
+                'shift_center__exam__updated_by__groups', 'shift_center__exam__updated_by__user_permissions',
+                'shift_center__shift__created_by__groups', 'shift_center__shift__created_by__user_permissions',
+                'shift_center__shift__updated_by__groups', 'shift_center__shift__updated_by__user_permissions',
+                self._tasks_prefetch(),
+            )
+        )
+
     def get_queryset(self):
+        queryset = self.get_scoped_queryset()
+        if self.action in self.LIST_ACTIONS:
+            return self.with_list_plan(queryset)
+        if self.action == 'retrieve':
+            return self.with_detail_plan(queryset)
+        return queryset.select_related('operator', 'role', 'shift_center')
+
+    def get_scoped_queryset(self):
         user = self.request.user
         
         if getattr(user, 'user_type', '') == 'OPERATOR':
-             return OperatorAssignment.objects.filter(operator=user).select_related('operator', 'role', 'shift_center')
+             return OperatorAssignment.objects.filter(operator=user)
              
         # For Admins (Internal, Exam, Client)
-        queryset = OperatorAssignment.objects.select_related('operator', 'role', 'shift_center').all()
+        queryset = OperatorAssignment.objects.all()
         
         if getattr(user, 'user_type', '') == 'EXAM_ADMIN' and user.exam:
             queryset = queryset.filter(shift_center__shift__exam=user.exam)
@@ -71,9 +111,23 @@ class OperatorAssignmentViewSet(ExportMixin, viewsets.ModelViewSet):
         shift_center_id = self.request.query_params.get('shift_center', None)
         if shift_center_id:
             queryset = queryset.filter(shift_center__uid=shift_center_id)
-            
+
         return queryset
 
+    # Writes go through post_save/post_delete hooks that adjust ShiftCenterStats;
+    # keep them in one transaction with the assignment row.
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
     @action(detail=False, methods=['get'], url_path='my-duties')
     def my_duties(self, request):
         
@@ -83,7 +137,7 @@ class OperatorAssignmentViewSet(ExportMixin, viewsets.ModelViewSet):
              return Response({"error": "Only operators have duties."}, status=status.HTTP_403_FORBIDDEN)
         
         
-        assignments = OperatorAssignment.objects.filter(operator=user).order_by('-assigned_at')
+        assignments = self.with_detail_plan(OperatorAssignment.objects.filter(operator=user).order_by('-assigned_at'))
         serializer = self.get_serializer(assignments, many=True)
         return Response(serializer.data)
 
@@ -113,100 +167,9 @@ class OperatorAssignmentViewSet(ExportMixin, viewsets.ModelViewSet):
         except ShiftCenter.DoesNotExist:
             return Response({"detail": "Invalid Shift Center ID."}, status=status.HTTP_404_NOT_FOUND)
 
-        User = get_user_model()
-        results = {"created": [], "updated": [], "errors": []}
-
         try:
-            decoded_file = file_obj.read().decode('utf-8')
-            reader = csv.DictReader(io.StringIO(decoded_file))
-            
-            with transaction.atomic():
-                for row in reader:
-                    # Basic cleaning
-                    data = {k: (v.strip() if v else None) for k, v in row.items()}
-                    
-                    mobile_raw = data.get('operator_mobile')
-                    name = data.get('operator_name', '').strip()
-                    role_name = data.get('role_name')
-                    
-                    if not mobile_raw or not role_name:
-                         results["errors"].append({"row": row, "error": "Missing mobile or role_name"})
-                         continue
-                    
-                    mobile = normalize_mobile(mobile_raw)
-                    if not is_valid_indian_mobile(mobile):
-                         results["errors"].append({"row": row, "error": f"Invalid mobile: {mobile_raw}"})
-                         continue
-
-                    # 1. Find or Create Operator
-                    try:
-                        operator = User.objects.filter(mobile_primary=mobile, user_type='OPERATOR').first()
-                        
-                        if not operator:
-                            # Create new user
-                            username = generate_operator_username(mobile)
-                            # Collisions loop? (Optional but safe)
-                            for _ in range(5):
-                                if not User.objects.filter(username=username).exists():
-                                    break
-                                username = generate_operator_username(mobile)
-                            
-                            operator = User.objects.create_user(
-                                username=username,
-                                password=None,
-                                user_type="OPERATOR",
-                                status="REQUESTED", # Or ONBOARDING? Let's use REQUESTED to match bulk invite
-                                mobile_primary=mobile,
-                                first_name=name
-                            )
-                            operator.set_unusable_password()
-                            operator.save(update_fields=["password", "first_name", "full_name"])
-                            
-                            # Create Profile
-                            from operators.models import OperatorProfile
-                            OperatorProfile.objects.get_or_create(user=operator)
-                            
-                            # Send Onboarding SMS
-                            try:
-                                send_onboarding_request_whatsapp(mobile, name)
-                            except Exception as e:
-                                print(f"Onboarding SMS failed for {mobile}: {e}")
-
-                    except Exception as e:
-                        results["errors"].append({"row": row, "error": f"User error: {str(e)}"})
-                        continue
-
-                    # 2. Find Role
-                    try:
-                        role = RoleMaster.objects.get(name__iexact=role_name)
-                    except RoleMaster.DoesNotExist:
-                        results["errors"].append({"row": row, "error": f"Role '{role_name}' not found"})
-                        continue
-                        
-                    # 3. Create/Update Assignment
-                    assignment, created = OperatorAssignment.objects.update_or_create(
-                        shift_center=shift_center,
-                        operator=operator,
-                        defaults={
-                            'role': role,
-                            'assignment_type': 'PRIMARY' if data.get('is_primary') == '1' else 'BUFFER',
-                            'remarks': data.get('notes'),
-                            'status': 'PENDING' 
-                        }
-                    )
-                    
-                    if created:
-                        results["created"].append(operator.username) # Use username or name? Username is unique.
-                        # Send Assignment Notification
-                        try:
-                            send_assignment_notification_whatsapp(mobile, role.name)
-                        except Exception as e:
-                            print(f"Assignment SMS failed for {mobile}: {e}")
-                    else:
-                        results["updated"].append(operator.username)
-                        # Optional: Send SMS on update?
-                        # send_assignment_notification_whatsapp(mobile, role.name)
-
+            rows = parse_rows(file_obj)
+            results = import_assignments(shift_center, rows)
         except Exception as e:
             return Response({"detail": f"CSV Error: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
             
@@ -230,7 +193,8 @@ class OperatorAssignmentViewSet(ExportMixin, viewsets.ModelViewSet):
 
         assignment.status = 'CONFIRMED'
         assignment.confirmed_at = timezone.now()
-        assignment.save()
+        with transaction.atomic():
+            assignment.save()
         return Response({"status": "Confirmed", "status_display": "Confirmed"})
 
 class AssignmentTaskViewSet(viewsets.ModelViewSet):
@@ -3,7 +3,7 @@ from .models import AttendanceLog
 
 @admin.register(AttendanceLog)
 class AttendanceLogAdmin(admin.ModelAdmin):
-    list_display = ('id', 'assignment', 'activity_type', 'timestamp', 'distance_from_center', 'is_verified')
-    list_filter = ('activity_type', 'is_verified', 'timestamp')
+    list_display = ('id', 'assignment', 'activity_type', 'timestamp', 'distance_from_center', 'is_verified', 'verification_status')
+    list_filter = ('activity_type', 'is_verified', 'verification_status', 'timestamp')
     search_fields = ('assignment__operator__username', 'assignment__operator__email')
     readonly_fields = ('timestamp', 'latitude', 'longitude', 'distance_from_center', 'is_verified')
\ No newline at end of file
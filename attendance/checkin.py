@@ -0,0 +1,131 @@
+"""
+Check-in context for AttendanceLogViewSet.create.
+
+Apart from the assignment itself, everything a check-in needs depends only
+on the shift center: the fence (center coordinates and radius), the exam's
+geofencing/selfie flags and the shift window. That part is a
+`CheckInFence`, cached per shift center in common.reference_cache (kind
+"checkin") and dropped by common.signals when any of its sources change.
+
+`load_context` reads the operator's assignment, and the operator with it,
+in one query and takes the fence from the cache. The check-in POST
+authenticates from the JWT's claims alone (AttendanceLogViewSet), so that
+read is also where the operator's account is loaded. On a miss the fence is built from a single
+select_related query over shift, exam, exam center and master center.
+`warm_fences` fills the cache for upcoming shifts (see the
+warm_checkin_cache command), so check-ins during the rush never miss.
+"""
+import datetime
+from typing import NamedTuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from assignments.models import OperatorAssignment
+from common.reference_cache import lookup, store, store_shift_center_scope
+from operations.models import ShiftCenter
+from .geofence import center_fence
+
+# Statements a whole warm-fence POST /api/attendance/logs/ check-in may
+# issue: the assignment and operator read, BEGIN, the log insert, the
+# assignment status update, the ShiftCenterStats counter update and COMMIT
+# (enforced in attendance.tests; a cold fence adds one read)
+CHECKIN_MAX_QUERIES = 6
+
+# Check-in opens this long before the shift starts; check-out stays open
+# this long after it ends
+CHECK_IN_LEAD = datetime.timedelta(hours=1)
+CHECK_OUT_GRACE = datetime.timedelta(hours=4)
+
+
+class CheckInFence(NamedTuple):
+    latitude: float
+    longitude: float
+    radius: int
+    is_geofencing_enabled: bool
+    is_selfie_enabled: bool
+    starts_at: datetime.datetime
+    ends_at: datetime.datetime
+
+    @property
+    def is_locked(self):
+        """Same rule as Shift.is_locked: nothing is accepted after the shift ends."""
+        return self.ends_at < timezone.now()
+
+    def window(self, activity_type):
+        """(opens, closes) for CHECK_IN / CHECK_OUT, or None for other types."""
+        if activity_type == 'CHECK_IN':
+            return self.starts_at - CHECK_IN_LEAD, self.ends_at
+        if activity_type == 'CHECK_OUT':
+            return self.starts_at, self.ends_at + CHECK_OUT_GRACE
+        return None
+
+
+class CheckInContext(NamedTuple):
+    assignment: OperatorAssignment
+    fence: CheckInFence
+
+
+def _ttl():
+    return getattr(settings, "CHECKIN_CACHE_SECONDS", 300)
+
+
+def _name(shift_center_id):
+    return f"fence:{shift_center_id}"
+
+
+def build_fence(shift_center):
+    """CheckInFence for a ShiftCenter loaded with shift, exam and exam_center__master_center."""
+    shift, exam = shift_center.shift, shift_center.exam
+    tz = timezone.get_current_timezone()
+    lat, lon, radius = center_fence(shift_center.exam_center)
+    return CheckInFence(
+        latitude=lat,
+        longitude=lon,
+        radius=radius,
+        is_geofencing_enabled=exam.is_geofencing_enabled,
+        is_selfie_enabled=exam.is_selfie_enabled,
+        starts_at=timezone.make_aware(datetime.datetime.combine(shift.work_date, shift.start_time), tz),
+        ends_at=timezone.make_aware(datetime.datetime.combine(shift.work_date, shift.end_time), tz),
+    )
+
+
+def _fence_queryset():
+    return ShiftCenter.objects.select_related('shift', 'exam', 'exam_center__master_center')
+
+
+def get_fence(shift_center_id):
+    hit, fence = lookup("checkin", _name(shift_center_id))
+    if not hit:
+        shift_center = _fence_queryset().get(pk=shift_center_id)
+        fence = build_fence(shift_center)
+        store("checkin", _name(shift_center_id), fence, _ttl())
+        store_shift_center_scope(shift_center, _ttl())
+    return fence
+
+
+def load_context(assignment_uid, operator_id):
+    """
+    CheckInContext for the operator's assignment, with `assignment.operator`
+    loaded. Raises OperatorAssignment.DoesNotExist if it isn't theirs.
+    """
+    assignment = OperatorAssignment.objects.select_related('operator').get(
+        uid=assignment_uid, operator_id=operator_id,
+    )
+    return CheckInContext(assignment, get_fence(assignment.shift_center_id))
+
+
+def warm_fences(shift_centers):
+    """
+    Builds and caches the fence of every shift center in the queryset, and
+    the scope the check-in's live event is routed by (events.emit); returns
+    the count.
+    """
+    count = 0
+    for shift_center in shift_centers.select_related('shift', 'exam', 'exam_center__master_center').iterator(
+        chunk_size=2000
+    ):
+        store("checkin", _name(shift_center.pk), build_fence(shift_center), _ttl())
+        store_shift_center_scope(shift_center, _ttl())
+        count += 1
+    return count
@@ -0,0 +1,181 @@
+"""
+Batch geofence re-verification for attendance logs.
+
+When a center's coordinates or `geofence_radius_meters` are corrected after
+the exam, `reverify_logs` recomputes `distance_from_center`,
+`within_geofence` and `is_verified` for every affected log. Distances are
+computed with NumPy over whole chunks of logs instead of one Haversine call
+per row, and only rows whose values change are written back.
+
+Assignment statuses are not touched: a log that gains or loses the geofence
+shows up in the diff report for review.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.utils import timezone
+
+from operations.models import ShiftCenter
+from .models import AttendanceLog
+
+EARTH_RADIUS_M = 6371000
+DEFAULT_RADIUS_M = 200
+CHUNK_SIZE = 20000
+# bulk_update builds one CASE per column, so cost per statement grows with batch size
+UPDATE_BATCH_SIZE = 100
+# Rows per distinct (distance, within, verified) value at which plain
+# UPDATE ... WHERE id IN (...) statements beat bulk_update's CASE
+GROUPED_UPDATE_MIN_ROWS = 20
+
+# Face verification outcomes that let a log count as verified
+FACE_OK_STATUSES = ('NOT_REQUIRED', 'VERIFIED')
+
+
+def center_fence(exam_center):
+    """
+    (lat, lon, radius) used for check-in: the ExamCenter's own coordinates,
+    else its CenterMaster's, else (0, 0) which fails any geofence.
+    """
+    if exam_center.latitude and exam_center.longitude:
+        return float(exam_center.latitude), float(exam_center.longitude), exam_center.geofence_radius_meters
+    master = exam_center.master_center
+    if master and master.latitude and master.longitude:
+        return float(master.latitude), float(master.longitude), master.geofence_radius_meters
+    return 0.0, 0.0, DEFAULT_RADIUS_M
+
+
+def haversine_array(lat1, lon1, lat2, lon2):
+    """Element-wise Haversine distance in metres between arrays of degrees."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dphi = np.radians(lat2 - lat1)
+    dlambda = np.radians(lon2 - lon1)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_M * c
+
+
+def load_fences(shift_centers):
+    """Returns {shift_center_id: (lat, lon, radius, geofencing_enabled)}."""
+    fences = {}
+    for sc in shift_centers.select_related('exam', 'exam_center__master_center'):
+        lat, lon, radius = center_fence(sc.exam_center)
+        fences[sc.pk] = (lat, lon, radius, sc.exam.is_geofencing_enabled)
+    return fences
+
+
+def _new_stats():
+    return {"scanned": 0, "changed": 0, "gained": 0, "lost": 0}
+
+
+def _write(updates, now):
+    """
+    A radius correction leaves distances alone and only flips flags, so
+    most changed rows share a few values: one UPDATE per value is far
+    cheaper than a CASE per row. Moved coordinates give near-unique
+    distances, which go through bulk_update instead.
+    """
+    groups = defaultdict(list)
+    for log in updates:
+        groups[(log.distance_from_center, log.within_geofence, log.is_verified)].append(log.pk)
+
+    if len(updates) >= len(groups) * GROUPED_UPDATE_MIN_ROWS:
+        for (distance, within, verified), pks in groups.items():
+            AttendanceLog.objects.filter(pk__in=pks).update(
+                distance_from_center=distance, within_geofence=within, is_verified=verified, updated_at=now
+            )
+    else:
+        AttendanceLog.objects.bulk_update(
+            updates, ['distance_from_center', 'within_geofence', 'is_verified', 'updated_at'],
+            batch_size=UPDATE_BATCH_SIZE,
+        )
+
+
+def reverify_logs(shift_centers=None, dry_run=False, chunk_size=CHUNK_SIZE, report=None):
+    """
+    Recomputes geofence results for all logs of `shift_centers` (default:
+    all) and bulk-updates the rows that changed.
+
+    `report`, if given, is called with one dict per changed log. Returns
+    {"scanned", "changed", "gained", "lost", "centers": {shift_center_id: {...}}},
+    where gained/lost count logs whose is_verified flipped.
+    """
+    if shift_centers is None:
+        shift_centers = ShiftCenter.objects.all()
+    fences = load_fences(shift_centers)
+    totals = _new_stats()
+    per_center = defaultdict(_new_stats)
+    if not fences:
+        return {**totals, "centers": {}}
+
+    sc_ids = np.fromiter(fences.keys(), dtype=np.int64, count=len(fences))
+    order = np.argsort(sc_ids)
+    sc_ids = sc_ids[order]
+    fence_arr = np.array(list(fences.values()), dtype=np.float64)[order]
+
+    qs = AttendanceLog.objects.filter(assignment__shift_center_id__in=list(fences)).order_by('pk')
+    fields = (
+        'pk', 'assignment__shift_center_id', 'latitude', 'longitude',
+        'distance_from_center', 'within_geofence', 'is_verified', 'verification_status',
+    )
+    last_pk = 0
+    while True:
+        rows = list(qs.filter(pk__gt=last_pk).values_list(*fields)[:chunk_size])
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+
+        pks, centers, lats, lons, old_dist, old_within, old_verified, face = zip(*rows)
+        idx = np.searchsorted(sc_ids, np.array(centers, dtype=np.int64))
+        fence = fence_arr[idx]
+
+        dist = haversine_array(
+            np.array(lats, dtype=np.float64), np.array(lons, dtype=np.float64), fence[:, 0], fence[:, 1]
+        )
+        within = (fence[:, 3] == 0) | (dist <= fence[:, 2])
+        verified = within & np.isin(np.array(face, dtype=object), FACE_OK_STATUSES)
+        new_dist = dist.astype(np.int64)
+
+        # NULL within_geofence (logs from before the column existed) always counts as a change
+        old_within_arr = np.array([w if w is not None else -1 for w in old_within], dtype=np.int8)
+        old_verified_arr = np.array(old_verified, dtype=bool)
+        changed = (
+            (new_dist != np.array(old_dist, dtype=np.int64))
+            | (within.astype(np.int8) != old_within_arr)
+            | (verified != old_verified_arr)
+        )
+
+        now = timezone.now()
+        updates = []
+        for i in np.flatnonzero(changed).tolist():
+            stats = per_center[centers[i]]
+            stats["changed"] += 1
+            if verified[i] != old_verified_arr[i]:
+                stats["gained" if verified[i] else "lost"] += 1
+            if report is not None:
+                report({
+                    "id": pks[i],
+                    "shift_center_id": centers[i],
+                    "old_distance": old_dist[i],
+                    "new_distance": int(new_dist[i]),
+                    "old_within_geofence": old_within[i],
+                    "new_within_geofence": bool(within[i]),
+                    "old_is_verified": old_verified[i],
+                    "new_is_verified": bool(verified[i]),
+                })
+            updates.append(AttendanceLog(
+                pk=pks[i],
+                distance_from_center=int(new_dist[i]),
+                within_geofence=bool(within[i]),
+                is_verified=bool(verified[i]),
+                updated_at=now,
+            ))
+        for sc_id, n in zip(*np.unique(np.array(centers, dtype=np.int64), return_counts=True)):
+            per_center[int(sc_id)]["scanned"] += int(n)
+
+        if updates and not dry_run:
+            _write(updates, now)
+
+    for stats in per_center.values():
+        for key in totals:
+            totals[key] += stats[key]
+    return {**totals, "centers": dict(per_center)}
@@ -0,0 +1,94 @@
+import datetime
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from assignments.models import OperatorAssignment
+from attendance.checkin import CHECKIN_MAX_QUERIES, warm_fences
+from attendance.views import AttendanceLogViewSet
+from common.benchmarking import percentile, rollback_fixture
+from common.reference_cache import invalidate
+from common.synthetic import seed_exam
+from operations.models import Exam, Shift, ShiftCenter
+
+
+def check_in(view, assignment):
+    """
+    (statements, ms) for one check-in through JWT authentication. Inside
+    rollback_fixture the view's SAVEPOINT / RELEASE stand in for the
+    BEGIN / COMMIT it issues in production, so every statement counts.
+    """
+    sc = assignment.shift_center
+    token = str(RefreshToken.for_user(assignment.operator).access_token)
+    request = APIRequestFactory().post("/api/attendance/logs/", {
+        "assignment_id": str(assignment.uid),
+        "latitude": str(sc.latitude),
+        "longitude": str(sc.longitude),
+        "activity_type": "CHECK_IN",
+    }, HTTP_AUTHORIZATION=f"Bearer {token}")
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        response = view(request)
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code != 201:
+        raise CommandError(f"Check-in failed ({response.status_code}): {response.data}")
+    return len(ctx.captured_queries), elapsed
+
+
+class Command(BaseCommand):
+    help = "Benchmarks check-in round trips with a cold and a warmed fence cache; fails over the query budget"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=50)
+        parser.add_argument("--operators-per-center", type=int, default=5)
+
+    def handle(self, *args, **options):
+        view = AttendanceLogViewSet.as_view({"post": "create"})
+
+        with rollback_fixture():
+            seeded = seed_exam(
+                centers=options["centers"], operators_per_center=options["operators_per_center"], incidents_per_center=0
+            )
+            exam = seeded["exam"]
+            # Open the shift around now, geofence on, no selfie (no vendor calls)
+            Exam.objects.filter(pk=exam.pk).update(is_geofencing_enabled=True, is_selfie_enabled=False)
+            Shift.objects.filter(exam=exam).update(
+                work_date=timezone.localdate(), start_time=datetime.time(0, 0), end_time=datetime.time(23, 59, 59)
+            )
+            assignments = list(
+                OperatorAssignment.objects.filter(shift_center__exam=exam, status__in=["PENDING", "CONFIRMED"])
+                .select_related("operator", "shift_center")
+            )
+            half = len(assignments) // 2
+            self.stdout.write(f"Seeded {len(assignments)} check-in candidates")
+
+            results = {}
+            cache.clear()
+            results["cold cache"] = [check_in(view, a) for a in assignments[:half]]
+
+            cache.clear()
+            warm_fences(ShiftCenter.objects.filter(exam=exam))
+            results["warmed cache"] = [check_in(view, a) for a in assignments[half:]]
+
+            for label, runs in results.items():
+                counts = [r[0] for r in runs]
+                latencies = [r[1] for r in runs]
+                self.stdout.write(
+                    f"{label:<14} check-ins={len(runs):<5} queries max={max(counts)} "
+                    f"mean={sum(counts) / len(counts):.2f} "
+                    f"p50={percentile(latencies, 50):.2f}ms p95={percentile(latencies, 95):.2f}ms"
+                )
+
+        # Fences of the rolled-back fixture must not outlive it
+        invalidate("checkin")
+
+        worst = max(r[0] for r in results["warmed cache"])
+        if worst > CHECKIN_MAX_QUERIES:
+            raise CommandError(f"Warm check-in issued {worst} queries (budget {CHECKIN_MAX_QUERIES})")
+        self.stdout.write(self.style.SUCCESS(f"Warm check-ins within the {CHECKIN_MAX_QUERIES}-query budget"))
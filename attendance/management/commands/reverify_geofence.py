@@ -0,0 +1,74 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance.geofence import CHUNK_SIZE, reverify_logs
+from operations.models import Exam, ShiftCenter
+
+REPORT_FIELDS = (
+    "id", "shift_center_id", "old_distance", "new_distance",
+    "old_within_geofence", "new_within_geofence", "old_is_verified", "new_is_verified",
+)
+
+
+class Command(BaseCommand):
+    help = "Recomputes attendance geofence results after center coordinates or radii are corrected"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exam", help="Exam code to re-verify")
+        parser.add_argument("--center", help="Client center code (limits the run to that center's shifts)")
+        parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+        parser.add_argument("--report", help="Write one CSV row per changed log to this path")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--top", type=int, default=20, help="Centers to list in the summary")
+
+    def handle(self, *args, **options):
+        shift_centers = ShiftCenter.objects.all()
+        if options["exam"]:
+            try:
+                exam = Exam.objects.get(exam_code=options["exam"])
+            except Exam.DoesNotExist:
+                raise CommandError(f"Exam {options['exam']} not found")
+            shift_centers = shift_centers.filter(exam=exam)
+        if options["center"]:
+            shift_centers = shift_centers.filter(exam_center__client_center_code=options["center"])
+
+        report_file = open(options["report"], "w", newline="") if options["report"] else None
+        try:
+            report = None
+            if report_file:
+                writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                report = writer.writerow
+
+            start = time.perf_counter()
+            result = reverify_logs(
+                shift_centers, dry_run=options["dry_run"], chunk_size=options["chunk_size"], report=report
+            )
+            elapsed = time.perf_counter() - start
+        finally:
+            if report_file:
+                report_file.close()
+
+        changed = sorted(
+            ((sc_id, stats) for sc_id, stats in result["centers"].items() if stats["changed"]),
+            key=lambda item: -item[1]["changed"],
+        )
+        if changed:
+            names = dict(
+                ShiftCenter.objects.filter(pk__in=[sc_id for sc_id, _ in changed[:options["top"]]])
+                .values_list("pk", "exam_center__client_center_code")
+            )
+            self.stdout.write("Shift centers with changes:")
+            for sc_id, stats in changed[:options["top"]]:
+                self.stdout.write(
+                    f"  {names.get(sc_id, sc_id)} (shift center {sc_id}): {stats['changed']}/{stats['scanned']} changed, "
+                    f"+{stats['gained']} verified, -{stats['lost']} verified"
+                )
+
+        verb = "Would update" if options["dry_run"] else "Updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {result['scanned']} logs in {elapsed:.2f}s. {verb} {result['changed']} "
+            f"({result['gained']} newly verified, {result['lost']} no longer verified)."
+        ))
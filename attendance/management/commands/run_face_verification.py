@@ -0,0 +1,52 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from attendance.verification import claim_batch, verify_log
+from kyc.surepass_client import get_surepass_client
+
+
+class Command(BaseCommand):
+    help = "Runs face verification for provisional (PENDING) attendance check-ins"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency", type=int, default=getattr(settings, "FACE_VERIFICATION_WORKER_CONCURRENCY", 16)
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Process due check-ins and exit")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        client = get_surepass_client()
+
+        def work(log):
+            try:
+                return verify_log(log, client=client)
+            finally:
+                close_old_connections()
+
+        self.stdout.write(f"Face verification worker started (concurrency={concurrency})")
+        totals = {"VERIFIED": 0, "PENDING": 0, "FAILED": 0}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                batch = claim_batch(concurrency * 2)
+                if not batch:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for outcome in pool.map(work, batch):
+                    totals[outcome] = totals.get(outcome, 0) + 1
+
+                if options["once"]:
+                    self.stdout.write(f"Processed {len(batch)} check-ins")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Verified {totals['VERIFIED']}, retrying {totals['PENDING']}, failed {totals['FAILED']}"
+        ))
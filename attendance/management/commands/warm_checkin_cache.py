@@ -0,0 +1,59 @@
+import datetime
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from attendance.checkin import warm_fences
+from operations.models import Exam, ShiftCenter
+
+
+class Command(BaseCommand):
+    help = "Caches the check-in fence of every shift center whose shift starts soon (run before each shift)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--exam", help="Exam code to warm (default: all exams)")
+        parser.add_argument(
+            "--minutes-ahead", type=int, default=120,
+            help="Warm shifts starting within this many minutes, plus shifts in progress",
+        )
+        parser.add_argument("--date", help="Warm every shift on this date (YYYY-MM-DD) instead")
+
+    def handle(self, *args, **options):
+        shift_centers = ShiftCenter.objects.all()
+        if options["exam"]:
+            try:
+                exam = Exam.objects.get(exam_code=options["exam"])
+            except Exam.DoesNotExist:
+                raise CommandError(f"Exam {options['exam']} not found")
+            shift_centers = shift_centers.filter(exam=exam)
+
+        if options["date"]:
+            try:
+                work_date = datetime.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+            shift_centers = shift_centers.filter(shift__work_date=work_date)
+        else:
+            now = timezone.localtime()
+            horizon = now + datetime.timedelta(minutes=options["minutes_ahead"])
+            # Check-in opens an hour before the start, so in-progress shifts are included
+            upcoming = Q(shift__work_date=now.date(), shift__end_time__gte=now.time())
+            if horizon.date() == now.date():
+                upcoming &= Q(shift__start_time__lte=horizon.time())
+            else:
+                upcoming |= Q(shift__work_date=horizon.date(), shift__start_time__lte=horizon.time())
+            shift_centers = shift_centers.filter(upcoming)
+
+        if not getattr(settings, "CACHE_URL", None):
+            self.stderr.write(self.style.WARNING(
+                "CACHE_URL is not set: the local cache is per process, so this only warms this command's own cache."
+            ))
+
+        start = time.perf_counter()
+        count = warm_fences(shift_centers)
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed {count} shift center fences in {time.perf_counter() - start:.2f}s"
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.9 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendancelog_selfie'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancelog',
+            name='face_similarity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='verification_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='verification_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='verification_locked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='verification_next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='verification_status',
+            field=models.CharField(choices=[('NOT_REQUIRED', 'Not Required'), ('PENDING', 'Pending'), ('PROCESSING', 'Processing'), ('VERIFIED', 'Verified'), ('FAILED', 'Failed')], default='NOT_REQUIRED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='verified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attendancelog',
+            name='within_geofence',
+            field=models.BooleanField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['verification_status', 'verification_next_attempt_at'], name='attendance__verific_c81d70_idx'),
+        ),
+    ]
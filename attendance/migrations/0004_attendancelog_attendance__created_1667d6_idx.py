@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_face_verification_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancelog',
+            index=models.Index(fields=['created_at', 'id'], name='attendance__created_1667d6_idx'),
+        ),
+    ]
@@ -24,6 +24,30 @@ class AttendanceLog(TimeStampedUUIDModel):
     
     is_verified = models.BooleanField(default=False, help_text="True if within geofence")
     selfie = models.ImageField(upload_to='attendance_selfies/', null=True, blank=True)
+
+    # Face verification (run in the background in provisional check-in mode)
+    VERIFICATION_STATUS_CHOICES = (
+        ("NOT_REQUIRED", "Not Required"),
+        ("PENDING", "Pending"),
+        ("PROCESSING", "Processing"),
+        ("VERIFIED", "Verified"),
+        ("FAILED", "Failed"),
+    )
+    verification_status = models.CharField(max_length=20, choices=VERIFICATION_STATUS_CHOICES, default="NOT_REQUIRED")
+    within_geofence = models.BooleanField(null=True, blank=True)
+    face_similarity = models.FloatField(null=True, blank=True)
+    verification_error = models.TextField(null=True, blank=True)
+    verification_attempts = models.PositiveSmallIntegerField(default=0)
+    verification_next_attempt_at = models.DateTimeField(null=True, blank=True)
+    verification_locked_at = models.DateTimeField(null=True, blank=True)
+    verified_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["verification_status", "verification_next_attempt_at"]),
+            # Keyset pagination (common.pagination)
+            models.Index(fields=["created_at", "id"]),
+        ]
     
     def __str__(self):
         return f"{self.assignment.operator.username} - {self.activity_type}"
\ No newline at end of file
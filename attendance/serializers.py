@@ -10,18 +10,25 @@ class AttendanceLogSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'assignment_id', 'activity_type', 
             'timestamp', 'latitude', 'longitude', 
-            'distance_from_center', 'is_verified', 'selfie'
+            'distance_from_center', 'is_verified', 'selfie',
+            'verification_status', 'verification_error',
         ]
-        read_only_fields = ['timestamp', 'distance_from_center', 'is_verified']
+        read_only_fields = ['timestamp', 'distance_from_center', 'is_verified', 'verification_status', 'verification_error']
 
     def validate_assignment_id(self, value):
         # Ensure the assignment belongs to the request user
         user = self.context['request'].user
-        if not OperatorAssignment.objects.filter(uid=value, operator=user).exists():
+        assignment = self.context.get('assignment')
+        if assignment is not None and assignment.uid == value and assignment.operator_id == user.pk:
+            # Already loaded (and ownership checked) by the check-in view
+            return value
+        if not OperatorAssignment.objects.filter(uid=value, operator_id=user.pk).exists():
             raise serializers.ValidationError("Invalid assignment or not assigned to you.")
         return value
 
     def create(self, validated_data):
         assignment_id = validated_data.pop('assignment_id')
-        assignment = OperatorAssignment.objects.get(uid=assignment_id)
+        assignment = self.context.get('assignment')
+        if assignment is None or assignment.uid != assignment_id:
+            assignment = OperatorAssignment.objects.get(uid=assignment_id)
         return AttendanceLog.objects.create(assignment=assignment, **validated_data)
\ No newline at end of file
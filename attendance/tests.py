@@ -1,3 +1,329 @@
-from django.test import TestCase
+import datetime
+import random
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import AppUser
+from assignments.models import OperatorAssignment
+from common.fakes import start_fake_server
+from common.loadtest import selfie_bytes
+from kyc.surepass_client import reset_surepass_client
+from masters.models import Client, RoleMaster
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter
+from .checkin import CHECKIN_MAX_QUERIES, warm_fences
+from .geofence import GROUPED_UPDATE_MIN_ROWS, haversine_array, reverify_logs
+from .models import AttendanceLog
+from .verification import claim_batch, verify_log
+from .views import AttendanceLogViewSet
+
+
+class AttendanceFixtureMixin:
+    """An exam whose only shift is open all day today, one center and one assignment per operator."""
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(client_code='C1', name='Client One')
+        cls.role = RoleMaster.objects.create(code='INV', name='Invigilator')
+        cls.exam = Exam.objects.create(
+            exam_code='E1', name='Exam One', client=client,
+            is_geofencing_enabled=True, is_selfie_enabled=False,
+        )
+        shift = Shift.objects.create(
+            exam=cls.exam, shift_code='S1', work_date=timezone.localdate(),
+            start_time=datetime.time(0, 0), end_time=datetime.time(23, 59, 59),
+        )
+        exam_center = ExamCenter.objects.create(
+            exam=cls.exam, client_center_code='EC1', client_center_name='Center One',
+            latitude='28.600000', longitude='77.200000',
+        )
+        cls.shift_center = ShiftCenter.objects.create(exam=cls.exam, shift=shift, exam_center=exam_center)
+
+    def make_assignment(self, username):
+        operator = AppUser.objects.create(username=username, user_type='OPERATOR')
+        return OperatorAssignment.objects.create(shift_center=self.shift_center, operator=operator, role=self.role)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+        return client
+
+    def check_in(self, assignment, client=None, **extra):
+        client = client or self.client_for(assignment.operator)
+        return client.post('/api/attendance/logs/', {
+            'assignment_id': str(assignment.uid),
+            'latitude': '28.6',
+            'longitude': '77.2',
+            'activity_type': 'CHECK_IN',
+            **extra,
+        })
+
+
+class CheckInQueryBudgetTests(AttendanceFixtureMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_check_in_stays_within_budget(self):
+        assignment = self.make_assignment('op1')
+        client = self.client_for(assignment.operator)
+        warm_fences(ShiftCenter.objects.all())
+        # Assignment and operator read, BEGIN (a savepoint here), log insert,
+        # status update, ShiftCenterStats update, COMMIT (savepoint release)
+        with self.assertNumQueries(CHECKIN_MAX_QUERIES):
+            response = self.check_in(assignment, client)
+        self.assertEqual(response.status_code, 201)
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.status, 'CHECK_IN')
+        self.assertTrue(AttendanceLog.objects.get(assignment=assignment).is_verified)
+
+    def test_inactive_operator_is_refused(self):
+        assignment = self.make_assignment('op1')
+        client = self.client_for(assignment.operator)
+        AppUser.objects.filter(pk=assignment.operator_id).update(is_active=False)
+        response = self.check_in(assignment, client)
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(AttendanceLog.objects.exists())
+
+    def test_other_operators_assignment_is_not_found(self):
+        assignment = self.make_assignment('op1')
+        other = self.make_assignment('op2')
+        response = self.check_in(assignment, self.client_for(other.operator))
+        self.assertEqual(response.status_code, 404)
+
+    def test_cold_fence_adds_one_read(self):
+        assignment = self.make_assignment('op1')
+        client = self.client_for(assignment.operator)
+        with self.assertNumQueries(CHECKIN_MAX_QUERIES + 1):
+            response = self.check_in(assignment, client)
+        self.assertEqual(response.status_code, 201)
+
+
+class ProvisionalVerificationTests(AttendanceFixtureMixin, TestCase):
+    """Provisional (202) check-ins verified afterwards against the fake Surepass server."""
+
+    def setUp(self):
+        cache.clear()
+        Exam.objects.filter(pk=self.exam.pk).update(is_selfie_enabled=True)
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.assignment = self.make_assignment('op1')
+
+    def start_vendor(self, **options):
+        server, url = start_fake_server('surepass', **options)
+        self.addCleanup(server.shutdown)
+        settings_override = override_settings(
+            SUREPASS_BASE_URL=url,
+            SUREPASS_TOKEN='test',
+            SUREPASS_MAX_RETRIES=0,
+            SUREPASS_BREAKER_FAILURES=100,
+            MEDIA_ROOT=self.media_root,
+            ATTENDANCE_PROVISIONAL_CHECKIN=True,
+            FACE_VERIFICATION_MAX_ATTEMPTS=3,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_surepass_client()
+        self.addCleanup(reset_surepass_client)
+        self.assignment.operator.photo.save('photo.jpg', ContentFile(selfie_bytes()))
+        return server
+
+    def provisional_check_in(self):
+        response = self.check_in(
+            self.assignment, selfie=SimpleUploadedFile('selfie.jpg', selfie_bytes(), 'image/jpeg'),
+        )
+        self.assertEqual(response.status_code, 202)
+        log = AttendanceLog.objects.get(assignment=self.assignment)
+        self.assertEqual(log.verification_status, 'PENDING')
+        return log
+
+    def verify_next(self):
+        claimed = claim_batch(10)
+        self.assertEqual(len(claimed), 1)
+        status = verify_log(claimed[0])
+        return status, AttendanceLog.objects.get(pk=claimed[0].pk)
+
+    def test_provisional_check_in_is_verified(self):
+        server = self.start_vendor()
+        self.provisional_check_in()
+        self.assignment.refresh_from_db()
+        self.assertNotEqual(self.assignment.status, 'CHECK_IN')
+
+        status, log = self.verify_next()
+        self.assertEqual(status, 'VERIFIED')
+        self.assertTrue(log.is_verified)
+        self.assertAlmostEqual(log.face_similarity, 0.92)
+        self.assignment.refresh_from_db()
+        self.assertEqual(self.assignment.status, 'CHECK_IN')
+        self.assertEqual(len(server.calls), 2)
+
+    def test_selfie_that_is_not_live_fails(self):
+        self.start_vendor(live=False)
+        self.provisional_check_in()
+        status, log = self.verify_next()
+        self.assertEqual(status, 'FAILED')
+        self.assertFalse(log.is_verified)
+        self.assertTrue(log.verification_error.startswith('Liveness check failed'))
+        self.assertEqual(log.verification_attempts, 1)
+
+    def test_face_mismatch_fails(self):
+        self.start_vendor(similarity=0.1)
+        self.provisional_check_in()
+        status, log = self.verify_next()
+        self.assertEqual(status, 'FAILED')
+        self.assertTrue(log.verification_error.startswith('Face verification failed'))
+        self.assignment.refresh_from_db()
+        self.assertNotEqual(self.assignment.status, 'CHECK_IN')
+
+    def test_vendor_errors_are_retried_with_backoff(self):
+        server = self.start_vendor(fail_rate=1.0)
+        self.provisional_check_in()
+        with mock.patch('attendance.verification.backoff_seconds', return_value=60) as backoff:
+            for attempt in (1, 2):
+                status, log = self.verify_next()
+                self.assertEqual(status, 'PENDING')
+                self.assertEqual(log.verification_attempts, attempt)
+                self.assertGreater(log.verification_next_attempt_at, timezone.now())
+                # Not due again until the backoff has passed
+                self.assertEqual(claim_batch(10), [])
+                AttendanceLog.objects.filter(pk=log.pk).update(
+                    verification_next_attempt_at=timezone.now() - datetime.timedelta(seconds=1),
+                )
+            status, log = self.verify_next()
+        self.assertEqual([c.args for c in backoff.call_args_list], [(1,), (2,)])
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(log.verification_attempts, 3)
+        self.assertTrue(log.verification_error.startswith('Verification Error'))
+        self.assertEqual(claim_batch(10), [])
+        # Liveness and face match on each of the three attempts
+        self.assertEqual(len(server.calls), 6)
+
+
+class GeofenceReverifyTests(AttendanceFixtureMixin, TestCase):
+    # Degrees of latitude for ~100 m (inside the default 200 m fence) and ~300 m (outside)
+    INSIDE = 0.0009
+    OUTSIDE = 0.0027
+    FACE_STATES = ('NOT_REQUIRED', 'VERIFIED', 'PENDING', 'FAILED')
+
+    def setUp(self):
+        self.assignment = self.make_assignment('op_geo')
+
+    def make_log(self, offset, face, **stale):
+        return AttendanceLog.objects.create(
+            assignment=self.assignment, activity_type='CHECK_IN',
+            latitude=f'{28.6 + offset:.6f}', longitude='77.200000',
+            verification_status=face, distance_from_center=stale.pop('distance', 0), **stale,
+        )
+
+    def make_logs(self):
+        """One log per face state on each side of the fence, all with stale results."""
+        logs = {}
+        for offset in (self.INSIDE, self.OUTSIDE):
+            for face in self.FACE_STATES:
+                logs[offset, face] = self.make_log(offset, face, is_verified=(offset == self.OUTSIDE))
+        return logs
+
+    def snapshot(self):
+        return list(
+            AttendanceLog.objects.order_by('pk')
+            .values_list('distance_from_center', 'within_geofence', 'is_verified')
+        )
+
+    def test_numpy_distances_match_the_scalar_haversine(self):
+        points = [
+            (28.6139, 77.2090, 19.0760, 72.8777),   # Delhi - Mumbai, ~1150 km
+            (0.0, 0.0, 0.0, 1.0),                   # one degree of longitude on the equator
+            (51.5074, -0.1278, 40.7128, -74.0060),  # London - New York, ~5570 km
+            (28.6, 77.2, 28.6 + self.INSIDE, 77.2),
+            (-33.8688, 151.2093, -33.8688, 151.2093),
+        ]
+        lat1, lon1, lat2, lon2 = (np.array(col, dtype=np.float64) for col in zip(*points))
+        distances = haversine_array(lat1, lon1, lat2, lon2)
+        for point, distance in zip(points, distances):
+            self.assertAlmostEqual(distance, AttendanceLogViewSet.calculate_distance(*point), places=6)
+        self.assertAlmostEqual(distances[1], 111195, delta=1)
+        self.assertAlmostEqual(distances[2], 5570000, delta=5000)
+        self.assertEqual(distances[4], 0)
+
+    def test_dry_run_reports_without_writing(self):
+        self.make_logs()
+        before = self.snapshot()
+        reported = []
+        result = reverify_logs(dry_run=True, report=reported.append)
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual((result['scanned'], result['changed']), (8, 8))
+        # Inside with an accepted face gains; every outside log was marked verified and loses
+        self.assertEqual((result['gained'], result['lost']), (2, 4))
+        self.assertEqual(len(reported), 8)
+        self.assertEqual(result['centers'][self.shift_center.pk]['changed'], 8)
+
+    def test_write_mode_applies_fence_and_face_state(self):
+        logs = self.make_logs()
+        result = reverify_logs()
+        self.assertEqual((result['changed'], result['gained'], result['lost']), (8, 2, 4))
+        for (offset, face), log in logs.items():
+            log.refresh_from_db()
+            inside = offset == self.INSIDE
+            with self.subTest(inside=inside, face=face):
+                self.assertEqual(log.within_geofence, inside)
+                self.assertEqual(log.is_verified, inside and face in ('NOT_REQUIRED', 'VERIFIED'))
+                self.assertAlmostEqual(log.distance_from_center, 100 if inside else 300, delta=1)
+        # A second pass finds nothing left to change
+        self.assertEqual(reverify_logs()['changed'], 0)
+
+    def test_chunked_run_matches_a_single_chunk(self):
+        self.make_logs()
+        single = reverify_logs(dry_run=True)
+        with self.assertNumQueries(1 + 4):
+            # Fences, then three chunks of at most 3 rows and the empty read that ends the scan
+            chunked = reverify_logs(dry_run=True, chunk_size=3)
+        self.assertEqual(chunked, single)
+
+        reverify_logs(chunk_size=3)
+        expected = self.snapshot()
+        AttendanceLog.objects.update(distance_from_center=0, within_geofence=None, is_verified=False)
+        reverify_logs()
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_geofencing_disabled_counts_every_log_as_within(self):
+        self.make_log(self.OUTSIDE, 'NOT_REQUIRED')
+        type(self.exam).objects.filter(pk=self.exam.pk).update(is_geofencing_enabled=False)
+        reverify_logs()
+        log = AttendanceLog.objects.get()
+        self.assertTrue(log.within_geofence)
+        self.assertTrue(log.is_verified)
+
+    def test_radius_correction_flips_flags_in_grouped_updates(self):
+        # Enough rows sharing a value to take the UPDATE ... WHERE id IN path
+        for _ in range(GROUPED_UPDATE_MIN_ROWS):
+            self.make_log(self.OUTSIDE, 'NOT_REQUIRED', distance=300, within_geofence=False)
+        self.make_log(self.INSIDE, 'NOT_REQUIRED', distance=100, within_geofence=True, is_verified=True)
+        self.shift_center.exam_center.geofence_radius_meters = 500
+        self.shift_center.exam_center.save()
+
+        with self.assertNumQueries(1 + 2 + 1):
+            result = reverify_logs()
+        flipped = GROUPED_UPDATE_MIN_ROWS
+        self.assertEqual((result['changed'], result['gained'], result['lost']), (flipped, flipped, 0))
+        self.assertEqual(AttendanceLog.objects.filter(within_geofence=True, is_verified=True).count(), flipped + 1)
+
+    def test_moved_center_rewrites_distances(self):
+        rng = random.Random(9)
+        for _ in range(5):
+            self.make_log(rng.uniform(-0.01, 0.01), 'VERIFIED')
+        reverify_logs()
+        self.shift_center.exam_center.latitude = '28.610000'
+        self.shift_center.exam_center.save()
+        reverify_logs()
+        for log in AttendanceLog.objects.all():
+            expected = AttendanceLogViewSet.calculate_distance(float(log.latitude), float(log.longitude), 28.61, 77.2)
+            self.assertEqual(log.distance_from_center, int(expected))
+            self.assertEqual(log.is_verified, expected <= 200)
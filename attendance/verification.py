@@ -0,0 +1,210 @@
+"""
+Face verification for attendance selfies.
+
+`check_face` runs the Surepass liveness and face-match calls concurrently.
+The check-in view calls it inline by default. When
+ATTENDANCE_PROVISIONAL_CHECKIN is on, the view saves the log with
+verification_status=PENDING instead, and the `run_face_verification`
+worker picks it up via `claim_batch` / `verify_log`.
+"""
+import contextvars
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from kyc.surepass_client import SurepassError, get_surepass_client
+from notifications.models import Notification
+from .models import AttendanceLog
+
+# A PROCESSING row older than this is assumed to belong to a dead worker
+STALE_LOCK_SECONDS = 300
+
+
+def describe_error(message):
+    """Maps a Surepass failure to the message shown to the operator."""
+    if "face_not_found" in message or "confidence" in message:
+        return "No face detected. Please ensure your face is clearly visible."
+    elif "multiple_faces" in message:
+        return "Multiple faces detected. Please ensure only you are in the frame."
+    elif "Face mismatch" in message:
+        return "Face verification failed. Your selfie does not match your profile photo."
+    elif "liveness" in message.lower():
+        return "Liveness check failed. Please blink or move slightly and try again."
+    return f"Verification Failed: {message}"
+
+
+def is_transient(error):
+    """Network errors and vendor 5xx are worth retrying; everything else is a verdict."""
+    return isinstance(error, SurepassError) and (error.status_code is None or error.status_code >= 500)
+
+
+def _similarity(match_resp):
+    # Expected structure: {'data': {'similarity': 0.95, ...}, 'success': True}
+    data = match_resp.get('data', {})
+    similarity = data.get('similarity')
+    if similarity is None:
+        similarity = data.get('confidence')
+    if similarity is None:
+        return 0.0
+    score = float(similarity)
+    # Some API versions report 0-100
+    return score / 100.0 if score > 1.0 else score
+
+
+def check_face(client, selfie_bytes, selfie_name, photo_bytes):
+    """
+    Runs liveness and face match in parallel and returns the similarity
+    (0-1). Raises SurepassError if either call fails, the selfie is not
+    live or the score is below FACE_MATCH_MIN_SIMILARITY.
+    """
+    # Each call runs in a copy of the caller's context so request
+    # instrumentation (common.instrumentation) still sees the Surepass time
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        liveness = pool.submit(
+            contextvars.copy_context().run, client.face_liveness, selfie_bytes, selfie_name or 'selfie.jpg'
+        )
+        match = pool.submit(
+            contextvars.copy_context().run,
+            client.face_match,
+            selfie_bytes,
+            photo_bytes,
+            selfie_filename='checkin_selfie.jpg',
+            id_filename='profile_photo.jpg',
+        )
+        liveness_data = liveness.result().get('data') or {}
+        live = liveness_data.get('live', liveness_data.get('is_live'))
+        score = _similarity(match.result())
+
+    # A successful call can still report the selfie as not live
+    if live is False:
+        raise SurepassError("Liveness check failed: the selfie is not live", status_code=400)
+
+    if score < getattr(settings, "FACE_MATCH_MIN_SIMILARITY", 0.6):
+        raise SurepassError(f"Face mismatch. Similarity score: {int(score * 100)}%", status_code=400)
+    return score
+
+
+def apply_attendance_status(assignment, activity_type):
+    """Moves the assignment to CHECK_IN / COMPLETED for a verified log."""
+    if activity_type == 'CHECK_IN':
+        # A late check-in verdict must not undo a completed duty
+        if assignment.status not in ('COMPLETED', 'CHECK_IN'):
+            assignment.status = 'CHECK_IN'
+            assignment.save(update_fields=['status', 'updated_at'])
+    elif activity_type == 'CHECK_OUT':
+        assignment.status = 'COMPLETED'
+        assignment.completed_at = timezone.now()
+        assignment.save(update_fields=['status', 'completed_at', 'updated_at'])
+
+
+def backoff_seconds(attempts):
+    return random.uniform(0, min(300, 10 * (2 ** max(0, attempts - 1))))
+
+
+def claim_batch(limit):
+    """
+    Marks up to `limit` due PENDING logs as PROCESSING and returns them.
+
+    Uses SKIP LOCKED so several worker processes can share the queue.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=STALE_LOCK_SECONDS)
+    with transaction.atomic():
+        ids = list(
+            AttendanceLog.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(verification_status='PENDING') & (
+                    Q(verification_next_attempt_at__isnull=True) | Q(verification_next_attempt_at__lte=now)
+                ) |
+                Q(verification_status='PROCESSING', verification_locked_at__lt=stale)
+            )
+            .order_by('timestamp')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        AttendanceLog.objects.filter(pk__in=ids).update(
+            verification_status='PROCESSING', verification_locked_at=now, updated_at=now
+        )
+    return list(
+        AttendanceLog.objects.filter(pk__in=ids)
+        .select_related('assignment__operator')
+        .order_by('timestamp')
+    )
+
+
+def _read(field_file):
+    field_file.open('rb')
+    try:
+        return field_file.read()
+    finally:
+        field_file.close()
+
+
+def _notify(log, verified, detail=None):
+    label = "Check-in" if log.activity_type == 'CHECK_IN' else "Check-out"
+    if verified:
+        title, message = f"{label} verified", f"Your {label.lower()} has been verified."
+    else:
+        title, message = f"{label} verification failed", detail or "Face verification failed."
+    Notification.objects.create(user=log.assignment.operator, title=title, message=message, notification_type='ALERT')
+
+
+def _finish(log, similarity=None, error=None):
+    now = timezone.now()
+    log.verification_locked_at = None
+    log.verification_error = error
+    log.face_similarity = similarity
+    log.verified_at = now
+    if error is None:
+        log.verification_status = 'VERIFIED'
+        log.is_verified = bool(log.within_geofence)
+    else:
+        log.verification_status = 'FAILED'
+        log.is_verified = False
+
+    with transaction.atomic():
+        log.save(update_fields=[
+            'verification_status', 'verification_error', 'verification_locked_at', 'face_similarity',
+            'verified_at', 'is_verified', 'verification_attempts', 'updated_at',
+        ])
+        if log.is_verified:
+            apply_attendance_status(log.assignment, log.activity_type)
+        _notify(log, log.is_verified, error)
+    return log.verification_status
+
+
+def verify_log(log, client=None, max_attempts=None):
+    """Verifies one claimed log and records the outcome; returns the new status."""
+    max_attempts = max_attempts or getattr(settings, "FACE_VERIFICATION_MAX_ATTEMPTS", 3)
+    log.verification_attempts += 1
+
+    photo = log.assignment.operator.photo
+    if not log.selfie or not photo:
+        return _finish(log, error="Selfie or profile photo missing. Cannot verify identity.")
+
+    try:
+        score = check_face(client or get_surepass_client(), _read(log.selfie), log.selfie.name, _read(photo))
+    except Exception as e:
+        if is_transient(e) or not isinstance(e, SurepassError):
+            if log.verification_attempts < max_attempts:
+                log.verification_status = 'PENDING'
+                log.verification_locked_at = None
+                log.verification_error = str(e)
+                log.verification_next_attempt_at = timezone.now() + timedelta(
+                    seconds=backoff_seconds(log.verification_attempts)
+                )
+                log.save(update_fields=[
+                    'verification_status', 'verification_locked_at', 'verification_error',
+                    'verification_next_attempt_at', 'verification_attempts', 'updated_at',
+                ])
+                return log.verification_status
+            return _finish(log, error=f"Verification Error: {e}")
+        return _finish(log, error=describe_error(str(e)))
+
+    return _finish(log, similarity=score)
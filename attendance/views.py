@@ -1,17 +1,29 @@
 import math
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
 from .models import AttendanceLog
 from .serializers import AttendanceLogSerializer
 from assignments.models import OperatorAssignment
+from common.pagination import StandardResultsSetPagination
+from kyc.surepass_client import SurepassError, get_surepass_client
+from .checkin import load_context
+from .verification import apply_attendance_status, check_face, describe_error
 
 class AttendanceLogViewSet(viewsets.ModelViewSet):
     queryset = AttendanceLog.objects.all()
     serializer_class = AttendanceLogSerializer
+    pagination_class = StandardResultsSetPagination
 
     def get_queryset(self):
         user = self.request.user
-        qs = AttendanceLog.objects.all()
+        qs = AttendanceLog.objects.order_by('-created_at', '-id')
         if user.is_staff or user.is_superuser or user.user_type == 'INTERNAL_ADMIN':
             return qs
         elif user.user_type == 'CLIENT_ADMIN' and user.client:
@@ -20,6 +32,14 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
             return qs.filter(assignment__shift_center__exam=user.exam)
         return qs.filter(assignment__operator=user)
 
+    def get_authenticators(self):
+        # Runs before self.action is set. The check-in takes the user id from
+        # the token's claims; the operator is read with the assignment
+        # (load_context) instead of by a separate user lookup.
+        if self.action_map.get(self.request.method.lower()) == 'create':
+            return [JWTStatelessUserAuthentication()]
+        return super().get_authenticators()
+
     def create(self, request, *args, **kwargs):
         # 1. Get Coordinates from Request
         try:
@@ -29,209 +49,118 @@ class AttendanceLogViewSet(viewsets.ModelViewSet):
         except (TypeError, ValueError):
             return Response({"detail": "Invalid coordinates"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 2. Get Center Coordinates (Priority: ExamCenter > CenterMaster)
+        # 2. Load the assignment and its shift center's fence (one query when cached)
         try:
-            assignment = OperatorAssignment.objects.get(uid=assignment_id, operator=request.user)
-            # Traverse: Assignment -> ShiftCenter -> ExamCenter
-            exam_center = assignment.shift_center.exam_center
-            master_center = exam_center.master_center
-
-            # Default to 0.0
-            center_lat = 0.0
-            center_lon = 0.0
-            radius = 200
-
-            # Priority 1: ExamCenter specific coordinates
-            if exam_center.latitude and exam_center.longitude:
-                center_lat = float(exam_center.latitude)
-                center_lon = float(exam_center.longitude)
-                radius = exam_center.geofence_radius_meters
-            
-            # Priority 2: MasterCenter fallback
-            elif master_center and master_center.latitude and master_center.longitude:
-                center_lat = float(master_center.latitude)
-                center_lon = float(master_center.longitude)
-                radius = master_center.geofence_radius_meters
-            
-            # If neither has coordinates, we essentially fail (dist will be huge if one is 0.0)
-             
-        except OperatorAssignment.DoesNotExist:
-             return Response({"detail": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+            assignment, fence = load_context(assignment_id, request.user.pk)
+        except (OperatorAssignment.DoesNotExist, DjangoValidationError):
+            return Response({"detail": "Assignment not found"}, status=status.HTTP_404_NOT_FOUND)
+        if not assignment.operator.is_active:
+            # What JWTAuthentication checks when it loads the user
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
 
         # 2a. Time Window Validation
-        shift = assignment.shift_center.shift
-        if assignment.shift_center.shift.is_locked:
+        if fence.is_locked:
             return Response({"detail": "Shift is locked. Time period exceeded."}, status=status.HTTP_400_BAD_REQUEST)
 
-        from django.utils import timezone
-        import datetime
-        
-        # Construct Aware Datetime for Shift Start/End
-        # Using project's current timezone (Asia/Kolkata as per settings)
-        try:
-            tz = timezone.get_current_timezone()
-            
-            # Combine Date + Time
-            shift_start_naive = datetime.datetime.combine(shift.work_date, shift.start_time)
-            shift_end_naive = datetime.datetime.combine(shift.work_date, shift.end_time)
-            
-            # Make Aware
-            shift_start_dt = timezone.make_aware(shift_start_naive, tz)
-            shift_end_dt = timezone.make_aware(shift_end_naive, tz)
-            
-            # Windows
-            # Check-In: 1 Hour before Start -> End Time
-            check_in_open = shift_start_dt - datetime.timedelta(hours=1)
-            check_in_close = shift_end_dt
-            
-            # Check-Out: Start Time -> End Time + 4 Hours
-            check_out_open = shift_start_dt
-            check_out_close = shift_end_dt + datetime.timedelta(hours=4)
-            
-            now = timezone.now() # Already aware (UTC internally if USE_TZ=True, but comparable)
-            activity_type = request.data.get('activity_type')
-
-            if activity_type == 'CHECK_IN':
-                if not (check_in_open <= now <= check_in_close):
-                    return Response({
-                        "detail": f"Check-In allowed between {timezone.localtime(check_in_open).strftime('%H:%M')} and {timezone.localtime(check_in_close).strftime('%H:%M')} IST."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                    
-            elif activity_type == 'CHECK_OUT':
-                 if not (check_out_open <= now <= check_out_close):
-                    return Response({
-                        "detail": f"Check-Out allowed between {timezone.localtime(check_out_open).strftime('%H:%M')} and {timezone.localtime(check_out_close).strftime('%H:%M')} IST."
-                    }, status=status.HTTP_400_BAD_REQUEST)
-
-        except Exception as e:
-            # Fallback if datetime conversion fails
-            print(f"Time validation error: {e}")
-            pass # Or fail validation? Safer to pass if data is corrupt to avoid lockout, or fail to be strict.
-            # Passing for now unless critical.
-
+        # Check-In: 1 Hour before Start -> End Time
+        # Check-Out: Start Time -> End Time + 4 Hours
+        activity_type = request.data.get('activity_type')
+        window = fence.window(activity_type)
+        if window and not (window[0] <= timezone.now() <= window[1]):
+            label = "Check-In" if activity_type == 'CHECK_IN' else "Check-Out"
+            return Response({
+                "detail": f"{label} allowed between {timezone.localtime(window[0]).strftime('%H:%M')} and {timezone.localtime(window[1]).strftime('%H:%M')} IST."
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         # 3. Calculate Distance (Haversine Formula)
-        dist = self.calculate_distance(lat, lon, center_lat, center_lon)
-        
+        dist = self.calculate_distance(lat, lon, fence.latitude, fence.longitude)
+
         # 4. Preparing data
         # We don't modify request.data directly for read_only fields
-        
-        is_geofencing_enabled = assignment.shift_center.exam.is_geofencing_enabled
-        if not is_geofencing_enabled:
+        if not fence.is_geofencing_enabled:
             is_verified = True
         else:
-            is_verified = (dist <= radius)
-        
-        # 4a. FACE VERIFICATION (Only for CHECK_IN)
-        activity_type = request.data.get('activity_type')
+            is_verified = (dist <= fence.radius)
         
+        # 4a. FACE VERIFICATION
         # Check if selfie is mandated by Exam config
-        # We already fetched 'assignment', so we can check the flag
-        is_selfie_required = assignment.shift_center.exam.is_selfie_enabled
+        is_selfie_required = fence.is_selfie_enabled
+        provisional = is_selfie_required and getattr(settings, 'ATTENDANCE_PROVISIONAL_CHECKIN', False)
         
         if is_selfie_required:
             # Selfie is mandatory for Check-In
             selfie_file = request.FILES.get('selfie')
             if not selfie_file:
                  return Response({"detail": f"Selfie is required for {activity_type.replace('_', ' ').title()}"}, status=status.HTTP_400_BAD_REQUEST)
-            
+
+            user_photo = assignment.operator.photo
+            if not user_photo:
+                return Response({"detail": "User profile photo missing. Cannot verify identity."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if is_selfie_required and not provisional:
             # Read bytes for API
             selfie_bytes = selfie_file.read()
             selfie_file.seek(0) # Reset pointer for saving model later
-            
-            # Initialize Surepass Helper
-            from kyc.surepass_client import SurepassClient, SurepassError
-            sp_client = SurepassClient()
-            
+
             try:
-                # A. Liveness Check
-                liveness_resp = sp_client.face_liveness(selfie_bytes, selfie_file.name or 'selfie.jpg')
-                # Check confidence/success logic based on Surepass response structure
-                # Typically data={'confidence': 0.99, 'is_live': True, ...} depending on exact API
-                # Assume standard success=True implies liveness passed or check payload
-                
-                # B. Face Match Check (Selfie vs Profile Photo)
-                user_photo = request.user.photo
-                if not user_photo:
-                    return Response({"detail": "User profile photo missing. Cannot verify identity."}, status=status.HTTP_400_BAD_REQUEST)
-                
-                try:
-                    user_photo_bytes = user_photo.read()
-                    # user_photo.close() # Don't close, Django manages storage
-                except Exception:
-                     return Response({"detail": "Could not read profile photo."}, status=status.HTTP_400_BAD_REQUEST)
-
-                match_resp = sp_client.face_match(
-                    selfie_bytes, 
-                    user_photo_bytes, 
-                    selfie_filename='checkin_selfie.jpg',
-                    id_filename='profile_photo.jpg'
-                )
-                
-                # Check Match Score
-                # Expected structure: {'data': {'similarity': 0.95, ...}, 'success': True}
-                data = match_resp.get('data', {})
-                similarity = data.get('similarity')
-                
-                # Fallback if 'similarity' key is different (e.g. 'confidence' or 'score')
-                if similarity is None:
-                    similarity = data.get('confidence')
-                
-                # If we still can't find it, we might be looking at a different API version. 
-                # But typically Surepass has 'similarity' (0-1) or (0-100).
-                # Assuming 0-1 scale. If it's 0-100, we'll need to adjust. 
-                # Safe logic: if > 1, assume 0-100.
-                
-                final_score = 0.0
-                if similarity is not None:
-                    final_score = float(similarity)
-                    if final_score > 1.0: # Normalize 0-100 to 0-1
-                        final_score = final_score / 100.0
-                
-                # THRESHOLD: 0.6 (60%) is a standard balance. Adjust as needed.
-                if final_score < 0.6:
-                    raise SurepassError(f"Face mismatch. Similarity score: {int(final_score*100)}%")
+                user_photo_bytes = user_photo.read()
+            except Exception:
+                 return Response({"detail": "Could not read profile photo."}, status=status.HTTP_400_BAD_REQUEST)
 
+            # Liveness and face match run concurrently
+            try:
+                check_face(get_surepass_client(), selfie_bytes, selfie_file.name, user_photo_bytes)
             except SurepassError as e:
-                # Parse user-friendly error
-                msg = str(e)
-                if "face_not_found" in msg or "confidence" in msg:
-                    error_detail = "No face detected. Please ensure your face is clearly visible."
-                elif "multiple_faces" in msg:
-                    error_detail = "Multiple faces detected. Please ensure only you are in the frame."
-                elif "Face mismatch" in msg:
-                    error_detail = "Face verification failed. Your selfie does not match your profile photo."
-                elif "liveness" in msg.lower():
-                     error_detail = "Liveness check failed. Please blink or move slightly and try again."
-                else:
-                    error_detail = f"Verification Failed: {msg}"
-                
-                return Response({"detail": error_detail}, status=status.HTTP_400_BAD_REQUEST)
+                return Response({"detail": describe_error(str(e))}, status=status.HTTP_400_BAD_REQUEST)
             except Exception as e:
                 return Response({"detail": f"Verification Error: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        # 5. Save
-        serializer = self.get_serializer(data=request.data)
+        # 5. Save (the serializer reuses the loaded assignment instead of querying it again)
+        serializer = self.get_serializer(data=request.data, context={**self.get_serializer_context(), 'assignment': assignment})
         serializer.is_valid(raise_exception=True)
+
+        if provisional:
+            # Saved now; run_face_verification sets is_verified and the assignment status later
+            self.perform_create(
+                serializer,
+                distance_from_center=int(dist),
+                is_verified=False,
+                within_geofence=is_verified,
+                verification_status='PENDING',
+            )
+            return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
         
-        self.perform_create(serializer, distance_from_center=int(dist), is_verified=is_verified)
-        
-        # Optional: Update Assignment Status
-        if is_verified:
-            if activity_type == 'CHECK_IN':
-                assignment.status = 'CHECK_IN'
-                assignment.save()
-            elif activity_type == 'CHECK_OUT':
-                assignment.status = 'COMPLETED'
-                from django.utils import timezone
-                assignment.completed_at = timezone.now()
-                assignment.save()
+        # Log, status change and ShiftCenterStats counters commit together
+        with transaction.atomic():
+            self.perform_create(
+                serializer,
+                distance_from_center=int(dist),
+                is_verified=is_verified,
+                within_geofence=is_verified,
+                verification_status='VERIFIED' if is_selfie_required else 'NOT_REQUIRED',
+            )
+
+            # Optional: Update Assignment Status
+            if is_verified:
+                apply_attendance_status(assignment, activity_type)
             
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def perform_create(self, serializer, **kwargs):
         serializer.save(**kwargs)
 
+    @action(detail=True, methods=['get'], url_path='verification-status')
+    def verification_status(self, request, pk=None):
+        """Polled by the app after a provisional (202) check-in."""
+        log = self.get_object()
+        return Response({
+            "id": log.id,
+            "verification_status": log.verification_status,
+            "is_verified": log.is_verified,
+            "verification_error": log.verification_error,
+            "assignment_status": log.assignment.status,
+        })
+
     @staticmethod
     def calculate_distance(lat1, lon1, lat2, lon2):
         # Simple Haversine implementation
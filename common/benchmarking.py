@@ -0,0 +1,87 @@
+"""
+Small helpers for the `bench_*` management commands.
+
+Benchmarks seed their fixtures inside `rollback_fixture()` so nothing is left
+behind in the database they run against.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rollback_fixture():
+    """Runs the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+class QueryCounter:
+    """Counts statements run on `connection` inside `with counter:` (no 9000-query cap like CaptureQueriesContext)."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._wrapper.__exit__(*exc)
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+def measure(fn, iterations=50, warmup=3):
+    """
+    Calls `fn` repeatedly and returns latency percentiles (ms) and the number
+    of SQL queries issued by a single call.
+    """
+    for _ in range(warmup):
+        fn()
+
+    with CaptureQueriesContext(connection) as ctx:
+        fn()
+    queries = len(ctx.captured_queries)
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "queries": queries,
+        "p50_ms": round(percentile(samples, 50), 2),
+        "p95_ms": round(percentile(samples, 95), 2),
+        "mean_ms": round(statistics.mean(samples), 2),
+    }
+
+
+def format_row(label, result):
+    return (
+        f"{label:<28} queries={result['queries']:<4} "
+        f"p50={result['p50_ms']:>8.2f}ms p95={result['p95_ms']:>8.2f}ms mean={result['mean_ms']:>8.2f}ms"
+    )
@@ -0,0 +1,26 @@
+"""Helpers shared by the set-based CSV importers."""
+import csv
+import io
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """Collects wall-clock milliseconds per named phase."""
+
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def parse_rows(file_obj):
+    """Reads the uploaded CSV into a list of raw row dicts."""
+    decoded_file = file_obj.read().decode('utf-8')
+    return list(csv.DictReader(io.StringIO(decoded_file)))
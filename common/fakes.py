@@ -0,0 +1,370 @@
+"""
+Local stand-ins for third-party providers, for tests and load runs.
+
+Point the matching setting at the fake (e.g. AUTHKEY_BASE_URL=
+http://127.0.0.1:8765/request, SUREPASS_BASE_URL=http://127.0.0.1:8765,
+CACHE_URL=redis://127.0.0.1:6379/0) and start it with
+`python manage.py run_fake_vendor authkey`, or in-process via
+`start_fake_server()` / `start_fake_redis()`.
+"""
+import json
+import random
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class FakeVendorHandler(BaseHTTPRequestHandler):
+    """Base handler with configurable latency and failure rate."""
+
+    latency_ms = 0
+    fail_rate = 0.0
+    calls = None  # list shared by the server instance
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        try:
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out waiting (a latency_ms longer than its timeout)
+            pass
+
+    def _simulate(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return random.random() < self.fail_rate
+
+
+class FakeAuthKeyHandler(FakeVendorHandler):
+    """Mimics GET https://api.authkey.io/request."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.calls is not None:
+            self.calls.append(params)
+
+        if self._simulate():
+            self._send_json(502, {"Message": "Bad Gateway"})
+            return
+        if not params.get("mobile"):
+            self._send_json(400, {"Message": "mobile is required"})
+            return
+        self._send_json(200, {"Message": "Submitted Successfully", "LogID": f"fake-{len(self.calls or [])}"})
+
+
+class FakeSurepassHandler(FakeVendorHandler):
+    """Mimics the Surepass face-liveness and face-match endpoints."""
+
+    similarity = 0.92
+    live = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        path = urlparse(self.path).path
+        if self.calls is not None:
+            self.calls.append({"path": path, "bytes": length})
+
+        if self._simulate():
+            self._send_json(502, {"message": "Bad Gateway"})
+            return
+        if path.endswith("/face/face-liveness"):
+            self._send_json(200, {"success": True, "data": {"live": self.live, "confidence": 0.98 if self.live else 0.12}})
+        elif path.endswith("/face/face-match"):
+            self._send_json(200, {"success": True, "data": {"match_status": True, "similarity": self.similarity}})
+        else:
+            self._send_json(404, {"success": False, "message": "Not found"})
+
+
+HANDLERS = {
+    "authkey": FakeAuthKeyHandler,
+    "surepass": FakeSurepassHandler,
+}
+
+
+def start_fake_server(vendor, host="127.0.0.1", port=0, latency_ms=0, fail_rate=0.0, **options):
+    """
+    Starts a fake vendor server on a daemon thread. `options` override the
+    handler's canned answers (e.g. surepass: similarity=0.1, live=False).
+
+    Returns (server, base_url). `server.calls` records every request received;
+    call `server.shutdown()` when done.
+    """
+    calls = []
+    handler = type(
+        f"Configured{HANDLERS[vendor].__name__}",
+        (HANDLERS[vendor],),
+        {"latency_ms": latency_ms, "fail_rate": fail_rate, "calls": calls, **options},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.calls = calls
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+class FakeRedisStore:
+    """Thread-safe key/value store with per-key expiry, shared by one server."""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        # channel -> handlers subscribed to it
+        self.channels = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """
+    Speaks enough of the Redis protocol (RESP2, or RESP3 after HELLO 3) for
+    Django's RedisCache: GET/SET/MGET/DEL/EXISTS, INCRBY/DECRBY,
+    EXPIRE/PERSIST/TTL, MULTI/EXEC, FLUSHDB, PING, SELECT and the
+    connection handshake, plus SUBSCRIBE/UNSUBSCRIBE/PUBLISH for the
+    events bus.
+    Values are kept as bytes.
+    """
+
+    store = None
+    calls = None
+    resp3 = False
+
+    def setup(self):
+        super().setup()
+        self.subscribed = set()
+        # PUBLISH from another connection writes to this one's socket too
+        self.write_lock = threading.Lock()
+
+    def finish(self):
+        with self.store.lock:
+            for channel in self.subscribed:
+                self.store.channels.get(channel, set()).discard(self)
+        super().finish()
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.strip().split()  # inline command, e.g. from telnet
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _write(self, value):
+        if value is None:
+            self.wfile.write(b"_\r\n" if self.resp3 else b"$-1\r\n")
+        elif isinstance(value, Exception):
+            self.wfile.write(b"-ERR " + str(value).encode() + b"\r\n")
+        elif isinstance(value, bool):
+            self.wfile.write(b":1\r\n" if value else b":0\r\n")
+        elif isinstance(value, int):
+            self.wfile.write(b":%d\r\n" % value)
+        elif isinstance(value, str):
+            self.wfile.write(b"+" + value.encode() + b"\r\n")
+        elif isinstance(value, dict):
+            self.wfile.write(b"%%%d\r\n" % len(value))
+            for key, item in value.items():
+                self._write(key)
+                self._write(item)
+        elif isinstance(value, list):
+            self.wfile.write(b"*%d\r\n" % len(value))
+            for item in value:
+                self._write(item)
+        else:
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(value), value))
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            name = args[0].decode().upper()
+            if self.calls is not None:
+                self.calls.append(name)
+            handler = getattr(self, f"cmd_{name.lower()}", None)
+            if handler is None:
+                self._write(ValueError(f"unknown command '{name}'"))
+            elif name == "MULTI":
+                self.queued = []
+                self._write("OK")
+            elif name == "DISCARD":
+                self.queued = None
+                self._write("OK")
+            elif name == "EXEC":
+                queued, self.queued = self.queued or [], None
+                with self.store.lock, self.write_lock:
+                    self._write([self._call(h, a) for h, a in queued])
+            elif getattr(self, "queued", None) is not None:
+                self.queued.append((handler, args[1:]))
+                with self.write_lock:
+                    self._write("QUEUED")
+            elif name in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                # One reply per channel, written by the handler itself
+                with self.store.lock:
+                    handler(*args[1:])
+            else:
+                with self.store.lock:
+                    result = self._call(handler, args[1:])
+                with self.write_lock:
+                    self._write(result)
+            with self.write_lock:
+                self.wfile.flush()
+
+    def _push(self, *items):
+        """Writes a pub/sub message: a push in RESP3, a plain array in RESP2."""
+        with self.write_lock:
+            if self.resp3:
+                self.wfile.write(b">%d\r\n" % len(items))
+                for item in items:
+                    self._write(item)
+            else:
+                self._write(list(items))
+            self.wfile.flush()
+
+    def _call(self, handler, args):
+        try:
+            return handler(*args)
+        except (TypeError, ValueError) as e:
+            return ValueError(str(e) or "syntax error")
+
+    def cmd_multi(self):
+        pass  # handled in handle()
+
+    cmd_exec = cmd_discard = cmd_multi
+
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_hello(self, protocol=b"2", *args):
+        self.resp3 = int(protocol) == 3
+        return {b"server": b"fake-redis", b"version": b"7.0.0", b"proto": int(protocol), b"mode": b"standalone"}
+
+    def cmd_select(self, db):
+        return "OK"
+
+    def cmd_client(self, *args):
+        return "OK"
+
+    def cmd_get(self, key):
+        return self.store.data[key] if self.store._alive(key) else None
+
+    def cmd_mget(self, *keys):
+        return [self.cmd_get(key) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        opts = [o.upper() for o in options]
+        exists = self.store._alive(key)
+        if (b"NX" in opts and exists) or (b"XX" in opts and not exists):
+            return None
+        self.store.data[key] = value
+        self.store.expires.pop(key, None)
+        for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+            if unit in opts:
+                self.store.expires[key] = time.monotonic() + int(options[opts.index(unit) + 1]) * scale
+        return "OK"
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self.store._alive(key):
+                removed += 1
+            self.store.data.pop(key, None)
+            self.store.expires.pop(key, None)
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self.store._alive(key))
+
+    def cmd_incrby(self, key, delta):
+        value = int(self.store.data[key]) if self.store._alive(key) else 0
+        value += int(delta)
+        self.store.data[key] = str(value).encode()
+        return value
+
+    def cmd_decrby(self, key, delta):
+        return self.cmd_incrby(key, -int(delta))
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, 1)
+
+    def cmd_expire(self, key, seconds):
+        if not self.store._alive(key):
+            return 0
+        self.store.expires[key] = time.monotonic() + int(seconds)
+        return 1
+
+    def cmd_persist(self, key):
+        return 1 if self.store._alive(key) and self.store.expires.pop(key, None) is not None else 0
+
+    def cmd_ttl(self, key):
+        if not self.store._alive(key):
+            return -2
+        deadline = self.store.expires.get(key)
+        return -1 if deadline is None else max(0, int(deadline - time.monotonic()))
+
+    def cmd_flushdb(self, *args):
+        self.store.data.clear()
+        self.store.expires.clear()
+        return "OK"
+
+    cmd_flushall = cmd_flushdb
+
+    def cmd_subscribe(self, *channels):
+        for channel in channels:
+            self.subscribed.add(channel)
+            self.store.channels.setdefault(channel, set()).add(self)
+            self._push(b"subscribe", channel, len(self.subscribed))
+
+    def cmd_unsubscribe(self, *channels):
+        for channel in channels or list(self.subscribed):
+            self.subscribed.discard(channel)
+            self.store.channels.get(channel, set()).discard(self)
+            self._push(b"unsubscribe", channel, len(self.subscribed))
+
+    def cmd_publish(self, channel, message):
+        receivers = list(self.store.channels.get(channel, ()))
+        for receiver in receivers:
+            try:
+                receiver._push(b"message", channel, message)
+            except OSError:
+                pass  # the subscriber hung up; finish() removes it
+        return len(receivers)
+
+
+def start_fake_redis(host="127.0.0.1", port=0):
+    """
+    Starts a RESP (Redis protocol) stand-in on a daemon thread.
+
+    Returns (server, cache_url). `server.calls` records command names and
+    `server.store.data` holds the raw keys.
+    """
+    calls = []
+    store = FakeRedisStore()
+    handler = type("ConfiguredFakeRedisHandler", (FakeRedisHandler,), {"store": store, "calls": calls})
+    server = socketserver.ThreadingTCPServer((host, port), handler)
+    server.daemon_threads = True
+    server.calls = calls
+    server.store = store
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"redis://{host}:{server.server_address[1]}/0"
@@ -0,0 +1,103 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .instrumentation import record_external
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+class _TimedAdapter(HTTPAdapter):
+    """Reports each call's duration to the current request's instrumentation."""
+
+    def __init__(self, upstream, **kwargs):
+        self.upstream = upstream
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            record_external(self.upstream, (time.perf_counter() - start) * 1000)
+
+
+def get_session(name: str, pool_size: int = 20) -> requests.Session:
+    """
+    Returns a process-wide requests.Session for an upstream provider.
+
+    Sessions keep connections alive between calls, so repeated requests to the
+    same host skip the TCP + TLS handshake. requests.Session is safe to share
+    across threads for plain request/response use.
+    """
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            adapter = _TimedAdapter(name, pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[name] = session
+    return session
+
+
+def jittered_backoff(attempt: int, base: float = 0.25, cap: float = 5.0) -> float:
+    """Full-jitter exponential backoff in seconds for retry `attempt` (1-based)."""
+    return random.uniform(0, min(cap, base * (2 ** max(0, attempt - 1))))
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    `allow()` returns False for `reset_seconds`. Then a single trial call is
+    let through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
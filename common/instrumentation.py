@@ -0,0 +1,263 @@
+"""
+Per-request query, SQL-time, external-HTTP and latency instrumentation.
+
+`RequestMetricsMiddleware` wraps every request. It records into
+common.metrics, labelled by the resolved view and action (e.g.
+"AttendanceLogViewSet.create"):
+
+- http_request_ms{view, method, status}: total latency histogram
+- http_request_queries{view}: queries per request histogram
+- http_request_sql_ms_total{view}: summed SQL time
+- http_request_external_ms_total{view, upstream}: time spent in outbound
+  HTTP calls made through common.http sessions (Surepass, AuthKey)
+
+Streamed responses (the CSV/XLSX exports, the events stream) are recorded
+when their body finishes or the client goes away, so their SQL and full
+duration count, not just the time to the first byte.
+
+Counting is a perf_counter pair per query. A REQUEST_SAMPLE_RATE fraction
+of requests also capture each statement. Statements that repeat within one
+request (the N+1 signature) are counted in
+http_duplicate_queries_total{view}. Sampled requests slower than
+SLOW_REQUEST_MS, or with a statement repeated DUPLICATE_QUERY_THRESHOLD
+times, are logged to "seqrview.requests" with their top statements.
+"""
+import functools
+import logging
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+logger = logging.getLogger("seqrview.requests")
+
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, 500)
+TOP_STATEMENTS = 5
+
+_current = ContextVar("request_stats", default=None)
+# Outbound calls may run on helper threads (attendance.verification.check_face)
+_external_lock = threading.Lock()
+
+# "IN (%s, %s, %s)" -> "IN (...)" so batches of different sizes share a fingerprint
+_IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+
+
+def fingerprint(sql):
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class RequestStats:
+    """What one request did. Shared by the threads it hands work to."""
+
+    __slots__ = ("queries", "sql_ms", "external_ms", "statements")
+
+    def __init__(self, sampled):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.external_ms = {}
+        # {sql: [count, total_ms]} on sampled requests only
+        self.statements = {} if sampled else None
+
+    def record_query(self, sql, elapsed_ms):
+        self.queries += 1
+        self.sql_ms += elapsed_ms
+        if self.statements is not None:
+            entry = self.statements.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed_ms
+
+    def record_external(self, upstream, elapsed_ms):
+        with _external_lock:
+            self.external_ms[upstream] = self.external_ms.get(upstream, 0.0) + elapsed_ms
+
+    def duplicates(self):
+        """{fingerprint: executions} for statements run more than once."""
+        counts = {}
+        for sql, (count, _) in self.statements.items():
+            key = fingerprint(sql)
+            counts[key] = counts.get(key, 0) + count
+        return {sql: n for sql, n in counts.items() if n > 1}
+
+
+def record_external(upstream, elapsed_ms):
+    """Called by common.http for every outbound request; no-op outside a request."""
+    stats = _current.get()
+    if stats is not None:
+        stats.record_external(upstream, elapsed_ms)
+
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, (time.perf_counter() - start) * 1000)
+
+
+def _install_query_timer(connection, **kwargs):
+    # Installed once per connection object (they outlive requests) when it
+    # first connects, so requests themselves pay nothing to set it up
+    if not getattr(connection, "_request_metrics_installed", False):
+        connection.execute_wrappers.append(_time_query)
+        connection._request_metrics_installed = True
+
+
+def view_label(request):
+    """ViewSet.action, APIView.method or function name of the resolved view."""
+    match = getattr(request, "resolver_match", None)
+    return _view_label(match and match.func, request.method)
+
+
+@functools.lru_cache(maxsize=4096)
+def _view_label(func, method):
+    if func is None:
+        return "unresolved"
+    cls = getattr(func, "cls", None) or getattr(func, "view_class", None)
+    if cls is None:
+        return getattr(func, "__name__", "unknown")
+    actions = getattr(func, "actions", None)
+    method = method.lower()
+    if actions:
+        return f"{cls.__name__}.{actions.get(method, method)}"
+    return f"{cls.__name__}.{method}"
+
+
+class _StreamRecorder:
+    """
+    A streamed response body iterated inside its request's stats. Calls
+    `finish` once, when the body is exhausted or the response is closed
+    (a client that disconnects mid-stream).
+    """
+
+    def __init__(self, content, stats, finish):
+        self.content = content
+        self.stats = stats
+        self.finish = finish
+
+    def close(self):
+        finish, self.finish = self.finish, None
+        if finish is not None:
+            finish()
+
+
+class _StreamedBody(_StreamRecorder):
+    def __iter__(self):
+        iterator = iter(self.content)
+        while True:
+            token = _current.set(self.stats)
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                self.close()
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+
+
+class _AsyncStreamedBody(_StreamRecorder):
+    async def __aiter__(self):
+        iterator = aiter(self.content)
+        while True:
+            token = _current.set(self.stats)
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                self.close()
+                return
+            finally:
+                _current.reset(token)
+            yield chunk
+
+
+@functools.lru_cache(maxsize=4096)
+def _series_labels(view, method, status_class):
+    """
+    Frozen ({view, method, status}, {view}) labels. Views, methods and
+    status classes are a small set, so these (and _view_label) are cached
+    rather than rebuilt on every request.
+    """
+    return (
+        metrics.frozen_labels({"view": view, "method": method, "status": f"{status_class}xx"}),
+        metrics.frozen_labels({"view": view}),
+    )
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_SAMPLE_RATE", 0.0)
+        self.slow_ms = getattr(settings, "SLOW_REQUEST_MS", 1000)
+        self.duplicate_threshold = getattr(settings, "DUPLICATE_QUERY_THRESHOLD", 5)
+        connection_created.connect(_install_query_timer, dispatch_uid="request_metrics_query_timer")
+        # Connections this thread opened before the middleware loaded
+        for alias in settings.DATABASES:
+            _install_query_timer(connections[alias])
+
+    def __call__(self, request):
+        stats = RequestStats(sampled=self.sample_rate > 0 and random.random() < self.sample_rate)
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if response.streaming:
+            # The body (and its SQL) runs after we return; record when it ends
+            finish = functools.partial(self.finish_stream, request, response, stats, start)
+            body = _AsyncStreamedBody if response.is_async else _StreamedBody
+            response.streaming_content = body(response.streaming_content, stats, finish)
+            return response
+        self.record(request, response, stats, (time.perf_counter() - start) * 1000)
+        return response
+
+    def finish_stream(self, request, response, stats, start):
+        self.record(request, response, stats, (time.perf_counter() - start) * 1000)
+
+    def record(self, request, response, stats, elapsed_ms):
+        view = view_label(request)
+        request_labels, labels = _series_labels(view, request.method, response.status_code // 100)
+        metrics.observe("http_request_ms", elapsed_ms, request_labels)
+        metrics.observe("http_request_queries", stats.queries, labels, buckets=QUERY_COUNT_BUCKETS)
+        if stats.sql_ms:
+            metrics.inc("http_request_sql_ms_total", labels, round(stats.sql_ms, 3))
+        for upstream, ms in stats.external_ms.items():
+            metrics.inc("http_request_external_ms_total", {"view": view, "upstream": upstream}, round(ms, 3))
+
+        if stats.statements is None:
+            return
+        metrics.inc("http_requests_sampled_total", labels)
+        duplicates = stats.duplicates()
+        if duplicates:
+            metrics.inc("http_duplicate_queries_total", labels, sum(n - 1 for n in duplicates.values()))
+        worst = max(duplicates.values(), default=0)
+        if elapsed_ms >= self.slow_ms or worst >= self.duplicate_threshold:
+            self.log(request, response, view, stats, elapsed_ms, duplicates)
+
+    def log(self, request, response, view, stats, elapsed_ms, duplicates):
+        top = sorted(stats.statements.items(), key=lambda item: -item[1][1])[:TOP_STATEMENTS]
+        external = ", ".join(f"{k}={v:.1f}ms" for k, v in stats.external_ms.items()) or "none"
+        lines = [
+            f"{request.method} {request.path} -> {response.status_code} view={view} "
+            f"total={elapsed_ms:.1f}ms queries={stats.queries} sql={stats.sql_ms:.1f}ms external: {external}"
+        ]
+        lines += [f"  {total:8.1f}ms x{count:<4} {sql[:300]}" for sql, (count, total) in top]
+        lines += [
+            f"  repeated x{n}: {sql[:300]}"
+            for sql, n in sorted(duplicates.items(), key=lambda item: -item[1])
+            if n >= self.duplicate_threshold
+        ]
+        logger.warning("\n".join(lines))
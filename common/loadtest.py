@@ -0,0 +1,418 @@
+"""
+In-process load harness for the exam-morning traffic mix.
+
+Each virtual operator replays the app's morning flow through the full
+Django stack (middleware, JWT auth, throttles) with django.test.Client:
+OTP request and verify, my-duties, the task list and a selfie check-in
+(face verification goes to a fake Surepass server). Dashboard pollers
+meanwhile cycle through the daily summary and the exam, shift center and
+role lists, revalidating with If-None-Match unless `conditional` is off. Every request records its latency, thread CPU time,
+response bytes and the SQL statements it ran on its thread's connection.
+With `push`, dashboards instead load once and hold an /api/events/ stream,
+refetching only when it asks them to resync.
+
+Driven by the `loadtest` management command. It writes to the database
+(OTP sessions, logs, status changes), so point it at a disposable one.
+"""
+import asyncio
+import datetime
+import io
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from dataclasses import dataclass
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from common.benchmarking import percentile
+
+OTP_REQUEST_PATH = "/api/identity/operator/otp/request/"
+OTP_VERIFY_PATH = "/api/identity/operator/otp/verify/"
+MY_DUTIES_PATH = "/api/assignments/my-duties/"
+TASKS_PATH = "/api/assignments/tasks/"
+CHECK_IN_PATH = "/api/attendance/logs/"
+SUMMARY_PATH = "/api/reports/summary/"
+EXAMS_PATH = "/api/operations/exams/"
+SHIFT_CENTERS_PATH = "/api/operations/shift-centers/"
+ROLES_PATH = "/api/masters/roles/"
+EVENTS_PATH = "/api/events/"
+
+PROFILE_PHOTO_NAME = "loadtest/profile.jpg"
+
+
+@dataclass
+class VirtualOperator:
+    mobile: str
+    assignment_uid: str
+    latitude: float
+    longitude: float
+
+
+class Recorder:
+    """Thread-safe per-endpoint samples of (latency ms, queries, status code, bytes, CPU ms)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+        self.failures = Counter()
+        # Live events received by dashboard listeners, by type
+        self.events = Counter()
+
+    def add(self, endpoint, elapsed_ms, queries, status_code, size=0, cpu_ms=0.0):
+        with self._lock:
+            self.samples[endpoint].append((elapsed_ms, queries, status_code, size, cpu_ms))
+
+    def event(self, event_type):
+        with self._lock:
+            self.events[event_type] += 1
+
+    def fail(self, step, error):
+        with self._lock:
+            self.failures[f"{step}: {type(error).__name__}: {error}"[:200]] += 1
+
+    def summary(self):
+        rows = []
+        for endpoint, samples in self.samples.items():
+            latencies = [s[0] for s in samples]
+            queries = [s[1] for s in samples]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(samples),
+                "errors": sum(1 for s in samples if s[2] >= 400),
+                "p50_ms": round(percentile(latencies, 50), 2),
+                "p95_ms": round(percentile(latencies, 95), 2),
+                "p99_ms": round(percentile(latencies, 99), 2),
+                "mean_queries": round(sum(queries) / len(queries), 2),
+                "max_queries": max(queries),
+                "not_modified": sum(1 for s in samples if s[2] == 304),
+                "bytes": sum(s[3] for s in samples),
+                "cpu_ms": round(sum(s[4] for s in samples), 1),
+            })
+        return rows
+
+
+def format_summary_row(row):
+    return (
+        f"{row['endpoint']:<12} n={row['requests']:<6} err={row['errors']:<4} "
+        f"p50={row['p50_ms']:>8.2f}ms p95={row['p95_ms']:>8.2f}ms p99={row['p99_ms']:>8.2f}ms "
+        f"queries mean={row['mean_queries']:<6} max={row['max_queries']:<4} "
+        f"304={row['not_modified']:<5} kb={row['bytes'] / 1024:<9.1f} cpu={row['cpu_ms']:.0f}ms"
+    )
+
+
+class Session:
+    """
+    One device: its own test client, source IP and bearer token. With
+    `conditional`, GETs send back the ETag last seen for the same URL.
+    """
+
+    def __init__(self, recorder, remote_addr, conditional=False):
+        host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost")
+        # 500s are recorded as error responses instead of raised
+        self.client = Client(raise_request_exception=False, REMOTE_ADDR=remote_addr, HTTP_HOST=host.lstrip("."))
+        self.recorder = recorder
+        self.token = None
+        self.conditional = conditional
+        self.etags = {}
+
+    def request(self, endpoint, method, path, data=None, **extra):
+        if self.token:
+            extra["HTTP_AUTHORIZATION"] = f"Bearer {self.token}"
+        cache_key = (path, repr(data)) if self.conditional and method == "get" else None
+        if cache_key in self.etags:
+            extra["HTTP_IF_NONE_MATCH"] = self.etags[cache_key]
+        # secure=True so SECURE_SSL_REDIRECT doesn't turn every call into a 301
+        with CaptureQueriesContext(connection) as ctx:
+            start, cpu_start = time.perf_counter(), time.thread_time()
+            response = getattr(self.client, method)(path, data, secure=True, **extra)
+            elapsed = (time.perf_counter() - start) * 1000
+            cpu = (time.thread_time() - cpu_start) * 1000
+        if cache_key and response.has_header("ETag"):
+            self.etags[cache_key] = response["ETag"]
+        self.recorder.add(
+            endpoint, elapsed, len(ctx.captured_queries), response.status_code, len(response.content), cpu
+        )
+        return response
+
+
+def _remote_addr(index):
+    # One address per phone so the per-IP anon throttle behaves as in the field
+    return f"10.{(index >> 16) & 255}.{(index >> 8) & 255}.{index & 255}"
+
+
+def selfie_bytes():
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (200, 170, 150)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def take_otp(otp_session_uid):
+    """
+    Reads the OTP the request view queued and removes the message so the
+    outbox worker never sends it to a synthetic number. Not timed.
+    """
+    from notifications.models import OutboundMessage
+    message = OutboundMessage.objects.get(dedupe_key=f"otp:{otp_session_uid}")
+    message.delete()
+    return message.params["otp"]
+
+
+def snapshot_exam(exam):
+    """
+    The exam settings prepare_exam overwrites, for restore_exam. Profile
+    photos are added by prepare_exam once it has chosen the operators.
+    """
+    from operations.models import Exam, Shift
+
+    return {
+        "exam": Exam.objects.filter(pk=exam.pk).values("pk", "is_geofencing_enabled", "is_selfie_enabled").get(),
+        "shifts": list(Shift.objects.filter(exam=exam).values("pk", "work_date", "start_time", "end_time")),
+        "photos": {},
+    }
+
+
+def restore_exam(snapshot):
+    """Puts back the exam flags, shift times and profile photos saved by snapshot_exam / prepare_exam."""
+    from collections import defaultdict
+
+    from django.contrib.auth import get_user_model
+
+    from common.reference_cache import invalidate
+    from operations.models import Exam, Shift
+
+    exam = dict(snapshot["exam"])
+    Exam.objects.filter(pk=exam.pop("pk")).update(**exam)
+    Shift.objects.bulk_update(
+        [Shift(**shift) for shift in snapshot["shifts"]], ["work_date", "start_time", "end_time"], batch_size=500,
+    )
+    by_photo = defaultdict(list)
+    for user_id, photo in snapshot["photos"].items():
+        by_photo[photo].append(user_id)
+    User = get_user_model()
+    for photo, user_ids in by_photo.items():
+        User.objects.filter(pk__in=user_ids).update(photo=photo)
+    invalidate("exam")
+    invalidate("checkin")
+
+
+def prepare_exam(exam, limit, snapshot):
+    """
+    Opens `exam` for check-in right now (geofence and selfie on, every shift
+    moved to today 00:00-23:59), gives the chosen operators a profile photo
+    and returns up to `limit` VirtualOperators, one per operator with a
+    PENDING/CONFIRMED assignment. Operators whose mobile is shared with
+    another operator are skipped, since OTP login can't tell them apart.
+    The operators' current photos are recorded in `snapshot` (see
+    snapshot_exam) before they are replaced.
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.db.models import Count
+
+    from assignments.models import OperatorAssignment
+    from common.reference_cache import invalidate
+    from operations.models import Exam, Shift
+
+    User = get_user_model()
+    Exam.objects.filter(pk=exam.pk).update(is_geofencing_enabled=True, is_selfie_enabled=True)
+    Shift.objects.filter(exam=exam).update(
+        work_date=timezone.localdate(), start_time=datetime.time(0, 0), end_time=datetime.time(23, 59, 59)
+    )
+    # update() skips the signals that normally drop these
+    invalidate("exam")
+    invalidate("checkin")
+
+    rows = (
+        OperatorAssignment.objects.filter(shift_center__exam=exam, status__in=["PENDING", "CONFIRMED"])
+        .order_by("pk")
+        .values_list(
+            "uid", "operator_id", "operator__mobile_primary",
+            "shift_center__exam_center__latitude", "shift_center__exam_center__longitude",
+        )
+    )
+    chosen = {}
+    for uid, operator_id, mobile, lat, lon in rows.iterator(chunk_size=2000):
+        if mobile and operator_id not in chosen:
+            chosen[operator_id] = VirtualOperator(mobile, str(uid), float(lat or 0), float(lon or 0))
+        if len(chosen) >= limit * 2:
+            break
+
+    mobiles = [op.mobile for op in chosen.values()]
+    shared = set(
+        User.objects.filter(user_type="OPERATOR", mobile_primary__in=mobiles)
+        .order_by().values("mobile_primary").annotate(n=Count("id")).filter(n__gt=1)
+        .values_list("mobile_primary", flat=True)
+    )
+    operators = {pk: op for pk, op in chosen.items() if op.mobile not in shared}
+    operators = dict(list(operators.items())[:limit])
+
+    snapshot["photos"].update(User.objects.filter(pk__in=list(operators)).values_list("pk", "photo"))
+    photo = default_storage.save(PROFILE_PHOTO_NAME, ContentFile(selfie_bytes()))
+    User.objects.filter(pk__in=list(operators)).update(photo=photo)
+    return list(operators.values())
+
+
+def operator_session(recorder, operator, index, selfie):
+    step = "otp_request"
+    session = Session(recorder, _remote_addr(index))
+    try:
+        response = session.request(
+            "otp_request", "post", OTP_REQUEST_PATH, {"mobile": operator.mobile}, content_type="application/json"
+        )
+        if response.status_code != 200:
+            return
+        otp_session_uid = response.json()["otp_session_uid"]
+
+        step = "otp_verify"
+        response = session.request(
+            "otp_verify", "post", OTP_VERIFY_PATH,
+            {"otp_session_uid": otp_session_uid, "otp": take_otp(otp_session_uid)},
+            content_type="application/json",
+        )
+        if response.status_code != 200:
+            return
+        session.token = response.json()["tokens"]["access"]
+
+        step = "my_duties"
+        session.request("my_duties", "get", MY_DUTIES_PATH)
+        step = "tasks"
+        session.request("tasks", "get", TASKS_PATH, {"assignment": operator.assignment_uid})
+
+        step = "check_in"
+        session.request("check_in", "post", CHECK_IN_PATH, {
+            "assignment_id": operator.assignment_uid,
+            "latitude": str(operator.latitude),
+            "longitude": str(operator.longitude),
+            "activity_type": "CHECK_IN",
+            "selfie": SimpleUploadedFile("selfie.jpg", selfie, content_type="image/jpeg"),
+        })
+    except Exception as e:
+        recorder.fail(step, e)
+    finally:
+        connection.close()
+
+
+def dashboard_requests(exam):
+    """(endpoint, path, params) for one dashboard refresh while `exam` runs."""
+    shift = exam.shifts.order_by("pk").first()
+    return [
+        ("summary", SUMMARY_PATH, None),
+        ("exams", EXAMS_PATH, None),
+        ("centers", SHIFT_CENTERS_PATH, {"shift": str(shift.uid)} if shift else None),
+        ("roles", ROLES_PATH, None),
+    ]
+
+
+def dashboard_poller(recorder, token, index, stop, interval, requests, conditional):
+    session = Session(recorder, _remote_addr(60000 + index), conditional=conditional)
+    session.token = token
+    try:
+        while not stop.is_set():
+            for endpoint, path, params in requests:
+                session.request(endpoint, "get", path, params)
+            stop.wait(interval)
+    except Exception as e:
+        recorder.fail("summary", e)
+    finally:
+        connection.close()
+
+
+def _event_type(chunk):
+    for line in chunk.decode().splitlines():
+        if line.startswith("event: "):
+            return line[len("event: "):]
+    return None
+
+
+async def _listen(recorder, session, stop, requests):
+    # Streams send a heartbeat at least every EVENTS_HEARTBEAT_SECONDS, which
+    # is how often `stop` gets checked. AsyncClient always sends
+    # Host: testserver, which the loadtest command allows.
+    client = AsyncClient(raise_request_exception=False)
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get(EVENTS_PATH, secure=True, headers={"Authorization": f"Bearer {session.token}"})
+        recorder.add("events", (time.perf_counter() - start) * 1000, 0, response.status_code)
+        if response.status_code != 200:
+            return
+        async with aclosing(aiter(response.streaming_content)) as chunks:
+            async for chunk in chunks:
+                if stop.is_set():
+                    return
+                event_type = _event_type(chunk)
+                if event_type is None:
+                    continue
+                recorder.event(event_type)
+                if event_type == "resync":
+                    await sync_to_async(refresh_dashboard, thread_sensitive=False)(session, requests)
+
+
+def refresh_dashboard(session, requests):
+    for endpoint, path, params in requests:
+        session.request(endpoint, "get", path, params)
+
+
+def dashboard_listener(recorder, token, index, stop, requests):
+    """A dashboard on server push: one full load, then the events stream until `stop`."""
+    session = Session(recorder, _remote_addr(60000 + index))
+    session.token = token
+    try:
+        refresh_dashboard(session, requests)
+        asyncio.run(_listen(recorder, session, stop, requests))
+    except Exception as e:
+        recorder.fail("events", e)
+    finally:
+        connection.close()
+
+
+def run(operators, admin_tokens=(), concurrency=20, ramp_seconds=10.0, poll_interval=2.0,
+        dashboard=(("summary", SUMMARY_PATH, None),), conditional=True, push=False):
+    """
+    Replays the morning flow for every VirtualOperator, starting them evenly
+    over `ramp_seconds` with at most `concurrency` in flight, while one
+    poller per admin token refreshes the `dashboard` requests (see
+    dashboard_requests), or with `push` listens on /api/events/ instead.
+    Returns (recorder, seconds).
+    """
+    recorder = Recorder()
+    selfie = selfie_bytes()
+    stop = threading.Event()
+    pollers = [
+        threading.Thread(
+            target=dashboard_listener, args=(recorder, token, i, stop, dashboard), daemon=True,
+        ) if push else threading.Thread(
+            target=dashboard_poller, args=(recorder, token, i, stop, poll_interval, dashboard, conditional),
+            daemon=True,
+        )
+        for i, token in enumerate(admin_tokens)
+    ]
+
+    start = time.perf_counter()
+    for poller in pollers:
+        poller.start()
+
+    def scheduled(index, operator):
+        delay = start + ramp_seconds * index / max(1, len(operators)) - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        operator_session(recorder, operator, index, selfie)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(scheduled, i, op) for i, op in enumerate(operators)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    for poller in pollers:
+        poller.join()
+    return recorder, elapsed
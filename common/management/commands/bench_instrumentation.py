@@ -0,0 +1,99 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import Client, RequestFactory
+from django.test.utils import override_settings
+from django.urls import resolve
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from assignments.models import OperatorAssignment
+from common.benchmarking import rollback_fixture
+from common.instrumentation import RequestMetricsMiddleware
+from common.synthetic import seed_exam
+
+MIDDLEWARE_PATH = "common.instrumentation.RequestMetricsMiddleware"
+
+
+def make_client(token, instrumented, sample_rate):
+    """A test client whose handler is built with or without the metrics middleware."""
+    middleware = [m for m in settings.MIDDLEWARE if m != MIDDLEWARE_PATH]
+    if instrumented:
+        middleware.insert(0, MIDDLEWARE_PATH)
+    host = next((h for h in settings.ALLOWED_HOSTS if h and h != "*"), "localhost")
+    client = Client(HTTP_HOST=host.lstrip("."), HTTP_AUTHORIZATION=f"Bearer {token}")
+    # The handler loads its middleware chain on the first request
+    with override_settings(MIDDLEWARE=middleware, REQUEST_SAMPLE_RATE=sample_rate, REQUEST_METRICS_ENABLED=True):
+        client.get("/api/health/", secure=True)
+    return client
+
+
+def middleware_cost_us(sample_rate, iterations=20000):
+    """Per-request cost of the middleware alone, around a view that does nothing."""
+    request = RequestFactory().get("/api/health/")
+    request.resolver_match = resolve("/api/health/")
+    response = HttpResponse()
+    with override_settings(REQUEST_SAMPLE_RATE=sample_rate, REQUEST_METRICS_ENABLED=True):
+        middleware = RequestMetricsMiddleware(lambda r: response)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        middleware(request)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def time_block(client, path, requests, throttle_key):
+    # The user throttle would start answering 429 part-way through
+    cache.delete(throttle_key)
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(path, secure=True)
+    return (time.perf_counter() - start) / requests * 1000
+
+
+class Command(BaseCommand):
+    help = "Measures RequestMetricsMiddleware overhead against the same stack without it"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rounds", type=int, default=30)
+        parser.add_argument("--requests", type=int, default=50, help="Requests per variant per round")
+        parser.add_argument("--sample-rate", type=float, default=0.01)
+
+    def handle(self, *args, **options):
+        with rollback_fixture():
+            seeded = seed_exam(centers=20, operators_per_center=5, shifts=3)
+            operator = get_user_model().objects.get(
+                pk=OperatorAssignment.objects.filter(shift_center__exam=seeded["exam"]).values("operator_id")[:1]
+            )
+            token = str(RefreshToken.for_user(operator).access_token)
+            throttle_key = f"throttle_user_{operator.pk}"
+            variants = {
+                "plain": make_client(token, False, 0.0),
+                f"sampled@{options['sample_rate']:g}": make_client(token, True, options["sample_rate"]),
+                "sampled@1": make_client(token, True, 1.0),
+            }
+            # Over a high slow threshold, so the fully sampled variant doesn't time log writes
+            with override_settings(SLOW_REQUEST_MS=10 ** 9, DUPLICATE_QUERY_THRESHOLD=10 ** 9):
+                for path in ("/api/assignments/my-duties/", "/api/health/"):
+                    samples = {label: [] for label in variants}
+                    # Interleaved, rotating rounds so drift (GC, caches, CPU boost) hits every variant alike
+                    order = list(variants.items())
+                    for _ in range(options["rounds"]):
+                        order.append(order.pop(0))
+                        for label, client in order:
+                            samples[label].append(time_block(client, path, options["requests"], throttle_key))
+                    base = statistics.median(samples["plain"])
+                    for label, values in samples.items():
+                        median = statistics.median(values)
+                        self.stdout.write(
+                            f"{path:<28} {label:<14} median={median:8.3f}ms/request "
+                            f"overhead={(median - base) / base * 100:+6.2f}%"
+                        )
+                    # End-to-end medians are noisy at this scale; the isolated cost is the steadier figure
+                    cost = middleware_cost_us(options["sample_rate"])
+                    self.stdout.write(
+                        f"{path:<28} middleware alone {cost:.1f}us/request = {cost / 10 / base:.2f}% of plain"
+                    )
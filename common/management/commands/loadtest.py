@@ -0,0 +1,166 @@
+import json
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common import loadtest
+from common.fakes import start_fake_server
+from common.synthetic import purge_exam, seed_exam
+from kyc.surepass_client import reset_surepass_client
+from operations.models import Exam
+
+
+def parse_budgets(values):
+    budgets = {}
+    for value in values or ():
+        endpoint, _, limit = value.partition("=")
+        try:
+            budgets[endpoint] = int(limit)
+        except ValueError:
+            raise CommandError(f"--max-queries expects ENDPOINT=N, got {value!r}")
+    return budgets
+
+
+class Command(BaseCommand):
+    help = (
+        "Replays the exam-morning storm (OTP login, my-duties, tasks, selfie check-in, dashboard polling) "
+        "in-process and reports p50/p95/p99, queries, bytes and CPU per endpoint. "
+        "Writes data: use a disposable database. With --exam, the exam's flags, shift times and the "
+        "operators' photos are restored afterwards, but the logins, check-ins and status changes remain."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operators", type=int, default=200, help="Virtual operators to log in and check in")
+        parser.add_argument("--concurrency", type=int, default=20, help="Operators in flight at once")
+        parser.add_argument("--ramp-seconds", type=float, default=10.0, help="Spread operator arrivals over this long")
+        parser.add_argument("--pollers", type=int, default=2, help="Admin dashboards polling summary and lists")
+        parser.add_argument("--poll-interval", type=float, default=2.0)
+        parser.add_argument(
+            "--no-conditional", action="store_true",
+            help="Dashboard pollers refetch in full instead of revalidating with If-None-Match",
+        )
+        parser.add_argument(
+            "--push", action="store_true",
+            help="Dashboards load once and follow /api/events/ instead of polling",
+        )
+        parser.add_argument("--surepass-latency-ms", type=int, default=300, help="Fake Surepass delay per call")
+        parser.add_argument(
+            "--exam",
+            help="Run against this existing exam code instead of seeding one "
+                 "(needs --i-understand-this-modifies-data unless DEBUG is on)",
+        )
+        parser.add_argument(
+            "--i-understand-this-modifies-data", action="store_true", dest="modify_data",
+            help="Allow --exam outside DEBUG: its operators are logged in and checked in for real",
+        )
+        parser.add_argument("--centers", type=int, default=100, help="Centers in the seeded exam")
+        parser.add_argument("--operators-per-center", type=int, default=6)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded exam afterwards")
+        parser.add_argument("--json", help="Write the per-endpoint summary to this path")
+        parser.add_argument(
+            "--max-queries", action="append", metavar="ENDPOINT=N",
+            help="Fail if any request to ENDPOINT ran more than N queries (repeatable)",
+        )
+        parser.add_argument("--fail-on-errors", action="store_true", help="Fail on any 4xx/5xx or crashed session")
+
+    def handle(self, *args, **options):
+        budgets = parse_budgets(options["max_queries"])
+        User = get_user_model()
+
+        seeded = None
+        if options["exam"] and not (options["modify_data"] or settings.DEBUG):
+            raise CommandError(
+                "--exam checks in the exam's real operators and leaves their attendance logs and "
+                "assignment statuses changed. Pass --i-understand-this-modifies-data to run it anyway."
+            )
+        if options["exam"]:
+            try:
+                exam = Exam.objects.get(exam_code=options["exam"])
+            except Exam.DoesNotExist:
+                raise CommandError(f"Exam {options['exam']} not found")
+        else:
+            seeded = seed_exam(
+                centers=options["centers"], operators_per_center=options["operators_per_center"],
+                incidents_per_center=1,
+            )
+            exam = seeded["exam"]
+            self.stdout.write(f"Seeded {exam.exam_code}: {seeded['assignments']} assignments")
+
+        tag = uuid.uuid4().hex[:8]
+        admins = [
+            User.objects.create_user(
+                username=f"loadtest_{tag}_{i}", user_type="INTERNAL_ADMIN" if i % 2 == 0 else "CLIENT_ADMIN",
+                client=None if i % 2 == 0 else exam.client, is_superuser=i % 2 == 0,
+            )
+            for i in range(options["pollers"])
+        ]
+        server, surepass_url = start_fake_server("surepass", latency_ms=options["surepass_latency_ms"])
+        media_root = tempfile.mkdtemp(prefix="loadtest-media-")
+        snapshot = loadtest.snapshot_exam(exam)
+
+        try:
+            with override_settings(
+                SUREPASS_BASE_URL=surepass_url, SUREPASS_TOKEN="loadtest", MEDIA_ROOT=media_root,
+                ATTENDANCE_PROVISIONAL_CHECKIN=False,
+                # --push: a fast heartbeat lets listeners notice the end of the run
+                EVENTS_HEARTBEAT_SECONDS=1, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                reset_surepass_client()
+                operators = loadtest.prepare_exam(exam, options["operators"], snapshot)
+                if not operators:
+                    raise CommandError(f"{exam.exam_code} has no PENDING/CONFIRMED assignments to check in")
+                self.stdout.write(
+                    f"Running {len(operators)} operators, concurrency {options['concurrency']}, "
+                    f"{len(admins)} dashboard pollers"
+                )
+                recorder, elapsed = loadtest.run(
+                    operators,
+                    admin_tokens=[str(RefreshToken.for_user(admin).access_token) for admin in admins],
+                    concurrency=options["concurrency"],
+                    ramp_seconds=options["ramp_seconds"],
+                    poll_interval=options["poll_interval"],
+                    dashboard=loadtest.dashboard_requests(exam),
+                    conditional=not options["no_conditional"],
+                    push=options["push"],
+                )
+        finally:
+            if seeded is None:
+                loadtest.restore_exam(snapshot)
+            reset_surepass_client()
+            server.shutdown()
+            User.objects.filter(pk__in=[admin.pk for admin in admins]).delete()
+            if seeded and not options["keep"]:
+                purge_exam(seeded)
+
+        rows = sorted(recorder.summary(), key=lambda row: row["endpoint"])
+        total = sum(row["requests"] for row in rows)
+        for row in rows:
+            self.stdout.write(loadtest.format_summary_row(row))
+        self.stdout.write(f"{total} requests in {elapsed:.1f}s ({total / elapsed:.1f} req/s)")
+        if recorder.events:
+            self.stdout.write("events pushed: " + ", ".join(f"{k}={v}" for k, v in sorted(recorder.events.items())))
+        for failure, count in recorder.failures.most_common():
+            self.stderr.write(self.style.ERROR(f"{count} x {failure}"))
+
+        if options["json"]:
+            with open(options["json"], "w") as f:
+                json.dump({
+                    "elapsed_s": round(elapsed, 2), "endpoints": rows, "events": dict(recorder.events),
+                    "failures": dict(recorder.failures),
+                }, f, indent=2)
+
+        problems = [
+            f"{row['endpoint']} ran up to {row['max_queries']} queries (budget {budgets[row['endpoint']]})"
+            for row in rows if row["endpoint"] in budgets and row["max_queries"] > budgets[row["endpoint"]]
+        ]
+        if options["fail_on_errors"]:
+            problems += [f"{row['endpoint']}: {row['errors']} error responses" for row in rows if row["errors"]]
+            if recorder.failures:
+                problems.append(f"{sum(recorder.failures.values())} crashed sessions")
+        if problems:
+            raise CommandError("; ".join(problems))
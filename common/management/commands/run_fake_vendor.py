@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.fakes import HANDLERS, start_fake_redis, start_fake_server
+
+
+class Command(BaseCommand):
+    help = "Runs a local fake of a third-party provider API (for tests and load runs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("vendor", choices=sorted(HANDLERS) + ["redis"])
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=int, default=0, help="Artificial delay per request")
+        parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 502")
+
+    def handle(self, *args, **options):
+        if options["vendor"] == "redis":
+            server, base_url = start_fake_redis(host=options["host"], port=options["port"])
+        else:
+            server, base_url = start_fake_server(
+                options["vendor"],
+                host=options["host"],
+                port=options["port"],
+                latency_ms=options["latency_ms"],
+                fail_rate=options["fail_rate"],
+            )
+        self.stdout.write(self.style.SUCCESS(f"Fake {options['vendor']} listening on {base_url} (Ctrl+C to stop)"))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -0,0 +1,49 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.synthetic import seed_platform
+
+
+class Command(BaseCommand):
+    help = "Creates synthetic clients, exams, shifts, centers and assignments for benchmarks and load runs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=3)
+        parser.add_argument("--exams-per-client", type=int, default=2)
+        parser.add_argument("--shifts", type=int, default=2, help="Shifts per exam")
+        parser.add_argument("--centers", type=int, default=200, help="Median centers per exam")
+        parser.add_argument("--operators-per-center", type=int, default=6, help="Mean staff per shift center")
+        parser.add_argument("--date", help="Work date (YYYY-MM-DD, default today)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed")
+
+    def handle(self, *args, **options):
+        work_date = None
+        if options["date"]:
+            try:
+                work_date = datetime.date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError("--date must be YYYY-MM-DD")
+
+        start = time.perf_counter()
+        results = seed_platform(
+            clients=options["clients"],
+            exams_per_client=options["exams_per_client"],
+            shifts=options["shifts"],
+            centers=options["centers"],
+            operators_per_center=options["operators_per_center"],
+            work_date=work_date,
+            rng=random.Random(options["seed"]),
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['exam'].exam_code:<12} client={result['client'].client_code:<12} "
+                f"shift_centers={result['shift_centers']:<7} operators={result['operators']:<7} "
+                f"assignments={result['assignments']}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(results)} exams, {sum(r['assignments'] for r in results)} assignments "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
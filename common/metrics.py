@@ -0,0 +1,150 @@
+"""
+In-process metrics: counters and latency histograms.
+
+Values live in the worker process that recorded them (no shared store), so
+each gunicorn worker reports its own numbers. Read them with `snapshot()`
+or GET /api/metrics/, or scrape them in Prometheus text format from
+/api/metrics/prometheus/ (`render_prometheus()`).
+"""
+import bisect
+import threading
+
+# Upper bounds in milliseconds; the last bucket is +Inf
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def frozen_labels(labels):
+    """
+    `labels` as the sorted tuple series are keyed by. Hot callers can pass
+    this to inc()/observe() in place of a dict to skip re-sorting it.
+    """
+    return tuple(sorted(labels.items()))
+
+
+def _key(name, labels):
+    if isinstance(labels, tuple):
+        return (name, labels)
+    return (name, frozen_labels(labels) if labels else ())
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return float(self.buckets[i]) if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 1),
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"], self.counts)),
+        }
+
+
+def inc(name, labels=None, value=1):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name, value_ms, labels=None, buckets=DEFAULT_BUCKETS_MS):
+    """Records one observation; `buckets` only applies when the series is first created."""
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = Histogram(buckets)
+        hist.observe(value_ms)
+
+
+def snapshot():
+    """Returns {"counters": [...], "histograms": [...]} with labels as dicts."""
+    with _lock:
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_counters.items())
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), **hist.as_dict()}
+                for (name, labels), hist in sorted(_histograms.items())
+            ],
+        }
+
+
+def _prometheus_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _prometheus_number(value):
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_prometheus():
+    """
+    Renders every counter and histogram in the Prometheus text exposition
+    format (0.0.4). Histogram buckets keep their recorded unit (ms for
+    latencies) and are written cumulatively as Prometheus expects.
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = [(key, hist.buckets, list(hist.counts), hist.count, hist.sum)
+                      for key, hist in sorted(_histograms.items())]
+
+    lines = []
+    typed = set()
+    for (name, labels), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE {name} counter")
+            typed.add(name)
+        lines.append(f"{name}{_prometheus_labels(labels)} {_prometheus_number(value)}")
+
+    for (name, labels), buckets, counts, count, total in histograms:
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, n in zip(list(buckets) + [float("inf")], counts):
+            cumulative += n
+            le = _prometheus_number(float(bound))
+            lines.append(f"{name}_bucket{_prometheus_labels(labels, [('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_prometheus_labels(labels)} {_prometheus_number(float(total))}")
+        lines.append(f"{name}_count{_prometheus_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
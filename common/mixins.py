@@ -1,68 +1,112 @@
-import csv
-import io
-from django.http import StreamingHttpResponse
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import FileResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
+from .exports import XLSXUnavailable, compile_columns, streaming_csv_response, wants_gzip, xlsx_file
+
+
 class ExportMixin:
     """
-    Mixin to add CSV export functionality to a ViewSet.
+    Mixin to add CSV / XLSX export functionality to a ViewSet.
+
+    ViewSets may declare `export_columns`, a list of common.exports.ExportColumn.
+    The export then runs as a single values_list() query over the filtered
+    queryset, with no serializer in the loop. Without it, each row goes
+    through the ViewSet's serializer (slower, but needs no setup).
+
+    Query params: `file_format=xlsx` (needs openpyxl), `gzip=1` for CSV.
     """
-    
+    export_columns = None
+
+    def get_export_columns(self):
+        return self.export_columns
+
+    def export_serializer_rows(self, queryset):
+        """Fallback: header and rows produced by the ViewSet's serializer."""
+        serializer = self.get_serializer_class()()
+        # Only include fields that are readable
+        readable_fields = [f for f, field in serializer.fields.items() if not field.write_only]
+        header = [f.replace('_', ' ').title() for f in readable_fields]
+
+        def rows():
+            # chunk_size keeps prefetch_related() working (one prefetch per chunk)
+            for instance in queryset.iterator(chunk_size=2000):
+                data = serializer.to_representation(instance)
+                yield ["" if data.get(f) is None else str(data.get(f)) for f in readable_fields]
+
+        return header, rows()
+
     @action(detail=False, methods=['get'])
     def export(self, request, *args, **kwargs):
         # Apply filters
         queryset = self.filter_queryset(self.get_queryset())
-        
-        # Use serializer to define columns/data if available, else models values
-        serializer_class = self.get_serializer_class()
-        
-        # Generator for streaming
-        def csv_generator():
-            # Create a memory buffer
-            buffer = io.StringIO()
-            writer = csv.writer(buffer)
-            
-            # Write Header
-            # We try to infer fields from serializer
-            serializer = serializer_class()
-            field_names = list(serializer.fields.keys())
-            
-            # Only include fields that are readable
-            readable_fields = [
-                f for f in field_names 
-                if not serializer.fields[f].write_only
-            ]
-            
-            writer.writerow([f.replace('_', ' ').title() for f in readable_fields])
-            yield buffer.getvalue()
-            buffer.seek(0)
-            buffer.truncate(0)
-            
-            # Write Data
-            # For performance, we might want to iterate queryset directly
-            # But utilizing serializer ensures formatted data (e.g. choice labels, nested fields)
-            # Trade-off: Serializer is slower but correct presentation.
-            # Optimization: Use iterator() on queryset
-            
-            for instance in queryset.iterator():
-                data = serializer.to_representation(instance)
-                row = []
-                for field in readable_fields:
-                    val = data.get(field, "")
-                    if val is None:
-                        val = ""
-                    row.append(str(val))
-                
-                writer.writerow(row)
-                yield buffer.getvalue()
-                buffer.seek(0)
-                buffer.truncate(0)
-
-        filename = f"{self.basename}_export.csv"
-        response = StreamingHttpResponse(
-            csv_generator(), 
-            content_type="text/csv"
-        )
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+
+        columns = self.get_export_columns()
+        if columns:
+            header, rows = compile_columns(queryset, columns)
+        else:
+            header, rows = self.export_serializer_rows(queryset)
+
+        filename = f"{self.basename}_export"
+        if request.query_params.get('file_format') == 'xlsx':
+            try:
+                return FileResponse(xlsx_file(header, rows), as_attachment=True, filename=f"{filename}.xlsx")
+            except XLSXUnavailable as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return streaming_csv_response(f"{filename}.csv", header, rows, gzip=wants_gzip(request))
+
+
+class ConditionalGetMixin:
+    """
+    Weak ETags for list and retrieve, checked before anything is serialized.
+
+    The fingerprint is one aggregate query over the filtered queryset: row
+    count and MAX(updated_at), plus count and MAX(updated_at) for every
+    relation in `etag_related` whose data the serializer embeds. Hashed
+    with the user, query string and media type it becomes the ETag. A
+    request whose If-None-Match matches gets 304 without the page being
+    loaded or serialized. Retrieve fingerprints the one object the same
+    way.
+
+    Values that change without a write (e.g. Shift.is_locked as the clock
+    passes the end time) need their own entries from
+    get_etag_aggregates().
+    """
+    etag_related = ()
+
+    def get_etag_aggregates(self):
+        aggregates = {'count': Count('pk', distinct=True), 'updated': Max('updated_at')}
+        for path in self.etag_related:
+            aggregates[f'{path}_count'] = Count(path, distinct=True)
+            aggregates[f'{path}_updated'] = Max(f'{path}__updated_at')
+        return aggregates
+
+    def get_etag_fingerprint(self, queryset):
+        return sorted(queryset.order_by().aggregate(**self.get_etag_aggregates()).items())
+
+    def make_etag(self, fingerprint):
+        request = self.request
+        raw = repr((fingerprint, request.user.pk, request.get_full_path(), request.accepted_media_type))
+        return f'W/"{hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()}"'
+
+    def conditional_response(self, etag, render):
+        """304 if If-None-Match matches `etag`, else render(); tagged either way."""
+        response = get_conditional_response(self.request, etag=etag) or render()
+        response['ETag'] = etag
+        # Clients revalidate every time; Authorization-scoped, so never shared
+        patch_cache_control(response, private=True, no_cache=True)
         return response
+
+    def list(self, request, *args, **kwargs):
+        etag = self.make_etag(self.get_etag_fingerprint(self.filter_queryset(self.get_queryset())))
+        return self.conditional_response(etag, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.make_etag(self.get_etag_fingerprint(self.get_queryset().filter(pk=instance.pk)))
+        return self.conditional_response(etag, lambda: Response(self.get_serializer(instance).data))
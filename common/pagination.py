@@ -0,0 +1,150 @@
+"""
+Pagination shared by the list endpoints.
+
+`StandardResultsSetPagination` pages by number (`?page=`, `?page_size=`),
+as the web dashboard expects. Sending a `cursor` param switches the
+request to keyset paging instead:
+
+    GET /api/assignments/?cursor=            first page
+    GET /api/assignments/?cursor=<next>      following pages
+
+Keyset pages filter on the last row seen, e.g. (assigned_at, id) <
+(last assigned_at, last id), rather than OFFSET. There is no COUNT(*)
+either, so every page costs the same however deep it is. That suits the
+mobile app and sync jobs walking millions of rows. The order comes from
+the view's `keyset_ordering` (default newest `created_at` first, `id`
+breaking ties). A composite index on those columns backs it, and
+`?ordering=` is ignored in this mode. Paging is forward-only: the
+response carries `next` and `results`.
+"""
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    # (field, tie-breaker), both descending ('-') or both ascending
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, 'keyset_ordering', None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def encode_cursor(self, values):
+        raw = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token, model, ordering):
+        """
+        [field value, tie-breaker] from a `next` token, or None for the first
+        page. Each value must convert to its `ordering` field on `model`.
+        """
+        if not token:
+            return None
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            fields = [model._meta.get_field(name.lstrip('-')) for name in ordering]
+            position = [field.to_python(v) for field, v in zip(fields, (value, pk))]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return tuple(position)
+
+    def seek(self, queryset, ordering, position):
+        """Rows strictly after `position` in `ordering`."""
+        descending = ordering[0].startswith('-')
+        field, tie = (name.lstrip('-') for name in ordering)
+        after = 'lt' if descending else 'gt'
+        value, pk = position
+        # The outer (field <= value) bound lets the composite index seek
+        # straight to the cursor; the OR alone would be applied as a filter
+        # while scanning from the first row
+        return queryset.filter(
+            Q(**{f'{field}__{after}e': value}),
+            Q(**{f'{field}__{after}': value}) | Q(**{f'{tie}__{after}': pk}),
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        token = request.query_params.get(self.cursor_query_param)
+        position = self.decode_cursor(token, queryset.model, ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = self.seek(queryset, ordering, position)
+
+        # One extra row tells whether there is a next page
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.next_position = None
+        if self.has_next:
+            last = rows[-1]
+            self.next_position = [getattr(last, name.lstrip('-')) for name in ordering]
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """Page numbers by default; keyset paging when the request sends `cursor`."""
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    keyset_class = KeysetPagination
+
+    keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            self.display_page_controls = False
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
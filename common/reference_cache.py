@@ -0,0 +1,207 @@
+"""
+Cached lookups for hot reference data (roles, incident categories,
+clients, exam flags, shift-center tenancy for the events bus, and the
+per-shift-center check-in fences kept by attendance.checkin).
+
+Entries live in the default Django cache (local LRU, or Redis when
+CACHE_URL is set) for REFERENCE_CACHE_SECONDS. Each kind has a version
+number inside its keys. common.signals bumps the version after any save
+or delete commits, which drops every entry of that kind at once. With the
+local backend, other worker processes only see a change once their TTL
+runs out.
+
+Until that commit, the transaction that made the change reads the kind
+straight from the database, and a value loaded while the version moved is
+stored under the version it was read for, where nothing looks it up.
+
+Hits and misses are counted in common.metrics as
+`reference_cache_lookups{kind, result}`.
+"""
+from functools import partial
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from common import metrics
+
+KINDS = ("role", "incident_category", "client", "exam", "scope", "checkin")
+
+_MISSING = object()
+
+
+def _ttl():
+    return getattr(settings, "REFERENCE_CACHE_SECONDS", 300)
+
+
+def _version_key(kind):
+    return f"ref:{kind}:version"
+
+
+def _key(kind, name):
+    version = cache.get(_version_key(kind), 0)
+    return f"ref:{kind}:{version}:{name}"
+
+
+def invalidate(kind):
+    """Drops every cached entry of `kind` by bumping its version."""
+    try:
+        cache.incr(_version_key(kind))
+    except ValueError:
+        cache.set(_version_key(kind), 1, None)
+
+
+def invalidate_on_commit(kind):
+    transaction.on_commit(partial(invalidate, kind))
+
+
+def _changed_in_transaction(kind):
+    """True while the current transaction holds an uncommitted invalidate_on_commit(kind)."""
+    connection = transaction.get_connection()
+    # Django drops the callbacks of rolled-back savepoints from run_on_commit
+    return connection.in_atomic_block and any(
+        isinstance(func, partial) and func.func is invalidate and func.args == (kind,)
+        for _, func, _ in connection.run_on_commit
+    )
+
+
+def _get(kind, key):
+    # Stored wrapped in a tuple so a cached None is distinguishable from a miss
+    entry = cache.get(key, _MISSING)
+    hit = entry is not _MISSING
+    metrics.inc("reference_cache_lookups", {"kind": kind, "result": "hit" if hit else "miss"})
+    return hit, entry[0] if hit else None
+
+
+def lookup(kind, name):
+    """
+    Returns (hit, value) for (kind, name) and records the hit or miss.
+    Unlike cached(), lookup/store don't look at the current transaction:
+    they are for hot paths (check-in) that never write what they read.
+    """
+    return _get(kind, _key(kind, name))
+
+
+def store(kind, name, value, timeout=None):
+    cache.set(_key(kind, name), (value,), _ttl() if timeout is None else timeout)
+
+
+def cached(kind, name, loader):
+    """
+    Returns the cached value for (kind, name), calling `loader()` on a miss.
+    None results are cached too, so unknown ids don't hit the database
+    every time.
+    """
+    if _changed_in_transaction(kind):
+        return loader()
+    key = _key(kind, name)
+    hit, value = _get(kind, key)
+    if not hit:
+        value = loader()
+        cache.set(key, (value,), _ttl())
+    return value
+
+
+# --- Roles ---
+
+def active_roles():
+    """Active RoleMaster rows in default (name) order."""
+    from masters.models import RoleMaster
+    return cached("role", "active", lambda: list(RoleMaster.objects.filter(is_active=True)))
+
+
+def roles_by_name():
+    """{lower-cased name: RoleMaster}, lowest pk winning on duplicate names."""
+    from masters.models import RoleMaster
+
+    def load():
+        roles = {}
+        for role in RoleMaster.objects.order_by('pk'):
+            roles.setdefault(role.name.lower(), role)
+        return roles
+
+    return cached("role", "by_name", load)
+
+
+def get_role(uid):
+    from masters.models import RoleMaster
+    return cached("role", f"uid:{uid}", lambda: RoleMaster.objects.filter(uid=uid).first())
+
+
+# --- Incident categories ---
+
+def active_incident_categories():
+    from support.models import IncidentCategory
+    return cached("incident_category", "active", lambda: list(IncidentCategory.objects.filter(is_active=True)))
+
+
+def get_incident_category(uid):
+    from support.models import IncidentCategory
+    return cached("incident_category", f"uid:{uid}", lambda: IncidentCategory.objects.filter(uid=uid).first())
+
+
+# --- Clients ---
+
+def get_client(uid):
+    from masters.models import Client
+    return cached("client", f"uid:{uid}", lambda: Client.objects.filter(uid=uid).first())
+
+
+# --- Exams ---
+
+class ExamFlags(NamedTuple):
+    is_geofencing_enabled: bool
+    is_selfie_enabled: bool
+
+
+def get_exam_flags(exam_id) -> Optional[ExamFlags]:
+    """Check-in feature flags for an exam (by pk)."""
+    from operations.models import Exam
+
+    def load():
+        row = Exam.objects.filter(pk=exam_id).values_list('is_geofencing_enabled', 'is_selfie_enabled').first()
+        return ExamFlags(*row) if row else None
+
+    return cached("exam", f"flags:{exam_id}", load)
+
+
+# --- Shift-center tenancy ---
+
+class ShiftCenterScope(NamedTuple):
+    shift_center_uid: str
+    exam_id: int
+    exam_uid: str
+    client_id: Optional[int]
+
+
+def _scope_name(shift_center_id):
+    return f"shift_center:{shift_center_id}"
+
+
+def get_shift_center_scope(shift_center_id) -> Optional[ShiftCenterScope]:
+    """Which exam and client a shift center (by pk) belongs to; used to route live events."""
+    from operations.models import ShiftCenter
+
+    def load():
+        row = ShiftCenter.objects.filter(pk=shift_center_id).values_list(
+            'uid', 'exam_id', 'exam__uid', 'exam__client_id',
+        ).first()
+        if row is None:
+            return None
+        return ShiftCenterScope(str(row[0]), row[1], str(row[2]), row[3])
+
+    # On the check-in path, next to the fences: lookup/store rather than cached()
+    hit, scope = lookup("scope", _scope_name(shift_center_id))
+    if not hit:
+        scope = load()
+        store("scope", _scope_name(shift_center_id), scope)
+    return scope
+
+
+def store_shift_center_scope(shift_center, timeout=None):
+    """Caches the scope of a ShiftCenter already loaded with its exam (no query)."""
+    exam = shift_center.exam
+    store("scope", _scope_name(shift_center.pk), ShiftCenterScope(
+        str(shift_center.uid), exam.pk, str(exam.uid), exam.client_id,
+    ), timeout)
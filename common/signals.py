@@ -0,0 +1,33 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from masters.models import CenterMaster, Client, RoleMaster
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter
+from support.models import IncidentCategory
+from .reference_cache import invalidate_on_commit
+
+REFERENCE_KINDS = {
+    RoleMaster: ("role",),
+    IncidentCategory: ("incident_category",),
+    Client: ("client",),
+    Exam: ("exam", "scope", "checkin"),
+    # Check-in fences are built from the shift window and center coordinates
+    Shift: ("checkin",),
+    ShiftCenter: ("scope", "checkin"),
+    ExamCenter: ("checkin",),
+    CenterMaster: ("checkin",),
+}
+
+
+@receiver([post_save, post_delete], sender=RoleMaster)
+@receiver([post_save, post_delete], sender=IncidentCategory)
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Exam)
+@receiver([post_save, post_delete], sender=Shift)
+@receiver([post_save, post_delete], sender=ShiftCenter)
+@receiver([post_save, post_delete], sender=ExamCenter)
+@receiver([post_save, post_delete], sender=CenterMaster)
+def invalidate_reference_cache(sender, **kwargs):
+    """Deferred to commit so a concurrent read can't re-cache pre-commit data."""
+    for kind in REFERENCE_KINDS[sender]:
+        invalidate_on_commit(kind)
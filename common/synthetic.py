@@ -0,0 +1,321 @@
+"""
+Synthetic data for benchmarks and load runs.
+
+Everything is written with bulk_create, so model save() hooks and signals
+(master-center linking, notifications, outbox) are intentionally skipped;
+ShiftCenterStats counters are rebuilt explicitly at the end.
+"""
+import math
+import random
+import uuid
+from datetime import time as dtime
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+
+# Rough exam-morning distribution of assignment statuses
+STATUS_WEIGHTS = {
+    'PENDING': 15,
+    'CONFIRMED': 35,
+    'CHECK_IN': 35,
+    'COMPLETED': 10,
+    'CANCELLED': 3,
+    'NO_SHOW': 2,
+}
+
+
+def _tag():
+    return uuid.uuid4().hex[:8].upper()
+
+
+def seed_exam(centers=100, operators_per_center=5, shifts=1, incidents_per_center=1, work_date=None, rng=None,
+              client=None):
+    """
+    Creates an exam (under `client`, or a new client) with `shifts` shifts on
+    `work_date`, `centers` exam centers linked to every shift, and operators
+    assigned per shift center with a realistic status mix.
+
+    Returns a dict with the created client, exam, shifts, role and counts.
+    """
+    from masters.models import Client, RoleMaster
+    from operations.models import Exam, Shift, ExamCenter, ShiftCenter
+    from operations.stats import rebuild_stats
+    from assignments.models import OperatorAssignment
+    from support.models import Incident, IncidentCategory
+
+    rng = rng or random.Random(42)
+    User = get_user_model()
+    tag = _tag()
+    work_date = work_date or timezone.localdate()
+
+    client = client or Client.objects.create(client_code=f"SYN{tag}", name=f"Synthetic Client {tag}")
+    role, _ = RoleMaster.objects.get_or_create(code="SYN_INV", defaults={"name": "Synthetic Invigilator"})
+    category, _ = IncidentCategory.objects.get_or_create(name="Synthetic")
+    exam = Exam.objects.create(exam_code=f"SYN{tag}", name=f"Synthetic Exam {tag}", client=client, status='LIVE')
+
+    shift_objs = Shift.objects.bulk_create([
+        Shift(
+            exam=exam, shift_code=f"S{i + 1}", work_date=work_date,
+            start_time=dtime(8 + (4 * i) % 12, 0), end_time=dtime(11 + (4 * i) % 12, 0), status='LIVE',
+        )
+        for i in range(shifts)
+    ])
+
+    exam_centers = ExamCenter.objects.bulk_create([
+        ExamCenter(
+            exam=exam,
+            client_center_code=f"{tag}-{i:05d}",
+            client_center_name=f"Synthetic Center {i}",
+            latitude=round(8 + rng.random() * 25, 6),
+            longitude=round(68 + rng.random() * 28, 6),
+            city=f"City {i % 200}",
+            expected_candidates=rng.randint(100, 800),
+        )
+        for i in range(centers)
+    ], batch_size=BATCH_SIZE)
+
+    shift_centers = ShiftCenter.objects.bulk_create([
+        ShiftCenter(exam=exam, shift=s, exam_center=ec, center_name=ec.client_center_name, city=ec.city,
+                    latitude=ec.latitude, longitude=ec.longitude)
+        for s in shift_objs for ec in exam_centers
+    ], batch_size=BATCH_SIZE)
+
+    n_operators = centers * operators_per_center
+    password = make_password(None)
+    operators = User.objects.bulk_create([
+        User(
+            username=f"syn_{tag.lower()}_{i:07d}",
+            password=password,
+            user_type='OPERATOR',
+            status='ACTIVE',
+            mobile_primary=f"9{rng.randint(0, 999999999):09d}",
+            first_name=f"Operator {i}",
+            full_name=f"Operator {i}",
+        )
+        for i in range(n_operators)
+    ], batch_size=BATCH_SIZE)
+
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    assignments = []
+    for sc_index, sc in enumerate(shift_centers):
+        center_index = sc_index % centers
+        for j in range(operators_per_center):
+            assignments.append(OperatorAssignment(
+                shift_center=sc,
+                operator=operators[center_index * operators_per_center + j],
+                role=role,
+                status=rng.choices(statuses, weights)[0],
+                assignment_type='PRIMARY' if j else 'BUFFER',
+            ))
+    assignments = OperatorAssignment.objects.bulk_create(assignments, batch_size=BATCH_SIZE)
+
+    incidents = []
+    if assignments and incidents_per_center:
+        for _ in range(centers * incidents_per_center):
+            incidents.append(Incident(
+                assignment=rng.choice(assignments),
+                category=category,
+                priority=rng.choice(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']),
+                status=rng.choice(['OPEN', 'OPEN', 'IN_PROGRESS', 'RESOLVED']),
+                description="Synthetic incident",
+            ))
+        Incident.objects.bulk_create(incidents, batch_size=BATCH_SIZE)
+
+    rebuild_stats(ShiftCenter.objects.filter(exam=exam))
+
+    return {
+        "tag": tag,
+        "client": client,
+        "exam": exam,
+        "role": role,
+        "shifts": shift_objs,
+        "shift_centers": len(shift_centers),
+        "operators": len(operators),
+        "assignments": len(assignments),
+        "incidents": len(incidents),
+    }
+
+
+def purge_exam(result):
+    """
+    Deletes what seed_exam created, plus anything hung off it since (logs,
+    OTP sessions of its operators). The client goes too once it has no
+    exams left.
+    """
+    from accounts.models import OtpSession
+    from operations.models import Exam
+
+    User = get_user_model()
+    operators = User.objects.filter(username__startswith=f"syn_{result['tag'].lower()}_")
+    mobiles = list(operators.values_list('mobile_primary', flat=True))
+    Exam.objects.filter(pk=result["exam"].pk).delete()
+    for start in range(0, len(mobiles), BATCH_SIZE):
+        OtpSession.objects.filter(mobile__in=mobiles[start:start + BATCH_SIZE]).delete()
+    operators.delete()
+    if not Exam.objects.filter(client=result["client"]).exists():
+        result["client"].delete()
+
+
+def seed_platform(clients=3, exams_per_client=2, shifts=2, centers=200, operators_per_center=6, work_date=None,
+                  rng=None):
+    """
+    Creates `clients` clients with `exams_per_client` exams each.
+
+    Exam sizes follow a log-normal spread with median `centers`, so most
+    exams are small and a few national ones are large. Staffing per exam
+    varies around `operators_per_center`.
+
+    Returns the list of seed_exam results.
+    """
+    rng = rng or random.Random(42)
+    results = []
+    for _ in range(clients):
+        client = None
+        for _ in range(exams_per_client):
+            n_centers = max(1, int(rng.lognormvariate(math.log(centers), 0.6)))
+            staff = max(1, round(rng.gauss(operators_per_center, operators_per_center / 4)))
+            result = seed_exam(
+                centers=n_centers, operators_per_center=staff, shifts=shifts, work_date=work_date, rng=rng,
+                client=client,
+            )
+            client = result["client"]
+            results.append(result)
+    return results
+
+
+def build_center_masters(count=50000, duplicate_rate=0.2, rng=None):
+    """
+    Returns `count` unsaved CenterMaster rows spread over India, ordered by
+    created_at. About `duplicate_rate` of them are re-registrations of an
+    earlier site placed 0-80 m away, so some fall inside the 50 m merge
+    radius and some just outside it. geo_cell is filled in because
+    bulk_create skips CenterMaster.save().
+    """
+    from datetime import timedelta
+    from masters.geo import METRES_PER_DEGREE, cell_key
+    from masters.models import CenterMaster
+
+    rng = rng or random.Random(42)
+    tag = _tag()
+    start = timezone.now() - timedelta(days=365)
+    sites = []
+    masters = []
+    for i in range(count):
+        if sites and rng.random() < duplicate_rate:
+            lat, lon = rng.choice(sites)
+            offset = rng.uniform(0, 80) / METRES_PER_DEGREE
+            lat, lon = lat + rng.uniform(-offset, offset), lon + rng.uniform(-offset, offset)
+        else:
+            lat, lon = 8 + rng.random() * 25, 68 + rng.random() * 28
+            sites.append((lat, lon))
+        lat, lon = round(lat, 6), round(lon, 6)
+        masters.append(CenterMaster(
+            center_code=f"{tag}-M{i:06d}",
+            name=f"Synthetic Master {i}",
+            city=f"City {i % 200}",
+            latitude=lat,
+            longitude=lon,
+            geo_cell=cell_key(lat, lon),
+            status=rng.choice(['ACTIVE', 'UNDER_REVIEW', 'UNDER_REVIEW']),
+            created_at=start + timedelta(seconds=i),
+        ))
+    return masters
+
+
+def seed_attendance_logs(exam, logs_per_assignment=2, rng=None):
+    """
+    Adds `logs_per_assignment` alternating CHECK_IN / CHECK_OUT logs to every
+    assignment of `exam`, near the exam center. Written in batches so large
+    fixtures never sit in memory at once. Returns the number of logs.
+    """
+    from assignments.models import OperatorAssignment
+    from attendance.models import AttendanceLog
+
+    rng = rng or random.Random(42)
+    assignments = OperatorAssignment.objects.filter(shift_center__exam=exam).values_list(
+        'pk', 'shift_center__exam_center__latitude', 'shift_center__exam_center__longitude'
+    )
+    batch = []
+    total = 0
+    for assignment_id, lat, lon in assignments.iterator(chunk_size=BATCH_SIZE):
+        for k in range(logs_per_assignment):
+            batch.append(AttendanceLog(
+                assignment_id=assignment_id,
+                activity_type='CHECK_IN' if k % 2 == 0 else 'CHECK_OUT',
+                latitude=round(float(lat or 0) + rng.uniform(-0.002, 0.002), 9),
+                longitude=round(float(lon or 0) + rng.uniform(-0.002, 0.002), 9),
+                distance_from_center=rng.randint(0, 300),
+                is_verified=rng.random() < 0.9,
+            ))
+        if len(batch) >= BATCH_SIZE:
+            AttendanceLog.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            total += len(batch)
+            batch = []
+    if batch:
+        AttendanceLog.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+        total += len(batch)
+    return total
+
+
+FIRST_NAMES = (
+    "Rahul", "Priya", "Amit", "Sunita", "Lakshmi", "Suresh", "Anjali", "Vikram", "Deepak", "Pooja",
+    "Ramesh", "Kavita", "Sanjay", "Neha", "Rajesh", "Sushma", "Abhishek", "Shweta", "Mohammed", "Farhan",
+    "Bhavna", "Dharmendra", "Chandrashekhar", "Vijay", "Gurpreet", "Harish", "Jyoti", "Karthik", "Meenakshi",
+    "Nagaraj", "Prakash", "Radhika", "Sakshi", "Tanvir", "Usha", "Venkatesh", "Yogesh", "Zeenat", "Ashok",
+)
+LAST_NAMES = (
+    "Sharma", "Verma", "Kumar", "Singh", "Gupta", "Patel", "Reddy", "Iyer", "Nair", "Chaudhary",
+    "Yadav", "Mishra", "Khan", "Bhattacharya", "Mukherjee", "Shrivastava", "Deshpande", "Thakur", "Joshi",
+    "Pandey", "Agarwal", "Qureshi", "Rao", "Pillai", "Ghosh", "Banerjee", "Kulkarni", "Saxena", "Tiwari",
+)
+# Spelling variants seen between self-entered and Aadhaar names
+NAME_VARIANTS = (
+    ("sh", "s"), ("v", "w"), ("ee", "i"), ("oo", "u"), ("ksh", "x"), ("ph", "f"),
+    ("th", "t"), ("dh", "d"), ("bh", "b"), ("a", "aa"), ("i", "ee"), ("y", "i"),
+)
+
+
+def _name_variant(name, rng):
+    first, *rest = name.split()
+    choice = rng.random()
+    if choice < 0.2:
+        return " ".join(rest + [first])
+    if choice < 0.3:
+        return f"{first[0]} {' '.join(rest)}"
+    if choice < 0.4:
+        return f"{rng.choice(['Mr', 'Smt', 'Dr'])} {name}"
+    lowered = name.lower()
+    for old, new in rng.sample(NAME_VARIANTS, len(NAME_VARIANTS)):
+        if old in lowered:
+            return lowered.replace(old, new, 1).title()
+    return name.upper()
+
+
+def build_operator_names(count=50000, duplicate_rate=0.02, rng=None):
+    """
+    Returns `count` (name, date_of_birth, duplicate_of) tuples of Indian
+    names. About `duplicate_rate` of them re-register an earlier person
+    (same birth date, name respelled, reordered, initialled or titled);
+    duplicate_of is that person's index, or None.
+    """
+    from datetime import date, timedelta
+
+    rng = rng or random.Random(42)
+    born = date(1970, 1, 1)
+    rows = []
+    for i in range(count):
+        if rows and rng.random() < duplicate_rate:
+            j = rng.randrange(len(rows))
+            name, dob, original = rows[j]
+            original = j if original is None else original
+            rows.append((_name_variant(name, rng), dob, original))
+            continue
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        if rng.random() < 0.3:
+            name = f"{rng.choice(FIRST_NAMES)} {name}"
+        rows.append((name, born + timedelta(days=rng.randrange(365 * 35)), None))
+    return rows
@@ -1,3 +1,201 @@
-from django.test import TestCase
+import asyncio
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import AppUser
+from masters.models import Client, RoleMaster
+from operations.models import Exam
+from support.models import IncidentCategory
+from . import metrics
+from .reference_cache import _version_key, active_roles, cached, get_client, get_exam_flags
+from .instrumentation import RequestMetricsMiddleware, _current
+
+
+def series(name, **labels):
+    """The snapshot entries of metric `name` whose labels include `labels`."""
+    return [
+        entry for entry in metrics.snapshot()['histograms'] + metrics.snapshot()['counters']
+        if entry['name'] == name and labels.items() <= entry['labels'].items()
+    ]
+
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def test_plain_view_is_recorded(self):
+        self.client.get('/api/health/')
+        latency, = series('http_request_ms', view='health')
+        self.assertEqual(latency['labels'], {'view': 'health', 'method': 'GET', 'status': '2xx'})
+        self.assertEqual(latency['count'], 1)
+        queries, = series('http_request_queries', view='health')
+        self.assertEqual((queries['count'], queries['sum_ms']), (1, 0))
+
+    def test_streamed_body_is_recorded_when_it_ends(self):
+        admin = AppUser.objects.create(
+            username='admin', user_type='INTERNAL_ADMIN', is_staff=True, is_superuser=True,
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        response = client.get('/api/reports/export/attendance/')
+        self.assertTrue(response.streaming)
+        # The export's SELECT runs while the body is read, not in the view
+        self.assertEqual(series('http_request_ms', view='AttendanceExportView.get'), [])
+        with CaptureQueriesContext(connection) as ctx:
+            body = b''.join(response.streaming_content)
+            response.close()
+        self.assertTrue(body.startswith(b'Date,Time'))
+        self.assertGreater(len(ctx.captured_queries), 0)
+        queries, = series('http_request_queries', view='AttendanceExportView.get')
+        self.assertEqual((queries['count'], queries['sum_ms']), (1, len(ctx.captured_queries)))
+        self.assertEqual(len(series('http_request_ms', view='AttendanceExportView.get')), 1)
+
+    def test_prometheus_needs_the_metrics_token(self):
+        self.client.get('/api/health/')
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/api/metrics/prometheus/').status_code, 403)
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            self.assertEqual(self.client.get('/api/metrics/prometheus/').status_code, 403)
+            response = self.client.get(
+                '/api/metrics/prometheus/', HTTP_AUTHORIZATION='Bearer wrong',
+            )
+            self.assertEqual(response.status_code, 403)
+            response = self.client.get(
+                '/api/metrics/prometheus/', HTTP_AUTHORIZATION='Bearer scrape-secret',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE http_request_ms histogram', body)
+        self.assertIn('http_request_ms_count{method="GET",status="2xx",view="health"} 1', body)
+
+    def test_async_stream_runs_inside_the_request_stats(self):
+        seen = []
+
+        async def events():
+            for i in range(3):
+                seen.append(_current.get())
+                yield f'data: {i}\n\n'
+
+        middleware = RequestMetricsMiddleware(lambda request: StreamingHttpResponse(events()))
+        response = middleware(RequestFactory().get('/stream/'))
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response]
+
+        self.assertEqual(len(asyncio.run(consume())), 3)
+        self.assertTrue(all(stats is not None for stats in seen))
+        self.assertEqual(len(series('http_request_ms', view='unresolved')), 1)
+
+
+class ReferenceCacheTests(TransactionTestCase):
+    """Real commits and rollbacks, since invalidation waits for on_commit."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.role = RoleMaster.objects.create(code='INV', name='Invigilator')
+        self.client_org = Client.objects.create(client_code='C1', name='Client One')
+        self.exam = Exam.objects.create(exam_code='E1', name='Exam One', client=self.client_org)
+        self.api = APIClient()
+        self.api.force_authenticate(AppUser.objects.create(username='admin', user_type='INTERNAL_ADMIN'))
+
+    def version(self, kind):
+        return cache.get(_version_key(kind), 0)
+
+    def role_names(self):
+        return [role.name for role in active_roles()]
+
+    def test_version_is_bumped_only_on_commit(self):
+        for model, kind, write in (
+            (RoleMaster, 'role', lambda: RoleMaster.objects.create(code='SUP', name='Supervisor')),
+            (Client, 'client', lambda: self.client_org.save()),
+            (Exam, 'exam', lambda: self.exam.delete()),
+        ):
+            with self.subTest(model=model.__name__):
+                before = self.version(kind)
+                with transaction.atomic():
+                    write()
+                    self.assertEqual(self.version(kind), before)
+                self.assertEqual(self.version(kind), before + 1)
+
+    def test_rollback_leaves_the_version(self):
+        before = self.version('role')
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            RoleMaster.objects.create(code='SUP', name='Supervisor')
+            raise RuntimeError
+        self.assertEqual(self.version('role'), before)
+        self.assertEqual(self.role_names(), ['Invigilator'])
+
+    def test_writing_transaction_reads_its_own_changes(self):
+        self.assertEqual(self.role_names(), ['Invigilator'])
+        self.assertEqual(get_exam_flags(self.exam.pk), (True, True))
+        with transaction.atomic():
+            RoleMaster.objects.create(code='SUP', name='Supervisor')
+            self.exam.is_selfie_enabled = False
+            self.exam.save()
+            self.assertEqual(self.role_names(), ['Invigilator', 'Supervisor'])
+            self.assertEqual(get_exam_flags(self.exam.pk), (True, False))
+            # Nothing from inside the transaction reaches the shared cache
+            with transaction.atomic():
+                self.assertEqual(self.role_names(), ['Invigilator', 'Supervisor'])
+        self.assertEqual(self.role_names(), ['Invigilator', 'Supervisor'])
+        self.assertEqual(get_exam_flags(self.exam.pk), (True, False))
+
+    def test_rolled_back_savepoint_goes_back_to_the_cache(self):
+        active_roles()
+        with transaction.atomic():
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                RoleMaster.objects.create(code='SUP', name='Supervisor')
+                raise RuntimeError
+            with self.assertNumQueries(0):
+                self.assertEqual(self.role_names(), ['Invigilator'])
+
+    def test_load_racing_a_commit_is_not_served(self):
+        def load():
+            roles = list(RoleMaster.objects.filter(is_active=True))
+            # Another request commits a change between our read and our cache write
+            RoleMaster.objects.create(code='SUP', name='Supervisor')
+            return roles
+
+        self.assertEqual([role.name for role in cached('role', 'active', load)], ['Invigilator'])
+        self.assertEqual(self.role_names(), ['Invigilator', 'Supervisor'])
+
+    def test_deleted_client_is_not_served(self):
+        self.assertEqual(get_client(self.client_org.uid), self.client_org)
+        self.exam.delete()
+        with transaction.atomic():
+            self.client_org.delete()
+            self.assertIsNone(get_client(self.client_org.uid))
+        self.assertIsNone(get_client(self.client_org.uid))
+
+    def test_role_list_endpoint(self):
+        response = self.api.get('/api/masters/roles/')
+        self.assertEqual([row['name'] for row in response.data], ['Invigilator'])
+        etag = response['ETag']
+        with transaction.atomic():
+            self.role.is_active = False
+            self.role.save()
+            RoleMaster.objects.create(code='SUP', name='Supervisor')
+            response = self.api.get('/api/masters/roles/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([row['name'] for row in response.data], ['Supervisor'])
+        response = self.api.get('/api/masters/roles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual([row['name'] for row in response.data], ['Supervisor'])
+        self.assertEqual(self.api.get('/api/masters/roles/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_incident_category_list_endpoint(self):
+        category = IncidentCategory.objects.create(name='Power cut')
+        self.assertEqual([row['name'] for row in self.api.get('/api/support/categories/').data], ['Power cut'])
+        with transaction.atomic():
+            category.delete()
+            IncidentCategory.objects.create(name='Fire')
+            self.assertEqual([row['name'] for row in self.api.get('/api/support/categories/').data], ['Fire'])
+        self.assertEqual([row['name'] for row in self.api.get('/api/support/categories/').data], ['Fire'])
@@ -1,3 +1,30 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import metrics
+from .permissions import IsInternalAdmin
+
+
+class MetricsView(APIView):
+    """Counters and latency histograms recorded by this worker process."""
+    permission_classes = [IsInternalAdmin]
+
+    def get(self, request):
+        return Response(metrics.snapshot())
+
+
+def prometheus_metrics(request):
+    """
+    The same metrics in Prometheus text format for the scraper. Needs
+    `Authorization: Bearer <METRICS_TOKEN>`; disabled while METRICS_TOKEN
+    is unset.
+    """
+    token = getattr(settings, "METRICS_TOKEN", None)
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ").strip()
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponse(status=403)
+    return HttpResponse(metrics.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
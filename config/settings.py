@@ -55,9 +55,13 @@ INSTALLED_APPS = [
     "support",
     "reports",
     "notifications",
+    "sync",
+    "events",
 ]
 
 MIDDLEWARE = [
+    # First, so its latency covers the rest of the stack
+    "common.instrumentation.RequestMetricsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -229,6 +233,83 @@ CORS_ALLOW_HEADERS = [
 
 SUREPASS_BASE_URL = os.getenv("SUREPASS_BASE_URL")
 SUREPASS_TOKEN = os.getenv("SUREPASS_TOKEN")  
+SUREPASS_POOL_SIZE = int(os.getenv("SUREPASS_POOL_SIZE", "20"))
+SUREPASS_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SUREPASS_CONNECT_TIMEOUT_SECONDS", "5"))
+SUREPASS_TIMEOUTS = {
+    # read timeout (seconds) per endpoint
+    "face-liveness": float(os.getenv("SUREPASS_LIVENESS_TIMEOUT_SECONDS", "30")),
+    "face-match": float(os.getenv("SUREPASS_FACE_MATCH_TIMEOUT_SECONDS", "40")),
+}
+SUREPASS_MAX_RETRIES = int(os.getenv("SUREPASS_MAX_RETRIES", "1"))
+SUREPASS_BREAKER_FAILURES = int(os.getenv("SUREPASS_BREAKER_FAILURES", "5"))
+SUREPASS_BREAKER_RESET_SECONDS = float(os.getenv("SUREPASS_BREAKER_RESET_SECONDS", "30"))
+
+# Provisional check-in: save the attendance log at once and run face
+# verification in the background (python manage.py run_face_verification)
+ATTENDANCE_PROVISIONAL_CHECKIN = os.getenv("ATTENDANCE_PROVISIONAL_CHECKIN", "False") == "True"
+FACE_VERIFICATION_WORKER_CONCURRENCY = int(os.getenv("FACE_VERIFICATION_WORKER_CONCURRENCY", "16"))
+FACE_VERIFICATION_MAX_ATTEMPTS = int(os.getenv("FACE_VERIFICATION_MAX_ATTEMPTS", "3"))
+FACE_MATCH_MIN_SIMILARITY = float(os.getenv("FACE_MATCH_MIN_SIMILARITY", "0.6"))
+
+# Cache: per-process LRU by default; set CACHE_URL (redis://host:6379/0) to
+# share one Redis-protocol cache across workers
+CACHE_URL = os.getenv("CACHE_URL")
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+            "KEY_PREFIX": "seqrview",
+            "TIMEOUT": 300,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "seqrview",
+            "TIMEOUT": 300,
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "10000"))},
+        }
+    }
+
+# Roles, incident categories, clients and exam flags (common.reference_cache)
+REFERENCE_CACHE_SECONDS = int(os.getenv("REFERENCE_CACHE_SECONDS", "300"))
+# Per-shift-center check-in fences (attendance.checkin). Long-lived only on a
+# shared cache, where warm_checkin_cache can fill them before the shift.
+CHECKIN_CACHE_SECONDS = int(os.getenv("CHECKIN_CACHE_SECONDS", "21600" if CACHE_URL else "300"))
+
+# Per-request metrics (common.instrumentation). Sampled requests also capture
+# their statements for duplicate-query detection and the slow-request log.
+REQUEST_METRICS_ENABLED = os.getenv("REQUEST_METRICS_ENABLED", "True") == "True"
+REQUEST_SAMPLE_RATE = float(os.getenv("REQUEST_SAMPLE_RATE", "0"))
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "1000"))
+DUPLICATE_QUERY_THRESHOLD = int(os.getenv("DUPLICATE_QUERY_THRESHOLD", "5"))
+# Bearer token for /api/metrics/prometheus/ (endpoint is off while unset)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Operator app delta sync (/api/sync/). Tokens older than the tombstone
+# retention get a full sync; see python manage.py prune_tombstones.
+SYNC_TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+SYNC_OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", "10"))
+
+# Live events (/api/events/, served by config.asgi). Set EVENTS_URL
+# (redis://host:6379/1) when more than one worker serves streams; unset,
+# events only reach streams on the worker that published them.
+EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "True") == "True"
+EVENTS_URL = os.getenv("EVENTS_URL")
+EVENTS_HEARTBEAT_SECONDS = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Streams close after this long and the client reconnects with Last-Event-ID
+EVENTS_STREAM_SECONDS = int(os.getenv("EVENTS_STREAM_SECONDS", "300"))
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "1000"))
+EVENTS_REPLAY_SIZE = int(os.getenv("EVENTS_REPLAY_SIZE", "5000"))
+
+# In-app notifications older than this move to notification_archive
+# (python manage.py archive_notifications)
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+
+# Dashboard summary cache (seconds, 0 disables)
+REPORTS_SUMMARY_CACHE_SECONDS = int(os.getenv("REPORTS_SUMMARY_CACHE_SECONDS", "10"))
 
 KYC_SESSION_TTL_MINUTES = int(os.getenv("KYC_SESSION_TTL_MINUTES", "30"))
 
@@ -236,6 +317,9 @@ KYC_NAME_MATCH_THRESHOLD = float(os.getenv("KYC_NAME_MATCH_THRESHOLD", "0.80"))
 KYC_FACE_MATCH_THRESHOLD = float(os.getenv("KYC_FACE_MATCH_THRESHOLD", "70.0"))
 
 KYC_DEDUPE_SECRET = os.getenv("KYC_DEDUPE_SECRET")
+# Rotation layers applied on top of KYC_DEDUPE_SECRET, oldest first and
+# comma-separated; append one, then run rotate_kyc_dedupe_hashes (see kyc.dedupe)
+KYC_DEDUPE_WRAP_SECRETS = [s for s in os.getenv("KYC_DEDUPE_WRAP_SECRETS", "").split(",") if s]
 
 
 OTP_SECRET = os.getenv("OTP_SECRET")
@@ -250,3 +334,17 @@ AUTHKEY_API_KEY = os.getenv("AUTHKEY_API_KEY")
 AUTHKEY_SID = os.getenv("AUTHKEY_SID")
 AUTHKEY_COMPANY = os.getenv("AUTHKEY_COMPANY")
 AUTHKEY_WID = os.getenv("AUTHKEY_WID")
+AUTHKEY_BASE_URL = os.getenv("AUTHKEY_BASE_URL", "https://api.authkey.io/request")
+AUTHKEY_TIMEOUT_SECONDS = int(os.getenv("AUTHKEY_TIMEOUT_SECONDS", "10"))
+
+# Outbound message queue (python manage.py run_outbox)
+# OTP login SMS, onboarding and assignment WhatsApps are only queued by the
+# API; they are delivered while a `python manage.py run_outbox` worker runs.
+# Without the worker, operators never receive their login OTP.
+OUTBOX_WORKER_CONCURRENCY = int(os.getenv("OUTBOX_WORKER_CONCURRENCY", "8"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_BASE_SECONDS = int(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+OUTBOX_RATE_LIMITS = {
+    # sends per second, per provider
+    "AUTHKEY": float(os.getenv("OUTBOX_AUTHKEY_RATE", "20")),
+}
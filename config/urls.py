@@ -5,6 +5,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework_simplejwt.views import TokenRefreshView
 from accounts.views import BlacklistTokenView, MeView, CustomTokenObtainPairView
+from common.views import MetricsView, prometheus_metrics
 
 def health(_request):
     return JsonResponse({"ok": True})
@@ -12,6 +13,8 @@ def health(_request):
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/health/", health),
+    path("api/metrics/", MetricsView.as_view()),
+    path("api/metrics/prometheus/", prometheus_metrics),
 
     # Auth
     path("api/auth/token/", CustomTokenObtainPairView.as_view()),
@@ -34,6 +37,8 @@ urlpatterns = [
     path("api/support/", include("support.urls")),
     path("api/reports/", include("reports.urls")),
     path('api/notifications/', include('notifications.urls')),
+    path("api/sync/", include("sync.urls")),
+    path("api/events/", include("events.urls")),
 ]
 
 # Serve media files in development
@@ -0,0 +1,230 @@
+"""
+Server-push event bus behind GET /api/events/.
+
+Writers call `publish()` inside their transaction; the events go out once
+it commits, as one batch. Each event names the channels it belongs to:
+`user:<pk>` for the operator it concerns, and `exam:<pk>`, `client:<pk>`
+and `internal` for the dashboards that can see it (the same tenants as
+reports.views.summary_scope).
+
+With EVENTS_URL unset the broker is in-process, which is enough for a
+single ASGI worker. With EVENTS_URL=redis://... every worker PUBLISHes
+batches to one Redis channel and a listener thread per worker hands them
+to that worker's streams, so any worker can serve any user.
+`common.fakes.start_fake_redis()` is a local stand-in for Redis.
+
+Every worker keeps the last EVENTS_REPLAY_SIZE events so a reconnecting
+stream can resume from Last-Event-ID. A stream that fell further behind,
+or overflowed its EVENTS_QUEUE_SIZE buffer, is sent a `resync` event and
+should refetch over the REST endpoints.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import Counter, deque
+
+from django.conf import settings
+from django.db import transaction
+
+from common import metrics
+
+logger = logging.getLogger("seqrview.events")
+
+REDIS_CHANNEL = "seqrview:events"
+# Seconds between reconnect attempts of the Redis listener
+RECONNECT_SECONDS = 1.0
+
+
+def make_event(event_type, data, channels):
+    return {"id": uuid.uuid4().hex, "type": event_type, "data": data, "channels": sorted(set(channels))}
+
+
+def channels_for_user(user):
+    """The channels `user`'s stream listens on."""
+    channels = {f"user:{user.pk}"}
+    if user.user_type == 'CLIENT_ADMIN' and user.client_id:
+        channels.add(f"client:{user.client_id}")
+    elif user.user_type == 'EXAM_ADMIN' and user.exam_id:
+        channels.add(f"exam:{user.exam_id}")
+    elif user.user_type == 'INTERNAL_ADMIN' or user.is_superuser:
+        channels.add("internal")
+    return channels
+
+
+class Subscription:
+    """
+    One open stream: an asyncio queue filled from any thread. When the
+    queue is full further events are dropped and `overflowed` is set, so
+    the stream can tell its client to resync.
+    """
+
+    def __init__(self, channels, loop, maxsize):
+        self.channels = frozenset(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # the stream's loop has closed; it unsubscribes on the way out
+
+    def _put(self, event):
+        if self.queue.full():
+            self.overflowed = True
+            metrics.inc("events_dropped_total")
+        else:
+            self.queue.put_nowait(event)
+
+
+class LocalBroker:
+    """Hands events to this process's subscriptions and keeps the replay buffer."""
+
+    def __init__(self, replay_size=5000, queue_size=1000):
+        self.queue_size = queue_size
+        self.recent = deque(maxlen=replay_size)
+        self.by_channel = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, channels, loop, last_event_id=None):
+        """
+        Registers a stream. Returns (subscription, backlog, complete): the
+        buffered events after `last_event_id` on its channels, and whether
+        that id was still in the buffer (False means events were missed).
+        """
+        subscription = Subscription(channels, loop, self.queue_size)
+        with self.lock:
+            backlog, complete = [], last_event_id is None
+            if not complete:
+                for event in self.recent:
+                    if complete and subscription.channels.intersection(event["channels"]):
+                        backlog.append(event)
+                    elif event["id"] == last_event_id:
+                        complete = True
+                if not complete:
+                    backlog = []
+            for channel in subscription.channels:
+                self.by_channel.setdefault(channel, set()).add(subscription)
+        return subscription, backlog, complete
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.by_channel.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.by_channel[channel]
+
+    def dispatch(self, events):
+        delivered = 0
+        with self.lock:
+            for event in events:
+                self.recent.append(event)
+                targets = set()
+                for channel in event["channels"]:
+                    targets.update(self.by_channel.get(channel, ()))
+                for subscription in targets:
+                    subscription.deliver(event)
+                delivered += len(targets)
+        if delivered:
+            metrics.inc("events_delivered_total", value=delivered)
+
+    def publish(self, events):
+        self.dispatch(events)
+
+    def subscribers(self):
+        with self.lock:
+            return len(set().union(*self.by_channel.values())) if self.by_channel else 0
+
+
+class RedisBroker(LocalBroker):
+    """
+    Publishes batches to Redis; a daemon thread, started by the first
+    subscribe(), feeds everything on REDIS_CHANNEL to the local streams.
+    """
+
+    def __init__(self, url, **kwargs):
+        super().__init__(**kwargs)
+        import redis  # only needed when EVENTS_URL is set
+
+        self.client = redis.Redis.from_url(url)
+        self.listener = None
+        self.ready = threading.Event()
+        self.listener_lock = threading.Lock()
+
+    def publish(self, events):
+        try:
+            self.client.publish(REDIS_CHANNEL, json.dumps(events))
+        except Exception:
+            # Already committed; a missed event only costs a client a refetch
+            logger.warning("Could not publish %d events", len(events), exc_info=True)
+            metrics.inc("events_publish_failed_total", value=len(events))
+
+    def subscribe(self, channels, loop, last_event_id=None):
+        self.start()
+        return super().subscribe(channels, loop, last_event_id)
+
+    def start(self, wait=5.0):
+        """Starts the listener thread once and waits (up to `wait` s) for its SUBSCRIBE."""
+        with self.listener_lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name="events-listener", daemon=True)
+                self.listener.start()
+        self.ready.wait(wait)
+
+    def listen(self):
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(REDIS_CHANNEL)
+                self.ready.set()
+                for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self.dispatch(json.loads(message["data"]))
+            except Exception:
+                logger.warning("Events listener lost its Redis connection; reconnecting", exc_info=True)
+            finally:
+                pubsub.close()
+            time.sleep(RECONNECT_SECONDS)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            options = {
+                "replay_size": getattr(settings, "EVENTS_REPLAY_SIZE", 5000),
+                "queue_size": getattr(settings, "EVENTS_QUEUE_SIZE", 1000),
+            }
+            url = getattr(settings, "EVENTS_URL", None)
+            _broker = RedisBroker(url, **options) if url else LocalBroker(**options)
+        return _broker
+
+
+def reset_broker():
+    """Drops the process broker so the next get_broker() reads settings again (tests, benchmarks)."""
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def publish(events):
+    """
+    Sends `events` (from make_event) once the current transaction commits,
+    or right away outside one. Does nothing while EVENTS_ENABLED is False.
+    """
+    events = list(events)
+    if not events or not getattr(settings, "EVENTS_ENABLED", True):
+        return
+    for event_type, n in Counter(event["type"] for event in events).items():
+        metrics.inc("events_published_total", {"type": event_type}, n)
+    transaction.on_commit(lambda: get_broker().publish(events))
@@ -0,0 +1,110 @@
+"""
+Builds and publishes the events streamed by /api/events/.
+
+events.signals calls these for single saves; bulk writers that skip
+signals (assignments.bulk_import, notifications.service) call them
+directly. Everything is published on commit, see events.bus.publish.
+
+    assignment.status    an assignment was created or changed status
+    attendance.created   a check-in / check-out log was recorded
+    attendance.verified  a log's face verification finished
+    incident.created     an operator raised an incident
+    incident.status      an incident changed status
+    notification.created a new in-app notification (operator channel only)
+    notification.read    notifications were marked read (uids, or all)
+"""
+from assignments.models import OperatorAssignment
+from common.reference_cache import get_shift_center_scope
+from .bus import make_event, publish
+
+
+def scope_channels(shift_center_id, user_id=None):
+    """
+    (channels, scope) for an event about a shift center: its exam, client
+    and internal dashboards, plus `user_id`'s own stream.
+    """
+    channels = ["internal"]
+    if user_id is not None:
+        channels.append(f"user:{user_id}")
+    scope = get_shift_center_scope(shift_center_id)
+    if scope is not None:
+        channels.append(f"exam:{scope.exam_id}")
+        if scope.client_id is not None:
+            channels.append(f"client:{scope.client_id}")
+    return channels, scope
+
+
+def _scope_data(scope):
+    if scope is None:
+        return {}
+    return {"shift_center": scope.shift_center_uid, "exam": scope.exam_uid}
+
+
+def _assignment_of(obj):
+    """(operator_id, shift_center_id, uid) of obj.assignment, without a query when it's already loaded."""
+    assignment = obj._state.fields_cache.get('assignment')
+    if assignment is not None:
+        return assignment.operator_id, assignment.shift_center_id, str(assignment.uid)
+    operator_id, shift_center_id, uid = OperatorAssignment.objects.filter(pk=obj.assignment_id).values_list(
+        'operator_id', 'shift_center_id', 'uid',
+    ).get()
+    return operator_id, shift_center_id, str(uid)
+
+
+def assignment_event(assignment, previous_status):
+    channels, scope = scope_channels(assignment.shift_center_id, assignment.operator_id)
+    return make_event("assignment.status", {
+        "uid": str(assignment.uid),
+        "status": assignment.status,
+        "previous_status": previous_status,
+        **_scope_data(scope),
+    }, channels)
+
+
+def assignments_changed(changes):
+    """Publishes one assignment.status event per (assignment, previous status or None)."""
+    publish(assignment_event(assignment, previous) for assignment, previous in changes)
+
+
+def attendance_logged(log, created):
+    operator_id, shift_center_id, assignment_uid = _assignment_of(log)
+    channels, scope = scope_channels(shift_center_id, operator_id)
+    publish([make_event("attendance.created" if created else "attendance.verified", {
+        "uid": str(log.uid),
+        "assignment": assignment_uid,
+        "activity_type": log.activity_type,
+        "is_verified": log.is_verified,
+        "verification_status": log.verification_status,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+        **_scope_data(scope),
+    }, channels)])
+
+
+def incident_changed(incident, created):
+    operator_id, shift_center_id, assignment_uid = _assignment_of(incident)
+    channels, scope = scope_channels(shift_center_id, operator_id)
+    publish([make_event("incident.created" if created else "incident.status", {
+        "uid": str(incident.uid),
+        "assignment": assignment_uid,
+        "status": incident.status,
+        "priority": incident.priority,
+        **_scope_data(scope),
+    }, channels)])
+
+
+def notifications_created(notifications):
+    publish(
+        make_event("notification.created", {
+            "uid": str(n.uid),
+            "title": n.title,
+            "notification_type": n.notification_type,
+            "is_read": n.is_read,
+        }, [f"user:{n.user_id}"])
+        for n in notifications
+    )
+
+
+def notifications_read(user_id, uids=None):
+    """`uids` None means every notification of the user."""
+    data = {"all": True} if uids is None else {"uids": [str(uid) for uid in uids]}
+    publish([make_event("notification.read", data, [f"user:{user_id}"])])
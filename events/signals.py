@@ -0,0 +1,63 @@
+"""
+Publishes live events for single saves (see events.emit for the types).
+Bulk writes skip these hooks and call events.emit themselves.
+"""
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from assignments.models import OperatorAssignment
+from attendance.models import AttendanceLog
+from notifications.models import Notification
+from support.models import Incident
+from . import emit
+
+# Field whose change is pushed for existing rows of each model
+TRACKED_FIELDS = {
+    OperatorAssignment: 'status',
+    AttendanceLog: 'verification_status',
+    Incident: 'status',
+}
+
+
+@receiver(post_init, sender=OperatorAssignment)
+@receiver(post_init, sender=AttendanceLog)
+@receiver(post_init, sender=Incident)
+def track_pushed_field(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields don't trigger a query
+    instance._events_value = instance.__dict__.get(TRACKED_FIELDS[sender])
+
+
+def _changed(sender, instance, created):
+    """The tracked field's value before this save, and whether the save is worth an event."""
+    field = TRACKED_FIELDS[sender]
+    previous = getattr(instance, '_events_value', None)
+    current = getattr(instance, field)
+    instance._events_value = current
+    return previous, created or (previous is not None and previous != current)
+
+
+@receiver(post_save, sender=OperatorAssignment)
+def push_assignment_status(sender, instance, created, raw=False, **kwargs):
+    previous, changed = _changed(sender, instance, created)
+    if changed and not raw:
+        emit.assignments_changed([(instance, None if created else previous)])
+
+
+@receiver(post_save, sender=AttendanceLog)
+def push_attendance_log(sender, instance, created, raw=False, **kwargs):
+    _, changed = _changed(sender, instance, created)
+    if changed and not raw:
+        emit.attendance_logged(instance, created)
+
+
+@receiver(post_save, sender=Incident)
+def push_incident(sender, instance, created, raw=False, **kwargs):
+    _, changed = _changed(sender, instance, created)
+    if changed and not raw:
+        emit.incident_changed(instance, created)
+
+
+@receiver(post_save, sender=Notification)
+def push_notification(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        emit.notifications_created([instance])
@@ -0,0 +1,165 @@
+import asyncio
+import datetime
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts.models import AppUser
+from masters.models import Client
+from notifications.models import Notification
+from operations.models import Exam
+from .bus import channels_for_user, get_broker, make_event, publish, reset_broker
+
+
+@override_settings(EVENTS_URL=None, EVENTS_ENABLED=True, EVENTS_HEARTBEAT_SECONDS=5)
+class EventsTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_org = Client.objects.create(client_code='C1', name='Client One')
+        cls.exam = Exam.objects.create(exam_code='E1', name='Exam One', client=cls.client_org)
+        cls.operator = AppUser.objects.create(username='op1', user_type='OPERATOR')
+        cls.other_operator = AppUser.objects.create(username='op2', user_type='OPERATOR')
+
+    def setUp(self):
+        reset_broker()
+        self.addCleanup(reset_broker)
+
+    def published(self):
+        """Events the process broker has dispatched (its replay buffer)."""
+        return [(event['type'], event['channels']) for event in get_broker().recent]
+
+
+class PublishTests(EventsTestCase):
+    def test_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                publish([make_event('test.event', {}, ['internal'])])
+                self.assertEqual(self.published(), [])
+        self.assertEqual(self.published(), [('test.event', ['internal'])])
+
+    def test_dropped_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                publish([make_event('test.event', {}, ['internal'])])
+                Notification.objects.create(user=self.operator, title='t', message='m')
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.published(), [])
+
+    def test_model_save_is_published_to_its_user(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notification.objects.create(user=self.operator, title='t', message='m')
+        self.assertEqual(self.published(), [('notification.created', [f'user:{self.operator.pk}'])])
+
+    @override_settings(EVENTS_ENABLED=False)
+    def test_disabled(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            publish([make_event('test.event', {}, ['internal'])])
+        self.assertEqual(callbacks, [])
+
+
+class ChannelScopeTests(EventsTestCase):
+    def test_channels_for_each_user_type(self):
+        client_admin = AppUser.objects.create(username='ca', user_type='CLIENT_ADMIN', client=self.client_org)
+        exam_admin = AppUser.objects.create(username='ea', user_type='EXAM_ADMIN', exam=self.exam)
+        internal = AppUser.objects.create(username='ia', user_type='INTERNAL_ADMIN')
+        self.assertEqual(channels_for_user(self.operator), {f'user:{self.operator.pk}'})
+        self.assertEqual(channels_for_user(client_admin), {f'user:{client_admin.pk}', f'client:{self.client_org.pk}'})
+        self.assertEqual(channels_for_user(exam_admin), {f'user:{exam_admin.pk}', f'exam:{self.exam.pk}'})
+        self.assertEqual(channels_for_user(internal), {f'user:{internal.pk}', 'internal'})
+        # An admin type without its tenant gets nothing beyond its own channel
+        orphan = AppUser.objects.create(username='ca2', user_type='CLIENT_ADMIN')
+        self.assertEqual(channels_for_user(orphan), {f'user:{orphan.pk}'})
+
+    def test_operator_only_receives_its_own_events(self):
+        async def receive():
+            broker = get_broker()
+            subscription, _, _ = broker.subscribe(channels_for_user(self.operator), asyncio.get_running_loop())
+            broker.publish([
+                make_event('other.user', {}, [f'user:{self.other_operator.pk}']),
+                make_event('dashboard', {}, ['internal', f'exam:{self.exam.pk}', f'client:{self.client_org.pk}']),
+                make_event('mine', {}, [f'user:{self.operator.pk}', 'internal']),
+            ])
+            await asyncio.sleep(0)
+            received = []
+            while not subscription.queue.empty():
+                received.append(subscription.queue.get_nowait()['type'])
+            broker.unsubscribe(subscription)
+            return received
+
+        self.assertEqual(asyncio.run(receive()), ['mine'])
+        self.assertEqual(get_broker().subscribers(), 0)
+
+
+class EventStreamTests(EventsTestCase):
+    def token(self, user, **lifetime):
+        token = AccessToken.for_user(user)
+        if lifetime:
+            token.set_exp(lifetime=datetime.timedelta(**lifetime))
+        return str(token)
+
+    async def open_stream(self, **params):
+        """The response, read by a task into `response.chunks` as the ASGI handler would."""
+        response = await self.async_client.get('/api/events/', params)
+        if response.status_code == 200:
+            response.chunks = asyncio.Queue()
+
+            async def read():
+                async for chunk in response.streaming_content:
+                    await response.chunks.put(chunk.decode())
+
+            response.reader = asyncio.create_task(read())
+        return response
+
+    async def next_chunk(self, response):
+        return await asyncio.wait_for(response.chunks.get(), 2)
+
+    async def disconnect(self, response):
+        # A client disconnect cancels the task sending the response
+        response.reader.cancel()
+        await asyncio.gather(response.reader, return_exceptions=True)
+
+    async def test_rejects_missing_invalid_and_expired_tokens(self):
+        inactive = await AppUser.objects.acreate(username='gone', user_type='OPERATOR', status='INACTIVE')
+        for params in (
+            {},
+            {'token': 'not-a-jwt'},
+            {'token': self.token(self.operator, seconds=-1)},
+            {'token': self.token(inactive)},
+        ):
+            with self.subTest(params=params):
+                response = await self.open_stream(**params)
+                self.assertEqual(response.status_code, 401)
+        self.assertEqual(get_broker().subscribers(), 0)
+
+    async def test_streams_a_published_event(self):
+        response = await self.open_stream(token=self.token(self.operator))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(await self.next_chunk(response), 'retry: 3000\n\n')
+
+        other = make_event('notification.created', {'title': 'not yours'}, [f'user:{self.other_operator.pk}'])
+        mine = make_event('notification.created', {'title': 'yours'}, [f'user:{self.operator.pk}'])
+        get_broker().publish([other, mine])
+        self.assertEqual(
+            await self.next_chunk(response),
+            f'id: {mine["id"]}\nevent: notification.created\ndata: {{"title": "yours"}}\n\n',
+        )
+        await self.disconnect(response)
+        self.assertEqual(get_broker().subscribers(), 0)
+
+    async def test_resumes_from_last_event_id(self):
+        first, second = (make_event('n', {'i': i}, [f'user:{self.operator.pk}']) for i in (1, 2))
+        get_broker().publish([first, second])
+        response = await self.open_stream(token=self.token(self.operator), last_event_id=first['id'])
+        await self.next_chunk(response)
+        self.assertTrue((await self.next_chunk(response)).startswith(f'id: {second["id"]}\n'))
+        await self.disconnect(response)
+
+        # An id that fell out of the replay buffer asks the client to refetch
+        response = await self.open_stream(token=self.token(self.operator), last_event_id='gone')
+        await self.next_chunk(response)
+        self.assertEqual(await self.next_chunk(response), 'event: resync\ndata: {}\n\n')
+        await self.disconnect(response)
+        self.assertEqual(get_broker().subscribers(), 0)
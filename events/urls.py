@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import events_view
+
+urlpatterns = [
+    path('', events_view),
+]
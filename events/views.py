@@ -0,0 +1,106 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from common import metrics
+from .bus import channels_for_user, get_broker
+
+# Milliseconds a disconnected EventSource waits before reconnecting
+RETRY_MS = 3000
+
+
+def _authenticate(request):
+    """
+    The user of the request's access token. EventSource can't set headers,
+    so the token may also come as ?token=.
+    """
+    auth = JWTAuthentication()
+    raw = None
+    header = auth.get_header(request)
+    if header is not None:
+        raw = auth.get_raw_token(header)
+    if raw is None:
+        raw = request.GET.get('token')
+    if not raw:
+        return None
+    try:
+        user = auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def resync_event():
+    return "event: resync\ndata: {}\n\n"
+
+
+async def event_stream(broker, subscription, backlog, complete, duration):
+    heartbeat = getattr(settings, "EVENTS_HEARTBEAT_SECONDS", 15)
+    deadline = time.monotonic() + duration
+    metrics.inc("events_streams_opened_total")
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        if not complete:
+            yield resync_event()
+        for event in backlog:
+            yield format_event(event)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # Closed on purpose so connections rebalance across workers;
+                # the client reconnects with Last-Event-ID
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if subscription.overflowed:
+                subscription.overflowed = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+                yield resync_event()
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
+        metrics.inc("events_streams_closed_total")
+
+
+async def events_view(request):
+    """
+    GET /api/events/: a text/event-stream of the live events the user may
+    see (their own duties and notifications; their exam, client or every
+    exam for admins, see events.bus). Serve it from config.asgi; under WSGI
+    the stream would hold a worker thread for its whole lifetime.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"detail": "Method not allowed."}, status=405)
+    user = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return JsonResponse({"detail": "Authentication credentials were not provided or are invalid."}, status=401)
+
+    broker = get_broker()
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id') or None
+    # subscribe() may wait for the Redis listener to connect
+    subscription, backlog, complete = await sync_to_async(broker.subscribe, thread_sensitive=False)(
+        channels_for_user(user), asyncio.get_running_loop(), last_event_id,
+    )
+    duration = getattr(settings, "EVENTS_STREAM_SECONDS", 300)
+    response = StreamingHttpResponse(
+        event_stream(broker, subscription, backlog, complete, duration),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: pass events through unbuffered
+    return response
@@ -0,0 +1,238 @@
+"""
+Keyed hashes of KYC ID numbers (Aadhaar / DL) used to stop one ID from
+verifying two accounts.
+
+The raw ID is never stored, so a hash can't be recomputed under a new
+secret. Rotation instead wraps: the hash at version 1 is
+HMAC(KYC_DEDUPE_SECRET, id) and each secret in KYC_DEDUPE_WRAP_SECRETS
+adds a layer, HMAC(secret, previous hash). Rows record the version they
+were hashed at (dedupe_version) so they can be brought forward from the
+stored hash alone:
+
+1. Append a new secret to KYC_DEDUPE_WRAP_SECRETS and deploy. New
+   sessions hash at the new version; `candidate_hashes` matches rows at
+   any version, so lookups keep working while old rows remain.
+2. Run `python manage.py rotate_kyc_dedupe_hashes` (repeat until it
+   reports nothing left; sessions started before the deploy may still
+   write the old version for KYC_SESSION_TTL_MINUTES).
+
+Every secret in the chain stays required, since new IDs are hashed
+through all of them.
+"""
+import hashlib
+import hmac
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Case, ExpressionWrapper, F, Q, Value, When
+from django.utils import timezone
+
+SCAN_CHUNK_SIZE = 5000
+# Each row adds two CASE branches to the rotation UPDATE
+ROTATE_CHUNK_SIZE = 500
+
+
+def dedupe_secrets():
+    """Base secret followed by the wrap secrets, oldest first."""
+    if not settings.KYC_DEDUPE_SECRET:
+        raise ImproperlyConfigured("KYC_DEDUPE_SECRET is not set")
+    return [settings.KYC_DEDUPE_SECRET, *getattr(settings, "KYC_DEDUPE_WRAP_SECRETS", [])]
+
+
+def current_version() -> int:
+    return len(dedupe_secrets())
+
+
+def _hmac(secret: str, value: str) -> str:
+    return hmac.new(secret.encode("utf-8"), value.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def hash_chain(id_number: str) -> list:
+    """The ID's hash at every version, [version 1, ..., current]."""
+    chain = []
+    value = id_number
+    for secret in dedupe_secrets():
+        value = _hmac(secret, value)
+        chain.append(value)
+    return chain
+
+
+def compute_dedupe_hash(id_number: str) -> str:
+    return hash_chain(id_number)[-1]
+
+
+def candidate_hashes(id_number: str) -> list:
+    """Hashes a stored row for this ID may hold, current version first."""
+    return hash_chain(id_number)[::-1]
+
+
+def upgrade_hash(dedupe_hash: str, version: int, secrets=None) -> str:
+    """A hash stored at `version` brought to the current version."""
+    secrets = dedupe_secrets() if secrets is None else secrets
+    for secret in secrets[version:]:
+        dedupe_hash = _hmac(secret, dedupe_hash)
+    return dedupe_hash
+
+
+def _key(dedupe_hash, version, secrets):
+    """Current-version digest of a stored hash, as bytes to keep scan memory down."""
+    try:
+        return bytes.fromhex(upgrade_hash(dedupe_hash, version, secrets))
+    except (TypeError, ValueError):
+        return None
+
+
+def scan_dedupe(report=None):
+    """
+    One streamed pass over UserVerification and one over KycSession,
+    comparing hashes at the current version. Calls `report(row)` with a
+    dict for every finding and returns counts per kind:
+
+        verified_conflict  an ID verified on more than one account
+        blocked_attempt    an unverified verification of an ID another account has verified
+        foreign_session    a KYC session for an ID another account has verified
+        unverified_completed  a COMPLETED session with no verified verification for its user and method
+        hash_mismatch      a COMPLETED session whose ID differs from its user's verified one
+        stale_session      an expired session still holding its ID card image
+        malformed          a stored hash that isn't hex
+    """
+    from .models import KycSession, UserVerification
+
+    secrets = dedupe_secrets()
+    counts = Counter()
+
+    def found(kind, model, pk, user_id, method, detail=""):
+        counts[kind] += 1
+        if report:
+            report({"kind": kind, "model": model, "id": pk, "user_id": user_id, "method": method, "detail": detail})
+
+    # key -> [(pk, user_id, method, verified), ...]
+    owners = {}
+    verified_key = {}
+    rows = UserVerification.objects.order_by().values_list(
+        "pk", "user_id", "method", "verified", "dedupe_hash", "dedupe_version",
+    )
+    for pk, user_id, method, verified, dedupe_hash, version in rows.iterator(chunk_size=SCAN_CHUNK_SIZE):
+        key = _key(dedupe_hash, version, secrets)
+        if key is None:
+            found("malformed", "UserVerification", pk, user_id, method)
+            continue
+        owners.setdefault(key, []).append((pk, user_id, method, verified))
+        if verified:
+            verified_key[(user_id, method)] = key
+    counts["verifications"] = sum(len(v) for v in owners.values())
+
+    for entries in owners.values():
+        if len(entries) < 2 or len({user_id for _, user_id, _, _ in entries}) < 2:
+            continue
+        verified_users = sorted({user_id for _, user_id, _, verified in entries if verified})
+        for pk, user_id, method, verified in entries:
+            if verified and len(verified_users) > 1:
+                found("verified_conflict", "UserVerification", pk, user_id, method,
+                      f"verified users {verified_users}")
+            elif not verified and verified_users:
+                found("blocked_attempt", "UserVerification", pk, user_id, method,
+                      f"verified by user {verified_users[0]}")
+
+    now = timezone.now()
+    sessions = KycSession.objects.order_by().annotate(
+        has_image=ExpressionWrapper(Q(id_card_image_b64__isnull=False), output_field=BooleanField()),
+    ).values_list("pk", "user_id", "method", "status", "dedupe_hash", "dedupe_version", "expires_at", "has_image")
+    for pk, user_id, method, status, dedupe_hash, version, expires_at, has_image in sessions.iterator(
+        chunk_size=SCAN_CHUNK_SIZE
+    ):
+        counts["sessions"] += 1
+        if has_image and expires_at < now:
+            found("stale_session", "KycSession", pk, user_id, method, f"expired {expires_at.isoformat()}")
+        key = _key(dedupe_hash, version, secrets)
+        if key is None:
+            found("malformed", "KycSession", pk, user_id, method)
+            continue
+        others = sorted({u for _, u, _, verified in owners.get(key, ()) if verified and u != user_id})
+        if others:
+            found("foreign_session", "KycSession", pk, user_id, method, f"verified by user {others[0]}")
+        if status == "COMPLETED":
+            own = verified_key.get((user_id, method))
+            if own is None:
+                found("unverified_completed", "KycSession", pk, user_id, method)
+            elif own != key:
+                found("hash_mismatch", "KycSession", pk, user_id, method)
+    return counts
+
+
+def _rotate_chunk(model, rows, version, secrets):
+    """
+    Compare-and-set UPDATE of one chunk: a row is only rewritten if its hash
+    is still the one read, so a concurrent save is never overwritten.
+    Returns (rows updated, pks that hit the verified-hash constraint).
+    """
+    new = {pk: upgrade_hash(dedupe_hash, old_version, secrets) for pk, dedupe_hash, old_version in rows}
+    old = {pk: dedupe_hash for pk, dedupe_hash, _ in rows}
+
+    def update(pks):
+        # The hash condition is in the WHERE clause so the row count excludes rows changed since the read
+        unchanged = Q()
+        for pk in pks:
+            unchanged |= Q(pk=pk, dedupe_hash=old[pk])
+        return model.objects.filter(unchanged).update(
+            dedupe_version=Value(version),
+            dedupe_hash=Case(
+                *(When(pk=pk, then=Value(new[pk])) for pk in pks),
+                default=F("dedupe_hash"),
+                output_field=model._meta.get_field("dedupe_hash"),
+            ),
+        )
+
+    try:
+        with transaction.atomic():
+            return update(list(new)), []
+    except IntegrityError:
+        pass
+    updated, conflicts = 0, []
+    for pk in new:
+        try:
+            with transaction.atomic():
+                updated += update([pk])
+        except IntegrityError:
+            conflicts.append(pk)
+    return updated, conflicts
+
+
+def rotate_hashes(chunk_size=ROTATE_CHUNK_SIZE, report=None):
+    """
+    Brings every UserVerification and KycSession hash to the current
+    version, walking each table by primary key in chunks of `chunk_size`,
+    each in its own short transaction. updated_at is left alone (it drives
+    the OTP resend cooldown). Verifications whose upgraded hash collides
+    with another verified account stay at their version and are passed to
+    `report(model_name, pk)`; rows saved since they were read are skipped
+    and not counted as rotated. Returns {model name: {"rotated", "conflicts",
+    "remaining"}}.
+    """
+    from .models import KycSession, UserVerification
+
+    secrets = dedupe_secrets()
+    version = len(secrets)
+    result = {}
+    for model in (UserVerification, KycSession):
+        stats = {"rotated": 0, "conflicts": 0}
+        last_pk = 0
+        while True:
+            rows = list(
+                model.objects.filter(dedupe_version__lt=version, pk__gt=last_pk)
+                .order_by("pk").values_list("pk", "dedupe_hash", "dedupe_version")[:chunk_size]
+            )
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            updated, conflicts = _rotate_chunk(model, rows, version, secrets)
+            stats["rotated"] += updated
+            stats["conflicts"] += len(conflicts)
+            if report:
+                for pk in conflicts:
+                    report(model.__name__, pk)
+        stats["remaining"] = model.objects.filter(dedupe_version__lt=version).count()
+        result[model.__name__] = stats
+    return result
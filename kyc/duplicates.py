@@ -0,0 +1,164 @@
+"""
+Batch name checks over operator accounts.
+
+`audit_kyc_names` compares each user's full_name with the name on their
+latest verified KYC session. `find_duplicates` groups operators that look
+like the same person (same date of birth, similar name) without comparing
+every pair: each record is filed under (date_of_birth, phonetic key) for
+every token of its name (kyc.match_utils.name_keys), and only records that
+share a block are scored. Blocks larger than `max_block` (a very common
+name on a common birthday) are skipped and reported rather than compared
+all-pairs.
+"""
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+from .match_utils import name_keys, prepare_name, prepared_similarity
+
+DEFAULT_MAX_BLOCK = 500
+CHUNK_SIZE = 5000
+
+# Sessions whose ekyc_full_name passed the details check
+VERIFIED_SESSION_STATUSES = ("DETAILS_VERIFIED", "COMPLETED")
+
+
+def match_threshold():
+    return getattr(settings, "KYC_NAME_MATCH_THRESHOLD", 0.80)
+
+
+class NameRecord(NamedTuple):
+    user_id: int
+    username: str
+    name: str
+    date_of_birth: object
+
+
+class _DisjointSet:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        root = x
+        while self.parent.get(root, root) != root:
+            root = self.parent[root]
+        while x != root:
+            self.parent[x], x = root, self.parent.get(x, x)
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def operator_records():
+    """NameRecords for every operator with a name and a date of birth on their profile."""
+    from operators.models import OperatorProfile
+
+    rows = (
+        OperatorProfile.objects.filter(date_of_birth__isnull=False, user__full_name__isnull=False)
+        .exclude(user__full_name="")
+        .order_by("user_id")
+        .values_list("user_id", "user__username", "user__full_name", "date_of_birth")
+    )
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield NameRecord(*row)
+
+
+def build_blocks(records):
+    """{(date_of_birth, phonetic key): [record index, ...]} over `records`."""
+    blocks = defaultdict(list)
+    for i, record in enumerate(records):
+        for key in name_keys(record.name):
+            blocks[(record.date_of_birth, key)].append(i)
+    return blocks
+
+
+def find_duplicates(records, threshold: Optional[float] = None, max_block: int = DEFAULT_MAX_BLOCK):
+    """
+    Clusters `records` (a list of NameRecord) whose names score at least
+    `threshold` (KYC_NAME_MATCH_THRESHOLD by default) within a block.
+
+    Returns {"clusters": [[record, ...], ...] (largest first), "pairs":
+    [(record, record, score), ...], "compared": pairs scored,
+    "oversized": [(block key, size), ...]}.
+    """
+    threshold = match_threshold() if threshold is None else threshold
+    prepared = [prepare_name(r.name) for r in records]
+    seen = set()
+    pairs = []
+    oversized = []
+    groups = _DisjointSet()
+
+    for key, members in build_blocks(records).items():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block:
+            oversized.append((key, len(members)))
+            continue
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                if (i, j) in seen:
+                    continue
+                seen.add((i, j))
+                score = prepared_similarity(prepared[i], prepared[j], minimum=threshold)
+                if score >= threshold:
+                    pairs.append((records[i], records[j], score))
+                    groups.union(i, j)
+
+    clusters = defaultdict(set)
+    for i in list(groups.parent):
+        root = groups.find(i)
+        clusters[root].update((i, root))
+    return {
+        "clusters": sorted(
+            ([records[i] for i in sorted(members)] for members in clusters.values()),
+            key=lambda cluster: (-len(cluster), cluster[0].user_id),
+        ),
+        "pairs": pairs,
+        "compared": len(seen),
+        "oversized": sorted(oversized, key=lambda item: -item[1]),
+    }
+
+
+def verified_kyc_names():
+    """(user_id, username, full_name, ekyc_full_name) from each user's latest verified session."""
+    from .models import KycSession
+
+    rows = (
+        KycSession.objects.filter(status__in=VERIFIED_SESSION_STATUSES, ekyc_full_name__isnull=False)
+        .exclude(ekyc_full_name="")
+        .order_by("user_id", "-created_at")
+        .values_list("user_id", "user__username", "user__full_name", "ekyc_full_name")
+    )
+    last_user = None
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        if row[0] != last_user:
+            last_user = row[0]
+            yield row
+
+
+def audit_kyc_names(threshold: Optional[float] = None, report=None):
+    """
+    Scores every user's full_name against their verified KYC name. Calls
+    `report(row)` with a dict for each user below `threshold`. Returns
+    {"checked", "mismatched", "missing_name"}.
+    """
+    threshold = match_threshold() if threshold is None else threshold
+    result = {"checked": 0, "mismatched": 0, "missing_name": 0}
+    for user_id, username, full_name, ekyc_name in verified_kyc_names():
+        result["checked"] += 1
+        if not (full_name or "").strip():
+            result["missing_name"] += 1
+            continue
+        score = prepared_similarity(prepare_name(full_name), prepare_name(ekyc_name))
+        if score < threshold:
+            result["mismatched"] += 1
+            if report:
+                report({
+                    "user_id": user_id, "username": username, "full_name": full_name,
+                    "kyc_name": ekyc_name, "score": round(score, 3),
+                })
+    return result
@@ -0,0 +1,38 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from kyc.duplicates import audit_kyc_names, match_threshold
+
+REPORT_FIELDS = ("user_id", "username", "full_name", "kyc_name", "score")
+
+
+class Command(BaseCommand):
+    help = "Re-scores every user's name against their verified KYC name and reports the ones below the threshold"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, help="Defaults to KYC_NAME_MATCH_THRESHOLD")
+        parser.add_argument("--report", help="Write one CSV row per mismatched user to this path")
+
+    def handle(self, *args, **options):
+        threshold = options["threshold"] if options["threshold"] is not None else match_threshold()
+        report_file = open(options["report"], "w", newline="") if options["report"] else None
+        try:
+            report = None
+            if report_file:
+                writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                report = writer.writerow
+
+            start = time.perf_counter()
+            result = audit_kyc_names(threshold, report=report)
+            elapsed = time.perf_counter() - start
+        finally:
+            if report_file:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {result['checked']} verified KYC names in {elapsed:.2f}s: {result['mismatched']} below "
+            f"{threshold:.2f}, {result['missing_name']} users without a name on their account."
+        ))
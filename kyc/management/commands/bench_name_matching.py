@@ -0,0 +1,79 @@
+import random
+import time
+from difflib import SequenceMatcher
+
+from django.core.management.base import BaseCommand
+
+from common.synthetic import build_operator_names
+from kyc.duplicates import DEFAULT_MAX_BLOCK, NameRecord, find_duplicates, match_threshold
+from kyc.match_utils import name_similarity, normalize_name
+
+
+def legacy_similarity(a, b):
+    """The previous SequenceMatcher implementation, kept for comparison."""
+    a_n = normalize_name(a)
+    b_n = normalize_name(b)
+    if not a_n or not b_n:
+        return 0.0
+    return SequenceMatcher(None, a_n, b_n).ratio()
+
+
+def timed(fn, pairs):
+    start = time.perf_counter()
+    scores = [fn(a, b) for a, b in pairs]
+    return scores, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Benchmarks kyc.match_utils against SequenceMatcher and blocked duplicate search against all-pairs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operators", type=int, default=50000)
+        parser.add_argument("--duplicate-rate", type=float, default=0.02)
+        parser.add_argument("--pairs", type=int, default=50000, help="Random pairs for the per-pair comparison")
+        parser.add_argument("--max-block", type=int, default=DEFAULT_MAX_BLOCK)
+        parser.add_argument("--threshold", type=float, help="Defaults to KYC_NAME_MATCH_THRESHOLD")
+
+    def handle(self, *args, **options):
+        threshold = options["threshold"] if options["threshold"] is not None else match_threshold()
+        rng = random.Random(7)
+        rows = build_operator_names(options["operators"], options["duplicate_rate"])
+        duplicates = [(rows[original][0], name) for name, _, original in rows if original is not None]
+
+        # Per-pair: known re-registrations plus random pairs
+        pairs = duplicates + [
+            (rng.choice(rows)[0], rng.choice(rows)[0]) for _ in range(options["pairs"])
+        ]
+        legacy_scores, legacy_time = timed(legacy_similarity, pairs)
+        scores, new_time = timed(name_similarity, pairs)
+        lower = sum(1 for old, new in zip(legacy_scores, scores) if new < old - 1e-9)
+        gained = sum(1 for old, new in zip(legacy_scores, scores) if old < threshold <= new)
+        lost = sum(1 for old, new in zip(legacy_scores, scores) if new < threshold <= old)
+        known = len(duplicates)
+        self.stdout.write(
+            f"{len(pairs)} pairs: SequenceMatcher {legacy_time:.2f}s, match_utils {new_time:.2f}s "
+            f"({legacy_time / max(new_time, 1e-9):.1f}x)"
+        )
+        self.stdout.write(
+            f"  at {threshold:.2f}: {gained} pairs newly match, {lost} no longer match, {lower} scored lower; "
+            f"known duplicates matched {sum(s >= threshold for s in legacy_scores[:known])}/{known} -> "
+            f"{sum(s >= threshold for s in scores[:known])}/{known}"
+        )
+
+        # Duplicate search: blocked vs the all-pairs cost at SequenceMatcher speed
+        records = [NameRecord(i, f"op{i}", name, dob) for i, (name, dob, _) in enumerate(rows)]
+        start = time.perf_counter()
+        result = find_duplicates(records, threshold, max_block=options["max_block"])
+        elapsed = time.perf_counter() - start
+        found = {frozenset((a.user_id, b.user_id)) for a, b, _ in result["pairs"]}
+        expected = {frozenset((i, original)) for i, (_, _, original) in enumerate(rows) if original is not None}
+        n = len(records)
+        all_pairs = n * (n - 1) // 2
+        self.stdout.write(
+            f"{n} operators: blocked search compared {result['compared']} pairs "
+            f"(all-pairs {all_pairs}, ~{all_pairs * legacy_time / len(pairs):.0f}s with SequenceMatcher) in {elapsed:.2f}s"
+        )
+        self.stdout.write(
+            f"  {len(result['clusters'])} clusters; {len(expected & found)}/{len(expected)} known duplicates found, "
+            f"{len(result['oversized'])} oversized blocks skipped"
+        )
@@ -0,0 +1,48 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand
+
+from kyc.duplicates import DEFAULT_MAX_BLOCK, find_duplicates, match_threshold, operator_records
+
+REPORT_FIELDS = ("cluster", "user_id", "username", "name", "date_of_birth")
+
+
+class Command(BaseCommand):
+    help = "Finds operators registered more than once: same date of birth and a matching name"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, help="Defaults to KYC_NAME_MATCH_THRESHOLD")
+        parser.add_argument("--max-block", type=int, default=DEFAULT_MAX_BLOCK,
+                            help="Skip (and report) blocks with more operators than this")
+        parser.add_argument("--report", help="Write one CSV row per operator in a cluster to this path")
+        parser.add_argument("--top", type=int, default=20, help="Clusters to list in the summary")
+
+    def handle(self, *args, **options):
+        threshold = options["threshold"] if options["threshold"] is not None else match_threshold()
+        start = time.perf_counter()
+        records = list(operator_records())
+        loaded = time.perf_counter() - start
+        result = find_duplicates(records, threshold, max_block=options["max_block"])
+        elapsed = time.perf_counter() - start
+
+        clusters = result["clusters"]
+        if options["report"]:
+            with open(options["report"], "w", newline="") as report_file:
+                writer = csv.DictWriter(report_file, fieldnames=REPORT_FIELDS)
+                writer.writeheader()
+                for n, cluster in enumerate(clusters, 1):
+                    for record in cluster:
+                        writer.writerow({"cluster": n, **record._asdict()})
+
+        for cluster in clusters[:options["top"]]:
+            self.stdout.write(f"  {cluster[0].date_of_birth}: " + " | ".join(
+                f"{record.name} ({record.username})" for record in cluster
+            ))
+        for (dob, key), size in result["oversized"]:
+            self.stdout.write(self.style.WARNING(f"  Skipped block {dob}/{key}: {size} operators"))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Compared {result['compared']} pairs among {len(records)} operators in {elapsed:.2f}s "
+            f"(load {loaded:.2f}s): {len(clusters)} clusters, {sum(len(c) for c in clusters)} operators."
+        ))
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from kyc.dedupe import ROTATE_CHUNK_SIZE, current_version, rotate_hashes
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-wraps stored KYC ID hashes with the secrets added to KYC_DEDUPE_WRAP_SECRETS "
+        "since they were written (online, in small chunks; see kyc.dedupe)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=ROTATE_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        conflicts = []
+        start = time.perf_counter()
+        result = rotate_hashes(
+            chunk_size=options["chunk_size"], report=lambda model, pk: conflicts.append((model, pk)),
+        )
+        elapsed = time.perf_counter() - start
+
+        for model, pk in conflicts:
+            self.stdout.write(self.style.ERROR(
+                f"  {model} {pk}: ID already verified on another account, left at its old version"
+            ))
+        for model, stats in result.items():
+            self.stdout.write(
+                f"  {model}: rotated {stats['rotated']}, conflicts {stats['conflicts']}, remaining {stats['remaining']}"
+            )
+        remaining = sum(stats["remaining"] for stats in result.values())
+        style = self.style.SUCCESS if not remaining else self.style.WARNING
+        self.stdout.write(style(
+            f"Rotated to version {current_version()} in {elapsed:.2f}s; {remaining} rows still on older versions."
+        ))
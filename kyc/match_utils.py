@@ -1,5 +1,42 @@
+"""
+Name matching for KYC checks, retroactive audits and duplicate detection.
+
+`name_similarity` scores two names on the same 0..1 scale as the
+difflib.SequenceMatcher ratio it replaces (2 * matched characters / total
+length), so KYC_NAME_MATCH_THRESHOLD keeps its meaning. Matched characters
+come from an exact longest common subsequence (bit-parallel, one big-int
+step per character instead of SequenceMatcher's quadratic block search),
+taken as the better of the names as written and with their tokens sorted,
+so "Kumar Rahul" matches "Rahul Kumar". It never scores a pair lower than
+SequenceMatcher did, whose greedy blocks are one common subsequence.
+
+`phonetic_key` folds the usual transliteration variants of Indian names
+(sh/s, v/w, ph/f, aspirated consonants, doubled letters, vowel spellings)
+to one key per token. `name_keys` gives a name's keys for blocking: batch
+jobs only compare records that share a key (see kyc.duplicates).
+"""
 import re
-from difflib import SequenceMatcher
+
+# Titles and relation markers that are not part of the name itself
+IGNORED_TOKENS = frozenset({
+    "mr", "mrs", "ms", "miss", "dr", "smt", "shri", "shree", "sri", "sh", "kum", "kumari", "late",
+})
+
+# Applied in order to each lower-case token
+PHONETIC_RULES = (
+    (re.compile(r"x"), "ks"),
+    (re.compile(r"q"), "k"),
+    (re.compile(r"c(?!h)"), "k"),
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"(?<=[bcdgjkpt])h"), ""),  # aspirated consonants and ch: bh, dh, gh, jh, kh, th
+    (re.compile(r"sh"), "s"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"z"), "j"),
+    (re.compile(r"(?<=[aeiou])h|h(?=[^aeiou])|h$"), ""),
+    (re.compile(r"(.)\1+"), r"\1"),
+)
+VOWELS = re.compile(r"[aeiouy]")
+LEADING_VOWEL = re.compile(r"[aeiou]")
 
 
 def normalize_name(name: str) -> str:
@@ -9,9 +46,76 @@ def normalize_name(name: str) -> str:
     return name
 
 
-def name_similarity(a: str, b: str) -> float:
-    a_n = normalize_name(a)
-    b_n = normalize_name(b)
+def name_tokens(name: str) -> list:
+    """Normalized tokens of `name` without titles."""
+    return [t for t in normalize_name(name).split() if t not in IGNORED_TOKENS]
+
+
+def _lcs_length(a: str, b: str) -> int:
+    """Length of the longest common subsequence (Allison-Dix bit-vector algorithm)."""
+    if not a or not b:
+        return 0
+    masks = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    v = full
+    for ch in b:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return len(a) - bin(v).count("1")
+
+
+def _ratio(a: str, b: str) -> float:
+    return 2.0 * _lcs_length(a, b) / (len(a) + len(b))
+
+
+def prepare_name(name: str) -> tuple:
+    """(normalized, token-sorted) forms of `name`, for comparing one name many times."""
+    normalized = normalize_name(name)
+    return normalized, " ".join(sorted(normalized.split()))
+
+
+def prepared_similarity(a: tuple, b: tuple, minimum: float = 0.0) -> float:
+    """
+    name_similarity of two prepare_name() results. Pairs whose lengths
+    alone rule out reaching `minimum` return 0.0 without being compared.
+    """
+    a_n, a_s = a
+    b_n, b_s = b
     if not a_n or not b_n:
         return 0.0
-    return SequenceMatcher(None, a_n, b_n).ratio()
+    if a_n == b_n or a_s == b_s:
+        return 1.0
+    total = len(a_n) + len(b_n)
+    if 2.0 * min(len(a_n), len(b_n)) / total < minimum:
+        return 0.0
+    score = _ratio(a_n, b_n)
+    if a_s != a_n or b_s != b_n:
+        score = max(score, _ratio(a_s, b_s))
+    return score
+
+
+def name_similarity(a: str, b: str) -> float:
+    return prepared_similarity(prepare_name(a), prepare_name(b))
+
+
+def phonetic_key(token: str) -> str:
+    """
+    Transliteration-tolerant key of one normalized token: the first sound
+    (any leading vowel reads as "a") followed by the consonant skeleton.
+    """
+    if not token:
+        return ""
+    key = token
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    if not key:
+        return ""
+    head = "a" if LEADING_VOWEL.match(key) else key[0]
+    return head + VOWELS.sub("", key[1:])
+
+
+def name_keys(name: str) -> set:
+    """Phonetic keys of the name's tokens, ignoring initials and titles."""
+    return {phonetic_key(t) for t in name_tokens(name) if len(t) > 1} - {""}
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_verified_duplicates(apps, schema_editor):
+    UserVerification = apps.get_model('kyc', 'UserVerification')
+    duplicates = (
+        UserVerification.objects.filter(verified=True)
+        .values('dedupe_hash').annotate(n=Count('id')).filter(n__gt=1).count()
+    )
+    if duplicates:
+        raise RuntimeError(
+            f"{duplicates} ID hashes are verified on more than one account. Resolve them "
+            f"(python manage.py scan_kyc_dedupe --report ...) before adding kyc_verified_dedupe_hash_uniq."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kyc', '0003_kycsession_ekyc_address_data'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kycsession',
+            name='dedupe_version',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='userverification',
+            name='dedupe_version',
+            field=models.PositiveSmallIntegerField(default=1),
+        ),
+        migrations.RunPython(check_verified_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='userverification',
+            constraint=models.UniqueConstraint(condition=models.Q(('verified', True)), fields=('dedupe_hash',), name='kyc_verified_dedupe_hash_uniq'),
+        ),
+    ]
@@ -1,10 +1,9 @@
-import hmac
-import hashlib
 from datetime import timedelta
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from common.models import TimeStampedUUIDModel
+from . import dedupe
 
 
 def default_kyc_expiry():
@@ -31,6 +30,7 @@ class KycSession(TimeStampedUUIDModel):
     surepass_client_id = models.CharField(max_length=220, null=True, blank=True)
 
     dedupe_hash = models.CharField(max_length=64, db_index=True)  
+    dedupe_version = models.PositiveSmallIntegerField(default=1)  # see kyc.dedupe
     otp_attempts = models.IntegerField(default=0)
     liveness_attempts = models.IntegerField(default=0)
     face_attempts = models.IntegerField(default=0)
@@ -70,8 +70,8 @@ class KycSession(TimeStampedUUIDModel):
 
     @staticmethod
     def compute_dedupe_hash(id_number: str) -> str:
-        secret = settings.KYC_DEDUPE_SECRET.encode("utf-8")
-        return hmac.new(secret, id_number.encode("utf-8"), hashlib.sha256).hexdigest()
+        return dedupe.compute_dedupe_hash(id_number)
+
     @staticmethod
     def default_expiry():
         minutes = getattr(settings, "KYC_SESSION_TTL_MINUTES", 10)
@@ -98,6 +98,7 @@ class UserVerification(TimeStampedUUIDModel):
     face_match_confidence = models.FloatField(null=True, blank=True)
 
     dedupe_hash = models.CharField(max_length=64, db_index=True)
+    dedupe_version = models.PositiveSmallIntegerField(default=1)
     vendor_reference_id = models.CharField(max_length=120, null=True, blank=True)
     vendor_uniqueness_id = models.CharField(max_length=120, null=True, blank=True)
 
@@ -106,3 +107,11 @@ class UserVerification(TimeStampedUUIDModel):
             models.Index(fields=["method", "verified"]),
             models.Index(fields=["dedupe_hash"]),
         ]
+        constraints = [
+            # One verified account per ID; also serves the verified-hash lookup at KYC start
+            models.UniqueConstraint(
+                fields=["dedupe_hash"],
+                condition=models.Q(verified=True),
+                name="kyc_verified_dedupe_hash_uniq",
+            ),
+        ]
@@ -1,6 +1,26 @@
+import threading
+import time
+
 import requests
 from django.conf import settings
 
+from common import metrics
+from common.http import CircuitBreaker, get_session, jittered_backoff
+
+# Read timeouts (seconds) per endpoint; override with settings.SUREPASS_TIMEOUTS
+DEFAULT_TIMEOUTS = {
+    "aadhaar-generate-otp": 20,
+    "aadhaar-submit-otp": 30,
+    "face-liveness": 30,
+    "face-match": 40,
+    "driving-license": 30,
+}
+
+# Only idempotent lookups are retried; re-sending an OTP call could
+# trigger a second SMS or consume the OTP.
+RETRYABLE_ENDPOINTS = {"face-liveness", "face-match", "driving-license"}
+RETRY_STATUSES = {502, 503, 504}
+
 
 class SurepassError(Exception):
     def __init__(self, message: str, status_code: int | None = None, payload: dict | None = None, raw_text: str | None = None):
@@ -12,9 +32,71 @@ class SurepassError(Exception):
 
 
 class SurepassClient:
+    """
+    Surepass API client.
+
+    All calls share one pooled keep-alive session. Each endpoint has its own
+    timeout, retry policy and circuit breaker. Latency and errors are
+    recorded in common.metrics. Use `get_surepass_client()` rather than
+    constructing one per request.
+    """
+
     def __init__(self):
         self.base = settings.SUREPASS_BASE_URL.rstrip("/")
         self.token = settings.SUREPASS_TOKEN.strip()
+        self.session = get_session("surepass", pool_size=getattr(settings, "SUREPASS_POOL_SIZE", 20))
+        self.connect_timeout = getattr(settings, "SUREPASS_CONNECT_TIMEOUT_SECONDS", 5)
+        self.timeouts = {**DEFAULT_TIMEOUTS, **getattr(settings, "SUREPASS_TIMEOUTS", {})}
+        self.max_retries = getattr(settings, "SUREPASS_MAX_RETRIES", 1)
+        self.breakers = {
+            endpoint: CircuitBreaker(
+                failure_threshold=getattr(settings, "SUREPASS_BREAKER_FAILURES", 5),
+                reset_seconds=getattr(settings, "SUREPASS_BREAKER_RESET_SECONDS", 30),
+            )
+            for endpoint in self.timeouts
+        }
+
+    def _post(self, endpoint: str, path: str, **kwargs) -> requests.Response:
+        """
+        POSTs to `path` and returns the response, retrying transient failures
+        (network errors, 502/503/504) for RETRYABLE_ENDPOINTS.
+
+        Raises SurepassError (status_code=None) for network errors and
+        (status_code=503) while the endpoint's circuit is open. Other HTTP
+        statuses are returned for the caller to interpret.
+        """
+        breaker = self.breakers[endpoint]
+        attempts = 1 + (self.max_retries if endpoint in RETRYABLE_ENDPOINTS else 0)
+        timeout = (self.connect_timeout, self.timeouts[endpoint])
+        labels = {"endpoint": endpoint}
+
+        for attempt in range(1, attempts + 1):
+            if not breaker.allow():
+                metrics.inc("surepass_errors_total", {**labels, "kind": "circuit_open"})
+                raise SurepassError(f"Surepass {endpoint} temporarily unavailable (circuit open)", status_code=503)
+
+            start = time.perf_counter()
+            try:
+                r = self.session.post(f"{self.base}{path}", timeout=timeout, **kwargs)
+            except requests.RequestException as e:
+                metrics.observe("surepass_request_ms", (time.perf_counter() - start) * 1000, {**labels, "outcome": "network_error"})
+                metrics.inc("surepass_errors_total", {**labels, "kind": type(e).__name__})
+                breaker.record_failure()
+                if attempt < attempts:
+                    time.sleep(jittered_backoff(attempt))
+                    continue
+                raise SurepassError(f"Surepass {endpoint} request failed: {e}", status_code=None)
+
+            metrics.observe("surepass_request_ms", (time.perf_counter() - start) * 1000, {**labels, "outcome": str(r.status_code)})
+            if r.status_code >= 500:
+                metrics.inc("surepass_errors_total", {**labels, "kind": f"http_{r.status_code}"})
+                breaker.record_failure()
+                if r.status_code in RETRY_STATUSES and attempt < attempts:
+                    time.sleep(jittered_backoff(attempt))
+                    continue
+            else:
+                breaker.record_success()
+            return r
 
     def _json_headers(self):
         headers = {"Content-Type": "application/json"}
@@ -29,18 +111,12 @@ class SurepassClient:
         return headers
 
     def aadhaar_generate_otp(self, id_number: str) -> dict:
-        url = f"{self.base}/aadhaar-v2/generate-otp"
-
-        try:
-            r = requests.post(
-                url,
-                json={"id_number": id_number},
-                headers=self._json_headers(),
-                timeout=20
-            )
-        except requests.RequestException as e:
-            # network/timeout etc. (no HTTP status available)
-            raise SurepassError(f"Surepass generate-otp request failed: {e}", status_code=None)
+        r = self._post(
+            "aadhaar-generate-otp",
+            "/aadhaar-v2/generate-otp",
+            json={"id_number": id_number},
+            headers=self._json_headers(),
+        )
 
         # Try to parse JSON safely
         payload = None
@@ -66,14 +142,15 @@ class SurepassClient:
 
 
     def aadhaar_submit_otp(self, client_id: str, otp: str) -> dict:
-        url = f"{self.base}/aadhaar-v2/submit-otp"
-        try:
-            r = requests.post(url, json={"client_id": client_id, "otp": otp}, headers=self._json_headers(), timeout=30)
-        except requests.RequestException as e:
-            raise SurepassError(f"Surepass submit-otp request failed: {e}")
+        r = self._post(
+            "aadhaar-submit-otp",
+            "/aadhaar-v2/submit-otp",
+            json={"client_id": client_id, "otp": otp},
+            headers=self._json_headers(),
+        )
 
         if r.status_code != 200:
-            raise SurepassError(f"Surepass submit-otp error {r.status_code}: {r.text}")
+            raise SurepassError(f"Surepass submit-otp error {r.status_code}: {r.text}", status_code=r.status_code)
 
         data = r.json()
         if not data.get("success", False):
@@ -81,38 +158,30 @@ class SurepassClient:
         return data
 
     def face_liveness(self, selfie_bytes: bytes, filename: str) -> dict:
-        url = f"{self.base}/face/face-liveness"
         files = {"file": (filename, selfie_bytes)}
-        try:
-            r = requests.post(url, files=files, headers=self._auth_headers(), timeout=30)
-        except requests.RequestException as e:
-            raise SurepassError(f"Surepass liveness request failed: {e}")
+        r = self._post("face-liveness", "/face/face-liveness", files=files, headers=self._auth_headers())
 
         if r.status_code != 200:
-            raise SurepassError(f"Surepass liveness error {r.status_code}: {r.text}")
+            raise SurepassError(f"Surepass liveness error {r.status_code}: {r.text}", status_code=r.status_code)
 
         data = r.json()
         if not data.get("success", False):
-            raise SurepassError(f"Surepass liveness unsuccessful: {data}")
+            raise SurepassError(f"Surepass liveness unsuccessful: {data}", status_code=400, payload=data)
         return data
 
     def face_match(self, selfie_bytes: bytes, id_card_bytes: bytes, selfie_filename: str, id_filename: str = "id.jpg") -> dict:
-        url = f"{self.base}/face/face-match"
         files = {
             "selfie": (selfie_filename, selfie_bytes),
             "id_card": (id_filename, id_card_bytes),
         }
-        try:
-            r = requests.post(url, files=files, headers=self._auth_headers(), timeout=40)
-        except requests.RequestException as e:
-            raise SurepassError(f"Surepass face-match request failed: {e}")
+        r = self._post("face-match", "/face/face-match", files=files, headers=self._auth_headers())
 
         if r.status_code != 200:
-            raise SurepassError(f"Surepass face-match error {r.status_code}: {r.text}")
+            raise SurepassError(f"Surepass face-match error {r.status_code}: {r.text}", status_code=r.status_code)
 
         data = r.json()
         if not data.get("success", False):
-            raise SurepassError(f"Surepass face-match unsuccessful: {data}")
+            raise SurepassError(f"Surepass face-match unsuccessful: {data}", status_code=400, payload=data)
         return data
 
     def driving_license_verify(self, license_number: str, dob: str) -> dict:
@@ -126,17 +195,12 @@ class SurepassClient:
         Returns:
             dict: Response data from Surepass API
         """
-        url = f"{self.base}/driving-license/driving-license"
-        
-        try:
-            r = requests.post(
-                url,
-                json={"id_number": license_number, "dob": dob},
-                headers=self._json_headers(),
-                timeout=30
-            )
-        except requests.RequestException as e:
-            raise SurepassError(f"Surepass driving-license request failed: {e}", status_code=None)
+        r = self._post(
+            "driving-license",
+            "/driving-license/driving-license",
+            json={"id_number": license_number, "dob": dob},
+            headers=self._json_headers(),
+        )
 
         # Try to parse JSON safely
         payload = None
@@ -159,3 +223,24 @@ class SurepassClient:
             raise SurepassError(msg, status_code=400, payload=payload, raw_text=r.text)
 
         return payload if isinstance(payload, dict) else {}
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_surepass_client() -> SurepassClient:
+    """Returns the process-wide SurepassClient (shared pool, breakers and timeouts)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SurepassClient()
+    return _client
+
+
+def reset_surepass_client():
+    """Drops the shared client so the next call picks up changed settings (load runs, fakes)."""
+    global _client
+    with _client_lock:
+        _client = None
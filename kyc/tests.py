@@ -1,3 +1,318 @@
-from django.test import TestCase
+import base64
+import datetime
+import random
+from collections import defaultdict
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import AppUser
+from common.synthetic import build_operator_names
+from . import dedupe
+from .duplicates import NameRecord, find_duplicates, operator_records
+from .management.commands.bench_name_matching import legacy_similarity
+from .match_utils import _lcs_length, name_keys, name_similarity, phonetic_key, prepare_name, prepared_similarity
+from .models import KycSession, UserVerification
+
+
+def dp_lcs_length(a, b):
+    """Textbook O(len(a) * len(b)) LCS, the reference for the bit-parallel one."""
+    previous = [0] * (len(b) + 1)
+    for ch in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if ch == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+class NameMatchingTests(SimpleTestCase):
+    def test_lcs_matches_dynamic_programming(self):
+        rng = random.Random(24)
+        for _ in range(400):
+            # Small alphabets give long common subsequences; lengths cross the 64-bit word size
+            alphabet = 'abcdefghijklmnopqrstuvwxyz '[:rng.choice((2, 4, 27))]
+            a = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 150)))
+            b = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(0, 150)))
+            self.assertEqual(_lcs_length(a, b), dp_lcs_length(a, b), (a, b))
+            self.assertEqual(_lcs_length(b, a), _lcs_length(a, b))
+
+    def test_lcs_edge_cases(self):
+        self.assertEqual(_lcs_length('', 'abc'), 0)
+        self.assertEqual(_lcs_length('abc', ''), 0)
+        self.assertEqual(_lcs_length('a' * 200, 'a' * 130), 130)
+        self.assertEqual(_lcs_length('ab' * 100, 'ba' * 100), 199)
+
+    def test_never_scores_below_sequence_matcher(self):
+        rows = build_operator_names(400, 0.2, rng=random.Random(5))
+        rng = random.Random(6)
+        pairs = [(rows[i][0], rows[original][0]) for i, (_, _, original) in enumerate(rows) if original is not None]
+        pairs += [(rng.choice(rows)[0], rng.choice(rows)[0]) for _ in range(400)]
+        for a, b in pairs:
+            self.assertGreaterEqual(name_similarity(a, b) + 1e-9, legacy_similarity(a, b), (a, b))
+
+    def test_similarity_scale(self):
+        self.assertEqual(name_similarity('Rahul Kumar', 'rahul  KUMAR.'), 1.0)
+        self.assertEqual(name_similarity('Rahul Kumar', 'Kumar Rahul'), 1.0)
+        self.assertEqual(name_similarity('', 'Rahul'), 0.0)
+        self.assertAlmostEqual(name_similarity('Priya Sharma', 'Priya Sarma'), 22 / 23)
+        self.assertLess(name_similarity('Rahul Kumar', 'Rohit Kumar'), 0.8)
+
+    def test_length_prefilter_only_skips_pairs_below_the_minimum(self):
+        a, b = prepare_name('Ravi'), prepare_name('Ravindranath Tagore')
+        self.assertEqual(prepared_similarity(a, b, minimum=0.8), 0.0)
+        self.assertGreater(prepared_similarity(a, b), 0.0)
+        close = prepare_name('Ravi Tagor'), prepare_name('Ravi Tagore')
+        self.assertEqual(prepared_similarity(*close, minimum=0.8), prepared_similarity(*close))
+
+    def test_phonetic_key_folds_transliterations(self):
+        for a, b in (
+            ('sharma', 'sarma'), ('verma', 'varma'), ('mohammed', 'muhammad'), ('bhavesh', 'bavesh'),
+            ('aarti', 'arti'), ('philip', 'filip'), ('shrivastava', 'srivastava'), ('chaudhary', 'choudhari'),
+            ('lakshmi', 'laxmi'), ('zeenat', 'jinat'), ('vikas', 'wikas'),
+        ):
+            with self.subTest(a=a, b=b):
+                self.assertEqual(phonetic_key(a), phonetic_key(b))
+        self.assertNotEqual(phonetic_key('rahul'), phonetic_key('rohit'))
+        self.assertEqual(phonetic_key(''), '')
+
+    def test_name_keys_skip_titles_and_initials(self):
+        self.assertEqual(name_keys('Dr. R Kumar'), {phonetic_key('kumar')})
+        self.assertEqual(name_keys('Smt Lakshmi Devi'), name_keys('Laxmi Devi'))
+
+
+class FindDuplicatesTests(SimpleTestCase):
+    def legacy_pairs(self, records, threshold=0.8):
+        """Every same-birthday pair the old all-pairs SequenceMatcher search matched."""
+        by_dob = defaultdict(list)
+        for record in records:
+            by_dob[record.date_of_birth].append(record)
+        return {
+            frozenset((a.user_id, b.user_id))
+            for group in by_dob.values()
+            for x, a in enumerate(group)
+            for b in group[x + 1:]
+            if legacy_similarity(a.name, b.name) >= threshold
+        }
+
+    def cluster_of(self, result):
+        return {record.user_id: n for n, cluster in enumerate(result['clusters']) for record in cluster}
+
+    def test_known_near_duplicates_are_grouped(self):
+        dob = datetime.date(1990, 5, 17)
+        names = [
+            'Priya Sharma', 'Priya Sarma',
+            'Mohammed Shaikh', 'Muhammad Sheikh',
+            'Ankit Shrivastava', 'Ankit Srivastava',
+            'Lakshmi Devi', 'Laxmi Devi',
+            'Rahul Kumar', 'Kumar Rahul',
+            'Rohit Kumar',
+        ]
+        records = [NameRecord(i, f'op{i}', name, dob) for i, name in enumerate(names)]
+        # A namesake born on another day is not a duplicate
+        records.append(NameRecord(len(records), 'other', 'Priya Sharma', datetime.date(1991, 5, 17)))
+        result = find_duplicates(records, 0.8)
+        self.assertEqual(
+            [[record.name for record in cluster] for cluster in result['clusters']],
+            [['Priya Sharma', 'Priya Sarma'], ['Mohammed Shaikh', 'Muhammad Sheikh'],
+             ['Ankit Shrivastava', 'Ankit Srivastava'], ['Lakshmi Devi', 'Laxmi Devi'],
+             ['Rahul Kumar', 'Kumar Rahul']],
+        )
+        # Every pair the old path matched is still grouped (Rahul/Kumar Rahul is new)
+        clusters = self.cluster_of(result)
+        for a, b in self.legacy_pairs(records):
+            self.assertEqual(clusters.get(a), clusters.get(b), [records[a].name, records[b].name])
+            self.assertIn(a, clusters)
+
+    def test_blocking_keeps_every_legacy_match(self):
+        rows = build_operator_names(3000, 0.05, rng=random.Random(3))
+        records = [NameRecord(i, f'op{i}', name, dob) for i, (name, dob, _) in enumerate(rows)]
+        result = find_duplicates(records, 0.8)
+        clusters = self.cluster_of(result)
+        legacy = self.legacy_pairs(records)
+        self.assertGreater(len(legacy), 50)
+        for a, b in legacy:
+            self.assertIn(a, clusters, (records[a].name, records[b].name))
+            self.assertEqual(clusters[a], clusters.get(b), (records[a].name, records[b].name))
+        # Far fewer pairs scored than the all-pairs search
+        self.assertLess(result['compared'], 10 * len(records))
+
+    def test_oversized_blocks_are_reported_not_compared(self):
+        dob = datetime.date(1985, 1, 1)
+        records = [NameRecord(i, f'op{i}', f'Amit Kumar {chr(97 + i)}', dob) for i in range(6)]
+        result = find_duplicates(records, 0.8, max_block=5)
+        self.assertEqual(result['compared'], 0)
+        self.assertEqual(result['clusters'], [])
+        self.assertEqual(sorted(result['oversized']), [((dob, phonetic_key('amit')), 6), ((dob, phonetic_key('kumar')), 6)])
+
+
+class OperatorRecordsTests(TestCase):
+    def test_reads_named_operators_with_a_birth_date(self):
+        dob = datetime.date(1992, 3, 4)
+        for username, full_name, birth in (
+            ('op1', 'Suresh Varma', dob), ('op2', 'Suresh Verma', dob),
+            ('op3', 'Suresh Verma', None), ('op4', None, dob),
+        ):
+            user = AppUser.objects.create(username=username, user_type='OPERATOR', full_name=full_name)
+            user.operator_profile.date_of_birth = birth
+            user.operator_profile.save()
+        records = list(operator_records())
+        self.assertEqual([record.username for record in records], ['op1', 'op2'])
+        [cluster] = find_duplicates(records)['clusters']
+        self.assertEqual([record.username for record in cluster], ['op1', 'op2'])
+
+
+def hash_at(id_number, version):
+    return dedupe.hash_chain(id_number)[version - 1]
+
+
+@override_settings(KYC_DEDUPE_SECRET='base', KYC_DEDUPE_WRAP_SECRETS=['wrap-1'])
+class DedupeTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [AppUser.objects.create(username=f'op{i}', user_type='OPERATOR') for i in range(1, 6)]
+
+    def verification(self, user, id_number, version=2, method='AADHAAR', verified=True):
+        return UserVerification.objects.create(
+            user=user, method=method, verified=verified,
+            dedupe_hash=hash_at(id_number, version), dedupe_version=version,
+        )
+
+    def session(self, user, id_number, version=2, method='AADHAAR', **fields):
+        return KycSession.objects.create(
+            user=user, method=method, dedupe_hash=hash_at(id_number, version), dedupe_version=version, **fields,
+        )
+
+
+class DedupeHashTests(DedupeTestCase):
+    def test_lookups_match_rows_before_and_after_a_wrap_secret_is_added(self):
+        with override_settings(KYC_DEDUPE_WRAP_SECRETS=[]):
+            self.assertEqual(dedupe.current_version(), 1)
+            self.assertEqual(dedupe.candidate_hashes('1234'), [dedupe.compute_dedupe_hash('1234')])
+            ver = self.verification(self.users[0], '1234', version=1)
+
+        self.assertEqual(dedupe.current_version(), 2)
+        current, previous = dedupe.candidate_hashes('1234')
+        self.assertEqual(previous, ver.dedupe_hash)
+        self.assertEqual(current, dedupe.compute_dedupe_hash('1234'))
+        self.assertEqual(current, dedupe.upgrade_hash(ver.dedupe_hash, 1))
+        # A row written before the deploy is still found, and only for its own ID
+        found = UserVerification.objects.filter(dedupe_hash__in=dedupe.candidate_hashes('1234'))
+        self.assertEqual(list(found), [ver])
+        self.assertFalse(UserVerification.objects.filter(dedupe_hash__in=dedupe.candidate_hashes('4321')).exists())
+
+    @override_settings(KYC_DEDUPE_SECRET=None)
+    def test_missing_secret(self):
+        with self.assertRaises(ImproperlyConfigured):
+            dedupe.compute_dedupe_hash('1234')
+
+
+class RotateHashesTests(DedupeTestCase):
+    def test_brings_rows_to_the_current_version(self):
+        old = [self.verification(user, f'id{n}', version=1) for n, user in enumerate(self.users[:3])]
+        current = self.verification(self.users[3], 'id3')
+        sessions = [self.session(user, f'id{n}', version=1) for n, user in enumerate(self.users)]
+
+        result = dedupe.rotate_hashes(chunk_size=2)
+        self.assertEqual(result, {
+            'UserVerification': {'rotated': 3, 'conflicts': 0, 'remaining': 0},
+            'KycSession': {'rotated': 5, 'conflicts': 0, 'remaining': 0},
+        })
+        for rows in (old, sessions):
+            for n, row in enumerate(rows):
+                row.refresh_from_db()
+                self.assertEqual((row.dedupe_hash, row.dedupe_version), (hash_at(f'id{n}', 2), 2))
+        updated_at = current.updated_at
+        current.refresh_from_db()
+        self.assertEqual((current.dedupe_hash, current.updated_at), (hash_at('id3', 2), updated_at))
+        # Nothing left for a second run
+        self.assertEqual(dedupe.rotate_hashes()['UserVerification']['rotated'], 0)
+
+    def test_conflict_is_reported_and_left_in_place(self):
+        self.verification(self.users[0], '1234')
+        clash = self.verification(self.users[1], '1234', version=1)
+        other = self.verification(self.users[2], '5678', version=1)
+        reported = []
+
+        result = dedupe.rotate_hashes(report=lambda model, pk: reported.append((model, pk)))
+        self.assertEqual(reported, [('UserVerification', clash.pk)])
+        self.assertEqual(result['UserVerification'], {'rotated': 1, 'conflicts': 1, 'remaining': 1})
+        clash.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((clash.dedupe_hash, clash.dedupe_version), (hash_at('1234', 1), 1))
+        self.assertEqual((other.dedupe_hash, other.dedupe_version), (hash_at('5678', 2), 2))
+
+    def test_rows_saved_since_the_read_are_not_counted(self):
+        rows = [self.verification(user, f'id{n}', version=1) for n, user in enumerate(self.users[:3])]
+        upgrade_hash = dedupe.upgrade_hash
+
+        def save_concurrently(dedupe_hash, version, secrets=None):
+            # A KYC flow re-saves the first row between the chunk read and its UPDATE
+            if dedupe_hash == rows[0].dedupe_hash:
+                UserVerification.objects.filter(pk=rows[0].pk).update(dedupe_hash=hash_at('new', 1))
+            return upgrade_hash(dedupe_hash, version, secrets)
+
+        with mock.patch('kyc.dedupe.upgrade_hash', side_effect=save_concurrently):
+            result = dedupe.rotate_hashes()
+        self.assertEqual(result['UserVerification'], {'rotated': 2, 'conflicts': 0, 'remaining': 1})
+        rows[0].refresh_from_db()
+        self.assertEqual((rows[0].dedupe_hash, rows[0].dedupe_version), (hash_at('new', 1), 1))
+
+
+class ScanDedupeTests(DedupeTestCase):
+    def test_counts_each_kind_of_finding(self):
+        u1, u2, u3, u4, u5 = self.users
+        # '1234' verified on two accounts, at different versions
+        self.verification(u1, '1234')
+        self.verification(u2, '1234', version=1)
+        self.verification(u3, '1234', method='DL', verified=False)
+        self.verification(u4, 'DL-1', method='DL')
+        UserVerification.objects.create(user=u5, method='AADHAAR', dedupe_hash='not-a-hash', dedupe_version=2)
+
+        self.session(u5, 'DL-1', method='DL')
+        self.session(u4, 'DL-2', method='DL', status='COMPLETED')
+        self.session(u4, '9999', status='COMPLETED')
+        self.session(u5, '5555', id_card_image_b64='aW1n', expires_at=timezone.now() - datetime.timedelta(days=1))
+
+        findings = []
+        counts = dedupe.scan_dedupe(report=findings.append)
+        self.assertEqual(dict(counts), {
+            'verifications': 4, 'sessions': 4,
+            'verified_conflict': 2, 'blocked_attempt': 1, 'malformed': 1, 'foreign_session': 1,
+            'hash_mismatch': 1, 'unverified_completed': 1, 'stale_session': 1,
+        })
+        by_kind = {(row['kind'], row['model'], row['user_id']) for row in findings}
+        self.assertEqual(by_kind, {
+            ('verified_conflict', 'UserVerification', u1.pk), ('verified_conflict', 'UserVerification', u2.pk),
+            ('blocked_attempt', 'UserVerification', u3.pk), ('malformed', 'UserVerification', u5.pk),
+            ('foreign_session', 'KycSession', u5.pk), ('hash_mismatch', 'KycSession', u4.pk),
+            ('unverified_completed', 'KycSession', u4.pk), ('stale_session', 'KycSession', u5.pk),
+        })
+
+
+class FaceMatchConflictTests(DedupeTestCase):
+    def test_second_account_verifying_the_same_id_gets_409(self):
+        first, second = self.users[:2]
+        self.verification(first, '1234')
+        session = self.session(
+            second, '1234', status='DETAILS_VERIFIED', id_card_image_b64=base64.b64encode(b'id').decode(),
+        )
+        client = mock.Mock()
+        client.face_match.return_value = {'data': {'match_status': True, 'confidence': 95}}
+        api = APIClient()
+        api.force_authenticate(second)
+
+        with mock.patch('kyc.views.get_surepass_client', return_value=client):
+            response = api.post('/api/kyc/face/match/', {
+                'kyc_session_uid': str(session.uid),
+                'selfie': SimpleUploadedFile('selfie.jpg', b'selfie', content_type='image/jpeg'),
+            }, format='multipart')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['detail'], 'This ID is already used for verification')
+        self.assertFalse(UserVerification.objects.filter(user=second, verified=True).exists())
+        second.refresh_from_db()
+        self.assertFalse(second.photo)
@@ -1,5 +1,6 @@
 import base64
 from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
@@ -7,12 +8,13 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from operators.models import OperatorProfile
+from .dedupe import candidate_hashes, current_version
 from .models import KycSession, UserVerification
 from .serializers import (
     AadhaarStartSerializer, AadhaarSubmitOtpSerializer, KycSessionUidSerializer, AadhaarVerifyDetailsSerializer,
     DLStartSerializer, DLVerifyDetailsSerializer
 )
-from .surepass_client import SurepassClient, SurepassError
+from .surepass_client import SurepassError, get_surepass_client
 from .match_utils import name_similarity
 
 
@@ -43,6 +45,13 @@ def _active_dl_session(user):
     )
 
 
+def _surepass_error_status(err):
+    # Provider/network trouble -> 502 ("service busy"); vendor verdicts (4xx) -> 400
+    if err.status_code is None or err.status_code >= 500:
+        return status.HTTP_502_BAD_GATEWAY
+    return status.HTTP_400_BAD_REQUEST
+
+
 # <----------------------------hitesh----------------------------------------->
 
 class AadhaarKycResetView(APIView):
@@ -153,11 +162,13 @@ class AadhaarKycStartView(APIView):
             )
 
         
-        dedupe_hash = KycSession.compute_dedupe_hash(id_number)
+        # Every version of the ID's hash, so rows not yet rotated still match (see kyc.dedupe)
+        hashes = candidate_hashes(id_number)
+        dedupe_hash = hashes[0]
 
         existing = (
             UserVerification.objects
-            .filter(dedupe_hash=dedupe_hash, verified=True)
+            .filter(dedupe_hash__in=hashes, verified=True)
             .exclude(user=request.user)
             .first()
         )
@@ -165,7 +176,7 @@ class AadhaarKycStartView(APIView):
             return Response({"detail": "This ID is already used for verification"}, status=status.HTTP_409_CONFLICT)
 
         
-        client = SurepassClient()
+        client = get_surepass_client()
         try:
             resp = client.aadhaar_generate_otp(id_number=id_number)
         except SurepassError as e:
@@ -200,6 +211,7 @@ class AadhaarKycStartView(APIView):
             method="AADHAAR",
             status="OTP_SENT",
             dedupe_hash=dedupe_hash,
+            dedupe_version=current_version(),
             surepass_client_id=surepass_client_id,
             expires_at=KycSession.default_expiry(),   
         )
@@ -258,11 +270,10 @@ class AadhaarKycResendOtpView(APIView):
             )
 
         # Verify ID matches the one used for dedupe (sanity check)
-        dedupe_hash = KycSession.compute_dedupe_hash(id_number)
-        if active.dedupe_hash != dedupe_hash:
+        if active.dedupe_hash not in candidate_hashes(id_number):
              return Response({"detail": "Aadhaar number does not match active session"}, status=status.HTTP_400_BAD_REQUEST)
 
-        client = SurepassClient()
+        client = get_surepass_client()
         try:
             resp = client.aadhaar_generate_otp(id_number=id_number)
         except SurepassError as e:
@@ -355,7 +366,7 @@ class AadhaarKycSubmitOtpView(APIView):
 
         profile: OperatorProfile = request.user.operator_profile
 
-        client = SurepassClient()
+        client = get_surepass_client()
         try:
             resp = client.aadhaar_submit_otp(client_id=session.surepass_client_id, otp=otp)
         except SurepassError as e:
@@ -597,11 +608,12 @@ class DLKycStartView(APIView):
             )
 
         # Dedupe check
-        dedupe_hash = KycSession.compute_dedupe_hash(license_number)
+        hashes = candidate_hashes(license_number)
+        dedupe_hash = hashes[0]
 
         existing = (
             UserVerification.objects
-            .filter(dedupe_hash=dedupe_hash, verified=True)
+            .filter(dedupe_hash__in=hashes, verified=True)
             .exclude(user=request.user)
             .first()
         )
@@ -609,7 +621,7 @@ class DLKycStartView(APIView):
             return Response({"detail": "This license is already used for verification"}, status=status.HTTP_409_CONFLICT)
 
         # Call Surepass
-        client = SurepassClient()
+        client = get_surepass_client()
         try:
             dob_str = dob.strftime("%Y-%m-%d")
             resp = client.driving_license_verify(license_number=license_number, dob=dob_str)
@@ -660,6 +672,7 @@ class DLKycStartView(APIView):
             method="DL",
             status="DL_VERIFIED",
             dedupe_hash=dedupe_hash,
+            dedupe_version=current_version(),
             surepass_client_id=data.get("client_id"),
             ekyc_full_name=dl_name,
             ekyc_gender=dl_gender,
@@ -867,30 +880,14 @@ class FaceLivenessView(APIView):
         session.liveness_attempts += 1
         session.save(update_fields=["liveness_attempts", "updated_at"])
 
-        client = SurepassClient()
+        client = get_surepass_client()
         selfie_bytes = selfie.read()
         
-        # Retry logic for Surepass fluctuation
-        resp = None
-        last_err = None
-        for attempt in range(2):
-            try:
-                resp = client.face_liveness(selfie_bytes=selfie_bytes, filename=selfie.name)
-                break
-            except SurepassError as e:
-                last_err = e
-                if "502" not in str(e) and "504" not in str(e):
-                    break # Not a transient error
-        
-        if not resp:
-            err_msg = str(last_err)
-            # If the error is NOT a timeout/gateway error from provider, it's likely a validation error (4xx)
-            # So we should return 400 to the app so it displays the message instead of "Service Busy"
-            status_code = status.HTTP_502_BAD_GATEWAY
-            if "502" not in err_msg and "504" not in err_msg:
-                 status_code = status.HTTP_400_BAD_REQUEST
-            
-            return Response({"detail": err_msg}, status=status_code)
+        # Transient failures are retried inside the client
+        try:
+            resp = client.face_liveness(selfie_bytes=selfie_bytes, filename=selfie.name)
+        except SurepassError as e:
+            return Response({"detail": str(e)}, status=_surepass_error_status(e))
 
         d = resp.get("data", {}) or {}
         live = bool(d.get("live", False))
@@ -900,9 +897,10 @@ class FaceLivenessView(APIView):
         ver, _ = UserVerification.objects.get_or_create(
             user=request.user,
             method=session.method,  
-            defaults={"dedupe_hash": session.dedupe_hash},
+            defaults={"dedupe_hash": session.dedupe_hash, "dedupe_version": session.dedupe_version},
         )
         ver.dedupe_hash = session.dedupe_hash
+        ver.dedupe_version = session.dedupe_version
         ver.liveness_pass = live
         ver.liveness_confidence = confidence
         ver.save()
@@ -959,28 +957,14 @@ class FaceMatchView(APIView):
         except Exception:
             return Response({"detail": "Invalid ID image. Restart KYC."}, status=status.HTTP_400_BAD_REQUEST)
 
-        client = SurepassClient()
+        client = get_surepass_client()
         selfie_bytes = selfie.read()
         
-        # Retry logic for Surepass fluctuation
-        resp = None
-        last_err = None
-        for attempt in range(2):
-            try:
-                resp = client.face_match(selfie_bytes=selfie_bytes, id_card_bytes=id_bytes, selfie_filename=selfie.name, id_filename="aadhaar.jpg")
-                break
-            except SurepassError as e:
-                last_err = e
-                if "502" not in str(e) and "504" not in str(e):
-                    break # Not a transient error
-        
-        if not resp:
-            err_msg = str(last_err)
-            status_code = status.HTTP_502_BAD_GATEWAY
-            if "502" not in err_msg and "504" not in err_msg:
-                 status_code = status.HTTP_400_BAD_REQUEST
-            
-            return Response({"detail": err_msg}, status=status_code)
+        # Transient failures are retried inside the client
+        try:
+            resp = client.face_match(selfie_bytes=selfie_bytes, id_card_bytes=id_bytes, selfie_filename=selfie.name, id_filename="aadhaar.jpg")
+        except SurepassError as e:
+            return Response({"detail": str(e)}, status=_surepass_error_status(e))
 
         d = resp.get("data", {}) or {}
         match_status = bool(d.get("match_status", False))
@@ -992,9 +976,10 @@ class FaceMatchView(APIView):
         ver, _ = UserVerification.objects.get_or_create(
             user=request.user,
             method=session.method,  
-            defaults={"dedupe_hash": session.dedupe_hash},
+            defaults={"dedupe_hash": session.dedupe_hash, "dedupe_version": session.dedupe_version},
         )
         ver.dedupe_hash = session.dedupe_hash
+        ver.dedupe_version = session.dedupe_version
         ver.name_match = session.name_match
         ver.name_match_score = session.name_match_score
         ver.dob_match = session.dob_match
@@ -1012,7 +997,13 @@ class FaceMatchView(APIView):
             ver.verified = False
             ver.verified_at = None
 
-        ver.save()
+        try:
+            with transaction.atomic():
+                ver.save()
+        except IntegrityError:
+            # Another account verified the same ID since this session started
+            # (kyc_verified_dedupe_hash_uniq)
+            return Response({"detail": "This ID is already used for verification"}, status=status.HTTP_409_CONFLICT)
 
         profile = request.user.operator_profile
         if face_pass:
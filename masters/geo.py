@@ -0,0 +1,124 @@
+"""
+Grid-based spatial index for center geo-matching.
+
+Space is cut into fixed CELL_DEGREES x CELL_DEGREES cells. Every
+CenterMaster stores its cell as `geo_cell` (an indexed column), so "masters
+within r metres" becomes an equality IN lookup on the few cells that
+cover the search circle, followed by an exact Haversine check. GridIndex
+is the in-memory equivalent for bulk passes such as `link_centers`.
+"""
+import math
+from collections import defaultdict
+
+CELL_DEGREES = 0.001  # ~111 m of latitude
+EARTH_RADIUS_M = 6371000
+METRES_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+
+# Two centers closer than this are treated as the same physical site
+DUPLICATE_RADIUS_M = 50
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return EARTH_RADIUS_M * c
+
+
+def cell_of(lat, lon):
+    return (math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES))
+
+
+def cell_key(lat, lon):
+    """Value stored in CenterMaster.geo_cell, or None without coordinates."""
+    if lat is None or lon is None:
+        return None
+    i, j = cell_of(float(lat), float(lon))
+    return f"{i}:{j}"
+
+
+def covering_cells(lat, lon, radius_m):
+    """Cells that together contain every point within `radius_m` of (lat, lon)."""
+    # 1% slack so float rounding at the box edge can never drop a match
+    radius_m *= 1.01
+    dlat = radius_m / METRES_PER_DEGREE
+    # Longitude degrees shrink with latitude; use the widest row the box touches
+    cos_lat = max(math.cos(math.radians(min(89.9, abs(lat) + dlat))), 1e-6)
+    dlon = radius_m / (METRES_PER_DEGREE * cos_lat)
+
+    i0, j0 = cell_of(lat - dlat, lon - dlon)
+    i1, j1 = cell_of(lat + dlat, lon + dlon)
+    return [(i, j) for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)]
+
+
+def covering_keys(lat, lon, radius_m):
+    return [f"{i}:{j}" for i, j in covering_cells(lat, lon, radius_m)]
+
+
+class GridIndex:
+    """
+    In-memory grid over (lat, lon) points.
+
+    `near()` returns the positions (insertion order) of points within a
+    radius, so callers scanning a list in order get the same results as a
+    full pairwise scan.
+    """
+
+    def __init__(self):
+        self.points = []
+        self.cells = defaultdict(list)
+
+    def add(self, lat, lon):
+        pos = len(self.points)
+        self.points.append((lat, lon))
+        self.cells[cell_of(lat, lon)].append(pos)
+        return pos
+
+    def near(self, lat, lon, radius_m):
+        found = []
+        for cell in covering_cells(lat, lon, radius_m):
+            for pos in self.cells.get(cell, ()):
+                plat, plon = self.points[pos]
+                if haversine_m(lat, lon, plat, plon) <= radius_m:
+                    found.append(pos)
+        found.sort()
+        return found
+
+
+def plan_merges(masters, radius_m=DUPLICATE_RADIUS_M):
+    """
+    Groups geolocated masters (ordered by created_at) into duplicate
+    clusters.
+
+    Scanning in order, each unprocessed master collects every other
+    unprocessed master within `radius_m`. The survivor is the first ACTIVE
+    master, else the oldest. Returns a list of (primary, [duplicates]).
+    """
+    index = GridIndex()
+    coords = []
+    for m in masters:
+        lat, lon = float(m.latitude), float(m.longitude)
+        coords.append((lat, lon))
+        index.add(lat, lon)
+
+    processed = [False] * len(masters)
+    plans = []
+    for pos, m1 in enumerate(masters):
+        if processed[pos]:
+            continue
+        processed[pos] = True
+
+        lat, lon = coords[pos]
+        positions = [p for p in index.near(lat, lon, radius_m) if not processed[p]]
+        if not positions:
+            continue
+
+        cluster = [pos] + positions
+        cluster.sort(key=lambda p: (0 if masters[p].status == 'ACTIVE' else 1, masters[p].created_at))
+        # The survivor stays unprocessed, so a later scan can still reach it
+        for p in cluster[1:]:
+            processed[p] = True
+        plans.append((masters[cluster[0]], [masters[p] for p in cluster[1:]]))
+    return plans
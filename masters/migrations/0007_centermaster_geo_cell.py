@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-18 15:06
+
+import math
+
+from django.db import migrations, models
+
+CELL_DEGREES = 0.001
+
+
+def backfill_geo_cell(apps, schema_editor):
+    CenterMaster = apps.get_model('masters', 'CenterMaster')
+
+    batch = []
+    qs = CenterMaster.objects.filter(latitude__isnull=False, longitude__isnull=False).only('pk', 'latitude', 'longitude')
+    for master in qs.iterator(chunk_size=2000):
+        i = math.floor(float(master.latitude) / CELL_DEGREES)
+        j = math.floor(float(master.longitude) / CELL_DEGREES)
+        master.geo_cell = f"{i}:{j}"
+        batch.append(master)
+        if len(batch) >= 2000:
+            CenterMaster.objects.bulk_update(batch, ['geo_cell'])
+            batch = []
+    if batch:
+        CenterMaster.objects.bulk_update(batch, ['geo_cell'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('masters', '0006_tasklibrary_task_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='centermaster',
+            name='geo_cell',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32, null=True),
+        ),
+        migrations.RunPython(backfill_geo_cell, migrations.RunPython.noop),
+    ]
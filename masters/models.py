@@ -4,6 +4,7 @@ from django.db import models
 from django.utils.text import slugify
 
 from common.models import TimeStampedUUIDModel
+from .geo import cell_key
 
 class Client(TimeStampedUUIDModel):
     client_code = models.CharField(max_length=50, unique=True, db_index=True)
@@ -100,6 +101,8 @@ class CenterMaster(TimeStampedUUIDModel):
 
     latitude = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
     longitude = models.DecimalField(max_digits=10, decimal_places=6, null=True, blank=True)
+    # Grid cell of (latitude, longitude), see masters.geo; kept in sync by save()
+    geo_cell = models.CharField(max_length=32, null=True, blank=True, db_index=True, editable=False)
     geofence_radius_meters = models.IntegerField(default=200)
     
 
@@ -144,6 +147,13 @@ class CenterMaster(TimeStampedUUIDModel):
             models.Index(fields=['status']),
             models.Index(fields=['latitude', 'longitude']),
         ]
+
+    def save(self, *args, **kwargs):
+        self.geo_cell = cell_key(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geo_cell'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.name} ({self.center_code})"
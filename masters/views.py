@@ -17,15 +17,11 @@ import string
 
 User = get_user_model()
 
-from common.mixins import ExportMixin
+from common.mixins import ConditionalGetMixin, ExportMixin
+from common.reference_cache import active_roles, get_client
 from rest_framework import filters 
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.pagination import PageNumberPagination
-
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 1000
+from common.pagination import StandardResultsSetPagination
 
 class ClientViewSet(ExportMixin, viewsets.ModelViewSet):
     serializer_class = ClientSerializer
@@ -138,7 +134,7 @@ class CenterMasterViewSet(ExportMixin, viewsets.ModelViewSet):
                     client_id = request.data.get('client_id')
                     client_found = None
                     if client_id:
-                        client_found = Client.objects.filter(uid=client_id).first()
+                        client_found = get_client(client_id)
                     
                     serializer = self.get_serializer(data=cleaned_data)
                     if serializer.is_valid():
@@ -154,7 +150,7 @@ class CenterMasterViewSet(ExportMixin, viewsets.ModelViewSet):
         
         return Response(results, status=status.HTTP_200_OK if not results["errors"] else status.HTTP_207_MULTI_STATUS)
 
-class RoleMasterViewSet(viewsets.ModelViewSet):
+class RoleMasterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = RoleMasterSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'uid'
@@ -162,6 +158,13 @@ class RoleMasterViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return RoleMaster.objects.filter(is_active=True)
 
+    def list(self, request, *args, **kwargs):
+        # Served from the reference cache; invalidated on any RoleMaster write.
+        # The ETag comes from the cached rows too, so a 304 costs no query.
+        roles = active_roles()
+        etag = self.make_etag([(role.pk, role.updated_at) for role in roles])
+        return self.conditional_response(etag, lambda: Response(self.get_serializer(roles, many=True).data))
+
 class TaskLibraryViewSet(viewsets.ModelViewSet):
     serializer_class = TaskLibrarySerializer
     permission_classes = [permissions.IsAuthenticated]
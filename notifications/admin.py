@@ -1,3 +1,32 @@
 from django.contrib import admin
+from .models import ArchivedNotification, Notification, NotificationCounter, OutboundMessage
 
-# Register your models here.
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'title', 'notification_type', 'is_read', 'created_at')
+    list_filter = ('notification_type', 'is_read')
+    search_fields = ('user__username', 'title')
+
+
+@admin.register(NotificationCounter)
+class NotificationCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread', 'updated_at')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'unread', 'created_at', 'updated_at')
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'title', 'notification_type', 'is_read', 'created_at', 'archived_at')
+    list_filter = ('notification_type', 'is_read')
+    search_fields = ('user__username', 'title')
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'mobile', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('kind', 'provider', 'status')
+    search_fields = ('mobile', 'dedupe_key')
+    readonly_fields = ('created_at', 'updated_at', 'provider_response', 'last_error')
+    exclude = ('params',)
@@ -0,0 +1,42 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from notifications.models import ArchivedNotification, Notification
+
+ARCHIVED_FIELDS = ('uid', 'user_id', 'title', 'message', 'notification_type', 'is_read', 'created_at')
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves notifications older than NOTIFICATION_RETENTION_DAYS into notification_archive "
+        "(unread counters and sync tombstones are updated by the delete signals)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override NOTIFICATION_RETENTION_DAYS")
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        days = options["days"] if options["days"] is not None else settings.NOTIFICATION_RETENTION_DAYS
+        cutoff = timezone.now() - datetime.timedelta(days=days)
+        total = 0
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Notification.objects.filter(created_at__lt=cutoff)
+                    .order_by('created_at')
+                    .values('pk', *ARCHIVED_FIELDS)[:options["batch_size"]]
+                )
+                if not rows:
+                    break
+                ArchivedNotification.objects.bulk_create(
+                    [ArchivedNotification(**{field: row[field] for field in ARCHIVED_FIELDS}) for row in rows],
+                    ignore_conflicts=True,
+                )
+                Notification.objects.filter(pk__in=[row['pk'] for row in rows]).delete()
+            total += len(rows)
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} notifications older than {cutoff:%Y-%m-%d}"))
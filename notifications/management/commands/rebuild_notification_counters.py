@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from notifications.service import rebuild_counters, verify_counters
+
+
+class Command(BaseCommand):
+    help = 'Recomputes per-user unread NotificationCounters from Notification (or checks them with --verify)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help='Report mismatches without writing')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = verify_counters()
+            for user_id, expected, stored in mismatches[:50]:
+                self.stdout.write(self.style.WARNING(f"User {user_id}: unread expected={expected} stored={stored}"))
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counter mismatches found")
+            self.stdout.write(self.style.SUCCESS("All unread counters match."))
+            return
+
+        with transaction.atomic():
+            written = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt unread counters for {written} users."))
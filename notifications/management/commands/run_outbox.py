@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.outbox import RateLimiter, claim_batch, deliver
+
+
+class Command(BaseCommand):
+    help = "Delivers queued WhatsApp/SMS messages from the outbound_message table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=getattr(settings, "OUTBOX_WORKER_CONCURRENCY", 8))
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--once", action="store_true", help="Drain due messages and exit")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        rates = getattr(settings, "OUTBOX_RATE_LIMITS", {})
+        limiters = {provider: RateLimiter(rate) for provider, rate in rates.items() if rate}
+
+        def work(message):
+            try:
+                return deliver(message, limiter=limiters.get(message.provider))
+            finally:
+                close_old_connections()
+
+        self.stdout.write(f"Outbox worker started (concurrency={concurrency}, rate_limits={rates})")
+        totals = {"SENT": 0, "PENDING": 0, "FAILED": 0}
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                batch = claim_batch(concurrency * 4)
+                if not batch:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for outcome in pool.map(work, batch):
+                    totals[outcome] = totals.get(outcome, 0) + 1
+
+                if options["once"]:
+                    self.stdout.write(f"Processed {len(batch)} messages")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals['SENT']}, retrying {totals['PENDING']}, failed {totals['FAILED']}"
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:52
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('kind', models.CharField(choices=[('OTP', 'Login OTP'), ('ONBOARDING', 'Onboarding Request'), ('ASSIGNMENT', 'Duty Assignment')], max_length=20)),
+                ('provider', models.CharField(choices=[('AUTHKEY', 'AuthKey')], default='AUTHKEY', max_length=20)),
+                ('mobile', models.CharField(max_length=10)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('priority', models.SmallIntegerField(default=100)),
+                ('dedupe_key', models.CharField(blank=True, max_length=150, null=True, unique=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('SENDING', 'Sending'), ('SENT', 'Sent'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('provider_response', models.JSONField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'outbound_message',
+                'ordering': ['priority', 'next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'priority', 'next_attempt_at'], name='outbound_me_status_ab5d1d_idx'), models.Index(fields=['mobile', 'kind'], name='outbound_me_mobile_c7f083_idx')],
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from common.models import TimeStampedUUIDModel
 from django.conf import settings
+from django.utils import timezone
 
 class Notification(TimeStampedUUIDModel):
     NOTIFICATION_TYPES = (
@@ -29,6 +30,115 @@ class Notification(TimeStampedUUIDModel):
     class Meta:
         db_table = 'notification'
         ordering = ['-created_at']
+        indexes = [
+            # Delta sync (sync.feed)
+            models.Index(fields=['user', 'updated_at']),
+            # Inbox listing, mark-all-read and counter rebuilds
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'is_read']),
+            # archive_notifications cutoff scan
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title} ({'Read' if self.is_read else 'Unread'})"
+
+
+class NotificationCounter(TimeStampedUUIDModel):
+    """
+    Denormalized unread count per user, so the app's unread-count poll is a
+    single-row read. Kept in sync by notifications.service (bulk writes,
+    mark_read, mark_all_read) and notifications.signals (single saves and
+    deletes); `rebuild_notification_counters` recomputes it.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='notification_counter'
+    )
+    unread = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'notification_counter'
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class ArchivedNotification(models.Model):
+    """
+    Notifications moved out of the hot table by `archive_notifications`
+    after NOTIFICATION_RETENTION_DAYS. Columns are copied as they were.
+    """
+    uid = models.UUIDField(unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_notifications'
+    )
+    title = models.CharField(max_length=200)
+    message = models.TextField()
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'notification_archive'
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.title} (archived)"
+
+
+class OutboundMessage(TimeStampedUUIDModel):
+    """
+    Durable outbox for WhatsApp/SMS sends.
+
+    Request handlers only insert rows here; the `run_outbox` worker delivers
+    them with bounded concurrency, retries and per-provider rate limits.
+    """
+    KINDS = (
+        ('OTP', 'Login OTP'),
+        ('ONBOARDING', 'Onboarding Request'),
+        ('ASSIGNMENT', 'Duty Assignment'),
+    )
+    PROVIDERS = (
+        ('AUTHKEY', 'AuthKey'),
+    )
+    STATUSES = (
+        ('PENDING', 'Pending'),
+        ('SENDING', 'Sending'),
+        ('SENT', 'Sent'),
+        ('FAILED', 'Failed'),
+    )
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    provider = models.CharField(max_length=20, choices=PROVIDERS, default='AUTHKEY')
+    mobile = models.CharField(max_length=10)
+    params = models.JSONField(default=dict, blank=True)
+
+    # Lower value is delivered first (OTPs jump the queue)
+    priority = models.SmallIntegerField(default=100)
+    dedupe_key = models.CharField(max_length=150, unique=True, null=True, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUSES, default='PENDING')
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    provider_response = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'outbound_message'
+        ordering = ['priority', 'next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at']),
+            models.Index(fields=['mobile', 'kind']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} -> {self.mobile} ({self.status})"
@@ -0,0 +1,215 @@
+"""
+Transactional outbox for outbound WhatsApp/SMS messages.
+
+Callers use `enqueue_message` / `enqueue_messages`, which only insert rows and
+therefore cost a single local write regardless of provider latency. Rows
+written inside a transaction become visible to the worker only after commit.
+The `run_outbox` management command claims due rows and delivers them.
+"""
+import random
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import OutboundMessage
+
+PRIORITY_OTP = 10
+PRIORITY_DEFAULT = 100
+
+# A SENDING row older than this is assumed to belong to a dead worker
+STALE_LOCK_SECONDS = 300
+
+
+def _senders():
+    # Imported lazily: accounts.utils pulls in settings-dependent config
+    from accounts.utils import (
+        send_authkey_otp,
+        send_onboarding_request_whatsapp,
+        send_assignment_notification_whatsapp,
+    )
+    return {
+        'OTP': lambda m: send_authkey_otp(m.mobile, m.params.get('otp')),
+        'ONBOARDING': lambda m: send_onboarding_request_whatsapp(m.mobile, m.params.get('name')),
+        'ASSIGNMENT': lambda m: send_assignment_notification_whatsapp(m.mobile, m.params.get('role')),
+    }
+
+
+def _build(kind, mobile, params=None, dedupe_key=None, priority=None):
+    if priority is None:
+        priority = PRIORITY_OTP if kind == 'OTP' else PRIORITY_DEFAULT
+    return OutboundMessage(
+        kind=kind,
+        mobile=mobile,
+        params=params or {},
+        dedupe_key=dedupe_key,
+        priority=priority,
+    )
+
+
+def enqueue_message(kind, mobile, params=None, dedupe_key=None, priority=None):
+    """
+    Queues one message. A repeated `dedupe_key` is ignored and the existing
+    row is returned, so retried requests never double-send.
+    """
+    if dedupe_key:
+        msg, _ = OutboundMessage.objects.get_or_create(
+            dedupe_key=dedupe_key,
+            defaults={
+                'kind': kind,
+                'mobile': mobile,
+                'params': params or {},
+                'priority': priority if priority is not None else
+                            (PRIORITY_OTP if kind == 'OTP' else PRIORITY_DEFAULT),
+            },
+        )
+        return msg
+    msg = _build(kind, mobile, params, priority=priority)
+    msg.save()
+    return msg
+
+
+def enqueue_messages(messages, batch_size=1000):
+    """
+    Bulk variant of enqueue_message.
+
+    Args:
+        messages: iterable of dicts with keys kind, mobile and optional
+            params, dedupe_key, priority.
+    """
+    objs = [_build(**m) for m in messages]
+    if objs:
+        OutboundMessage.objects.bulk_create(objs, batch_size=batch_size, ignore_conflicts=True)
+    return len(objs)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at 10 minutes."""
+    base = getattr(settings, "OUTBOX_BACKOFF_BASE_SECONDS", 5)
+    return random.uniform(0, min(600, base * (2 ** max(0, attempts - 1))))
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` sends per second with a burst of `rate`."""
+
+    def __init__(self, rate: float):
+        self.rate = float(rate)
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def claim_batch(limit: int):
+    """
+    Marks up to `limit` due messages as SENDING and returns them.
+
+    Uses SKIP LOCKED so several worker processes can drain the same table.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=STALE_LOCK_SECONDS)
+    with transaction.atomic():
+        ids = list(
+            OutboundMessage.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='PENDING', next_attempt_at__lte=now) |
+                Q(status='SENDING', locked_at__lt=stale)
+            )
+            .order_by('priority', 'next_attempt_at')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        OutboundMessage.objects.filter(pk__in=ids).update(status='SENDING', locked_at=now, updated_at=now)
+    return list(OutboundMessage.objects.filter(pk__in=ids).order_by('priority', 'next_attempt_at'))
+
+
+def _expired(message, now):
+    """True once the message's `expires_at` param (an OTP's session expiry) has passed."""
+    expires_at = parse_datetime(message.params.get('expires_at') or '')
+    return expires_at is not None and expires_at <= now
+
+
+def _expire(message):
+    message.status = 'FAILED'
+    message.locked_at = None
+    message.last_error = "Expired before delivery"
+    if message.kind == 'OTP':
+        message.params = {}
+    message.save(update_fields=['status', 'locked_at', 'last_error', 'params', 'updated_at'])
+    return message.status
+
+
+def deliver(message, limiter=None, max_attempts=None):
+    """
+    Sends one claimed message and records the outcome.
+
+    Provider helpers report failures as {"status": "error", ...} rather than
+    raising, so both shapes count as a failed attempt. A message past its
+    `expires_at` param is marked FAILED without being sent: a retry backoff
+    can outlast the OTP it carries.
+    """
+    max_attempts = max_attempts or getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+    sender = _senders().get(message.kind)
+
+    if _expired(message, timezone.now()):
+        return _expire(message)
+
+    if limiter:
+        limiter.acquire()
+
+    error = None
+    response = None
+    try:
+        if sender is None:
+            raise ValueError(f"No sender for kind {message.kind}")
+        response = sender(message)
+        if isinstance(response, dict) and response.get("status") == "error":
+            error = response.get("message") or "Provider error"
+    except Exception as e:
+        error = str(e)
+
+    now = timezone.now()
+    message.attempts += 1
+    message.locked_at = None
+    message.provider_response = response if isinstance(response, dict) else None
+
+    if error is None:
+        message.status = 'SENT'
+        message.sent_at = now
+        message.last_error = None
+    else:
+        message.last_error = error
+        retry_at = now + timedelta(seconds=backoff_seconds(message.attempts))
+        # No point retrying an OTP the user can no longer enter
+        if message.attempts >= max_attempts or _expired(message, retry_at):
+            message.status = 'FAILED'
+        else:
+            message.status = 'PENDING'
+            message.next_attempt_at = retry_at
+
+    if message.kind == 'OTP' and message.status != 'PENDING':
+        # Don't keep plaintext OTPs once delivered or given up on
+        message.params = {}
+
+    message.save(update_fields=[
+        'status', 'attempts', 'locked_at', 'sent_at', 'last_error',
+        'provider_response', 'params', 'next_attempt_at', 'updated_at',
+    ])
+    return message.status
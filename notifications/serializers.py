@@ -6,3 +6,17 @@ class NotificationSerializer(serializers.ModelSerializer):
         model = Notification
         fields = ['uid', 'title', 'message', 'notification_type', 'is_read', 'created_at']
         read_only_fields = ['uid', 'created_at']
+
+
+class BroadcastSerializer(serializers.Serializer):
+    exam = serializers.UUIDField(required=False)
+    shift = serializers.UUIDField(required=False)
+    shift_center = serializers.UUIDField(required=False)
+    title = serializers.CharField(max_length=200)
+    message = serializers.CharField()
+    notification_type = serializers.ChoiceField(choices=Notification.NOTIFICATION_TYPES, default='ALERT')
+
+    def validate(self, attrs):
+        if not any(attrs.get(key) for key in ('exam', 'shift', 'shift_center')):
+            raise serializers.ValidationError("One of exam, shift or shift_center is required.")
+        return attrs
@@ -0,0 +1,182 @@
+"""
+In-app notification fan-out and per-user unread counters.
+
+Bulk writers (`create_notifications`, `broadcast`) insert Notification rows
+in chunks and add to each recipient's NotificationCounter with one
+`UPDATE ... SET unread = unread + n` per chunk. `mark_read` and
+`mark_all_read` flip rows with a conditional UPDATE and subtract exactly the
+rows they changed, so concurrent readers and writers never lose counts.
+Single `save()`/`delete()` calls are counted by notifications.signals. Call
+these inside the caller's transaction so the counter commits (or rolls back)
+with the rows. A user without a counter row is recounted from Notification.
+The bulk paths also publish the live events (events.emit) that single saves
+get from events.signals.
+"""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from assignments.models import OperatorAssignment
+from events.emit import notifications_created, notifications_read
+from .models import Notification, NotificationCounter
+
+BATCH_SIZE = 1000
+
+# Operators of these assignments are left out of broadcasts
+BROADCAST_EXCLUDED_STATUSES = ('CANCELLED',)
+
+
+def adjust_unread(deltas, rebuild_missing=True):
+    """
+    Applies {user_id: n} to the unread counters, one UPDATE per distinct n
+    per chunk. Users without a counter row are recounted unless
+    `rebuild_missing` is False.
+    """
+    by_amount = defaultdict(list)
+    for user_id, n in deltas.items():
+        if n:
+            by_amount[n].append(user_id)
+
+    now = timezone.now()
+    missing = []
+    for n, user_ids in by_amount.items():
+        for i in range(0, len(user_ids), BATCH_SIZE):
+            chunk = user_ids[i:i + BATCH_SIZE]
+            updated = NotificationCounter.objects.filter(user_id__in=chunk).update(
+                unread=F('unread') + n, updated_at=now,
+            )
+            if updated < len(chunk):
+                have = set(NotificationCounter.objects.filter(user_id__in=chunk).values_list('user_id', flat=True))
+                missing.extend(u for u in chunk if u not in have)
+    if missing and rebuild_missing:
+        # The notification rows are already written, so the recount includes them
+        rebuild_counters(missing)
+
+
+def compute_unread(user_ids=None):
+    """Counts unread notifications straight from Notification: {user_id: unread}."""
+    qs = Notification.objects.filter(is_read=False)
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=user_ids)
+    return dict(qs.order_by().values('user_id').annotate(n=Count('pk')).values_list('user_id', 'n'))
+
+
+def rebuild_counters(user_ids=None):
+    """
+    Recomputes and upserts counter rows for `user_ids` (every user when
+    None); returns the number written.
+    """
+    if user_ids is None:
+        user_ids = list(get_user_model().objects.values_list('pk', flat=True))
+    user_ids = list(user_ids)
+    written = 0
+    now = timezone.now()
+    for i in range(0, len(user_ids), BATCH_SIZE):
+        chunk = user_ids[i:i + BATCH_SIZE]
+        unread = compute_unread(chunk)
+        rows = [NotificationCounter(user_id=u, unread=unread.get(u, 0), updated_at=now) for u in chunk]
+        NotificationCounter.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['unread', 'updated_at'],
+        )
+        written += len(rows)
+    return written
+
+
+def verify_counters(user_ids=None):
+    """
+    Compares stored counters against a fresh count. Returns a list of
+    (user_id, expected, stored) mismatches; a missing counter row reads as 0.
+    """
+    expected = compute_unread(user_ids)
+    stored = NotificationCounter.objects.all()
+    if user_ids is not None:
+        stored = stored.filter(user_id__in=user_ids)
+    stored = dict(stored.values_list('user_id', 'unread'))
+    return [
+        (user_id, expected.get(user_id, 0), stored.get(user_id, 0))
+        for user_id in sorted(set(expected) | set(stored))
+        if expected.get(user_id, 0) != stored.get(user_id, 0)
+    ]
+
+
+def unread_count(user):
+    """The user's unread count from their counter row (recounted once if it doesn't exist yet)."""
+    count = NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first()
+    if count is None:
+        rebuild_counters([user.pk])
+        count = NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first()
+    return count
+
+
+def create_notifications(notifications):
+    """Bulk-inserts unsaved Notification objects in chunks and counts the unread ones."""
+    created = Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    deltas = defaultdict(int)
+    for notification in created:
+        if not notification.is_read:
+            deltas[notification.user_id] += 1
+    adjust_unread(deltas)
+    notifications_created(created)
+    return created
+
+
+def broadcast_recipients(exam=None, shift=None, shift_center=None):
+    """Distinct ids of operators assigned to the given exam, shift or shift center."""
+    if not (exam or shift or shift_center):
+        raise ValueError("A broadcast needs an exam, shift or shift center")
+    assignments = OperatorAssignment.objects.exclude(status__in=BROADCAST_EXCLUDED_STATUSES)
+    if exam:
+        assignments = assignments.filter(shift_center__exam=exam)
+    if shift:
+        assignments = assignments.filter(shift_center__shift=shift)
+    if shift_center:
+        assignments = assignments.filter(shift_center=shift_center)
+    return assignments.order_by('operator_id').values_list('operator_id', flat=True).distinct()
+
+
+def broadcast(title, message, exam=None, shift=None, shift_center=None, notification_type='ALERT'):
+    """
+    Sends one announcement to every operator of an exam, shift or shift
+    center. Each chunk of recipients commits on its own, so a large
+    broadcast never holds one long transaction. Returns the recipient count.
+    """
+    user_ids = list(broadcast_recipients(exam=exam, shift=shift, shift_center=shift_center))
+    for i in range(0, len(user_ids), BATCH_SIZE):
+        with transaction.atomic():
+            create_notifications([
+                Notification(user_id=user_id, title=title, message=message, notification_type=notification_type)
+                for user_id in user_ids[i:i + BATCH_SIZE]
+            ])
+    return len(user_ids)
+
+
+def mark_read(notification):
+    """Marks one notification read; returns False if it already was."""
+    with transaction.atomic():
+        # updated_at by hand: update() skips auto_now, and /api/sync/ relies on it
+        changed = Notification.objects.filter(pk=notification.pk, is_read=False).update(
+            is_read=True, updated_at=timezone.now(),
+        )
+        if changed:
+            adjust_unread({notification.user_id: -changed})
+            notifications_read(notification.user_id, [notification.uid])
+    notification.is_read = True
+    return bool(changed)
+
+
+def mark_all_read(user):
+    """Marks every unread notification of `user` read; returns how many changed."""
+    with transaction.atomic():
+        changed = Notification.objects.filter(user=user, is_read=False).update(
+            is_read=True, updated_at=timezone.now(),
+        )
+        if changed:
+            adjust_unread({user.pk: -changed})
+            notifications_read(user.pk)
+    return changed
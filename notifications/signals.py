@@ -0,0 +1,43 @@
+"""
+Unread counters for single Notification saves and deletes (Notification
+.objects.create, admin edits). Bulk paths go through notifications.service,
+which adjusts the counters itself.
+"""
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .service import adjust_unread, rebuild_counters
+
+
+def _remember_read_state(instance):
+    # Read from __dict__ so deferred fields don't trigger a query
+    instance._counter_is_read = instance.__dict__.get('is_read')
+
+
+@receiver(post_init, sender=Notification)
+def track_read_state(sender, instance, **kwargs):
+    _remember_read_state(instance)
+
+
+@receiver(post_save, sender=Notification)
+def count_saved_notification(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    was_read = instance._counter_is_read
+    if created:
+        if not instance.is_read:
+            adjust_unread({instance.user_id: 1})
+    elif was_read is None:
+        # Loaded without is_read (e.g. .only()); recount instead of guessing
+        rebuild_counters([instance.user_id])
+    elif was_read != instance.is_read:
+        adjust_unread({instance.user_id: -1 if instance.is_read else 1})
+    _remember_read_state(instance)
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_deleted_notification(sender, instance, **kwargs):
+    if not instance.is_read:
+        # During a cascading user delete the counter row goes too
+        adjust_unread({instance.user_id: -1}, rebuild_missing=False)
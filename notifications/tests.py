@@ -1,3 +1,218 @@
-from django.test import TestCase
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import AppUser
+from assignments.models import OperatorAssignment
+from common.fakes import start_fake_server
+from masters.models import Client, RoleMaster
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter
+from . import service
+from .models import ArchivedNotification, Notification, NotificationCounter, OutboundMessage
+from .outbox import claim_batch, deliver, enqueue_message
+
+
+class OtpOutboxTests(TestCase):
+    """OTP delivery through the real AuthKey sender against the fake AuthKey server."""
+
+    def start_authkey(self, **options):
+        server, url = start_fake_server('authkey', **options)
+        self.addCleanup(server.shutdown)
+        settings_override = override_settings(
+            AUTHKEY_BASE_URL=f'{url}/request', AUTHKEY_API_KEY='key', AUTHKEY_SID='sid',
+            AUTHKEY_COMPANY='SeqrView', AUTHKEY_WID='wid', AUTHKEY_TIMEOUT_SECONDS=0.2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        return server
+
+    def enqueue_otp(self, expires_in=timedelta(minutes=5)):
+        expires_at = timezone.now() + expires_in
+        return enqueue_message('OTP', '9000000001', {'otp': '123456', 'expires_at': expires_at.isoformat()})
+
+    def deliver_next(self, max_attempts=2):
+        [message] = claim_batch(10)
+        status = deliver(message, max_attempts=max_attempts)
+        return status, OutboundMessage.objects.get(pk=message.pk)
+
+    def retry_now(self, message):
+        OutboundMessage.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+
+    def test_sent_otp_params_are_cleared(self):
+        server = self.start_authkey()
+        self.enqueue_otp()
+        status, message = self.deliver_next()
+        self.assertEqual(status, 'SENT')
+        self.assertEqual(message.params, {})
+        self.assertEqual(message.provider_response['Message'], 'Submitted Successfully')
+        [call] = server.calls
+        self.assertEqual((call['mobile'], call['otp'], call['authkey']), ('9000000001', '123456', 'key'))
+
+    def test_provider_errors_are_retried_then_failed(self):
+        server = self.start_authkey(fail_rate=1.0)
+        self.enqueue_otp()
+        status, message = self.deliver_next()
+        # The 502 comes back from the sender as {"status": "error"}
+        self.assertEqual(status, 'PENDING')
+        self.assertIn('502', message.last_error)
+        self.assertEqual(message.params['otp'], '123456')
+        self.retry_now(message)
+        status, message = self.deliver_next()
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(message.attempts, 2)
+        self.assertEqual(message.params, {})
+        self.assertEqual(len(server.calls), 2)
+
+    def test_provider_timeout_is_a_failed_attempt(self):
+        self.start_authkey(latency_ms=800)
+        self.enqueue_otp()
+        status, message = self.deliver_next()
+        self.assertEqual(status, 'PENDING')
+        self.assertIn('timed out', message.last_error)
+
+    def test_expired_otp_is_not_sent(self):
+        server = self.start_authkey()
+        self.enqueue_otp(expires_in=timedelta(seconds=-1))
+        status, message = self.deliver_next()
+        self.assertEqual(server.calls, [])
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(message.attempts, 0)
+        self.assertEqual(message.last_error, 'Expired before delivery')
+        self.assertEqual(message.params, {})
+
+    def test_retry_after_expiry_gives_up(self):
+        self.start_authkey(fail_rate=1.0)
+        self.enqueue_otp(expires_in=timedelta(seconds=30))
+        with mock.patch('notifications.outbox.backoff_seconds', return_value=60):
+            status, message = self.deliver_next(max_attempts=5)
+        self.assertEqual(status, 'FAILED')
+        self.assertEqual(message.attempts, 1)
+        self.assertEqual(message.params, {})
+
+
+class UnreadCounterTests(TestCase):
+    """NotificationCounter.unread must always equal the unread Notification rows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        client = Client.objects.create(client_code='C1', name='Client One')
+        role = RoleMaster.objects.create(code='INV', name='Invigilator')
+        exam = Exam.objects.create(exam_code='E1', name='Exam One', client=client)
+        shift = Shift.objects.create(
+            exam=exam, shift_code='S1', work_date=timezone.localdate(),
+            start_time=time(9, 0), end_time=time(12, 0),
+        )
+        center = ExamCenter.objects.create(exam=exam, client_center_code='EC1', client_center_name='Center One')
+        cls.shift_center = ShiftCenter.objects.create(exam=exam, shift=shift, exam_center=center)
+        cls.operators = [AppUser.objects.create(username=f'op{n}', user_type='OPERATOR') for n in range(4)]
+        # Each assignment also creates a "New Duty Assigned" notification
+        for n, operator in enumerate(cls.operators):
+            OperatorAssignment.objects.create(
+                shift_center=cls.shift_center, operator=operator, role=role,
+                status='CANCELLED' if n == 3 else 'PENDING',
+            )
+        cls.admin = AppUser.objects.create(username='admin', user_type='INTERNAL_ADMIN')
+
+    def assertCountersMatch(self):
+        self.assertEqual(service.verify_counters(), [])
+        for user in self.operators:
+            stored = NotificationCounter.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+            self.assertEqual(stored, Notification.objects.filter(user=user, is_read=False).count(), user.username)
+
+    def unread(self, user):
+        return service.unread_count(user)
+
+    def test_counters_follow_every_write_path(self):
+        op0, op1, op2, op3 = self.operators
+        self.assertCountersMatch()
+        self.assertEqual(self.unread(op0), 1)
+
+        service.create_notifications([
+            Notification(user=op0, title='a', message='a'),
+            Notification(user=op0, title='b', message='b', is_read=True),
+            Notification(user=op1, title='c', message='c'),
+        ])
+        self.assertCountersMatch()
+
+        self.assertEqual(service.broadcast('Gate', 'Gate closes at 9', shift_center=self.shift_center), 3)
+        self.assertCountersMatch()
+        self.assertEqual([self.unread(op) for op in self.operators], [3, 3, 2, 1])
+
+        single = Notification.objects.create(user=op2, title='d', message='d')
+        self.assertCountersMatch()
+        single.is_read = True
+        single.save()
+        self.assertCountersMatch()
+        single.is_read = False
+        single.save()
+        self.assertCountersMatch()
+
+        target = Notification.objects.filter(user=op1, is_read=False).first()
+        self.assertTrue(service.mark_read(target))
+        self.assertFalse(service.mark_read(target))
+        self.assertCountersMatch()
+
+        self.assertEqual(service.mark_all_read(op0), 3)
+        self.assertEqual(service.mark_all_read(op0), 0)
+        self.assertCountersMatch()
+        self.assertEqual(self.unread(op0), 0)
+
+        single.delete()
+        Notification.objects.filter(user=op1).delete()
+        self.assertCountersMatch()
+        self.assertEqual([self.unread(op) for op in self.operators], [0, 0, 2, 1])
+
+    def test_archiving_moves_unread_rows_out_of_the_count(self):
+        Notification.objects.create(user=self.operators[0], title='new', message='new')
+        Notification.objects.exclude(title='new').update(created_at=timezone.now() - timedelta(days=400))
+        call_command('archive_notifications', days=30, stdout=mock.Mock())
+        self.assertEqual(ArchivedNotification.objects.count(), 4)
+        self.assertCountersMatch()
+        self.assertEqual([self.unread(op) for op in self.operators], [1, 0, 0, 0])
+
+    def test_api_endpoints(self):
+        op0 = self.operators[0]
+        service.create_notifications([Notification(user=op0, title=str(n), message='m') for n in range(3)])
+        api = APIClient()
+        api.force_authenticate(op0)
+        self.assertEqual(api.get('/api/notifications/unread-count/').data, {'unread_count': 4})
+        uid = Notification.objects.filter(user=op0, title='0').values_list('uid', flat=True).get()
+        api.post(f'/api/notifications/{uid}/mark-read/')
+        self.assertEqual(api.get('/api/notifications/unread-count/').data, {'unread_count': 3})
+        api.post('/api/notifications/mark-all-read/')
+        self.assertEqual(api.get('/api/notifications/unread-count/').data, {'unread_count': 0})
+
+        api.force_authenticate(self.admin)
+        response = api.post('/api/notifications/broadcast/', {
+            'title': 'Shift moved', 'message': '10:00', 'shift_center': str(self.shift_center.uid),
+        })
+        self.assertEqual(response.data, {'recipients': 3})
+        self.assertCountersMatch()
+
+    def test_missing_counter_row_is_recounted(self):
+        op0 = self.operators[0]
+        NotificationCounter.objects.filter(user=op0).delete()
+        service.create_notifications([Notification(user=op0, title='a', message='a')])
+        self.assertEqual(NotificationCounter.objects.get(user=op0).unread, 2)
+        self.assertCountersMatch()
+
+    def test_verify_detects_drift_and_rebuild_corrects_it(self):
+        op0, op1 = self.operators[:2]
+        NotificationCounter.objects.filter(user=op0).update(unread=42)
+        NotificationCounter.objects.filter(user=op1).delete()
+        self.assertEqual(service.verify_counters(), [(op0.pk, 1, 42), (op1.pk, 1, 0)])
+        self.assertEqual(service.verify_counters([op1.pk]), [(op1.pk, 1, 0)])
+        with self.assertRaisesMessage(CommandError, '2 counter mismatches found'):
+            call_command('rebuild_notification_counters', verify=True, stdout=mock.Mock())
+
+        self.assertEqual(service.rebuild_counters([op0.pk]), 1)
+        self.assertEqual(service.verify_counters(), [(op1.pk, 1, 0)])
+        call_command('rebuild_notification_counters', stdout=mock.Mock())
+        self.assertCountersMatch()
+        # Every user gets a row, including those with nothing unread
+        self.assertEqual(NotificationCounter.objects.get(user=self.admin).unread, 0)
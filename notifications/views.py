@@ -1,8 +1,12 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+
+from common.permissions import IsInternalAdmin
+from operations.models import Exam, Shift, ShiftCenter
+from . import service
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import BroadcastSerializer, NotificationSerializer
 
 class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -17,17 +21,33 @@ class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=True, methods=['post'], url_path='mark-read')
     def mark_read(self, request, uid=None):
-        notification = self.get_object()
-        notification.is_read = True
-        notification.save()
+        service.mark_read(self.get_object())
         return Response({'status': 'read'})
 
     @action(detail=False, methods=['post'], url_path='mark-all-read')
     def mark_all_read(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        service.mark_all_read(request.user)
         return Response({'status': 'all marked as read'})
 
     @action(detail=False, methods=['get'], url_path='unread-count')
     def unread_count(self, request):
-        count = Notification.objects.filter(user=request.user, is_read=False).count()
-        return Response({'unread_count': count})
+        return Response({'unread_count': service.unread_count(request.user)})
+
+    @action(detail=False, methods=['post'], url_path='broadcast', permission_classes=[IsInternalAdmin])
+    def broadcast(self, request):
+        """Announcement to every operator of one exam, shift or shift center (by uid)."""
+        serializer = BroadcastSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        scope = {}
+        for key, model in (('exam', Exam), ('shift', Shift), ('shift_center', ShiftCenter)):
+            if data.get(key):
+                scope[key] = model.objects.filter(uid=data[key]).first()
+                if scope[key] is None:
+                    return Response({"detail": f"Invalid {key} ID."}, status=status.HTTP_404_NOT_FOUND)
+
+        recipients = service.broadcast(
+            data['title'], data['message'], notification_type=data['notification_type'], **scope
+        )
+        return Response({'recipients': recipients}, status=status.HTTP_201_CREATED)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Exam, Shift, ExamCenter, ShiftCenter, ShiftCenterRole
+from .models import Exam, Shift, ExamCenter, ShiftCenter, ShiftCenterRole, ShiftCenterStats
 
 class ShiftInline(admin.TabularInline):
     model = Shift
@@ -34,4 +34,10 @@ class ShiftCenterAdmin(admin.ModelAdmin):
 @admin.register(ShiftCenterRole)
 class ShiftCenterRoleAdmin(admin.ModelAdmin):
     list_display = ('shift_center', 'role', 'headcount', 'buffer_headcount')
-    list_filter = ('role',)
\ No newline at end of file
+    list_filter = ('role',)
+
+@admin.register(ShiftCenterStats)
+class ShiftCenterStatsAdmin(admin.ModelAdmin):
+    list_display = ('shift_center', 'total', 'pending', 'confirmed', 'checked_in', 'completed', 'updated_at')
+    list_filter = ('exam',)
+    readonly_fields = ('total', 'pending', 'confirmed', 'checked_in', 'completed', 'cancelled', 'no_show')
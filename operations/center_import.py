@@ -0,0 +1,288 @@
+"""
+Set-based CSV import of exam centers into a shift.
+
+The per-row importer ran ExamCenter.get_or_create and
+ShiftCenter.update_or_create for every line, and every new ExamCenter's
+save() looked up (or created) its CenterMaster and pushed its contact and
+location details back into it. Here the file is parsed up front, existing
+exam centers, shift centers and candidate masters are fetched with a few IN
+queries, master linking and syncing are replayed in memory in file order,
+and everything is written with bulk_create / bulk_update.
+
+Semantics match the per-row path: existing exam centers are left as they
+are, only new ones are linked to a master, and for a center listed twice the
+last row's values land on the shift center.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from common.csv_import import PhaseTimer
+from common.reference_cache import invalidate_on_commit
+from masters.geo import DUPLICATE_RADIUS_M, cell_key, cell_of, covering_cells, covering_keys, haversine_m
+from masters.models import CenterMaster
+from .models import ExamCenter, ShiftCenter
+
+BATCH_SIZE = 1000
+
+# ExamCenter fields pushed into its master (see ExamCenter.save)
+MASTER_SYNC_FIELDS = ['latitude', 'longitude', 'geo_cell', 'incharge_name', 'incharge_phone',
+                      'max_candidates_overall', 'updated_at']
+
+SNAPSHOT_FIELDS = ['operators_required', 'center_name', 'city', 'address', 'latitude', 'longitude',
+                   'incharge_name', 'incharge_phone']
+
+
+def _coords(lat, lon):
+    """(lat, lon) as floats, or None when missing or unparsable (ExamCenter.save skips geo-matching then)."""
+    if not (lat and lon):
+        return None
+    try:
+        return float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+
+
+class MasterLinker:
+    """
+    In-memory replay of ExamCenter.save's master linking for a batch of new
+    exam centers.
+
+    Masters are prefetched by code and by the grid cells around every new
+    center. Masters created or moved earlier in the batch are visible to
+    later rows, as they were when each row was saved on its own.
+    """
+
+    def __init__(self, centers):
+        codes = {ec.client_center_code.strip().upper() for ec in centers}
+        keys = set()
+        for ec in centers:
+            point = _coords(ec.latitude, ec.longitude)
+            if point:
+                keys.update(covering_keys(*point, DUPLICATE_RADIUS_M))
+
+        self.by_code = {}
+        self.cells = {}
+        self.order = {}
+        self.new = []
+        self.dirty = {}
+        codes, keys = list(codes), list(keys)
+        found = {}
+        for i in range(0, len(codes), BATCH_SIZE):
+            found.update((m.pk, m) for m in CenterMaster.objects.filter(center_code__in=codes[i:i + BATCH_SIZE]))
+        for i in range(0, len(keys), BATCH_SIZE):
+            found.update((m.pk, m) for m in CenterMaster.objects.filter(geo_cell__in=keys[i:i + BATCH_SIZE]))
+        # Same tie-break as the per-save lookup's order_by('created_at')
+        for master in sorted(found.values(), key=lambda m: (m.created_at, m.pk)):
+            self._track(master)
+
+    def _track(self, master):
+        self.order[id(master)] = len(self.order)
+        self.by_code[master.center_code] = master
+        self._index(master)
+
+    def _index(self, master):
+        point = _coords(master.latitude, master.longitude)
+        master._import_cell = cell_of(*point) if point else None
+        if point:
+            self.cells.setdefault(master._import_cell, []).append(master)
+
+    def _move(self, master):
+        if master._import_cell is not None:
+            self.cells[master._import_cell].remove(master)
+        self._index(master)
+
+    def _nearest(self, lat, lon):
+        found = [
+            master
+            for cell in covering_cells(lat, lon, DUPLICATE_RADIUS_M)
+            for master in self.cells.get(cell, ())
+            if haversine_m(lat, lon, float(master.latitude), float(master.longitude)) <= DUPLICATE_RADIUS_M
+        ]
+        return min(found, key=lambda m: self.order[id(m)]) if found else None
+
+    def link(self, ec):
+        """Sets ec.master_center: exact code, else first master within 50 m, else a new UNDER_REVIEW master."""
+        clean_code = ec.client_center_code.strip().upper()
+        master = self.by_code.get(clean_code)
+        if master is None:
+            point = _coords(ec.latitude, ec.longitude)
+            master = self._nearest(*point) if point else None
+        if master is None:
+            master = CenterMaster(
+                center_code=clean_code,
+                name=ec.client_center_name,
+                incharge_name=ec.incharge_name,
+                incharge_phone=ec.incharge_phone,
+                latitude=ec.latitude,
+                longitude=ec.longitude,
+                max_candidates_overall=ec.active_capacity or 0,
+                status='UNDER_REVIEW',
+            )
+            self.new.append(master)
+            self._track(master)
+        ec.master_center = master
+        self.sync(ec, master)
+
+    def sync(self, ec, master):
+        """ExamCenter.save's AUTO-SYNC of location, contact and capacity into the master."""
+        updated = moved = False
+        if ec.latitude and ec.longitude:
+            if master.latitude != ec.latitude or master.longitude != ec.longitude:
+                master.latitude, master.longitude = ec.latitude, ec.longitude
+                updated = moved = True
+        if ec.incharge_name and master.incharge_name != ec.incharge_name:
+            master.incharge_name = ec.incharge_name
+            updated = True
+        if ec.incharge_phone and master.incharge_phone != ec.incharge_phone:
+            master.incharge_phone = ec.incharge_phone
+            updated = True
+        if ec.active_capacity and master.max_candidates_overall != ec.active_capacity:
+            master.max_candidates_overall = ec.active_capacity
+            updated = True
+        if moved:
+            self._move(master)
+        if updated and master.pk:
+            self.dirty[master.pk] = master
+
+    def save(self):
+        """
+        Inserts new masters and writes back the synced ones (bulk writes skip
+        CenterMaster.save, so geo_cell is set here). The synced rows go
+        through an upsert on center_code. bulk_update's CASE per column
+        costs more to build than the rows take to write.
+        """
+        now = timezone.now()
+        for master in self.new:
+            master.geo_cell = cell_key(master.latitude, master.longitude)
+        CenterMaster.objects.bulk_create(self.new, batch_size=BATCH_SIZE)
+        dirty = list(self.dirty.values())
+        for master in dirty:
+            master.geo_cell = cell_key(master.latitude, master.longitude)
+            master.updated_at = now
+        CenterMaster.objects.bulk_create(
+            dirty,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['center_code'],
+            update_fields=MASTER_SYNC_FIELDS,
+        )
+
+
+def _decimal(field, value):
+    """CSV text as the Python value the model field stores, so comparisons with loaded rows are exact."""
+    return field.to_python(value) if value else value
+
+
+def import_shift_centers(shift, raw_rows):
+    """
+    Links the centers in parsed CSV rows to `shift`, creating exam centers
+    (and their masters) that don't exist yet.
+
+    Returns the same report as the per-row importer
+    ({"created": [{"center_code", "status"}], "errors": [...]}) plus a
+    "timings" dict with per-phase milliseconds.
+    """
+    timer = PhaseTimer()
+    results = {"created": [], "errors": []}
+    exam = shift.exam
+    lat_field = ExamCenter._meta.get_field('latitude')
+    lon_field = ExamCenter._meta.get_field('longitude')
+
+    # 1. Validate rows (no queries)
+    with timer.phase('parse'):
+        valid = []
+        for row in raw_rows:
+            data = {k: (v.strip() if v else None) for k, v in row.items()}
+            # Support both center_code and client_center_code
+            center_code = data.get('center_code') or data.get('client_center_code')
+            if not center_code:
+                results["errors"].append({"row": row, "errors": "Missing center_code"})
+                continue
+            data['latitude'] = _decimal(lat_field, data.get('latitude'))
+            data['longitude'] = _decimal(lon_field, data.get('longitude'))
+            valid.append((center_code, data))
+
+    # 2. Resolve existing exam centers and shift centers with IN queries
+    with timer.phase('resolve'):
+        codes = list(dict.fromkeys(code for code, _ in valid))
+        exam_centers = {}
+        for i in range(0, len(codes), BATCH_SIZE):
+            exam_centers.update(
+                (ec.client_center_code, ec)
+                for ec in ExamCenter.objects.filter(exam=exam, client_center_code__in=codes[i:i + BATCH_SIZE])
+            )
+        linked = set(
+            ShiftCenter.objects.filter(shift=shift, exam=exam).values_list('exam_center_id', flat=True)
+        )
+
+        # First row for a code creates the exam center, as get_or_create did
+        new_centers = []
+        for center_code, data in valid:
+            if center_code not in exam_centers:
+                ec = ExamCenter(
+                    exam=exam,
+                    client_center_code=center_code,
+                    client_center_name=data.get('center_name') or data.get('client_center_name') or center_code,
+                    operators_required=data.get('operators_required') or data.get('active_capacity'),
+                    latitude=data.get('latitude'),
+                    longitude=data.get('longitude'),
+                    incharge_name=data.get('incharge_name'),
+                    incharge_phone=data.get('incharge_phone'),
+                    client_specific_instructions=data.get('address'),
+                )
+                exam_centers[center_code] = ec
+                new_centers.append(ec)
+
+    with transaction.atomic():
+        # 3. Link new exam centers to masters in file order, then write masters
+        with timer.phase('masters'):
+            linker = MasterLinker(new_centers)
+            for ec in new_centers:
+                linker.link(ec)
+            linker.save()
+
+        # 4. Create exam centers; a concurrent import's rows win (and hand back their pk)
+        with timer.phase('exam_centers'):
+            ExamCenter.objects.bulk_create(
+                new_centers,
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['exam', 'client_center_code'],
+                update_fields=['updated_at'],
+            )
+
+        # 5. Upsert shift centers, snapshotting the row (falling back to the exam center)
+        with timer.phase('shift_centers'):
+            shift_centers = {}
+            for center_code, data in valid:
+                exam_center = exam_centers[center_code]
+                status = "Linked" if exam_center.pk in linked or exam_center.pk in shift_centers else "Created"
+                shift_centers[exam_center.pk] = ShiftCenter(
+                    exam=exam,
+                    shift=shift,
+                    exam_center=exam_center,
+                    operators_required=data.get('operators_required') or data.get('active_capacity'),
+                    center_name=data.get('center_name') or data.get('client_center_name') or exam_center.client_center_name,
+                    city=data.get('city') or exam_center.city,
+                    address=data.get('address') or exam_center.client_specific_instructions,
+                    latitude=data.get('latitude') or exam_center.latitude,
+                    longitude=data.get('longitude') or exam_center.longitude,
+                    incharge_name=data.get('incharge_name') or exam_center.incharge_name,
+                    incharge_phone=data.get('incharge_phone') or exam_center.incharge_phone,
+                )
+                results["created"].append({"center_code": center_code, "status": status})
+
+            ShiftCenter.objects.bulk_create(
+                list(shift_centers.values()),
+                batch_size=BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['exam', 'shift', 'exam_center'],
+                update_fields=SNAPSHOT_FIELDS + ['updated_at'],
+            )
+
+        # bulk writes skip the post_save hooks that normally do this
+        invalidate_on_commit("checkin")
+
+    results["timings"] = timer.timings
+    return results
@@ -0,0 +1,174 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from common.benchmarking import rollback_fixture
+from common.synthetic import build_center_masters
+from masters.geo import METRES_PER_DEGREE
+from masters.models import CenterMaster, Client
+from operations.center_import import import_shift_centers
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter
+
+def legacy_import(shift, rows):
+    """The previous per-row bulk_import loop, kept for comparison."""
+    results = {"created": [], "errors": []}
+    for row in rows:
+        data = {k: (v.strip() if v else None) for k, v in row.items()}
+        center_code = data.get('center_code') or data.get('client_center_code')
+        if not center_code:
+            results["errors"].append({"row": row, "errors": "Missing center_code"})
+            continue
+        exam_center, _ = ExamCenter.objects.get_or_create(
+            exam=shift.exam,
+            client_center_code=center_code,
+            defaults={
+                'client_center_name': data.get('center_name') or data.get('client_center_name') or center_code,
+                'operators_required': data.get('operators_required') or data.get('active_capacity'),
+                'latitude': data.get('latitude'),
+                'longitude': data.get('longitude'),
+                'incharge_name': data.get('incharge_name'),
+                'incharge_phone': data.get('incharge_phone'),
+                'client_specific_instructions': data.get('address'),
+            },
+        )
+        _, sc_created = ShiftCenter.objects.update_or_create(
+            exam=shift.exam,
+            shift=shift,
+            exam_center=exam_center,
+            defaults={
+                'operators_required': data.get('operators_required') or data.get('active_capacity'),
+                'center_name': data.get('center_name') or data.get('client_center_name') or exam_center.client_center_name,
+                'city': data.get('city') or exam_center.city,
+                'address': data.get('address') or exam_center.client_specific_instructions,
+                'latitude': data.get('latitude') or exam_center.latitude,
+                'longitude': data.get('longitude') or exam_center.longitude,
+                'incharge_name': data.get('incharge_name') or exam_center.incharge_name,
+                'incharge_phone': data.get('incharge_phone') or exam_center.incharge_phone,
+            },
+        )
+        results["created"].append({"center_code": center_code, "status": "Linked" if not sc_created else "Created"})
+    return results
+
+
+def build_rows(count, masters, rng):
+    """
+    CSV rows for `count` centers: a third reuse a master's code, a third sit
+    within 40 m of a master under a new code, the rest are new sites. About
+    2% of rows repeat an earlier center with different details.
+    """
+    rows = []
+    for i in range(count):
+        master = rng.choice(masters)
+        kind = rng.random()
+        if kind < 0.33:
+            code, lat, lon = master.center_code.lower(), master.latitude, master.longitude
+        elif kind < 0.66:
+            offset = rng.uniform(0, 40) / METRES_PER_DEGREE / 1.5
+            code, lat, lon = f"NEAR{i:06d}", master.latitude + offset, master.longitude - offset
+        else:
+            code, lat, lon = f"NEW{i:06d}", 8 + rng.random() * 25, 68 + rng.random() * 28
+        rows.append({
+            'center_code': code,
+            'center_name': f"Center {i}",
+            'city': f"City {i % 50}",
+            'operators_required': str(rng.randint(2, 12)),
+            'address': f"{i} Main Road",
+            'latitude': f"{lat:.6f}",
+            'longitude': f"{lon:.6f}",
+            'incharge_name': f"Incharge {i}" if rng.random() < 0.5 else '',
+            'incharge_phone': f"98{i:08d}" if rng.random() < 0.5 else '',
+        })
+        if rows and rng.random() < 0.02:
+            repeat = dict(rng.choice(rows), center_name=f"Renamed {i}", incharge_name=f"Relief {i}")
+            rows.append(repeat)
+    return rows
+
+
+def snapshot(shift, results):
+    """What an import left behind, in a form two runs can be compared by."""
+    centers = list(
+        ExamCenter.objects.filter(exam=shift.exam).order_by('client_center_code').values_list(
+            'client_center_code', 'client_center_name', 'master_center__center_code', 'latitude', 'longitude',
+            'incharge_name', 'incharge_phone', 'operators_required', 'client_specific_instructions',
+        )
+    )
+    shift_centers = list(
+        ShiftCenter.objects.filter(shift=shift).order_by('exam_center__client_center_code').values_list(
+            'exam_center__client_center_code', 'operators_required', 'center_name', 'city', 'address',
+            'latitude', 'longitude', 'incharge_name', 'incharge_phone',
+        )
+    )
+    masters = list(
+        CenterMaster.objects.filter(exam_centers__exam=shift.exam).distinct().order_by('center_code').values_list(
+            'center_code', 'name', 'latitude', 'longitude', 'geo_cell', 'incharge_name', 'incharge_phone',
+            'max_candidates_overall', 'status',
+        )
+    )
+    return centers, shift_centers, masters, CenterMaster.objects.count(), results["created"]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the shift-center CSV import: per-row get_or_create vs the set-based upsert"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=4000, help="CSV rows for the set-based import")
+        parser.add_argument("--masters", type=int, default=20000, help="Existing center masters")
+        parser.add_argument(
+            "--legacy-limit", type=int, default=500,
+            help="Run the per-row importer on the first N rows only and compare the resulting data",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(7)
+        with rollback_fixture():
+            masters = build_center_masters(options["masters"], rng=rng)
+            CenterMaster.objects.bulk_create(masters, batch_size=2000)
+            client = Client.objects.create(client_code="BENCHCI", name="Bench center import")
+            exam = Exam.objects.create(exam_code="BENCHCI", name="Bench center import", client=client)
+            shift = Shift.objects.create(
+                exam=exam, shift_code="S1", name="Shift 1", work_date="2030-01-01",
+                start_time="09:00", end_time="12:00",
+            )
+            rows = build_rows(options["centers"], masters, rng)
+            subset = rows[:options["legacy_limit"]]
+
+            with rollback_fixture(), CaptureQueriesContext(connection) as legacy_ctx:
+                start = time.perf_counter()
+                legacy_results = legacy_import(shift, subset)
+                legacy_s = time.perf_counter() - start
+                legacy_queries = len(legacy_ctx.captured_queries)
+                legacy = snapshot(shift, legacy_results)
+            with rollback_fixture(), CaptureQueriesContext(connection) as batched_ctx:
+                start = time.perf_counter()
+                batched_results = import_shift_centers(shift, subset)
+                batched_s = time.perf_counter() - start
+                batched_queries = len(batched_ctx.captured_queries)
+                batched = snapshot(shift, batched_results)
+
+            if legacy != batched:
+                for name, a, b in zip(("exam centers", "shift centers", "masters", "master count", "report"),
+                                      legacy, batched):
+                    if a != b:
+                        self.stderr.write(self.style.ERROR(f"{name} differ after importing {len(subset)} rows"))
+                return
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(subset)} rows: identical exam centers, shift centers, masters and report; "
+                f"per-row={legacy_s:.2f}s/{legacy_queries} queries, set-based={batched_s:.3f}s/{batched_queries} queries"
+            ))
+
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                results = import_shift_centers(shift, rows)
+                elapsed = time.perf_counter() - start
+            created = sum(1 for r in results["created"] if r["status"] == "Created")
+            self.stdout.write(
+                f"{len(rows)} rows: set-based {elapsed:.2f}s, {len(ctx.captured_queries)} queries ({created} created, "
+                f"{len(results['created']) - created} linked), phases {results['timings']} "
+                f"(per-row extrapolated ~{legacy_s * len(rows) / max(1, len(subset)):.0f}s)"
+            )
+            start = time.perf_counter()
+            import_shift_centers(shift, rows)
+            self.stdout.write(f"re-import of the same file: {time.perf_counter() - start:.2f}s (all linked)")
@@ -0,0 +1,60 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from common.benchmarking import rollback_fixture
+from common.synthetic import seed_exam
+from operations.views import ShiftCenterViewSet
+
+
+def run_export(view, user, params=None):
+    request = APIRequestFactory().get("/api/operations/shift-centers/export/", params or {})
+    force_authenticate(request, user=user)
+    start = time.perf_counter()
+    response = view(request)
+    if hasattr(response, "streaming_content"):
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = sum(len(chunk) for chunk in response)
+    return size, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = "Benchmarks ShiftCenterViewSet.export: declarative values() columns vs per-row serializer"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=50000)
+        parser.add_argument("--shifts", type=int, default=10)
+        parser.add_argument("--skip-serializer", action="store_true", help="Skip the slow serializer fallback")
+
+    def handle(self, *args, **options):
+        user = get_user_model()(username="bench_export", user_type="INTERNAL_ADMIN", is_superuser=True)
+        fast = ShiftCenterViewSet.as_view({"get": "export"})
+        fallback = ShiftCenterViewSet.as_view({"get": "export"}, export_columns=None)
+
+        with rollback_fixture():
+            seeded = seed_exam(
+                centers=options["centers"], shifts=options["shifts"], operators_per_center=0, incidents_per_center=0
+            )
+            self.stdout.write(f"Seeded {seeded['shift_centers']} shift centers")
+
+            runs = [
+                ("columns/csv", fast, {}),
+                ("columns/csv.gz", fast, {"gzip": "1"}),
+                ("columns/xlsx", fast, {"file_format": "xlsx"}),
+            ]
+            if not options["skip_serializer"]:
+                runs.insert(0, ("serializer/csv", fallback, {}))
+
+            timings = {}
+            for label, view, params in runs:
+                size, elapsed = run_export(view, user, params)
+                timings[label] = elapsed
+                self.stdout.write(f"{label:<16} bytes={size:<12} time={elapsed:>8.2f}s")
+
+            if "serializer/csv" in timings:
+                self.stdout.write(self.style.SUCCESS(
+                    f"columns/csv is {timings['serializer/csv'] / timings['columns/csv']:.1f}x faster than serializer/csv"
+                ))
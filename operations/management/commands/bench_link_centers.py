@@ -0,0 +1,105 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.benchmarking import format_row, measure, rollback_fixture
+from common.synthetic import build_center_masters
+from masters.geo import DUPLICATE_RADIUS_M, covering_keys, haversine_m, plan_merges
+from masters.models import CenterMaster
+
+
+def legacy_plan_merges(masters, radius_m=DUPLICATE_RADIUS_M):
+    """The previous pairwise scan from link_centers, kept for comparison."""
+    processed_ids = set()
+    plans = []
+    for m1 in masters:
+        if m1.center_code in processed_ids:
+            continue
+        processed_ids.add(m1.center_code)
+
+        duplicates = []
+        for m2 in masters:
+            if m2.center_code in processed_ids:
+                continue
+            dist = haversine_m(float(m1.latitude), float(m1.longitude), float(m2.latitude), float(m2.longitude))
+            if dist <= radius_m:
+                duplicates.append(m2)
+
+        if duplicates:
+            cluster = [m1] + duplicates
+            cluster.sort(key=lambda x: (0 if x.status == 'ACTIVE' else 1, x.created_at))
+            for dup in cluster[1:]:
+                processed_ids.add(dup.center_code)
+            plans.append((cluster[0], cluster[1:]))
+    return plans
+
+
+def _decisions(plans):
+    return [(primary.center_code, [dup.center_code for dup in dups]) for primary, dups in plans]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks link_centers geo-dedup and the ExamCenter.save geo lookup: pairwise vs grid index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--masters", type=int, default=50000)
+        parser.add_argument(
+            "--legacy-limit", type=int, default=3000,
+            help="Run the O(n^2) legacy planner on the first N masters only and compare decisions",
+        )
+        parser.add_argument("--lookups", type=int, default=200, help="Lookups per timing for the per-save query")
+        parser.add_argument("--skip-db", action="store_true", help="Only benchmark the in-memory merge planner")
+
+    def handle(self, *args, **options):
+        masters = build_center_masters(options["masters"])
+
+        subset = masters[:options["legacy_limit"]]
+        start = time.perf_counter()
+        legacy = _decisions(legacy_plan_merges(subset))
+        legacy_s = time.perf_counter() - start
+        start = time.perf_counter()
+        grid = _decisions(plan_merges(subset))
+        grid_s = time.perf_counter() - start
+        if legacy != grid:
+            self.stderr.write(self.style.ERROR(f"Merge decisions differ on the first {len(subset)} masters"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(subset)} masters: identical decisions ({len(grid)} clusters), "
+            f"legacy={legacy_s:.2f}s grid={grid_s:.3f}s"
+        ))
+
+        start = time.perf_counter()
+        plans = plan_merges(masters)
+        self.stdout.write(
+            f"{len(masters)} masters: grid plan {time.perf_counter() - start:.2f}s, "
+            f"{len(plans)} clusters, {sum(len(d) for _, d in plans)} duplicates "
+            f"(legacy extrapolated ~{legacy_s * (len(masters) / max(1, len(subset))) ** 2:.0f}s)"
+        )
+
+        if options["skip_db"]:
+            return
+
+        with rollback_fixture():
+            CenterMaster.objects.bulk_create(masters, batch_size=2000)
+            probes = [(float(m.latitude), float(m.longitude)) for m in masters[::max(1, len(masters) // options["lookups"])]]
+
+            def bbox_lookup():
+                for lat, lon in probes:
+                    for pm in CenterMaster.objects.filter(
+                        latitude__gte=lat - 0.001, latitude__lte=lat + 0.001,
+                        longitude__gte=lon - 0.001, longitude__lte=lon + 0.001,
+                    ):
+                        if haversine_m(lat, lon, float(pm.latitude), float(pm.longitude)) <= DUPLICATE_RADIUS_M:
+                            break
+
+            def cell_lookup():
+                for lat, lon in probes:
+                    for pm in CenterMaster.objects.filter(
+                        geo_cell__in=covering_keys(lat, lon, DUPLICATE_RADIUS_M)
+                    ).order_by('created_at'):
+                        if haversine_m(lat, lon, float(pm.latitude), float(pm.longitude)) <= DUPLICATE_RADIUS_M:
+                            break
+
+            self.stdout.write(f"ExamCenter.save geo lookup, {len(probes)} probes per call:")
+            self.stdout.write(format_row("save/bbox", measure(bbox_lookup, iterations=5, warmup=1)))
+            self.stdout.write(format_row("save/geo_cell", measure(cell_lookup, iterations=5, warmup=1)))
@@ -0,0 +1,108 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from assignments.models import AssignmentTask
+from common.benchmarking import QueryCounter, rollback_fixture
+from common.synthetic import seed_exam
+from operations.models import ShiftCenterTask
+from operations.task_provisioning import provision_tasks
+
+
+def legacy_provision(centers, role, tasks_data):
+    """The previous bulk_tasks loop (one update_or_create and signal fan-out per template), kept for comparison."""
+    created_count = updated_count = 0
+    for center in centers:
+        for task_def in tasks_data:
+            task_name = task_def.get('task_name', '').strip()
+            if not task_name:
+                continue
+            _, created = ShiftCenterTask.objects.update_or_create(
+                shift_center=center,
+                role=role,
+                task_name=task_name,
+                defaults={
+                    'task_type': task_def.get('task_type', 'CHECKLIST'),
+                    'is_mandatory': task_def.get('is_mandatory', True),
+                },
+            )
+            if created:
+                created_count += 1
+            else:
+                updated_count += 1
+    return created_count, updated_count
+
+
+def snapshot(shift):
+    templates = sorted(
+        ShiftCenterTask.objects.filter(shift_center__shift=shift).values_list(
+            'shift_center_id', 'role_id', 'task_name', 'task_type', 'is_mandatory',
+        )
+    )
+    tasks = sorted(
+        AssignmentTask.objects.filter(assignment__shift_center__shift=shift).values_list(
+            'assignment_id', 'shift_center_task__task_name', 'status',
+        )
+    )
+    return templates, tasks
+
+
+class Command(BaseCommand):
+    help = "Benchmarks ShiftViewSet.bulk_tasks: per-template update_or_create vs set-based provisioning"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=3000)
+        parser.add_argument("--operators-per-center", type=int, default=5)
+        parser.add_argument("--tasks", type=int, default=10, help="Task definitions per request")
+        parser.add_argument(
+            "--legacy-limit", type=int, default=300,
+            help="Run the per-template loop on the first N centers only and compare the resulting rows",
+        )
+
+    def handle(self, *args, **options):
+        tasks_data = [
+            {'task_name': f"Task {i}", 'task_type': 'PHOTO' if i % 3 == 0 else 'CHECKLIST', 'is_mandatory': i % 2 == 0}
+            for i in range(options["tasks"])
+        ]
+        with rollback_fixture():
+            seeded = seed_exam(centers=options["centers"], operators_per_center=options["operators_per_center"],
+                               incidents_per_center=0)
+            shift, role = seeded["shifts"][0], seeded["role"]
+            centers = shift.shift_centers.order_by('pk')
+            subset = centers.filter(pk__in=list(centers.values_list('pk', flat=True)[:options["legacy_limit"]]))
+
+            with rollback_fixture(), QueryCounter() as counter:
+                start = time.perf_counter()
+                legacy_counts = legacy_provision(subset, role, tasks_data)
+                legacy_s = time.perf_counter() - start
+                legacy_queries = counter.count
+                legacy = snapshot(shift)
+            with rollback_fixture(), QueryCounter() as counter:
+                start = time.perf_counter()
+                report = provision_tasks(subset, role, tasks_data)
+                batched_s = time.perf_counter() - start
+                batched_queries = counter.count
+                batched = snapshot(shift)
+
+            counts = (report["tasks_created"], report["tasks_updated"])
+            if legacy != batched or legacy_counts != counts:
+                self.stderr.write(self.style.ERROR(
+                    f"Results differ on {subset.count()} centers: counts {legacy_counts} vs {counts}"
+                ))
+                return
+            self.stdout.write(self.style.SUCCESS(
+                f"{subset.count()} centers x {len(tasks_data)} tasks: identical templates and assignment tasks "
+                f"({len(batched[1])}); per-template={legacy_s:.2f}s/{legacy_queries} queries, "
+                f"set-based={batched_s:.3f}s/{batched_queries} queries"
+            ))
+
+            for label in ("first run", "re-run"):
+                with QueryCounter() as counter:
+                    start = time.perf_counter()
+                    report = provision_tasks(centers, role, tasks_data)
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{label}: {report['centers_count']} centers, {elapsed:.2f}s, {counter.count} queries, "
+                    f"created={report['tasks_created']} updated={report['tasks_updated']} "
+                    f"assignment_tasks={report['assignment_tasks_created']} phases {report['timings']}"
+                )
@@ -0,0 +1,42 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from operations.models import Exam, ShiftCenter
+from operations.stats import rebuild_stats, verify_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes ShiftCenterStats counters from OperatorAssignment (or checks them with --verify)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exam', help='Limit to one exam (exam_code or uid)')
+        parser.add_argument('--verify', action='store_true', help='Report mismatches without writing')
+
+    def handle(self, *args, **options):
+        shift_centers = ShiftCenter.objects.all()
+        if options['exam']:
+            exam = Exam.objects.filter(exam_code=options['exam']).first()
+            if exam is None:
+                try:
+                    exam = Exam.objects.filter(uid=options['exam']).first()
+                except ValidationError:
+                    exam = None
+            if exam is None:
+                raise CommandError(f"Exam '{options['exam']}' not found")
+            shift_centers = shift_centers.filter(exam=exam)
+
+        if options['verify']:
+            mismatches = verify_stats(shift_centers)
+            for sc_id, field, expected, stored in mismatches[:50]:
+                self.stdout.write(self.style.WARNING(
+                    f"ShiftCenter {sc_id}: {field} expected={expected} stored={stored}"
+                ))
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counter mismatches found")
+            self.stdout.write(self.style.SUCCESS("All shift center counters match."))
+            return
+
+        with transaction.atomic():
+            written = rebuild_stats(shift_centers)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt counters for {written} shift centers."))
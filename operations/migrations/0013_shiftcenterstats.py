@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-18 14:57
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0012_shiftcenter_address_shiftcenter_center_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShiftCenterStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(db_index=True, default=uuid.uuid4, editable=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('total', models.IntegerField(default=0)),
+                ('pending', models.IntegerField(default=0)),
+                ('confirmed', models.IntegerField(default=0)),
+                ('checked_in', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('cancelled', models.IntegerField(default=0)),
+                ('no_show', models.IntegerField(default=0)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_center_stats', to='operations.exam')),
+                ('shift', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shift_center_stats', to='operations.shift')),
+                ('shift_center', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='operations.shiftcenter')),
+            ],
+            options={
+                'db_table': 'shift_center_stats',
+                'indexes': [models.Index(fields=['exam', 'shift'], name='shift_cente_exam_id_5098ff_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+import uuid
+
+from django.db import migrations
+from django.db.models import Count, Q
+
+STATUS_FIELDS = {
+    'PENDING': 'pending',
+    'CONFIRMED': 'confirmed',
+    'CHECK_IN': 'checked_in',
+    'COMPLETED': 'completed',
+    'CANCELLED': 'cancelled',
+    'NO_SHOW': 'no_show',
+}
+
+
+def backfill(apps, schema_editor):
+    ShiftCenter = apps.get_model('operations', 'ShiftCenter')
+    ShiftCenterStats = apps.get_model('operations', 'ShiftCenterStats')
+
+    annotations = {'total': Count('assignments')}
+    for status, field in STATUS_FIELDS.items():
+        annotations[field] = Count('assignments', filter=Q(assignments__status=status))
+
+    rows = [
+        ShiftCenterStats(uid=uuid.uuid4(), shift_center_id=row.pop('pk'), **row)
+        for row in ShiftCenter.objects.order_by().annotate(**annotations).values(
+            'pk', 'exam_id', 'shift_id', 'total', *STATUS_FIELDS.values()
+        )
+    ]
+    ShiftCenterStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0013_shiftcenterstats'),
+        ('assignments', '0005_assignmenttaskevidence'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -74,6 +74,12 @@ class Exam(TimeStampedUUIDModel):
             return self.exam_end_date < timezone.now().date()
         return False
 
+    @staticmethod
+    def locked_q(prefix=''):
+        """is_locked as a filter, e.g. for aggregates over many exams."""
+        from django.utils import timezone
+        return models.Q(**{f'{prefix}exam_end_date__lt': timezone.now().date()})
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding
         super().save(*args, **kwargs)
@@ -182,6 +188,17 @@ class Shift(TimeStampedUUIDModel):
             
         return shift_end_aware < current_datetime
 
+    @staticmethod
+    def locked_q(prefix=''):
+        """is_locked as a filter, e.g. for aggregates over many shifts."""
+        from django.utils import timezone
+
+        now = timezone.localtime()
+        return (
+            models.Q(**{f'{prefix}work_date__lt': now.date()})
+            | models.Q(**{f'{prefix}work_date': now.date(), f'{prefix}end_time__lt': now.time()})
+        )
+
 
 class ExamCenter(TimeStampedUUIDModel):
     # Links
@@ -245,6 +262,7 @@ class ExamCenter(TimeStampedUUIDModel):
         # 1. AUTO-LINKING Logic (On Creation or if missing)
         if not self.master_center:
             from masters.models import CenterMaster  # Local import to avoid circular dep
+            from masters.geo import DUPLICATE_RADIUS_M, covering_keys, haversine_m
             
             # Clean the code to handle edge cases (whitespace, case sensitivity)
             clean_code = self.client_center_code.strip().upper()
@@ -261,36 +279,16 @@ class ExamCenter(TimeStampedUUIDModel):
                     try:
                         lat_val = float(self.latitude)
                         lon_val = float(self.longitude)
-                        
-                        # Bounding box filter (approx +/- 0.001 deg is ~111m)
-                        lat_min = lat_val - 0.001
-                        lat_max = lat_val + 0.001
-                        lon_min = lon_val - 0.001
-                        lon_max = lon_val + 0.001
-                        
+
+                        # Indexed lookup on the grid cells covering the 50m circle
                         possible_matches = CenterMaster.objects.filter(
-                            latitude__gte=lat_min, latitude__lte=lat_max,
-                            longitude__gte=lon_min, longitude__lte=lon_max
-                        )
-                        
-                        # Refine with Haversine
-                        import math
-                        def calc_dist(lat1, lon1, lat2, lon2):
-                            R = 6371000
-                            phi1, phi2 = math.radians(lat1), math.radians(lat2)
-                            dphi = math.radians(lat2 - lat1)
-                            dlambda = math.radians(lon2 - lon1)
-                            a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-                            c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
-                            return R * c
+                            geo_cell__in=covering_keys(lat_val, lon_val, DUPLICATE_RADIUS_M)
+                        ).order_by('created_at')
 
+                        # Refine with Haversine
                         for pm in possible_matches:
-                            # PM lat/long are Decimal, convert to float
-                            pm_lat = float(pm.latitude) if pm.latitude else 0.0
-                            pm_lon = float(pm.longitude) if pm.longitude else 0.0
-                            
-                            dist = calc_dist(lat_val, lon_val, pm_lat, pm_lon)
-                            if dist <= 50: # Match if within 50 meters
+                            dist = haversine_m(lat_val, lon_val, float(pm.latitude), float(pm.longitude))
+                            if dist <= DUPLICATE_RADIUS_M: # Match if within 50 meters
                                 candidates.append(pm)
                                 break # Take the first close match
                     except (ValueError, TypeError):
@@ -387,6 +385,36 @@ class ShiftCenter(TimeStampedUUIDModel):
         return f"{self.shift.shift_code} - {self.exam_center.client_center_name}"
 
 
+class ShiftCenterStats(TimeStampedUUIDModel):
+    """
+    Denormalized assignment counts per shift center.
+
+    Kept in sync by operations.stats (assignment signals and the bulk import);
+    `rebuild_shift_center_stats` recomputes them from OperatorAssignment.
+    """
+    shift_center = models.OneToOneField('ShiftCenter', on_delete=models.CASCADE, related_name='stats')
+    # Copied from the shift center so dashboards can filter without joins
+    exam = models.ForeignKey('Exam', on_delete=models.CASCADE, related_name='shift_center_stats')
+    shift = models.ForeignKey('Shift', on_delete=models.CASCADE, related_name='shift_center_stats')
+
+    total = models.IntegerField(default=0)
+    pending = models.IntegerField(default=0)
+    confirmed = models.IntegerField(default=0)
+    checked_in = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    cancelled = models.IntegerField(default=0)
+    no_show = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'shift_center_stats'
+        indexes = [
+            models.Index(fields=['exam', 'shift']),
+        ]
+
+    def __str__(self):
+        return f"{self.shift_center} ({self.total} assigned)"
+
+
 class ShiftCenterRole(TimeStampedUUIDModel):
     shift_center = models.ForeignKey('ShiftCenter', on_delete=models.CASCADE, related_name='role_requirements')
     role = models.ForeignKey('masters.RoleMaster', on_delete=models.PROTECT, related_name='shift_center_assignments')
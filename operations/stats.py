@@ -0,0 +1,130 @@
+"""
+Maintenance of ShiftCenterStats, the per-shift-center assignment counters.
+
+Writers report status changes as deltas with `apply_deltas`; each delta is a
+single `UPDATE ... SET col = col + n`, so concurrent check-ins on the same
+center never lose counts. Call it inside the same transaction as the
+assignment write so both commit (or roll back) together. A shift center with
+no stats row yet is recomputed from OperatorAssignment instead.
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import ShiftCenter, ShiftCenterStats
+
+# OperatorAssignment.status -> ShiftCenterStats column
+STATUS_FIELDS = {
+    'PENDING': 'pending',
+    'CONFIRMED': 'confirmed',
+    'CHECK_IN': 'checked_in',
+    'COMPLETED': 'completed',
+    'CANCELLED': 'cancelled',
+    'NO_SHOW': 'no_show',
+}
+COUNTER_FIELDS = ['total'] + list(STATUS_FIELDS.values())
+
+BATCH_SIZE = 1000
+
+
+class StatsDelta:
+    """Accumulates counter changes per shift center."""
+
+    def __init__(self):
+        self.changes = defaultdict(Counter)
+
+    def add(self, shift_center_id, status, n=1):
+        counter = self.changes[shift_center_id]
+        counter['total'] += n
+        field = STATUS_FIELDS.get(status)
+        if field:
+            counter[field] += n
+
+    def remove(self, shift_center_id, status):
+        self.add(shift_center_id, status, -1)
+
+    def move(self, shift_center_id, old_status, new_status):
+        if old_status == new_status:
+            return
+        counter = self.changes[shift_center_id]
+        if old_status in STATUS_FIELDS:
+            counter[STATUS_FIELDS[old_status]] -= 1
+        if new_status in STATUS_FIELDS:
+            counter[STATUS_FIELDS[new_status]] += 1
+
+
+def apply_deltas(delta, rebuild_missing=True):
+    """
+    Writes a StatsDelta with one F() update per touched shift center. Centers
+    without a stats row are recounted unless `rebuild_missing` is False.
+    """
+    now = timezone.now()
+    missing = []
+    for shift_center_id, counter in delta.changes.items():
+        changes = {field: F(field) + n for field, n in counter.items() if n}
+        if not changes:
+            continue
+        updated = ShiftCenterStats.objects.filter(shift_center_id=shift_center_id).update(updated_at=now, **changes)
+        if not updated:
+            missing.append(shift_center_id)
+    if missing and rebuild_missing:
+        # The assignment rows are already written, so the recount includes the change
+        rebuild_stats(ShiftCenter.objects.filter(pk__in=missing))
+
+
+def compute_stats(shift_centers=None):
+    """
+    Counts assignments per shift center straight from OperatorAssignment.
+
+    Returns {shift_center_id: {'exam_id', 'shift_id', <counter fields>}}.
+    """
+    qs = ShiftCenter.objects.all() if shift_centers is None else shift_centers
+    annotations = {'total': Count('assignments')}
+    for status, field in STATUS_FIELDS.items():
+        annotations[field] = Count('assignments', filter=Q(assignments__status=status))
+
+    return {
+        row.pop('pk'): row
+        for row in qs.order_by().annotate(**annotations).values('pk', 'exam_id', 'shift_id', *COUNTER_FIELDS)
+    }
+
+
+def rebuild_stats(shift_centers=None):
+    """Recomputes and upserts stats rows; returns the number written."""
+    now = timezone.now()
+    rows = [
+        ShiftCenterStats(shift_center_id=sc_id, updated_at=now, **values)
+        for sc_id, values in compute_stats(shift_centers).items()
+    ]
+    ShiftCenterStats.objects.bulk_create(
+        rows,
+        batch_size=BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['shift_center'],
+        update_fields=COUNTER_FIELDS + ['exam', 'shift', 'updated_at'],
+    )
+    return len(rows)
+
+
+def verify_stats(shift_centers=None):
+    """
+    Compares stored counters against a fresh count.
+
+    Returns a list of (shift_center_id, field, expected, stored) mismatches; a
+    missing stats row is reported against every non-zero counter.
+    """
+    expected = compute_stats(shift_centers)
+    stored = {
+        row.pop('shift_center_id'): row
+        for row in ShiftCenterStats.objects.filter(shift_center_id__in=list(expected)).values('shift_center_id', *COUNTER_FIELDS)
+    }
+
+    mismatches = []
+    for sc_id, values in expected.items():
+        current = stored.get(sc_id, {})
+        for field in COUNTER_FIELDS:
+            have = current.get(field, 0)
+            if values[field] != have:
+                mismatches.append((sc_id, field, values[field], have))
+    return mismatches
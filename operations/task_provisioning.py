@@ -0,0 +1,130 @@
+"""
+Set-based provisioning of ShiftCenterTask templates.
+
+`ShiftViewSet.bulk_tasks` used to update_or_create one template per
+(center, task) and let sync_new_task_to_assignments fan each new template
+out to the matching assignments, one query and one insert per template.
+Here the (center, role, task) matrix is upserted with
+bulk_create(update_conflicts=True), and the AssignmentTasks every template
+in scope is missing are found with a single SELECT (assignments of the
+template's role at its center, minus existing rows) and bulk-inserted.
+"""
+from django.db.models import Exists, F, OuterRef
+
+from assignments.models import AssignmentTask, OperatorAssignment
+from common.csv_import import PhaseTimer
+from .models import ShiftCenterTask
+
+BATCH_SIZE = 2000
+
+# Assignments a newly added template is pushed to (the operator still has the duty ahead)
+FANOUT_STATUSES = ('PENDING', 'CONFIRMED', 'CHECK_IN')
+
+
+def normalize_task_defs(tasks_data):
+    """
+    Task definitions keyed by name, in first-seen order, the last definition
+    of a repeated name winning (as sequential update_or_create did).
+    Returns (defs, rows) where rows counts the non-empty definitions.
+    """
+    defs = {}
+    rows = 0
+    for task_def in tasks_data:
+        task_name = task_def.get('task_name', '').strip()
+        if not task_name:
+            continue
+        rows += 1
+        defs[task_name] = {
+            'task_type': task_def.get('task_type', 'CHECKLIST'),
+            'is_mandatory': task_def.get('is_mandatory', True),
+        }
+    return defs, rows
+
+
+def missing_assignment_tasks(templates):
+    """
+    (assignment id, template id) pairs for every template in `templates` (a
+    ShiftCenterTask queryset) that an assignment of the same role at the
+    same center in FANOUT_STATUSES doesn't have yet, in one query.
+    """
+    # Everything in one filter() call so the Exists, the role match and the
+    # selected template id share a single join to shift_center_task. A
+    # plain `tasks__in=templates` makes SQLite probe the whole IN list per
+    # assignment.
+    return (
+        OperatorAssignment.objects.filter(
+            Exists(templates.filter(pk=OuterRef('shift_center__tasks'))),
+            shift_center__in=templates.values('shift_center_id'),
+            shift_center__tasks__role=F('role'),
+            status__in=FANOUT_STATUSES,
+        )
+        .annotate(has_task=Exists(AssignmentTask.objects.filter(
+            assignment=OuterRef('pk'), shift_center_task=OuterRef('shift_center__tasks'),
+        )))
+        .filter(has_task=False)
+        .order_by()
+        .values_list('pk', 'shift_center__tasks')
+    )
+
+
+def materialize_assignment_tasks(templates):
+    """
+    Creates the AssignmentTasks `templates` are missing and returns how
+    many were found missing. A pair a concurrent request inserts first is
+    skipped by the unique constraint.
+    """
+    pairs = list(missing_assignment_tasks(templates))
+    AssignmentTask.objects.bulk_create(
+        [AssignmentTask(assignment_id=a, shift_center_task_id=t, status='PENDING') for a, t in pairs],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return len(pairs)
+
+
+def provision_tasks(shift_centers, role, tasks_data):
+    """
+    Upserts `role`'s task templates on every center in `shift_centers` and
+    pushes them to the centers' assignments. Call inside a transaction.
+
+    Returns {"centers_count", "tasks_created", "tasks_updated",
+    "assignment_tasks_created", "timings"}; created/updated count
+    (center, task) rows as the per-row loop did.
+    """
+    timer = PhaseTimer()
+    defs, rows = normalize_task_defs(tasks_data)
+
+    with timer.phase('resolve'):
+        center_ids = list(shift_centers.values_list('pk', flat=True))
+        existing = set()
+        for i in range(0, len(center_ids), BATCH_SIZE):
+            existing.update(ShiftCenterTask.objects.filter(
+                shift_center_id__in=center_ids[i:i + BATCH_SIZE], role=role, task_name__in=list(defs),
+            ).values_list('shift_center_id', 'task_name'))
+
+    with timer.phase('templates'):
+        ShiftCenterTask.objects.bulk_create(
+            [
+                ShiftCenterTask(shift_center_id=center_id, role=role, task_name=name, **fields)
+                for center_id in center_ids
+                for name, fields in defs.items()
+            ],
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['shift_center', 'role', 'task_name'],
+            update_fields=['task_type', 'is_mandatory', 'updated_at'],
+        )
+        created = len(center_ids) * len(defs) - len(existing)
+
+    with timer.phase('assignment_tasks'):
+        fanned_out = materialize_assignment_tasks(
+            ShiftCenterTask.objects.filter(shift_center__in=shift_centers, role=role, task_name__in=list(defs))
+        )
+
+    return {
+        "centers_count": len(center_ids),
+        "tasks_created": created,
+        "tasks_updated": len(center_ids) * rows - created,
+        "assignment_tasks_created": fanned_out,
+        "timings": timer.timings,
+    }
@@ -1,3 +1,351 @@
+import csv
+import datetime
+import gzip
+import io
+from unittest import mock
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from accounts.models import AppUser
+from assignments.models import AssignmentTask, OperatorAssignment
+from masters.models import Client, RoleMaster
+from .models import Exam, ExamCenter, Shift, ShiftCenter, ShiftCenterTask
+from .task_provisioning import provision_tasks
+
+
+class OperationsFixtureMixin:
+    """Two exams; E1 has two shifts and three centers, E2 one shift and one center."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_org = Client.objects.create(client_code='C1', name='Client One')
+        cls.role = RoleMaster.objects.create(code='INV', name='Invigilator')
+        cls.admin = AppUser.objects.create(username='admin', user_type='INTERNAL_ADMIN')
+        cls.exam = Exam.objects.create(exam_code='E1', name='Exam One', client=cls.client_org)
+        cls.other_exam = Exam.objects.create(exam_code='E2', name='Exam Two', client=cls.client_org)
+        cls.shift = cls.make_shift(cls.exam, 'S1')
+        cls.late_shift = cls.make_shift(cls.exam, 'S2')
+        cls.centers = [
+            ExamCenter.objects.create(
+                exam=cls.exam, client_center_code=f'EC{n}', client_center_name=f'Center {n}',
+                city='Delhi' if n < 3 else 'Pune', latitude='28.600000', longitude='77.200000',
+                operators_required=n,
+            )
+            for n in (1, 2, 3)
+        ]
+        cls.centers[2].status = 'INACTIVE'
+        cls.centers[2].save()
+        cls.other_center = ExamCenter.objects.create(
+            exam=cls.other_exam, client_center_code='X1', client_center_name='Other Center',
+        )
+        cls.shift_centers = [
+            ShiftCenter.objects.create(exam=cls.exam, shift=shift, exam_center=center, operators_required=2)
+            for shift in (cls.shift, cls.late_shift) for center in cls.centers
+        ]
+        ShiftCenter.objects.create(
+            exam=cls.other_exam, shift=cls.make_shift(cls.other_exam, 'X'), exam_center=cls.other_center,
+        )
+
+    @classmethod
+    def make_shift(cls, exam, code):
+        return Shift.objects.create(
+            exam=exam, shift_code=code, work_date=timezone.localdate(),
+            start_time=datetime.time(0, 0), end_time=datetime.time(23, 59, 59),
+        )
+
+    def setUp(self):
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+
+
+class ExportTests(OperationsFixtureMixin, TestCase):
+    def read_csv(self, response, gzipped=False):
+        body = b''.join(response.streaming_content)
+        if gzipped:
+            body = gzip.decompress(body)
+        return list(csv.reader(io.StringIO(body.decode())))
+
+    def read_xlsx(self, response):
+        sheet = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True).active
+        return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+    def test_exam_center_csv(self):
+        response = self.api.get('/api/operations/exam-centers/export/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="examcenter_export.csv"')
+        header, *rows = self.read_csv(response)
+        self.assertEqual(header[:4], ['Exam Center ID', 'Exam Code', 'Center Code', 'Center Name'])
+        self.assertEqual(header[-2:], ['Status', 'Created At'])
+        self.assertEqual(len(rows), 4)
+        by_code = {row[2]: dict(zip(header, row)) for row in rows}
+        center = self.centers[2]
+        self.assertEqual(by_code['EC3'], {
+            **by_code['EC3'],
+            'Exam Center ID': str(center.uid),
+            'Exam Code': 'E1',
+            'City': 'Pune',
+            'Latitude': '28.600000',
+            'Geofence Radius (m)': '200',
+            'Operators Required': '3',
+            'Status': 'Inactive',
+            'Created At': timezone.localtime(center.created_at).isoformat(),
+        })
+        # ExamCenter.save() links (or creates) the CenterMaster for the code
+        self.assertEqual(by_code['X1']['Master Center Code'], self.other_center.master_center.center_code)
+
+    def test_exam_center_filtered_by_exam(self):
+        response = self.api.get('/api/operations/exam-centers/export/', {'exam': str(self.other_exam.uid)})
+        header, *rows = self.read_csv(response)
+        self.assertEqual([row[2] for row in rows], ['X1'])
+
+    def test_exam_center_scoped_to_exam_admin(self):
+        self.api.force_authenticate(AppUser.objects.create(username='ea', user_type='EXAM_ADMIN', exam=self.exam))
+        header, *rows = self.read_csv(self.api.get('/api/operations/exam-centers/export/'))
+        self.assertEqual(sorted(row[2] for row in rows), ['EC1', 'EC2', 'EC3'])
+
+    def test_exam_center_gzip(self):
+        response = self.api.get('/api/operations/exam-centers/export/', {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="examcenter_export.csv.gz"')
+        plain = self.read_csv(self.api.get('/api/operations/exam-centers/export/'))
+        self.assertEqual(self.read_csv(response, gzipped=True), plain)
+
+    def test_exam_center_xlsx(self):
+        response = self.api.get('/api/operations/exam-centers/export/', {'file_format': 'xlsx', 'exam': str(self.exam.uid)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="examcenter_export.xlsx"')
+        header, *rows = self.read_xlsx(response)
+        self.assertEqual(header[2], 'Center Code')
+        self.assertEqual(sorted(row[2] for row in rows), ['EC1', 'EC2', 'EC3'])
+        ec2 = next(dict(zip(header, row)) for row in rows if row[2] == 'EC2')
+        # Numbers stay numbers in the workbook
+        self.assertEqual(ec2['Operators Required'], 2)
+        self.assertEqual(ec2['Status'], 'Active')
+        self.assertEqual(ec2['Exam Center ID'], str(self.centers[1].uid))
+
+    def test_shift_center_csv(self):
+        operator = AppUser.objects.create(username='op', user_type='OPERATOR')
+        OperatorAssignment.objects.create(shift_center=self.shift_centers[0], operator=operator, role=self.role)
+        response = self.api.get('/api/operations/shift-centers/export/', {'shift': str(self.shift.uid)})
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="shiftcenter_export.csv"')
+        header, *rows = self.read_csv(response)
+        self.assertEqual(header[:5], ['Shift Center ID', 'Exam Code', 'Shift', 'Work Date', 'Center Code'])
+        self.assertEqual(len(rows), 3)
+        by_code = {row[4]: dict(zip(header, row)) for row in rows}
+        self.assertEqual(by_code['EC1']['Shift Center ID'], str(self.shift_centers[0].uid))
+        self.assertEqual(by_code['EC1']['Work Date'], timezone.localdate().isoformat())
+        self.assertEqual(by_code['EC1']['Operators Assigned'], '1')
+        self.assertEqual(by_code['EC1']['Tasks'], '0')
+        self.assertEqual(by_code['EC2']['Operators Assigned'], '')
+        self.assertEqual(by_code['EC3']['Status'], 'Planned')
+        self.assertEqual({row['Shift'] for row in by_code.values()}, {'S1'})
+
+    def test_shift_center_search_and_gzip(self):
+        response = self.api.get('/api/operations/shift-centers/export/', {'search': 'Pune', 'gzip': 'true'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        header, *rows = self.read_csv(response, gzipped=True)
+        self.assertEqual(sorted((row[2], row[4]) for row in rows), [('S1', 'EC3'), ('S2', 'EC3')])
+
+    def test_shift_center_xlsx(self):
+        response = self.api.get('/api/operations/shift-centers/export/', {'file_format': 'xlsx'})
+        header, *rows = self.read_xlsx(response)
+        self.assertEqual(len(rows), 7)
+        row = next(dict(zip(header, row)) for row in rows if row[0] == str(self.shift_centers[4].uid))
+        self.assertEqual((row['Shift'], row['Center Code'], row['City']), ('S2', 'EC2', 'Delhi'))
+        self.assertEqual(row['Work Date'], datetime.datetime.combine(timezone.localdate(), datetime.time()))
+        self.assertEqual(row['Operators Required'], 2)
+
+
+class ConditionalGetTests(OperationsFixtureMixin, TestCase):
+    EXAMS = '/api/operations/exams/'
+    SHIFTS = '/api/operations/shifts/'
+    SHIFT_CENTERS = '/api/operations/shift-centers/'
+
+    def etag(self, url, **params):
+        response = self.api.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def tomorrow(self):
+        """Patches the clock a day ahead, which locks today's exam end date and shifts."""
+        return mock.patch('django.utils.timezone.now', return_value=timezone.now() + datetime.timedelta(days=1))
+
+    def test_repeated_get_is_not_modified(self):
+        for url in (self.EXAMS, self.SHIFTS, self.SHIFT_CENTERS):
+            with self.subTest(url=url):
+                etag = self.etag(url)
+                # One aggregate query; nothing is loaded or serialized
+                with self.assertNumQueries(1):
+                    response = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+                self.assertEqual(response.content, b'')
+
+    def test_repeated_retrieve_is_not_modified(self):
+        url = f'{self.SHIFT_CENTERS}{self.shift_centers[0].uid}/'
+        etag = self.etag(url)
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        ShiftCenterTask.objects.create(shift_center=self.shift_centers[0], role=self.role, task_name='Seal')
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_is_scoped_to_the_query(self):
+        self.assertNotEqual(self.etag(self.SHIFT_CENTERS), self.etag(self.SHIFT_CENTERS, shift=str(self.shift.uid)))
+
+    def test_client_rename_changes_the_exam_etag(self):
+        etag = self.etag(self.EXAMS)
+        self.client_org.name = 'Client Renamed'
+        self.client_org.save()
+        self.assertNotEqual(self.etag(self.EXAMS), etag)
+
+    def test_task_added_changes_the_shift_center_etag(self):
+        etag = self.etag(self.SHIFT_CENTERS)
+        task = ShiftCenterTask.objects.create(shift_center=self.shift_centers[0], role=self.role, task_name='Seal')
+        after_add = self.etag(self.SHIFT_CENTERS)
+        self.assertNotEqual(after_add, etag)
+        task.delete()
+        self.assertNotEqual(self.etag(self.SHIFT_CENTERS), after_add)
+
+    def test_shift_center_added_changes_the_shift_etag(self):
+        etag = self.etag(self.SHIFTS)
+        center = ExamCenter.objects.create(exam=self.exam, client_center_code='EC4', client_center_name='Center 4')
+        ShiftCenter.objects.create(exam=self.exam, shift=self.shift, exam_center=center)
+        self.assertNotEqual(self.etag(self.SHIFTS), etag)
+
+    def test_delete_changes_the_etag(self):
+        # Not the most recently updated row, so only the count moves
+        oldest = ShiftCenter.objects.order_by('updated_at').first()
+        etag = self.etag(self.SHIFT_CENTERS)
+        oldest.delete()
+        self.assertNotEqual(self.etag(self.SHIFT_CENTERS), etag)
+
+        exam = Exam.objects.order_by('updated_at').first()
+        etag = self.etag(self.EXAMS)
+        Exam.objects.filter(pk=exam.pk).delete()
+        self.assertNotEqual(self.etag(self.EXAMS), etag)
+
+    def test_exam_lock_changes_the_etag(self):
+        Exam.objects.filter(pk=self.exam.pk).update(exam_end_date=timezone.localdate())
+        etag = self.etag(self.EXAMS)
+        self.assertEqual(self.etag(self.EXAMS), etag)
+        with self.tomorrow():
+            response = self.api.get(self.EXAMS, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(next(row for row in response.data['results'] if row['exam_code'] == 'E1')['is_locked'])
+
+    def test_shift_lock_changes_the_etag(self):
+        shift_etag = self.etag(self.SHIFTS)
+        center_etag = self.etag(self.SHIFT_CENTERS)
+        with self.tomorrow():
+            self.assertEqual(self.api.get(self.SHIFTS, HTTP_IF_NONE_MATCH=shift_etag).status_code, 200)
+            self.assertEqual(self.api.get(self.SHIFT_CENTERS, HTTP_IF_NONE_MATCH=center_etag).status_code, 200)
+
+
+class TaskProvisioningTests(OperationsFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.supervisor = RoleMaster.objects.create(code='SUP', name='Supervisor')
+        first, second = self.shift_centers[:2]
+        self.assign(first, 'op1')
+        self.assign(first, 'op2', status='CONFIRMED')
+        self.assign(second, 'op3', status='CHECK_IN')
+        # Neither gets tasks: another role, and a duty that is over
+        self.assign(first, 'op4', role=self.supervisor)
+        self.assign(second, 'op5', status='CANCELLED')
+
+    def assign(self, shift_center, username, role=None, status='PENDING'):
+        operator = AppUser.objects.create(username=username, user_type='OPERATOR')
+        return OperatorAssignment.objects.create(
+            shift_center=shift_center, operator=operator, role=role or self.role, status=status,
+        )
+
+    def provision(self, tasks_data, centers=2):
+        scope = ShiftCenter.objects.filter(pk__in=[sc.pk for sc in self.shift_centers[:centers]])
+        return provision_tasks(scope, self.role, tasks_data)
+
+    def task_pairs(self):
+        return sorted(AssignmentTask.objects.values_list(
+            'assignment__operator__username', 'shift_center_task__task_name',
+        ))
+
+    def test_duplicate_definitions_normalize_to_one_row(self):
+        report = self.provision([
+            {'task_name': 'Seal'},
+            {'task_name': ' Seal ', 'task_type': 'PHOTO', 'is_mandatory': False},
+            {'task_name': 'Count'},
+            {'task_name': '  '},
+        ])
+        self.assertEqual(report['centers_count'], 2)
+        # Per (center, definition) as the per-row loop counted: the repeat updated what the first created
+        self.assertEqual((report['tasks_created'], report['tasks_updated']), (4, 2))
+        self.assertEqual(ShiftCenterTask.objects.count(), 4)
+        seal = ShiftCenterTask.objects.filter(task_name='Seal')
+        self.assertEqual(set(seal.values_list('task_type', 'is_mandatory')), {('PHOTO', False)})
+        self.assertEqual(report['assignment_tasks_created'], 6)
+        self.assertEqual(self.task_pairs(), [
+            ('op1', 'Count'), ('op1', 'Seal'), ('op2', 'Count'), ('op2', 'Seal'), ('op3', 'Count'), ('op3', 'Seal'),
+        ])
+
+    def test_reprovisioning_is_idempotent(self):
+        tasks = [{'task_name': 'Seal'}, {'task_name': 'Count'}]
+        self.provision(tasks)
+        templates = dict(ShiftCenterTask.objects.values_list('pk', 'uid'))
+        pairs = self.task_pairs()
+
+        report = self.provision([{'task_name': 'Seal', 'task_type': 'VIDEO'}, {'task_name': 'Count'}])
+        self.assertEqual((report['tasks_created'], report['tasks_updated']), (0, 4))
+        self.assertEqual(report['assignment_tasks_created'], 0)
+        # Conflicting rows are updated in place, not replaced
+        self.assertEqual(dict(ShiftCenterTask.objects.values_list('pk', 'uid')), templates)
+        self.assertEqual(set(ShiftCenterTask.objects.filter(task_name='Seal').values_list('task_type', flat=True)), {'VIDEO'})
+        self.assertEqual(self.task_pairs(), pairs)
+
+    def test_racing_insert_of_the_same_assignment_task_is_ignored(self):
+        self.provision([{'task_name': 'Seal'}])
+        stale = list(AssignmentTask.objects.values_list('assignment_id', 'shift_center_task_id'))
+        # As if another request inserted them between our SELECT and INSERT
+        with mock.patch('operations.task_provisioning.missing_assignment_tasks', return_value=stale):
+            self.provision([{'task_name': 'Seal'}])
+        self.assertEqual(AssignmentTask.objects.count(), len(stale))
+
+    def test_widening_the_scope_only_adds_what_is_missing(self):
+        self.provision([{'task_name': 'Seal'}], centers=1)
+        op6 = self.assign(self.shift_centers[1], 'op6')
+        report = self.provision([{'task_name': 'Seal'}, {'task_name': 'Count'}], centers=3)
+        self.assertEqual((report['tasks_created'], report['tasks_updated']), (5, 1))
+        # op1/op2 gain Count; op3 and op6 gain both
+        self.assertEqual(report['assignment_tasks_created'], 6)
+        self.assertEqual(AssignmentTask.objects.filter(assignment=op6).count(), 2)
+        self.assertEqual(len(self.task_pairs()), 8)
+
+    def test_query_count_does_not_grow_with_assignments(self):
+        with CaptureQueriesContext(connection) as few:
+            self.provision([{'task_name': 'Seal'}], centers=1)
+        for n in range(10):
+            self.assign(self.shift_centers[1], f'extra{n}')
+        with CaptureQueriesContext(connection) as many:
+            self.provision([{'task_name': 'Seal'}, {'task_name': 'Count'}], centers=2)
+        self.assertEqual(len(many), len(few))
+
+    def test_new_template_reaches_each_matching_assignment_once(self):
+        template = ShiftCenterTask.objects.create(shift_center=self.shift_centers[0], role=self.role, task_name='Seal')
+        self.assertEqual(
+            sorted(template.assignment_tasks.values_list('assignment__operator__username', flat=True)), ['op1', 'op2'],
+        )
+        template.task_type = 'PHOTO'
+        template.save()
+        ShiftCenterTask.objects.create(shift_center=self.shift_centers[0], role=self.supervisor, task_name='Keys')
+        self.assertEqual(self.task_pairs(), [('op1', 'Seal'), ('op2', 'Seal'), ('op4', 'Keys')])
 
-# Create your tests here.
+    def test_new_assignment_gets_existing_templates(self):
+        self.provision([{'task_name': 'Seal'}, {'task_name': 'Count'}])
+        op6 = self.assign(self.shift_centers[0], 'op6')
+        self.assertEqual(AssignmentTask.objects.filter(assignment=op6).count(), 2)
+        op6.status = 'CONFIRMED'
+        op6.save(update_fields=['status'])
+        self.assertEqual(AssignmentTask.objects.filter(assignment=op6).count(), 2)
@@ -2,8 +2,8 @@ from rest_framework import viewsets, permissions, status, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
-from .models import Exam, Shift, ExamCenter, ShiftCenter, ShiftCenterTask
+from common.pagination import StandardResultsSetPagination
+from .models import Exam, Shift, ExamCenter, ShiftCenter, ShiftCenterTask, ShiftCenterStats
 from django.db.models import Count
 from .serializers import (
     ExamSerializer, ShiftSerializer, 
@@ -17,15 +17,16 @@ from django.http import HttpResponse, Http404
 from django.db import transaction
 from django.core.exceptions import ValidationError
 
-from common.mixins import ExportMixin
+from common.csv_import import parse_rows
+from common.exports import ExportColumn
+from common.mixins import ConditionalGetMixin, ExportMixin
+from common.reference_cache import get_role
+from .center_import import import_shift_centers
+from .task_provisioning import provision_tasks
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10
-    page_size_query_param = 'page_size'
-    max_page_size = 1000
-
-class ExamViewSet(ExportMixin, viewsets.ModelViewSet):
+class ExamViewSet(ConditionalGetMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = ExamSerializer
+    etag_related = ('client', 'created_by')
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['name', 'exam_code', 'client__name']
@@ -74,6 +75,9 @@ class ExamViewSet(ExportMixin, viewsets.ModelViewSet):
             
         return qs.order_by('-created_at')  # Ensure consistent ordering for pagination
 
+    def get_etag_aggregates(self):
+        return {**super().get_etag_aggregates(), 'locked': Count('pk', filter=Exam.locked_q())}
+
     @action(detail=True, methods=['get'])
     def statistics(self, request, uid=None):
         exam = self.get_object()
@@ -124,8 +128,9 @@ class ExamViewSet(ExportMixin, viewsets.ModelViewSet):
             }
         })
 
-class ShiftViewSet(ExportMixin, viewsets.ModelViewSet):
+class ShiftViewSet(ConditionalGetMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = ShiftSerializer
+    etag_related = ('shift_centers',)
     # Apply read-only permission for Exam Admins
     permission_classes = [permissions.IsAuthenticated, IsExamAdminReadOnly | IsInternalAdmin] 
     lookup_field = 'uid'
@@ -146,6 +151,9 @@ class ShiftViewSet(ExportMixin, viewsets.ModelViewSet):
             
         return qs
 
+    def get_etag_aggregates(self):
+        return {**super().get_etag_aggregates(), 'locked': Count('pk', filter=Shift.locked_q())}
+
     @action(detail=True, methods=['get'])
     def statistics(self, request, uid=None):
         shift = self.get_object()
@@ -153,14 +161,13 @@ class ShiftViewSet(ExportMixin, viewsets.ModelViewSet):
         # Total Centers
         total_centers = shift.shift_centers.count()
         
-        # Operators Assigned (Distinct operators assigned to centers in this shift)
-        # We need to import locally to avoid circular dependency if assignments.models imports operations.models
-        from assignments.models import OperatorAssignment
-        
-        operators_assigned = OperatorAssignment.objects.filter(
-            shift_center__shift=shift,
-            status__in=['CONFIRMED', 'CHECK_IN', 'COMPLETED']
-        ).values('operator').distinct().count()
+        # Operators Assigned (confirmed / checked-in / completed duties in this shift),
+        # summed from the per-center counters instead of scanning assignments
+        from django.db.models import Sum
+        counts = ShiftCenterStats.objects.filter(shift=shift).aggregate(
+            confirmed=Sum('confirmed'), checked_in=Sum('checked_in'), completed=Sum('completed')
+        )
+        operators_assigned = sum(v or 0 for v in counts.values())
         
         return Response({
             'total_centers': total_centers,
@@ -189,10 +196,8 @@ class ShiftViewSet(ExportMixin, viewsets.ModelViewSet):
         if not role_uid or not tasks_data:
             return Response({"detail": "Role and Tasks are required."}, status=status.HTTP_400_BAD_REQUEST)
             
-        try:
-            from masters.models import RoleMaster
-            role = RoleMaster.objects.get(uid=role_uid)
-        except RoleMaster.DoesNotExist:
+        role = get_role(role_uid)
+        if role is None:
              return Response({"detail": "Invalid Role"}, status=status.HTTP_400_BAD_REQUEST)
 
         # 1. Determine Scope (All centers vs CSV filtered)
@@ -216,38 +221,10 @@ class ShiftViewSet(ExportMixin, viewsets.ModelViewSet):
             except Exception as e:
                 return Response({"detail": f"Error parsing CSV: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        created_count = 0
-        updated_count = 0
-        
-        from .models import ShiftCenterTask
-        
         with transaction.atomic():
-            for center in centers:
-                for task_def in tasks_data:
-                    task_name = task_def.get('task_name', '').strip()
-                    if not task_name: continue
-                    
-                    # Update or Create
-                    obj, created = ShiftCenterTask.objects.update_or_create(
-                        shift_center=center,
-                        role=role,
-                        task_name=task_name,
-                        defaults={
-                            'task_type': task_def.get('task_type', 'CHECKLIST'),
-                            'is_mandatory': task_def.get('is_mandatory', True)
-                        }
-                    )
-                    if created:
-                        created_count += 1
-                    else:
-                        updated_count += 1
-                        
-        return Response({
-            "detail": f"Processed {len(centers)} centers.",
-            "centers_count": len(centers),
-            "tasks_created": created_count,
-            "tasks_updated": updated_count
-        })
+            report = provision_tasks(centers, role, tasks_data)
+
+        return Response({"detail": f"Processed {report['centers_count']} centers.", **report})
 
     @action(detail=False, methods=['get'], url_path='bulk-tasks-template')
     def bulk_tasks_template(self, request):
@@ -269,6 +246,25 @@ class ExamCenterViewSet(ExportMixin, viewsets.ModelViewSet):
     lookup_field = 'uid'
     basename = 'exam_center'
 
+    export_columns = [
+        ExportColumn('uid', 'Exam Center ID'),
+        ExportColumn('exam__exam_code', 'Exam Code'),
+        ExportColumn('client_center_code', 'Center Code'),
+        ExportColumn('client_center_name', 'Center Name'),
+        ExportColumn('master_center__center_code', 'Master Center Code'),
+        ExportColumn('city'),
+        ExportColumn('latitude'),
+        ExportColumn('longitude'),
+        ExportColumn('geofence_radius_meters', 'Geofence Radius (m)'),
+        ExportColumn('active_capacity'),
+        ExportColumn('operators_required'),
+        ExportColumn('expected_candidates'),
+        ExportColumn('incharge_name'),
+        ExportColumn('incharge_phone'),
+        ExportColumn('status', labels=True),
+        ExportColumn('created_at'),
+    ]
+
     def get_queryset(self):
         user = self.request.user
         qs = ExamCenter.objects.all()
@@ -284,12 +280,32 @@ class ExamCenterViewSet(ExportMixin, viewsets.ModelViewSet):
             
         return qs
 
-class ShiftCenterViewSet(ExportMixin, viewsets.ModelViewSet):
+class ShiftCenterViewSet(ConditionalGetMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = ShiftCenterSerializer
+    etag_related = ('exam_center', 'shift', 'tasks')
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'uid'
     basename = 'shift_center'
 
+    export_columns = [
+        ExportColumn('uid', 'Shift Center ID'),
+        ExportColumn('exam__exam_code', 'Exam Code'),
+        ExportColumn('shift__shift_code', 'Shift'),
+        ExportColumn('shift__work_date', 'Work Date'),
+        ExportColumn('exam_center__client_center_code', 'Center Code'),
+        ExportColumn('exam_center__client_center_name', 'Center Name'),
+        ExportColumn('exam_center__city', 'City'),
+        ExportColumn('operators_required'),
+        ExportColumn('stats__total', 'Operators Assigned'),
+        ExportColumn('tasks_count', 'Tasks'),
+        ExportColumn('latitude'),
+        ExportColumn('longitude'),
+        ExportColumn('incharge_name'),
+        ExportColumn('incharge_phone'),
+        ExportColumn('status', labels=True),
+        ExportColumn('created_at'),
+    ]
+
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter, DjangoFilterBackend, filters.OrderingFilter]
     search_fields = ['exam_center__client_center_name', 'exam_center__client_center_code', 'exam_center__city']
@@ -313,6 +329,10 @@ class ShiftCenterViewSet(ExportMixin, viewsets.ModelViewSet):
             
         return qs
 
+    def get_etag_aggregates(self):
+        # shift_details carries the shift's is_locked
+        return {**super().get_etag_aggregates(), 'locked': Count('pk', filter=Shift.locked_q('shift__'))}
+
     @action(detail=False, methods=['get'], url_path='download-template')
     def download_template(self, request):
         """Generates a CSV template for bulk shift center assignment."""
@@ -347,61 +367,9 @@ class ShiftCenterViewSet(ExportMixin, viewsets.ModelViewSet):
         except Shift.DoesNotExist:
              return Response({"detail": "Invalid Shift ID."}, status=status.HTTP_404_NOT_FOUND)
 
-        results = {"created": [], "errors": []}
-
         try:
-            decoded_file = file_obj.read().decode('utf-8')
-            reader = csv.DictReader(io.StringIO(decoded_file))
-            
-            with transaction.atomic():
-                for row in reader:
-                    # Basic cleaning
-                    data = {k: (v.strip() if v else None) for k, v in row.items()}
-                    
-                    # Support both center_code and client_center_code
-                    center_code = data.get('center_code') or data.get('client_center_code')
-                    
-                    if not center_code:
-                         results["errors"].append({"row": row, "errors": "Missing center_code"})
-                         continue
-
-                    # 1. Get/Create ExamCenter (NO global sync here if exists)
-                    exam_center, created = ExamCenter.objects.get_or_create(
-                        exam=shift.exam,
-                        client_center_code=center_code,
-                        defaults={
-                            'client_center_name': data.get('center_name') or data.get('client_center_name') or center_code,
-                            'operators_required': data.get('operators_required') or data.get('active_capacity'),
-                            'latitude': data.get('latitude'),
-                            'longitude': data.get('longitude'),
-                            'incharge_name': data.get('incharge_name'),
-                            'incharge_phone': data.get('incharge_phone'),
-                            'client_specific_instructions': data.get('address')
-                        }
-                    )
-                    
-                    # 2. Link to Shift (Snapshot all metadata here for full isolation)
-                    shift_center, sc_created = ShiftCenter.objects.update_or_create(
-                        exam=shift.exam,
-                        shift=shift,
-                        exam_center=exam_center,
-                        defaults={
-                            'operators_required': data.get('operators_required') or data.get('active_capacity'),
-                            'center_name': data.get('center_name') or data.get('client_center_name') or exam_center.client_center_name,
-                            'city': data.get('city') or exam_center.city,
-                            'address': data.get('address') or exam_center.client_specific_instructions,
-                            'latitude': data.get('latitude') or exam_center.latitude,
-                            'longitude': data.get('longitude') or exam_center.longitude,
-                            'incharge_name': data.get('incharge_name') or exam_center.incharge_name,
-                            'incharge_phone': data.get('incharge_phone') or exam_center.incharge_phone,
-                        }
-                    )
-                    
-                    results["created"].append({
-                        "center_code": center_code,
-                        "status": "Linked" if not sc_created else "Created"
-                    })
-
+            rows = parse_rows(file_obj)
+            results = import_shift_centers(shift, rows)
         except Exception as e:
             return Response({"detail": f"CSV Error: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
             
@@ -0,0 +1,17 @@
+from django.core.cache import cache
+
+SUMMARY_VERSION_KEY = "reports:summary:version"
+
+
+def summary_cache_key(scope_key: str) -> str:
+    """Cache key for one dashboard scope under the current version."""
+    version = cache.get(SUMMARY_VERSION_KEY, 0)
+    return f"reports:summary:{version}:{scope_key}"
+
+
+def invalidate_summary_cache():
+    """Bumps the summary cache version so every scope recomputes on next read."""
+    try:
+        cache.incr(SUMMARY_VERSION_KEY)
+    except ValueError:
+        cache.set(SUMMARY_VERSION_KEY, 1, None)
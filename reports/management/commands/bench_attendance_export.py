@@ -0,0 +1,87 @@
+import csv
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+
+from attendance.models import AttendanceLog
+from common.benchmarking import rollback_fixture
+from common.exports import streaming_csv_response
+from common.synthetic import seed_attendance_logs, seed_exam
+from reports.views import ATTENDANCE_EXPORT_HEADER, attendance_export_queryset, attendance_export_rows
+
+
+def legacy_export(logs):
+    """The previous build-everything-in-memory export (with the center lookup fixed)."""
+    response = HttpResponse(content_type='text/csv')
+    writer = csv.writer(response)
+    writer.writerow(ATTENDANCE_EXPORT_HEADER)
+    for log in logs.select_related(
+        'assignment__operator', 'assignment__shift_center__exam_center', 'assignment__role'
+    ).order_by('-timestamp'):
+        writer.writerow([
+            log.timestamp.date(),
+            log.timestamp.strftime('%H:%M:%S'),
+            log.assignment.operator.username,
+            log.assignment.role.name,
+            log.assignment.shift_center.exam_center.client_center_name,
+            log.activity_type,
+            'Verified' if log.is_verified else 'Flagged',
+            log.latitude,
+            log.longitude,
+        ])
+    return len(response.content)
+
+
+def streaming_export(logs, gzip=False):
+    response = streaming_csv_response(
+        'attendance_logs.csv', ATTENDANCE_EXPORT_HEADER, attendance_export_rows(logs), gzip=gzip
+    )
+    return sum(len(chunk) for chunk in response.streaming_content)
+
+
+def traced(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+class Command(BaseCommand):
+    help = "Benchmarks AttendanceExportView: in-memory HttpResponse vs streaming (plain and gzip)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Approximate attendance logs to seed")
+        parser.add_argument("--centers", type=int, default=500)
+        parser.add_argument("--operators-per-center", type=int, default=10)
+        parser.add_argument("--skip-legacy", action="store_true", help="Skip the in-memory export (slow at 1M rows)")
+
+    def handle(self, *args, **options):
+        assignments = options["centers"] * options["operators_per_center"]
+        per_assignment = max(1, options["rows"] // assignments)
+
+        with rollback_fixture():
+            seeded = seed_exam(
+                centers=options["centers"], operators_per_center=options["operators_per_center"], incidents_per_center=0
+            )
+            count = seed_attendance_logs(seeded["exam"], per_assignment)
+            self.stdout.write(f"Seeded {count} attendance logs")
+
+            logs = attendance_export_queryset({"exam": str(seeded["exam"].uid)})
+            runs = [
+                ("streaming", lambda: streaming_export(logs)),
+                ("streaming/gzip", lambda: streaming_export(logs, gzip=True)),
+            ]
+            if not options["skip_legacy"]:
+                runs.insert(0, ("legacy", lambda: legacy_export(AttendanceLog.objects.all())))
+
+            # tracemalloc roughly doubles wall time; compare the numbers with each other
+            for label, fn in runs:
+                size, elapsed, peak = traced(fn)
+                self.stdout.write(
+                    f"{label:<16} bytes={size:<12} time={elapsed:>7.2f}s peak_python_mem={peak / 1024 / 1024:>8.1f}MiB"
+                )
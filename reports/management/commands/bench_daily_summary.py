@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from common.benchmarking import format_row, measure, rollback_fixture
+from assignments.models import OperatorAssignment
+from common.synthetic import seed_exam
+from reports.views import build_summary, get_daily_summary, summary_scope
+
+
+def legacy_summary(assignments, incidents, exams):
+    """The previous one-COUNT-per-number implementation, kept for comparison."""
+    total_assigned = assignments.count()
+    checked_in = assignments.filter(status='CHECK_IN').count()
+    completed = assignments.filter(status='COMPLETED').count()
+    pending = assignments.filter(status='PENDING').count()
+    confirmed = assignments.filter(status='CONFIRMED').count()
+    total_incidents = incidents.count()
+    open_incidents = incidents.filter(status='OPEN').count()
+    high_priority = incidents.filter(priority__in=['HIGH', 'CRITICAL'], status='OPEN').count()
+    return (
+        exams.count(), exams.filter(status='DRAFT').count(), exams.filter(status='LIVE').count(),
+        exams.filter(status='COMPLETED').count(), exams.filter(status='CONFIGURING').count(),
+        total_assigned, checked_in, completed, pending, confirmed,
+        total_incidents, open_incidents, high_priority,
+        list(incidents.order_by('-created_at')[:5].values('uid')),
+    )
+
+
+class Command(BaseCommand):
+    help = "Benchmarks DailySummaryView: legacy per-count queries vs ShiftCenterStats counters vs cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--centers", type=int, default=500)
+        parser.add_argument("--operators-per-center", type=int, default=10)
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        with rollback_fixture():
+            seeded = seed_exam(centers=options["centers"], operators_per_center=options["operators_per_center"])
+            self.stdout.write(f"Seeded {seeded['assignments']} assignments, {seeded['incidents']} incidents")
+
+            users = {
+                "internal": User(username="bench_internal", user_type="INTERNAL_ADMIN", is_superuser=True),
+                "client": User(username="bench_client", user_type="CLIENT_ADMIN", client=seeded["client"]),
+                "exam": User(username="bench_exam", user_type="EXAM_ADMIN", exam=seeded["exam"]),
+            }
+
+            legacy_assignments = {
+                "internal": OperatorAssignment.objects.all(),
+                "client": OperatorAssignment.objects.filter(shift_center__exam__client=seeded["client"]),
+                "exam": OperatorAssignment.objects.filter(shift_center__exam=seeded["exam"]),
+            }
+
+            n = options["iterations"]
+            for label, user in users.items():
+                _, stats, incidents, exams = summary_scope(user)
+                assignments = legacy_assignments[label]
+                self.stdout.write(format_row(f"{label}/legacy", measure(lambda: legacy_summary(assignments, incidents, exams), n)))
+                self.stdout.write(format_row(f"{label}/counters", measure(lambda: build_summary(stats, incidents, exams), n)))
+                cache.clear()
+                self.stdout.write(format_row(f"{label}/cached", measure(lambda: get_daily_summary(user), n)))
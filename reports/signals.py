@@ -0,0 +1,19 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from assignments.models import OperatorAssignment
+from operations.models import Exam
+from support.models import Incident
+from .cache import invalidate_summary_cache
+
+
+@receiver([post_save, post_delete], sender=OperatorAssignment)
+@receiver([post_save, post_delete], sender=Incident)
+@receiver([post_save, post_delete], sender=Exam)
+def invalidate_daily_summary(sender, **kwargs):
+    """
+    Any change to the counted tables makes cached dashboard summaries stale.
+    Deferred to commit so a concurrent read can't re-cache pre-commit data.
+    """
+    transaction.on_commit(invalidate_summary_cache)
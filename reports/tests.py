@@ -1,3 +1,32 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from accounts.models import AppUser
+
+
+class AttendanceExportFilterTests(TestCase):
+    def setUp(self):
+        admin = AppUser.objects.create(
+            username='admin', user_type='INTERNAL_ADMIN', is_staff=True, is_superuser=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def export(self, **params):
+        return self.client.get('/api/reports/export/attendance/', params)
+
+    def test_malformed_uid_is_bad_request(self):
+        for name in ('exam', 'shift', 'client'):
+            response = self.export(**{name: 'not-a-uuid'})
+            self.assertEqual(response.status_code, 400, name)
+            self.assertEqual(response.data['detail'], f'{name} must be a valid uid.')
+
+    def test_malformed_date_is_bad_request(self):
+        response = self.export(date_from='01/02/2024')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['detail'], 'date_from / date_to must be YYYY-MM-DD.')
+
+    def test_valid_filters_stream_csv(self):
+        response = self.export(exam='7b0c4f2e-9d1a-4c3e-8f5a-1b2c3d4e5f60', date_from='2024-01-01')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'Date,Time'))
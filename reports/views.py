@@ -1,109 +1,224 @@
+import datetime
+import uuid
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from common.permissions import IsInternalAdmin
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate, TruncTime
 from django.utils import timezone
-from django.db.models import Count, Q
-from assignments.models import OperatorAssignment
 from support.models import Incident
+from attendance.models import AttendanceLog
+from common.exports import EXPORT_CHUNK_SIZE, streaming_csv_response, wants_gzip
+
+from operations.models import Exam, ShiftCenterStats
+from .cache import summary_cache_key
+
+def summary_scope(user):
+    """
+    Returns (scope_key, stats, incidents, exams) for the user's tenant, or
+    None if the user may not see the dashboard. `stats` is a ShiftCenterStats
+    queryset, so assignment counts read one row per shift center.
+    """
+    stats = ShiftCenterStats.objects.all()
+    incidents = Incident.objects.all()
+    exams = Exam.objects.all()
+
+    if user.user_type == 'CLIENT_ADMIN' and user.client_id:
+        return (
+            f"client:{user.client_id}",
+            stats.filter(exam__client_id=user.client_id),
+            incidents.filter(assignment__shift_center__exam__client_id=user.client_id),
+            exams.filter(client_id=user.client_id),
+        )
+    elif user.user_type == 'EXAM_ADMIN' and user.exam_id:
+        return (
+            f"exam:{user.exam_id}",
+            stats.filter(exam_id=user.exam_id),
+            incidents.filter(assignment__shift_center__exam_id=user.exam_id),
+            exams.filter(pk=user.exam_id),
+        )
+    elif user.user_type == 'INTERNAL_ADMIN' or user.is_superuser:
+        return ("internal", stats, incidents, exams)
+    return None
+
+
+def build_summary(stats, incidents, exams):
+    """One aggregate per table, plus the recent incidents list."""
+    a = {k: v or 0 for k, v in stats.aggregate(
+        total=Sum('total'),
+        checked_in=Sum('checked_in'),
+        completed=Sum('completed'),
+        pending=Sum('pending'),
+        confirmed=Sum('confirmed'),
+    ).items()}
+    i = incidents.aggregate(
+        total=Count('pk'),
+        open=Count('pk', filter=Q(status='OPEN')),
+        critical_pending=Count('pk', filter=Q(status='OPEN', priority__in=['HIGH', 'CRITICAL'])),
+    )
+    e = exams.aggregate(
+        total=Count('pk'),
+        draft=Count('pk', filter=Q(status='DRAFT')),
+        live=Count('pk', filter=Q(status='LIVE')),
+        completed=Count('pk', filter=Q(status='COMPLETED')),
+        configuring=Count('pk', filter=Q(status='CONFIGURING')),
+    )
+
+    total_assigned = a['total']
+    present = a['checked_in'] + a['completed']
+
+    return {
+        "total_exams": e['total'],
+        "draft": e['draft'],
+        "live": e['live'],
+        "completed": e['completed'],
+        "configuring": e['configuring'],
+        "overview": {
+            "total_duties": total_assigned,
+            "present": present,
+            "pending": a['pending'] + a['confirmed'],
+            "absent": 0,
+            "attendance_rate": round((present / total_assigned * 100) if total_assigned else 0, 1)
+        },
+        "incidents": {
+            "total": i['total'],
+            "open": i['open'],
+            "critical_pending": i['critical_pending']
+        },
+        "recent_incidents": list(incidents.order_by('-created_at')[:5].values(
+            'uid', 'category__name', 'priority', 'status', 'created_at', 'assignment__operator__username'
+        ))
+    }
+
+
+def get_daily_summary(user):
+    """Cached build_summary for the user's scope; None if unauthorized."""
+    scope = summary_scope(user)
+    if scope is None:
+        return None
+    scope_key, stats, incidents, exams = scope
+
+    ttl = getattr(settings, "REPORTS_SUMMARY_CACHE_SECONDS", 10)
+    if not ttl:
+        return build_summary(stats, incidents, exams)
+
+    key = summary_cache_key(scope_key)
+    data = cache.get(key)
+    if data is None:
+        data = build_summary(stats, incidents, exams)
+        cache.set(key, data, ttl)
+    return data
 
-from operations.models import Exam
 
 class DailySummaryView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        user = self.request.user
-        
-        # Scoping logic
-        assignments = OperatorAssignment.objects.all()
-        incidents = Incident.objects.all()
-        exams = Exam.objects.all()
-
-        if user.user_type == 'CLIENT_ADMIN' and user.client:
-            assignments = assignments.filter(shift_center__exam__client=user.client)
-            incidents = incidents.filter(assignment__shift_center__exam__client=user.client)
-            exams = exams.filter(client=user.client)
-        elif user.user_type == 'EXAM_ADMIN' and user.exam:
-            assignments = assignments.filter(shift_center__exam=user.exam)
-            incidents = incidents.filter(assignment__shift_center__exam=user.exam)
-            exams = exams.filter(pk=user.exam.pk)
-        elif user.user_type == 'INTERNAL_ADMIN' or user.is_superuser:
-            pass # Keep all
-        else:
+        data = get_daily_summary(request.user)
+        if data is None:
             return Response({"error": "Unauthorized"}, status=403)
+        return Response(data)
+
+def parse_export_date(value):
+    """YYYY-MM-DD query param to a date; None if blank, ValueError if malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError("date_from / date_to must be YYYY-MM-DD.")
+
+
+def parse_export_uid(value, name):
+    """uid query param to a UUID; None if blank, ValueError if malformed."""
+    if not value:
+        return None
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a valid uid.")
+
+
+def attendance_export_queryset(params):
+    """
+    AttendanceLog queryset for the export, narrowed by the request's
+    filters. Raises ValueError with a message for the client if a filter is
+    malformed.
+    """
+    logs = AttendanceLog.objects.all()
+
+    exam_id = parse_export_uid(params.get('exam'), 'exam')
+    if exam_id:
+        logs = logs.filter(assignment__shift_center__exam__uid=exam_id)
+    shift_id = parse_export_uid(params.get('shift'), 'shift')
+    if shift_id:
+        logs = logs.filter(assignment__shift_center__shift__uid=shift_id)
+    client_id = parse_export_uid(params.get('client'), 'client')
+    if client_id:
+        logs = logs.filter(assignment__shift_center__exam__client__uid=client_id)
+
+    # Dates are local (TIME_ZONE) calendar days, inclusive
+    date_from = parse_export_date(params.get('date_from'))
+    if date_from:
+        logs = logs.filter(timestamp__date__gte=date_from)
+    date_to = parse_export_date(params.get('date_to'))
+    if date_to:
+        logs = logs.filter(timestamp__date__lte=date_to)
+    return logs
+
+
+ATTENDANCE_EXPORT_HEADER = ['Date', 'Time', 'Operator', 'Role', 'Center', 'Activity', 'Status', 'Latitude', 'Longitude']
+
+
+def attendance_export_rows(logs):
+    """
+    Flat CSV rows for `logs`, read through a server-side cursor. The
+    database converts timestamps to local date/time, so rows need no
+    per-row timezone work in Python.
+    """
+    tz = timezone.get_current_timezone()
+    rows = logs.annotate(
+        local_date=TruncDate('timestamp', tzinfo=tz),
+        local_time=TruncTime('timestamp', tzinfo=tz),
+    ).order_by('-timestamp').values_list(
+        'local_date',
+        'local_time',
+        'assignment__operator__username',
+        'assignment__role__name',
+        'assignment__shift_center__exam_center__client_center_name',
+        'activity_type',
+        'is_verified',
+        'latitude',
+        'longitude',
+    )
+    for date, time, operator, role, center, activity, verified, lat, lon in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield (
+            date, time.isoformat(timespec='seconds'), operator, role, center, activity,
+            'Verified' if verified else 'Flagged', lat, lon,
+        )
 
-        total_assigned = assignments.count()
-        checked_in = assignments.filter(status='CHECK_IN').count()
-        completed = assignments.filter(status='COMPLETED').count()
-        pending = assignments.filter(status='PENDING').count()
-        confirmed = assignments.filter(status='CONFIRMED').count()
-        
-        total_incidents = incidents.count()
-        open_incidents = incidents.filter(status='OPEN').count()
-        high_priority = incidents.filter(priority__in=['HIGH', 'CRITICAL'], status='OPEN').count()
-        
-        # Exam Stats
-        total_exams = exams.count()
-        draft_exams = exams.filter(status='DRAFT').count()
-        live_exams = exams.filter(status='LIVE').count()
-        completed_exams = exams.filter(status='COMPLETED').count()
-        configuring_exams = exams.filter(status='CONFIGURING').count()
-        
-        return Response({
-            "total_exams": total_exams,
-            "draft": draft_exams,
-            "live": live_exams,
-            "completed": completed_exams,
-            "configuring": configuring_exams,
-            "overview": {
-                "total_duties": total_assigned,
-                "present": checked_in + completed,
-                "pending": pending + confirmed,
-                "absent": 0,
-                "attendance_rate": round(((checked_in + completed) / total_assigned * 100) if total_assigned else 0, 1)
-            },
-            "incidents": {
-                "total": total_incidents,
-                "open": open_incidents,
-                "critical_pending": high_priority
-            },
-            "recent_incidents": list(incidents.order_by('-created_at')[:5].values(
-                'uid', 'category__name', 'priority', 'status', 'created_at', 'assignment__operator__username'
-            ))
-        })
-
-import csv
-from django.http import HttpResponse
-from attendance.models import AttendanceLog
 
 class AttendanceExportView(APIView):
+    """
+    Streams attendance logs as CSV (`?gzip=1` for .csv.gz).
+
+    Filters: exam, shift, client (uids), date_from / date_to (YYYY-MM-DD).
+    """
     permission_classes = [IsInternalAdmin]
 
     def get(self, request):
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="attendance_logs.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow(['Date', 'Time', 'Operator', 'Role', 'Center', 'Activity', 'Status', 'Latitude', 'Longitude'])
-
-        logs = AttendanceLog.objects.select_related(
-            'assignment__operator', 
-            'assignment__shift_center__center',
-            'assignment__role'
-        ).order_by('-timestamp')
-
-        for log in logs:
-            writer.writerow([
-                log.timestamp.date(),
-                log.timestamp.strftime('%H:%M:%S'),
-                log.assignment.operator.username,
-                log.assignment.role.name,
-                log.assignment.shift_center.center.clientCenterName,
-                log.activity_type,
-                'Verified' if log.is_verified else 'Flagged',
-                log.latitude,
-                log.longitude
-            ])
-
-        return response
+        try:
+            logs = attendance_export_queryset(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=400)
+
+        return streaming_csv_response(
+            'attendance_logs.csv',
+            ATTENDANCE_EXPORT_HEADER,
+            attendance_export_rows(logs),
+            gzip=wants_gzip(request),
+        )
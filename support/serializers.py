@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import IncidentCategory, Incident, IncidentAttachment
 from assignments.models import OperatorAssignment
+from common.reference_cache import get_incident_category
 
 class IncidentCategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -62,7 +63,9 @@ class IncidentSerializer(serializers.ModelSerializer):
         category_id = validated_data.pop('category_id')
         
         assignment = OperatorAssignment.objects.get(uid=assignment_id)
-        category = IncidentCategory.objects.get(uid=category_id)
+        category = get_incident_category(category_id)
+        if category is None:
+            raise serializers.ValidationError({"category_id": "Invalid incident category."})
         
         incident = Incident.objects.create(
             assignment=assignment,
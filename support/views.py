@@ -2,12 +2,18 @@ from rest_framework import viewsets, permissions, parsers, status
 from rest_framework.response import Response
 from .models import IncidentCategory, Incident
 from .serializers import IncidentCategorySerializer, IncidentSerializer
+from common.reference_cache import active_incident_categories
 
 class IncidentCategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = IncidentCategory.objects.filter(is_active=True)
     serializer_class = IncidentCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def list(self, request, *args, **kwargs):
+        # Served from the reference cache; invalidated on any IncidentCategory write
+        serializer = self.get_serializer(active_incident_categories(), many=True)
+        return Response(serializer.data)
+
 class IncidentViewSet(viewsets.ModelViewSet):
     serializer_class = IncidentSerializer
     permission_classes = [permissions.IsAuthenticated]
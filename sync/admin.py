@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'uid', 'user', 'deleted_at')
+    list_filter = ('kind',)
+    search_fields = ('uid', 'user__username')
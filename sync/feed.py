@@ -0,0 +1,113 @@
+"""
+Delta feed behind /api/sync/.
+
+A sync token is the server time the previous sync started, less
+SYNC_OVERLAP_SECONDS. Changed rows are those whose `updated_at` (or that
+of a row they embed, e.g. the shift of an assignment) is after it;
+deletions come from sync.Tombstone. The overlap absorbs writes that were
+stamped before the previous sync started but committed after it read, and
+small clock differences between app servers. Rows in the overlap are sent
+twice, so the app must apply them as upserts by uid.
+
+A sync without a token, or with one older than the tombstone retention
+(SYNC_TOMBSTONE_DAYS), is a full sync: everything the operator has, with
+`full` set so the app replaces its local copy instead of merging.
+"""
+import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from assignments.models import AssignmentTask, AssignmentTaskEvidence, OperatorAssignment
+from assignments.serializers import annotate_attendance_times
+from notifications.models import Notification
+from notifications.serializers import NotificationSerializer
+from .models import Tombstone
+from .serializers import SyncAssignmentSerializer, SyncEvidenceSerializer, SyncTaskSerializer
+
+TOMBSTONE_KINDS = {
+    'ASSIGNMENT': 'assignments',
+    'TASK': 'tasks',
+    'EVIDENCE': 'evidence',
+    'NOTIFICATION': 'notifications',
+}
+
+# Rows whose changes show up in a synced assignment
+ASSIGNMENT_SOURCES = (
+    '', 'role__', 'shift_center__', 'shift_center__shift__', 'shift_center__exam__',
+    'shift_center__exam_center__', 'shift_center__exam_center__master_center__',
+)
+TASK_SOURCES = ('', 'shift_center_task__')
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+def encode_token(moment):
+    return str(int(moment.timestamp() * 1_000_000))
+
+
+def decode_token(token):
+    try:
+        return datetime.datetime.fromtimestamp(int(token) / 1_000_000, tz=datetime.timezone.utc)
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise InvalidToken(f"Invalid sync token: {token!r}")
+
+
+def tombstone_horizon(now=None):
+    """Tombstones older than this are pruned, so older tokens need a full sync."""
+    return (now or timezone.now()) - datetime.timedelta(days=getattr(settings, 'SYNC_TOMBSTONE_DAYS', 30))
+
+
+def _changed_since(sources, since):
+    condition = Q()
+    for prefix in sources:
+        condition |= Q(**{f'{prefix}updated_at__gt': since})
+    return condition
+
+
+def build_delta(user, token=None, request=None):
+    """
+    The sync payload for `user` since `token` (None for a full sync).
+    Raises InvalidToken for a malformed token.
+    """
+    now = timezone.now()
+    since = decode_token(token) if token else None
+    full = since is None or since < tombstone_horizon(now)
+
+    assignments = OperatorAssignment.objects.filter(operator=user)
+    tasks = AssignmentTask.objects.filter(assignment__operator=user)
+    evidence = AssignmentTaskEvidence.objects.filter(task__assignment__operator=user)
+    notifications = Notification.objects.filter(user=user)
+    if not full:
+        assignments = assignments.filter(_changed_since(ASSIGNMENT_SOURCES, since))
+        tasks = tasks.filter(_changed_since(TASK_SOURCES, since))
+        evidence = evidence.filter(updated_at__gt=since)
+        notifications = notifications.filter(updated_at__gt=since)
+
+    assignments = annotate_attendance_times(
+        assignments.select_related(
+            'role', 'shift_center__exam', 'shift_center__shift', 'shift_center__exam_center__master_center',
+        ).order_by('-assigned_at')
+    )
+    tasks = tasks.select_related('assignment', 'shift_center_task').order_by('pk')
+    evidence = evidence.select_related('task').order_by('pk')
+    context = {'request': request}
+
+    deleted = {name: [] for name in TOMBSTONE_KINDS.values()}
+    if not full:
+        for kind, uid in Tombstone.objects.filter(user=user, deleted_at__gt=since).values_list('kind', 'uid'):
+            deleted[TOMBSTONE_KINDS[kind]].append(uid)
+
+    overlap = datetime.timedelta(seconds=getattr(settings, 'SYNC_OVERLAP_SECONDS', 10))
+    return {
+        'token': encode_token(now - overlap),
+        'full': full,
+        'assignments': SyncAssignmentSerializer(assignments, many=True, context=context).data,
+        'tasks': SyncTaskSerializer(tasks, many=True, context=context).data,
+        'evidence': SyncEvidenceSerializer(evidence, many=True, context=context).data,
+        'notifications': NotificationSerializer(notifications, many=True, context=context).data,
+        'deleted': deleted,
+    }
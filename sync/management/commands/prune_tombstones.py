@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from sync.feed import tombstone_horizon
+from sync.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Deletes sync tombstones older than SYNC_TOMBSTONE_DAYS (apps with older tokens get a full sync)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        horizon = tombstone_horizon()
+        total = 0
+        while True:
+            ids = list(
+                Tombstone.objects.filter(deleted_at__lt=horizon).values_list('pk', flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+            total += Tombstone.objects.filter(pk__in=ids).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"Deleted {total} tombstones older than {horizon:%Y-%m-%d %H:%M}"))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-18 16:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ASSIGNMENT', 'Assignment'), ('TASK', 'Assignment Task'), ('EVIDENCE', 'Task Evidence'), ('NOTIFICATION', 'Notification')], max_length=20)),
+                ('uid', models.UUIDField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'sync_tombstone',
+                'indexes': [models.Index(fields=['user', 'deleted_at'], name='sync_tombst_user_id_0a082d_idx'), models.Index(fields=['deleted_at'], name='sync_tombst_deleted_a4ccdc_idx')],
+            },
+        ),
+    ]
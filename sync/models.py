@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import models
+
+
+class Tombstone(models.Model):
+    """
+    Records that a synced row was deleted, so /api/sync/ can tell the
+    operator's app to drop it. Written by sync.signals; pruned after
+    SYNC_TOMBSTONE_DAYS by the prune_tombstones command.
+    """
+    KINDS = (
+        ('ASSIGNMENT', 'Assignment'),
+        ('TASK', 'Assignment Task'),
+        ('EVIDENCE', 'Task Evidence'),
+        ('NOTIFICATION', 'Notification'),
+    )
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=20, choices=KINDS)
+    uid = models.UUIDField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sync_tombstone'
+        indexes = [
+            models.Index(fields=['user', 'deleted_at']),
+            models.Index(fields=['deleted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.uid} (deleted {self.deleted_at})"
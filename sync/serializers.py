@@ -0,0 +1,97 @@
+"""
+Compact representations for /api/sync/.
+
+They keep the shape the app already parses (Assignment.fromJson and
+friends) but carry only the fields it reads. The depth=3
+OperatorAssignmentSerializer behind my-duties also sends audit users,
+every exam and center column and the tasks nested again.
+"""
+from rest_framework import serializers
+
+from assignments.models import AssignmentTask, AssignmentTaskEvidence, OperatorAssignment
+from masters.models import CenterMaster, RoleMaster
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter
+
+
+class SyncRoleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = RoleMaster
+        fields = ('uid', 'code', 'name')
+
+
+class SyncExamSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Exam
+        fields = ('uid', 'exam_code', 'name', 'is_geofencing_enabled', 'is_selfie_enabled')
+
+
+class SyncShiftSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Shift
+        fields = ('uid', 'shift_code', 'name', 'work_date', 'start_time', 'end_time', 'reporting_time')
+
+
+class SyncMasterCenterSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CenterMaster
+        fields = ('address', 'city', 'latitude', 'longitude', 'geofence_radius_meters')
+
+
+class SyncExamCenterSerializer(serializers.ModelSerializer):
+    master_center = SyncMasterCenterSerializer(read_only=True)
+
+    class Meta:
+        model = ExamCenter
+        fields = (
+            'uid', 'client_center_code', 'client_center_name', 'latitude', 'longitude',
+            'geofence_radius_meters', 'master_center',
+        )
+
+
+class SyncShiftCenterSerializer(serializers.ModelSerializer):
+    exam = SyncExamSerializer(read_only=True)
+    shift = SyncShiftSerializer(read_only=True)
+    exam_center = SyncExamCenterSerializer(read_only=True)
+
+    class Meta:
+        model = ShiftCenter
+        fields = ('uid', 'exam', 'shift', 'exam_center')
+
+
+class SyncAssignmentSerializer(serializers.ModelSerializer):
+    role = SyncRoleSerializer(read_only=True)
+    shift_center = SyncShiftCenterSerializer(read_only=True)
+    check_in_at = serializers.DateTimeField(read_only=True)
+    check_out_at = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = OperatorAssignment
+        fields = (
+            'uid', 'status', 'assignment_type', 'role', 'shift_center',
+            'check_in_at', 'check_out_at', 'confirmed_at', 'completed_at', 'updated_at',
+        )
+        read_only_fields = fields
+
+
+class SyncTaskSerializer(serializers.ModelSerializer):
+    assignment = serializers.ReadOnlyField(source='assignment.uid')
+    task_name = serializers.ReadOnlyField(source='shift_center_task.task_name')
+    task_type = serializers.ReadOnlyField(source='shift_center_task.task_type')
+    is_mandatory = serializers.ReadOnlyField(source='shift_center_task.is_mandatory')
+
+    class Meta:
+        model = AssignmentTask
+        fields = (
+            'uid', 'assignment', 'task_name', 'task_type', 'is_mandatory',
+            'status', 'response_data', 'completed_at', 'updated_at',
+        )
+        read_only_fields = fields
+
+
+class SyncEvidenceSerializer(serializers.ModelSerializer):
+    task = serializers.ReadOnlyField(source='task.uid')
+
+    class Meta:
+        model = AssignmentTaskEvidence
+        fields = ('uid', 'task', 'file', 'media_type', 'updated_at')
+        read_only_fields = fields
@@ -0,0 +1,132 @@
+"""
+Tombstones for rows the operator app syncs.
+
+Deleting an assignment, task, evidence file or notification leaves a
+Tombstone for the operator who could have it on their phone. A task or
+evidence row removed as part of a larger delete gets no tombstone of its
+own when the assignment above it goes too: the app drops an assignment's
+tasks with it.
+
+Django sends every pre_delete of a delete before any post_delete, so the
+pre_delete receivers only note the rows going away (no queries) and the
+first post_delete writes the whole delete's tombstones with one
+bulk_create, inside the delete's transaction. Deleting an exam costs the
+same few statements however many assignments cascade with it.
+"""
+import threading
+
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from assignments.models import AssignmentTask, AssignmentTaskEvidence, OperatorAssignment
+from notifications.models import Notification
+from .models import Tombstone
+
+# Parent (or user) id of each synced model, read from the deleted instance
+PARENT_FIELDS = {
+    OperatorAssignment: 'operator_id',
+    AssignmentTask: 'assignment_id',
+    AssignmentTaskEvidence: 'task_id',
+    Notification: 'user_id',
+}
+
+# Holds the pending tombstones of a delete that has no origin
+_no_origin = threading.local()
+
+
+def _origin_model(origin):
+    if origin is None:
+        return None
+    return origin.model if isinstance(origin, QuerySet) else type(origin)
+
+
+def _user_deleted(origin):
+    model = _origin_model(origin)
+    return model is not None and issubclass(model, get_user_model())
+
+
+def _pending(origin):
+    """{model: {pk: (parent or user id, uid)}} noted so far for the delete started by `origin`."""
+    holder = _no_origin if origin is None else origin
+    if getattr(holder, '_sync_pending_tombstones', None) is None:
+        holder._sync_pending_tombstones = {model: {} for model in PARENT_FIELDS}
+    return holder._sync_pending_tombstones
+
+
+def _take_pending(origin):
+    holder = _no_origin if origin is None else origin
+    pending = getattr(holder, '_sync_pending_tombstones', None)
+    holder._sync_pending_tombstones = None
+    return pending
+
+
+def build_tombstones(pending):
+    """Tombstones for one delete's pending rows, with at most one lookup per kind."""
+    assignments = pending[OperatorAssignment]
+    tombstones = [
+        Tombstone(user_id=operator_id, kind='ASSIGNMENT', uid=uid) for operator_id, uid in assignments.values()
+    ]
+
+    tasks = {pk: row for pk, row in pending[AssignmentTask].items() if row[0] not in assignments}
+    if tasks:
+        operators = dict(
+            OperatorAssignment.objects.filter(pk__in={a for a, _ in tasks.values()}).order_by()
+            .values_list('pk', 'operator_id')
+        )
+        tombstones += [
+            Tombstone(user_id=operators[a], kind='TASK', uid=uid) for a, uid in tasks.values() if a in operators
+        ]
+
+    evidence = {
+        pk: row for pk, row in pending[AssignmentTaskEvidence].items() if row[0] not in pending[AssignmentTask]
+    }
+    if evidence:
+        operators = dict(
+            AssignmentTask.objects.filter(pk__in={t for t, _ in evidence.values()}).order_by()
+            .values_list('pk', 'assignment__operator_id')
+        )
+        tombstones += [
+            Tombstone(user_id=operators[t], kind='EVIDENCE', uid=uid) for t, uid in evidence.values() if t in operators
+        ]
+
+    tombstones += [
+        Tombstone(user_id=user_id, kind='NOTIFICATION', uid=uid) for user_id, uid in pending[Notification].values()
+    ]
+    return tombstones
+
+
+@receiver(post_init, sender=OperatorAssignment)
+def track_assignment_operator(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields don't trigger a query
+    instance._sync_operator_id = instance.__dict__.get('operator_id')
+
+
+@receiver(post_save, sender=OperatorAssignment)
+def tombstone_reassigned(sender, instance, created, raw=False, **kwargs):
+    """A duty moved to another operator disappears from the previous one's app."""
+    old_operator = getattr(instance, '_sync_operator_id', None)
+    if not created and not raw and old_operator and old_operator != instance.operator_id:
+        Tombstone.objects.create(user_id=old_operator, kind='ASSIGNMENT', uid=instance.uid)
+    instance._sync_operator_id = instance.operator_id
+
+
+@receiver(pre_delete, sender=OperatorAssignment)
+@receiver(pre_delete, sender=AssignmentTask)
+@receiver(pre_delete, sender=AssignmentTaskEvidence)
+@receiver(pre_delete, sender=Notification)
+def note_deleted_row(sender, instance, origin=None, **kwargs):
+    # A deleted user's tombstones would go with them
+    if not _user_deleted(origin):
+        _pending(origin)[sender][instance.pk] = (getattr(instance, PARENT_FIELDS[sender]), instance.uid)
+
+
+@receiver(post_delete, sender=OperatorAssignment)
+@receiver(post_delete, sender=AssignmentTask)
+@receiver(post_delete, sender=AssignmentTaskEvidence)
+@receiver(post_delete, sender=Notification)
+def write_tombstones(sender, origin=None, **kwargs):
+    pending = _take_pending(origin)
+    if pending:
+        Tombstone.objects.bulk_create(build_tombstones(pending))
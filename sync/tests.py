@@ -0,0 +1,92 @@
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import AppUser
+from assignments.models import AssignmentTask, AssignmentTaskEvidence, OperatorAssignment
+from masters.models import Client, RoleMaster
+from notifications.models import Notification
+from operations.models import Exam, ExamCenter, Shift, ShiftCenter, ShiftCenterTask
+from .models import Tombstone
+
+
+class TombstoneTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.client_row = Client.objects.create(client_code='C1', name='Client One')
+        cls.role = RoleMaster.objects.create(code='INV', name='Invigilator')
+
+    def make_exam(self, code, operators):
+        """An exam with one shift center, two task templates and an evidence file per task."""
+        exam = Exam.objects.create(exam_code=code, name=code, client=self.client_row)
+        shift = Shift.objects.create(
+            exam=exam, shift_code='S1', work_date=datetime.date(2030, 1, 1),
+            start_time=datetime.time(9, 0), end_time=datetime.time(12, 0),
+        )
+        exam_center = ExamCenter.objects.create(exam=exam, client_center_code='EC1', client_center_name='Center')
+        shift_center = ShiftCenter.objects.create(exam=exam, shift=shift, exam_center=exam_center)
+        ShiftCenterTask.objects.create(shift_center=shift_center, role=self.role, task_name='Frisking')
+        ShiftCenterTask.objects.create(shift_center=shift_center, role=self.role, task_name='Seating')
+        for operator in operators:
+            OperatorAssignment.objects.create(shift_center=shift_center, operator=operator, role=self.role)
+        AssignmentTaskEvidence.objects.bulk_create(
+            AssignmentTaskEvidence(task=task, file='task_evidence/x.jpg')
+            for task in AssignmentTask.objects.filter(assignment__shift_center=shift_center)
+        )
+        return exam
+
+    def make_operators(self, prefix, count):
+        return [AppUser.objects.create(username=f'{prefix}{i}', user_type='OPERATOR') for i in range(count)]
+
+    def tombstones(self):
+        return sorted(Tombstone.objects.values_list('kind', 'user_id', 'uid'))
+
+    def test_exam_delete_writes_assignment_tombstones_in_constant_queries(self):
+        small = self.make_exam('E1', self.make_operators('a', 2))
+        with CaptureQueriesContext(connection) as ctx:
+            small.delete()
+        Tombstone.objects.all().delete()
+
+        operators = self.make_operators('b', 15)
+        exam = self.make_exam('E2', operators)
+        expected = sorted(
+            ('ASSIGNMENT', a.operator_id, a.uid) for a in OperatorAssignment.objects.filter(shift_center__exam=exam)
+        )
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            exam.delete()
+        # Tasks and evidence go with their assignment on the phone
+        self.assertEqual(self.tombstones(), expected)
+        self.assertEqual(len(expected), 15)
+
+    def test_task_delete_writes_task_tombstones(self):
+        self.make_exam('E1', self.make_operators('a', 3))
+        tasks = AssignmentTask.objects.filter(shift_center_task__task_name='Frisking')
+        expected = sorted(('TASK', t.assignment.operator_id, t.uid) for t in tasks)
+        # Tasks, their evidence, evidence DELETE, one operator lookup,
+        # one tombstone INSERT, task DELETE
+        with self.assertNumQueries(6):
+            tasks.delete()
+        # The evidence went with its task
+        self.assertEqual(self.tombstones(), expected)
+
+    def test_evidence_delete_writes_evidence_tombstone(self):
+        operator, = self.make_operators('a', 1)
+        self.make_exam('E1', [operator])
+        evidence = AssignmentTaskEvidence.objects.first()
+        evidence.delete()
+        self.assertEqual(self.tombstones(), [('EVIDENCE', operator.pk, evidence.uid)])
+
+    def test_notification_delete_writes_tombstone(self):
+        operator, = self.make_operators('a', 1)
+        notification = Notification.objects.create(user=operator, title='t', message='m')
+        notification.delete()
+        self.assertEqual(self.tombstones(), [('NOTIFICATION', operator.pk, notification.uid)])
+
+    def test_user_delete_writes_no_tombstones(self):
+        operator, = self.make_operators('a', 1)
+        self.make_exam('E1', [operator])
+        operator.delete()
+        self.assertFalse(Tombstone.objects.exists())
+        self.assertFalse(OperatorAssignment.objects.exists())
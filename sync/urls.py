@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import SyncView
+
+urlpatterns = [
+    path('', SyncView.as_view()),
+]
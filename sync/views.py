@@ -0,0 +1,24 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .feed import InvalidToken, build_delta
+
+
+class SyncView(APIView):
+    """
+    GET /api/sync/?since=<token>: the operator's assignments, tasks,
+    evidence and notifications changed since `token`, plus uids deleted
+    since then. Returns the next token; see sync.feed.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if getattr(request.user, 'user_type', '') != 'OPERATOR':
+            return Response({"detail": "Only operators can sync."}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            data = build_delta(request.user, request.query_params.get('since') or None, request=request)
+        except InvalidToken as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)